@@ -0,0 +1,65 @@
+"""Benchmark of the loop and the vectorized analog convolution kernels.
+
+Usage:
+    python benchmarks/analog_conv.py --height 240 --width 320 --num_kernels 8
+"""
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+
+from camj.analog.component import Voltage2VoltageConv, Time2VoltageConv, BinaryWeightConv
+
+
+def build_component(cls, num_kernels):
+    if cls is Voltage2VoltageConv:
+        component = cls(capacitance_array = [1e-12] * 9, vs_array = [1.0] * 9)
+    else:
+        component = cls()
+    component._set_conv_config(
+        kernel_size = [(3, 3, 1)],
+        num_kernels = [num_kernels],
+        stride = [(1, 1, 1)]
+    )
+    return component
+
+
+def loop_convolution(component, image, kernels):
+    return [component._single_channel_convolution(image, kernels[:, :, i]) for i in range(kernels.shape[-1])]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--height", type = int, default = 240)
+    parser.add_argument("--width", type = int, default = 320)
+    parser.add_argument("--num_kernels", type = int, default = 8)
+    args = parser.parse_args()
+
+    image = np.random.uniform(0, 1, size = (args.height, args.width))
+    kernels = np.random.uniform(0, 1, size = (3, 3, args.num_kernels))
+
+    for cls in [Voltage2VoltageConv, Time2VoltageConv, BinaryWeightConv]:
+        num_kernels = 1 if cls is BinaryWeightConv else args.num_kernels
+        component = build_component(cls, num_kernels)
+
+        start = time.time()
+        loop_convolution(component, image, kernels[:, :, :num_kernels])
+        loop_time = time.time() - start
+
+        start = time.time()
+        component._vectorized_convolution(
+            image, kernels[:, :, 0] if cls is BinaryWeightConv else kernels[:, :, :num_kernels]
+        )
+        vectorized_time = time.time() - start
+
+        print("%-20s loop: %8.3f s, vectorized: %8.4f s, speedup: %8.1fx" % (
+            cls.__name__, loop_time, vectorized_time, loop_time / vectorized_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
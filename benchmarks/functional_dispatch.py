@@ -0,0 +1,43 @@
+"""Benchmark of the per-call and the compiled dispatch of pixel function models.
+
+Usage:
+    python benchmarks/functional_dispatch.py --tile 4 --num_iters 20000
+"""
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, DigitalPixelSensor
+from camj.analog.function_utils import default_functional_simulation
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tile", type = int, default = 4)
+    parser.add_argument("--num_iters", type = int, default = 20000)
+    args = parser.parse_args()
+
+    input_list = [np.full((args.tile, args.tile, 1), 100.0)]
+    for component in [ActivePixelSensor(num_transistor = 4, enable_cds = True), DigitalPixelSensor()]:
+        start = time.time()
+        for _ in range(args.num_iters):
+            default_functional_simulation(component.noise_components, input_list)
+        per_call_time = time.time() - start
+
+        start = time.time()
+        for _ in range(args.num_iters):
+            default_functional_simulation(component.noise_plan, input_list)
+        compiled_time = time.time() - start
+
+        print("%-20s per-call: %8.3f s, compiled: %8.3f s, speedup: %6.2fx" % (
+            type(component).__name__, per_call_time, compiled_time, per_call_time / compiled_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
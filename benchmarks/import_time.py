@@ -0,0 +1,80 @@
+"""Benchmark of the import time of camj modules with ``python -X importtime``.
+
+Each module is imported in a fresh interpreter, and the best of ``num_runs`` runs is reported.
+The time without NumPy is the cost of camj and the rest of its imports, it is compared to the
+budgets in ``IMPORT_BUDGETS``. ``tests/test_import_time.py`` always checks that the deferred
+modules are not imported, and only enforces the budgets with ``CAMJ_IMPORT_BUDGET=1``, since
+wall-clock times depend on the machine and its load.
+
+Usage:
+    python benchmarks/import_time.py --num_runs 5
+"""
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import subprocess
+
+# the import time budgets without NumPy in us, they leave room for slower machines.
+IMPORT_BUDGETS = {
+    "camj": 20000,
+    "camj.analog.component": 100000,
+    "camj.general.launch": 150000,
+}
+
+# modules that are only imported when a report is printed.
+DEFERRED_MODULES = ("prettytable", "pprint")
+
+
+def measure_import_time(module, python = sys.executable):
+    """the import times of ``module`` and everything it imports in a fresh interpreter.
+
+    Returns:
+        import_times (dict): module name to ``(self time, cumulative time)`` in us.
+    """
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    res = subprocess.run(
+        [python, "-X", "importtime", "-c", "import %s" % module],
+        cwd = root_dir,
+        capture_output = True,
+        text = True,
+        check = True
+    )
+    import_times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, name = line[len("import time:"):].split("|")
+        import_times[name.strip()] = (int(self_time), int(cumulative_time))
+    return import_times
+
+
+def import_time_without_numpy(module, num_runs = 3):
+    """the best import time of ``module`` in us, without NumPy, and the imported modules."""
+    best_time = None
+    for _ in range(num_runs):
+        import_times = measure_import_time(module)
+        curr_time = import_times[module][1] - import_times.get("numpy", (0, 0))[1]
+        if best_time is None or curr_time < best_time:
+            best_time = curr_time
+    return best_time, set(import_times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_runs", type = int, default = 5)
+    args = parser.parse_args()
+
+    for module, budget in IMPORT_BUDGETS.items():
+        import_times = measure_import_time(module)
+        best_time, imported = import_time_without_numpy(module, args.num_runs)
+        deferred = [name for name in DEFERRED_MODULES if name in imported]
+        print("%-24s total: %8.2f ms, without numpy: %8.2f ms, budget: %8.2f ms, deferred modules imported: %s" % (
+            module, import_times[module][1] / 1000., best_time / 1000., budget / 1000., ", ".join(deferred) or "none"
+        ))
+
+
+if __name__ == '__main__':
+    main()
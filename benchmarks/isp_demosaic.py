@@ -0,0 +1,49 @@
+"""Benchmark of the per-pixel loop and the vectorized edge aware demosaicing in utility/isp_utils.
+
+Usage:
+    python benchmarks/isp_demosaic.py --height 1024 --width 1536 --num_iters 3
+"""
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utility"))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+
+import argparse
+import time
+import numpy as np
+
+from isp_utils import edge_aware_interpolation, get_luminance
+from test_isp_utils import loop_edge_aware_interpolation, loop_get_luminance
+
+
+def timeit(func, arg, num_iters):
+    start = time.time()
+    for _ in range(num_iters):
+        func(arg)
+    return (time.time() - start) / num_iters
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--height", type = int, default = 1024)
+    parser.add_argument("--width", type = int, default = 1536)
+    parser.add_argument("--num_iters", type = int, default = 3)
+    args = parser.parse_args()
+
+    bayer_img = np.random.RandomState(0).uniform(size = (args.height // 2, args.width // 2, 4))
+    raw_img = np.random.RandomState(1).uniform(size = (args.height, args.width))
+    for name, loop_func, func, arg in [
+        ("edge_aware_interpolation", loop_edge_aware_interpolation, edge_aware_interpolation, bayer_img),
+        ("get_luminance", loop_get_luminance, get_luminance, raw_img)
+    ]:
+        loop_time = timeit(loop_func, arg, args.num_iters)
+        vectorized_time = timeit(func, arg, args.num_iters)
+        print("%-26s %d x %d, loop: %8.3f s, vectorized: %8.3f s, speedup: %6.2fx" % (
+            name, args.height, args.width, loop_time, vectorized_time, loop_time / vectorized_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
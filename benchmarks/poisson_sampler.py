@@ -0,0 +1,40 @@
+"""Benchmark of exact and approximated photon shot noise in the photodiode function model.
+
+Usage:
+    python benchmarks/poisson_sampler.py --size 2000 --electrons 10000 --num_iters 5
+"""
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+
+from camj.analog.function_model import PhotodiodeFunc
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type = int, default = 2000)
+    parser.add_argument("--electrons", type = float, default = 10000.)
+    parser.add_argument("--num_iters", type = int, default = 5)
+    args = parser.parse_args()
+
+    input_signal = np.full((args.size, args.size, 1), args.electrons)
+    times = {}
+    for threshold in [None, 1000.]:
+        func = PhotodiodeFunc(name = "Photodiode", dark_current_noise = 10., poisson_threshold = threshold)
+        start = time.time()
+        for _ in range(args.num_iters):
+            func.simulate_output(input_signal)
+        times[threshold] = (time.time() - start) / args.num_iters
+
+    print("%d x %d frame at %d e-, exact: %8.3f s, threshold 1000: %8.3f s, speedup: %6.2fx" % (
+        args.size, args.size, args.electrons, times[None], times[1000.], times[None] / times[1000.]
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""CamJ
+
+The top-level API is resolved lazily, ``import camj`` doesn't import any simulation module
+(nor NumPy), and ``camj.energy_simulation`` imports ``camj.general.launch`` on first use.
+The sub-packages, e.g., ``camj.analog``, are also imported on first use.
+
+Examples:
+        To run energy simulation from the top-level API:
+
+        >>> import camj
+        >>> camj.energy_simulation(hw_desc, mapping, sw_desc)
+
+"""
+
+import importlib
+
+# the top-level API, the name to the module that defines it.
+_LAZY_ATTRS = {
+    "energy_simulation": "camj.general.launch",
+    "digital_energy_simulation": "camj.general.launch",
+    "functional_simulation": "camj.general.launch",
+    "moment_simulation": "camj.general.launch",
+    "analog_energy_simulation": "camj.analog.utils",
+    "AnalogArray": "camj.analog.infra",
+    "AnalogComponent": "camj.analog.infra",
+    "ADC": "camj.digital.compute",
+    "ComputeUnit": "camj.digital.compute",
+    "SystolicArray": "camj.digital.compute",
+    "FIFO": "camj.digital.memory",
+    "LineBuffer": "camj.digital.memory",
+    "DoubleBuffer": "camj.digital.memory",
+    "PrefixCache": "camj.digital.prefix_cache",
+    "PixelInput": "camj.sw.interface",
+    "WeightInput": "camj.sw.interface",
+    "ProcessStage": "camj.sw.interface",
+    "DNNProcessStage": "camj.sw.interface",
+    "build_sw_graph": "camj.sw.utils",
+    "ProcessorLocation": "camj.general.enum",
+    "ProcessDomain": "camj.general.enum",
+    "build_description": "camj.general.description",
+    "NoiseStatistics": "camj.general.noise_statistics",
+    "DatasetEvaluator": "camj.general.evaluation",
+    "ShardedDataset": "camj.general.dataset",
+    "prepare_dataset": "camj.general.dataset",
+}
+
+_SUBPACKAGES = ("analog", "digital", "general", "sw")
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+    elif name in _SUBPACKAGES:
+        value = importlib.import_module("camj." + name)
+    else:
+        raise AttributeError("module 'camj' has no attribute '%s'" % name)
+    # later lookups don't go through ``__getattr__``.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | set(_SUBPACKAGES))
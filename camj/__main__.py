@@ -0,0 +1,57 @@
+import argparse
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "camj")
+    subparsers = parser.add_subparsers(dest = "command")
+
+    serve_parser = subparsers.add_parser("serve", help = "run a long-lived simulation service.")
+    serve_parser.add_argument("--host", default = "127.0.0.1", help = "address to listen on.")
+    serve_parser.add_argument("--port", type = int, default = 8765, help = "port to listen on.")
+    serve_parser.add_argument("--workers", type = int, default = None, help = "number of worker processes.")
+    serve_parser.add_argument(
+        "--allow-module", action = "append", default = ["camj"],
+        help = "module prefix that customized classes can be imported from, e.g., examples."
+    )
+
+    validate_parser = subparsers.add_parser("validate", help = "validate JSON or YAML description files.")
+    validate_parser.add_argument("paths", nargs = "+", help = "description files.")
+    validate_parser.add_argument(
+        "--allow-module", action = "append", default = ["camj"],
+        help = "module prefix that customized classes can be imported from, e.g., examples."
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "validate":
+        from camj.general.description import parse_description, validate_description
+        num_invalid = 0
+        for path in args.paths:
+            try:
+                with open(path, "rb") as f:
+                    validate_description(parse_description(f.read(), path), tuple(args.allow_module))
+                print("[VALIDATE] %s is valid." % path)
+            except Exception as e:
+                num_invalid += 1
+                print("[VALIDATE] %s: %s" % (path, e))
+        return 1 if num_invalid > 0 else 0
+    elif args.command == "serve":
+        from camj.general.serve import SimulationServer
+        server = SimulationServer(
+            host = args.host,
+            port = args.port,
+            num_workers = args.workers,
+            allowed_modules = tuple(args.allow_module)
+        )
+        print("[SERVE] CamJ simulation service is listening on http://%s:%d" % server.address)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -21,11 +21,12 @@ Examples:
 # TODO [Tianrui]: check if we need to consider input noise in column amplifier
 
 import numpy as np
-import time
 
 # import local modules
-from camj.analog.function_utils import default_functional_simulation, _cap_thermal_noise,\
-                                _single_pole_rc_circuit_thermal_noise
+from camj.analog.function_utils import default_functional_simulation, compile_functional_pipeline,\
+                                default_moment_simulation,\
+                                _cap_thermal_noise, _single_pole_rc_circuit_thermal_noise,\
+                                _sliding_window_view, _kernel_windows, _window_stack
 from camj.analog.energy_model import  ColumnAmplifierEnergy, SourceFollowerEnergy,\
                                 ActiveAnalogMemoryEnergy, PassiveAnalogMemoryEnergy,\
                                 DigitalToCurrentConverterEnergy, CurrentMirrorEnergy,\
@@ -36,7 +37,9 @@ from camj.analog.energy_model import  ColumnAmplifierEnergy, SourceFollowerEnerg
 from camj.analog.function_model import ColumnwiseFunc, PixelwiseFunc, FloatingDiffusionFunc,\
                                 CurrentMirrorFunc, ComparatorFunc, AnalogToDigitalConverterFunc,\
                                 PassiveSwitchedCapacitorArrayFunc, CorrelatedDoubleSamplingFunc,\
-                                AbsoluteDifferenceFunc, MaximumVoltageFunc, PhotodiodeFunc
+                                AbsoluteDifferenceFunc, MaximumVoltageFunc, PhotodiodeFunc, frame_shape,\
+                                SignalMoments
+from camj.analog.rng import new_generator, add_normal_noise
 from camj.general.enum import ProcessDomain
 
 # Active pxiel sensor
@@ -73,6 +76,9 @@ class ActivePixelSensor(object):
         dcnu_std (float): dcnu standard deviation percentage. it is relative number respect
             to ``dark_current_noise``, the dcnu standard deviation is,
             ``dcnu_std`` * ``dark_current_noise``, the default value is ``0.001``. 
+        poisson_threshold (float): the number of electrons from which shot noise is drawn from
+            the normal approximation of the Poisson distribution, ``None`` always draws exact
+            Poisson samples, the default value is ``None``.
         fd_gain (float): the gain of FD, the default value is ``1.0``.
         fd_noise (float): the standard deviation of FD read noise, the default value is ``None``. If
             users do not specific this parameter, CamJ will calculate the noise STD based on the kTC
@@ -105,6 +111,7 @@ class ActivePixelSensor(object):
         enable_dcnu = False,
         enable_prnu = False,
         dcnu_std = 0.001,
+        poisson_threshold = None,
         fd_gain = 1.0,
         fd_noise = None,
         fd_prnu_std = 0.001,
@@ -156,7 +163,8 @@ class ActivePixelSensor(object):
                 name = "Photodiode",
                 dark_current_noise = dark_current_noise,
                 enable_dcnu = enable_dcnu,
-                dcnu_std = dcnu_std
+                dcnu_std = dcnu_std,
+                poisson_threshold = poisson_threshold
             ),
             FloatingDiffusionFunc(
                 name = "FloatingDiffusion",
@@ -174,6 +182,13 @@ class ActivePixelSensor(object):
                 prnu_std = sf_prnu_std,
             )
         ]
+        self._noise_plan = None
+
+    @property
+    def noise_plan(self):
+        """the compiled ``noise_components``, it is compiled again if they are changed."""
+        self._noise_plan = compile_functional_pipeline(self.noise_components, self._noise_plan)
+        return self._noise_plan
 
     def energy(self):
         """Calculate Energy
@@ -213,7 +228,26 @@ class ActivePixelSensor(object):
 
         return (
             "ActivePixelSensor", 
-            default_functional_simulation(self.noise_components, input_signal_list)
+            default_functional_simulation(self.noise_plan, input_signal_list)
+        )
+
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        return (
+            "ActivePixelSensor",
+            default_moment_simulation(self.noise_plan, input_moments_list)
         )
 
 # digital pixel sensor
@@ -253,6 +287,9 @@ class DigitalPixelSensor(object):
         dcnu_std (float): dcnu standard deviation percentage. it is relative number respect
             to ``dark_current_noise``, the dcnu standard deviation is,
             ``dcnu_std`` * ``dark_current_noise``, the default value is ``0.001``.
+        poisson_threshold (float): the number of electrons from which shot noise is drawn from
+            the normal approximation of the Poisson distribution, ``None`` always draws exact
+            Poisson samples, the default value is ``None``.
         fd_gain (float): the gain of FD, the default value is ``1.0``.
         fd_noise (float): the stadard deviation of FD read noise, the default value is ``None``. If
             users do not specific this parameter, CamJ will calculate the noise STD based on the kTC
@@ -293,6 +330,7 @@ class DigitalPixelSensor(object):
         enable_dcnu = False,
         enable_prnu = False,
         dcnu_std = 0.001,
+        poisson_threshold = None,
         # FD parameters
         fd_gain = 1.0,
         fd_noise = None,
@@ -360,7 +398,8 @@ class DigitalPixelSensor(object):
                 name = "PhotodiodeFunc",
                 dark_current_noise = dark_current_noise,
                 enable_dcnu = enable_dcnu,
-                dcnu_std = dcnu_std
+                dcnu_std = dcnu_std,
+                poisson_threshold = poisson_threshold
             ),
             FloatingDiffusionFunc(
                 name = "FloatingDiffusion",
@@ -396,6 +435,13 @@ class DigitalPixelSensor(object):
                 resolution = adc_reso,
             )
         )
+        self._noise_plan = None
+
+    @property
+    def noise_plan(self):
+        """the compiled ``noise_components``, it is compiled again if they are changed."""
+        self._noise_plan = compile_functional_pipeline(self.noise_components, self._noise_plan)
+        return self._noise_plan
 
     def energy(self):
         """Calculate Energy
@@ -434,7 +480,26 @@ class DigitalPixelSensor(object):
 
         return (
             "DigitalPixelSensor",
-            default_functional_simulation(self.noise_components, input_signal_list)
+            default_functional_simulation(self.noise_plan, input_signal_list)
+        )
+
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        return (
+            "DigitalPixelSensor",
+            default_moment_simulation(self.noise_plan, input_moments_list)
         )
 
 class PulseWidthModulationPixel(object):
@@ -637,7 +702,7 @@ class ColumnAmplifier(object):
         """
         output_signal_list = []
         for input_signal in input_signal_list:
-            if input_signal.ndim == 2:
+            if len(frame_shape(input_signal.shape)) == 2:
                 raise Exception("Input signal to 'ColumnAmplifier' needs to be 3 dimentional (height, width, channel)")
 
             output_signal_list.append(
@@ -647,6 +712,29 @@ class ColumnAmplifier(object):
             )
         return (self.func_model.name, output_signal_list)
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            output_moments_list.append(
+                self.func_model.simulate_moments(
+                    input_moments
+                )
+            )
+        return (self.func_model.name, output_moments_list)
+
 class SourceFollower(object):
     """Source Follower
 
@@ -744,7 +832,7 @@ class SourceFollower(object):
         """
         output_signal_list = []
         for input_signal in input_signal_list:
-            if input_signal.ndim != 3:
+            if len(frame_shape(input_signal.shape)) != 3:
                 raise Exception("input signal to 'SourceFollower' needs to be in (height, width, channel) 3D shape.")
 
             output_signal_list.append(
@@ -754,6 +842,29 @@ class SourceFollower(object):
             )
         return (self.func_model.name, output_signal_list)
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            output_moments_list.append(
+                self.func_model.simulate_moments(
+                    input_moments
+                )
+            )
+        return (self.func_model.name, output_moments_list)
+
 class ActiveAnalogMemory(object):
     """Active Analog Memory
     
@@ -866,7 +977,7 @@ class ActiveAnalogMemory(object):
         """
         output_signal_list = []
         for input_signal in input_signal_list:
-            if input_signal.ndim != 3:
+            if len(frame_shape(input_signal.shape)) != 3:
                 raise Exception("input signal to 'ActiveAnalogMemory' needs to be in (height, width, channel) 3D shape.")
             output_signal_list.append(
                 self.func_model.simulate_output(
@@ -875,6 +986,29 @@ class ActiveAnalogMemory(object):
             )
         return (self.func_model.name, output_signal_list)
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            output_moments_list.append(
+                self.func_model.simulate_moments(
+                    input_moments
+                )
+            )
+        return (self.func_model.name, output_moments_list)
+
 
 class PassiveAnalogMemory(object):
     """Passive Analog Memory
@@ -964,7 +1098,7 @@ class PassiveAnalogMemory(object):
         """
         output_signal_list = []
         for input_signal in input_signal_list:
-            if input_signal.ndim != 3:
+            if len(frame_shape(input_signal.shape)) != 3:
                 raise Exception("input signal to 'PassiveAnalogMemory' needs to be in (height, width, channel) 3D shape.")
             output_signal_list.append(
                 self.func_model.simulate_output(
@@ -973,6 +1107,29 @@ class PassiveAnalogMemory(object):
             )
         return (self.func_model.name, output_signal_list)
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            output_moments_list.append(
+                self.func_model.simulate_moments(
+                    input_moments
+                )
+            )
+        return (self.func_model.name, output_moments_list)
+
 class CurrentMirror(object):
     """Current Mirror.
 
@@ -1106,6 +1263,27 @@ class CurrentMirror(object):
         else:
             raise Exception("Input signal list to 'CurrentMirror' can only be length of 1 or 2!")
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        if len(input_moments_list) not in (1, 2):
+            raise Exception("Input signal list to 'CurrentMirror' can only be length of 1 or 2!")
+        return (
+            self.func_model.name,
+            [self.func_model.simulate_moments(*input_moments_list)]
+        )
+
 
 class PassiveSwitchedCapacitorArray(object):
     """Passive Switched Capacitor Array
@@ -1198,6 +1376,25 @@ class PassiveSwitchedCapacitorArray(object):
             [self.func_model.simulate_output(input_signal_list)]
         )
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        return (
+            self.func_model.name,
+            [self.func_model.simulate_moments(input_moments_list)]
+        )
+
 class Comparator(object):
     """Dynamic Voltage Comparator
 
@@ -1378,6 +1575,29 @@ class AnalogToDigitalConverter(object):
             )
         return (self.func_model.name, output_signal_list)
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            output_moments_list.append(
+                self.func_model.simulate_moments(
+                    input_moments
+                )
+            )
+        return (self.func_model.name, output_moments_list)
+
 
 class DigitalToCurrentConverter(object):
     """Digital-to-Current Converter
@@ -1481,6 +1701,29 @@ class DigitalToCurrentConverter(object):
             )
         return (self.func_model.name, output_signal_list)
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            output_moments_list.append(
+                self.func_model.simulate_moments(
+                    input_moments
+                )
+            )
+        return (self.func_model.name, output_moments_list)
+
 
 class MaximumVoltage(object):
     """Maximum Voltage
@@ -1765,6 +2008,30 @@ class Adder(object):
         else:
             raise Exception("Input signal list to Comparator can only be length of 2!")
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        if len(input_moments_list) != 2:
+            raise Exception("Input signal list to 'Adder' can only be length of 2!")
+        # the two inputs are read independently, their variances add up.
+        moments1 = self.func_model.simulate_moments(input_moments_list[0])
+        moments2 = self.func_model.simulate_moments(input_moments_list[1])
+        return (
+            "Adder",
+            [SignalMoments(mean = moments1.mean + moments2.mean, var = moments1.var + moments2.var)]
+        )
+
 
 class Subtractor(object):
     """Subtractor
@@ -1903,6 +2170,30 @@ class Subtractor(object):
         else:
             raise Exception("Input signal list to Comparator can only be length of 2!")
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        if len(input_moments_list) != 2:
+            raise Exception("Input signal list to 'Subtractor' can only be length of 2!")
+        # the two inputs are read independently, their variances add up.
+        moments1 = self.func_model.simulate_moments(input_moments_list[0])
+        moments2 = self.func_model.simulate_moments(input_moments_list[1])
+        return (
+            "Subtractor",
+            [SignalMoments(mean = moments1.mean - moments2.mean, var = moments1.var + moments2.var)]
+        )
+
 
 class AbsoluteDifference(object):
     """Absolute Difference
@@ -2159,34 +2450,13 @@ class MaxPool(object):
         """
         output_signal_list = []
         for input_signal in input_signal_list:
-            input_shape = input_signal.shape
-            if len(input_shape) != 3:
+            if len(frame_shape(input_signal.shape)) != 3:
                 raise Exception("'MaxPool' only support 3D input.")
-            new_input_shape = (
-                input_shape[0] // self.kernel_size[0],
-                self.kernel_size[0],
-                input_shape[1] // self.kernel_size[1],
-                self.kernel_size[1],
-                input_shape[2]
-            )
-            transposed_input_signal = np.transpose(
-                input_signal.reshape(new_input_shape),
-                (0, 2, 1, 3, 4)
-            ).reshape(
-                (
-                    new_input_shape[0],
-                    new_input_shape[2],
-                    new_input_shape[1] * new_input_shape[3],
-                    new_input_shape[4]
-                )
-            )
-
-            reshaped_signal_list = []
-            for i in range(new_input_shape[1] * new_input_shape[3]):
-                reshaped_signal_list.append(transposed_input_signal[:, :, i, :])
-            
             output_signal_list.append(
-                self.func_model.simulate_output(reshaped_signal_list)
+                self.func_model.simulate_window_output(
+                    _kernel_windows(input_signal, self.kernel_size),
+                    axis = (-4, -2)
+                )
             )
 
         return ("MaxPool", output_signal_list)
@@ -2330,6 +2600,31 @@ class PassiveAverage(object):
             ]
         )
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        return (
+            "PassiveAverage",
+            [
+                self.sf_func_model.simulate_moments(
+                    self.psca_func_model.simulate_moments(
+                        input_moments_list
+                    )
+                )
+            ]
+        )
+
 class PassiveBinning(object):
     """Passive Binning
 
@@ -2469,43 +2764,44 @@ class PassiveBinning(object):
         """
         output_signal_list = []
         for input_signal in input_signal_list:
-            input_shape = input_signal.shape
-            if len(input_shape) != 3:
+            if len(frame_shape(input_signal.shape)) != 3:
                 raise Exception("'PassiveBinning' only support 3D input.")
-            new_input_shape = (
-                input_shape[0] // self.kernel_size[0],
-                self.kernel_size[0],
-                input_shape[1] // self.kernel_size[1],
-                self.kernel_size[1],
-                input_shape[2]
-            )
-            transposed_input_signal = np.transpose(
-                input_signal.reshape(new_input_shape), 
-                (0, 2, 1, 3, 4)
-            ).reshape(
-                (
-                    new_input_shape[0],
-                    new_input_shape[2],
-                    new_input_shape[1] * new_input_shape[3],
-                    new_input_shape[4]
-                )
-            )
-
-            psca_input_list = []
-            for i in range(new_input_shape[1] * new_input_shape[3]):
-                psca_input_list.append(
-                    transposed_input_signal[:, :, i, :]
-                )
-
             output_signal_list.append(
                 self.sf_func_model.simulate_output(
-                    self.psca_func_model.simulate_output(
-                        psca_input_list
+                    self.psca_func_model.simulate_window_output(
+                        _kernel_windows(input_signal, self.kernel_size),
+                        axis = (-4, -2)
                     )
                 )
             )
         return ("PassiveBinning", output_signal_list)
 
+    def moments(self, input_moments_list):
+        """Propagate signal moments
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples, the binning windows are independent.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            window_moments = SignalMoments(
+                *[_kernel_windows(m, self.kernel_size) for m in input_moments]
+            )
+            output_moments_list.append(
+                self.sf_func_model.simulate_moments(
+                    self.psca_func_model.simulate_window_moments(window_moments, axis = (-4, -2))
+                )
+            )
+        return ("PassiveBinning", output_moments_list)
+
 
 class ActiveAverage(object):
     """Active Average
@@ -2631,19 +2927,37 @@ class ActiveAverage(object):
             Simulation result (tuple): The first element in the tuple is the name of this simulated
             analog component, the second one is a list of simulation results.
         """
-        output_signal_list = []
-        for input_signal in input_signal_list:
-            output_signal_list.append(
-                self.func_model.simulate_output(
-                    input_signal
+        return (
+            "ActiveAverage",
+            [
+                self.func_model.simulate_average_output(
+                    np.stack(input_signal_list, axis = -4),
+                    axis = (-4, )
                 )
-            )
+            ]
+        )
 
-        output_signal_sum = np.zeros(output_signal_list[0].shape)
-        for output_signal in output_signal_list:
-            output_signal_sum += output_signal
+    def moments(self, input_moments_list):
+        """Propagate signal moments
 
-        return ["ActiveAverage", output_signal_sum / len(output_signal_list)]
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
+
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        stacked_moments = SignalMoments(
+            *[np.stack(m, axis = -4) for m in zip(*input_moments_list)]
+        )
+        return (
+            "ActiveAverage",
+            [self.func_model.simulate_average_moments(stacked_moments, axis = (-4, ))]
+        )
 
 
 class ActiveBinning(object):
@@ -2774,43 +3088,40 @@ class ActiveBinning(object):
         """
         output_signal_list = []
         for input_signal in input_signal_list:
-            input_shape = input_signal.shape
-            if len(input_shape) != 3:
+            if len(frame_shape(input_signal.shape)) != 3:
                 raise Exception("'ActiveBinning' only support 3D input.")
-            new_input_shape = (
-                input_shape[0] // self.kernel_size[0],
-                self.kernel_size[0],
-                input_shape[1] // self.kernel_size[1],
-                self.kernel_size[1],
-                input_shape[2]
-            )
-            transposed_input_signal = np.transpose(
-                input_signal.reshape(new_input_shape), 
-                (0, 2, 1, 3, 4)
-            ).reshape(
-                (
-                    new_input_shape[0],
-                    new_input_shape[2],
-                    new_input_shape[1] * new_input_shape[3],
-                    new_input_shape[4]
+            output_signal_list.append(
+                self.func_model.simulate_average_output(
+                    _window_stack(_kernel_windows(input_signal, self.kernel_size)),
+                    axis = (-5, -4)
                 )
             )
 
-            signal_after_colamp_list = []
-            for i in range(new_input_shape[1] * new_input_shape[3]):
-                signal_after_colamp_list.append(
-                    self.func_model.simulate_output(
-                        transposed_input_signal[:, :, i, :]
-                    )
-                )
+        return ("ActiveBinning", output_signal_list)
 
-            signal_sum = np.zeros(signal_after_colamp_list[0].shape)
-            for signal_after_colamp in signal_after_colamp_list:
-                signal_sum += signal_after_colamp
+    def moments(self, input_moments_list):
+        """Propagate signal moments
 
-            output_signal_list.append(signal_sum / len(signal_after_colamp_list))
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the input
+        signals are propagated instead of noisy samples.
 
-        return ("ActiveBinning", output_signal_list)
+        Args:
+            input_moments_list (list): A list of ``analog.function_model.SignalMoments`` of the
+                input signals.
+
+        Returns:
+            Simulation result (tuple): The first element in the tuple is the name of this simulated
+            analog component, the second one is a list of output signal moments.
+        """
+        output_moments_list = []
+        for input_moments in input_moments_list:
+            stacked_moments = SignalMoments(
+                *[_window_stack(_kernel_windows(m, self.kernel_size)) for m in input_moments]
+            )
+            output_moments_list.append(
+                self.func_model.simulate_average_moments(stacked_moments, axis = (-5, -4))
+            )
+        return ("ActiveBinning", output_moments_list)
 
 
 class Voltage2VoltageConv(object):
@@ -2909,8 +3220,7 @@ class Voltage2VoltageConv(object):
 
         # initialize random number generator
         self.psca_noise = psca_noise
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
         self.sf_func_model = PixelwiseFunc(
             name = "SourceFollower",
@@ -2969,6 +3279,14 @@ class Voltage2VoltageConv(object):
 
         return output_signal
 
+    def _vectorized_convolution(self, input_signal, weight_signal):
+        # convolve all kernels at once, weight_signal is in (height, width, num_kernels).
+        windows = _sliding_window_view(input_signal, weight_signal.shape[:2], self.stride)
+        output_signal = np.tensordot(windows, weight_signal, axes = ([-2, -1], [0, 1]))
+
+        # apply noise to convolution result, one draw for all kernels.
+        return add_normal_noise(self.rs, output_signal, scale = self.psca_noise)
+
     def noise(self, input_signal_list):
         """Perform functional simulation
 
@@ -2992,7 +3310,8 @@ class Voltage2VoltageConv(object):
         image_input = None
         kernel_input = None
         for input_signal in input_signal_list:
-            if input_signal.shape[:2] == self.kernel_size[:2]:
+            # weight signals are shared by all frames, they are in (height, width, num_kernels).
+            if input_signal.shape[-3:-1] == self.kernel_size[:2]:
                 kernel_input = input_signal
             else:
                 image_input = input_signal
@@ -3005,35 +3324,21 @@ class Voltage2VoltageConv(object):
                 % self.num_kernels
             )
 
-        if image_input.ndim == 3:
+        if len(frame_shape(image_input.shape)) == 3:
             if image_input.shape[-1] != 1:
                 raise Exception("image_input in 'Voltage2VoltageConv' need to be either (height, width) or (height, width, 1).")
             # squeeze image input to be 2D matrix
-            image_input = np.squeeze(image_input)
-
-        conv_result_list = []
-        for i in range(self.num_kernels):
-            conv_result = self._single_channel_convolution(image_input, kernel_input[:, :, i])
-            output_height, output_width = conv_result.shape
-
-            # apply noise to convolution result.
-            conv_result_after_noise = self.rs.normal(
-                scale = self.psca_noise,
-                size = (output_height, output_width)
-            ) + conv_result
+            image_input = image_input[..., 0]
 
-            # apply sf noise
-            conv_result_list.append(
-                self.sf_func_model.simulate_output(
-                    conv_result_after_noise
-                )
-            )
-
-        output_height, output_width = conv_result_list[0].shape
-        output_result = np.zeros((output_height, output_width, self.num_kernels))
+        conv_result_after_noise = self._vectorized_convolution(image_input, kernel_input)
 
+        # apply sf noise, the SF of each output pixel is shared by all kernels.
+        output_result = np.empty_like(conv_result_after_noise)
         for i in range(self.num_kernels):
-            output_result[:, :, i] = conv_result_list[i]
+            self.sf_func_model.simulate_output(
+                conv_result_after_noise[..., i],
+                out = output_result[..., i]
+            )
 
         return ("Voltage2VoltageConv", [output_result])
 
@@ -3204,6 +3509,11 @@ class Time2VoltageConv(object):
 
         return output_signal
 
+    def _vectorized_convolution(self, input_signal, weight_signal):
+        # convolve all kernels at once, weight_signal is in (height, width, num_kernels).
+        windows = _sliding_window_view(input_signal, weight_signal.shape[:2], self.stride)
+        return self.cm_func_model.simulate_accumulated_output(windows, weight_signal)
+
     def noise(self, input_signal_list):
         """Perform functional simulation
 
@@ -3227,7 +3537,8 @@ class Time2VoltageConv(object):
         image_input = None
         kernel_input = None
         for input_signal in input_signal_list:
-            if input_signal.shape[:2] == self.kernel_size[:2]:
+            # weight signals are shared by all frames, they are in (height, width, num_kernels).
+            if input_signal.shape[-3:-1] == self.kernel_size[:2]:
                 kernel_input = input_signal
             else:
                 image_input = input_signal
@@ -3241,27 +3552,18 @@ class Time2VoltageConv(object):
                 % self.num_kernels
             )
 
-        if image_input.ndim == 3:
+        if len(frame_shape(image_input.shape)) == 3:
             if image_input.shape[-1] != 1:
                 raise Exception("image_input in 'Time2VoltageConv' need to be either (height, width) or (height, width, 1).")
             # squeeze image input to be 2D matrix
-            image_input = np.squeeze(image_input)
+            image_input = image_input[..., 0]
 
-        conv_result_list = []
-        for i in range(self.num_kernels):
-            conv_result = self._single_channel_convolution(image_input, kernel_input[:, :, i])
-            output_height, output_width = conv_result.shape
-            conv_result_list.append(
-                self.am_func_model.simulate_output(
-                    conv_result
-                )
-            )
-
-        output_height, output_width = conv_result_list[0].shape
-        output_result = np.zeros((output_height, output_width, self.num_kernels))
+        conv_result = self._vectorized_convolution(image_input, kernel_input)
 
+        # the analog memory of each output pixel is shared by all kernels.
+        output_result = np.empty_like(conv_result)
         for i in range(self.num_kernels):
-            output_result[:, :, i] = conv_result_list[i]
+            self.am_func_model.simulate_output(conv_result[..., i], out = output_result[..., i])
 
         return ("Time2VoltageConv", [output_result])
 
@@ -3405,6 +3707,13 @@ class BinaryWeightConv(object):
 
         return positive_output_signal, negative_output_signal
 
+    def _vectorized_convolution(self, input_signal, weight_signal):
+        windows = _sliding_window_view(input_signal, weight_signal.shape[:2], self.stride)
+        positive_output_signal = np.sum(np.where(windows >= 0, windows, 0), axis = (-2, -1))
+        negative_output_signal = np.sum(np.where(windows < 0, windows, 0), axis = (-2, -1))
+
+        return positive_output_signal, negative_output_signal
+
     def noise(self, input_signal_list):
         """Perform functional simulation
 
@@ -3428,7 +3737,8 @@ class BinaryWeightConv(object):
         image_input = None
         kernel_input = None
         for input_signal in input_signal_list:
-            if input_signal.shape[:2] == self.kernel_size[:2]:
+            # weight signals are shared by all frames, they are in (height, width, num_kernels).
+            if input_signal.shape[-3:-1] == self.kernel_size[:2]:
                 kernel_input = input_signal
             else:
                 image_input = input_signal
@@ -3441,16 +3751,15 @@ class BinaryWeightConv(object):
                 % self.num_kernels
             )
 
-        if image_input.ndim == 3:
+        if len(frame_shape(image_input.shape)) == 3:
             if image_input.shape[-1] != 1:
                 raise Exception("image_input in 'Time2VoltageConv' need to be either (height, width) or (height, width, 1).")
             # squeeze image input to be 2D matrix
-            image_input = np.squeeze(image_input)
+            image_input = image_input[..., 0]
         
-        positive_conv_signal, negative_conv_signal = self._single_channel_convolution(image_input, kernel_input[:, :, 0])
-        output_height, output_width = positive_conv_signal.shape
-        positive_conv_result = np.expand_dims(positive_conv_signal, axis = 2)
-        negative_conv_result = np.expand_dims(negative_conv_signal, axis = 2)
+        positive_conv_signal, negative_conv_signal = self._vectorized_convolution(image_input, kernel_input[:, :, 0])
+        positive_conv_result = np.expand_dims(positive_conv_signal, axis = -1)
+        negative_conv_result = np.expand_dims(negative_conv_signal, axis = -1)
 
         positive_result_after_noise = self.func_model.simulate_output(positive_conv_result)
         negative_result_after_noise = self.func_model.simulate_output(negative_conv_result)
@@ -1,8 +1,22 @@
 import numpy as np
+from inspect import signature
 from camj.analog.energy_utils import gm_id, get_pixel_parasitic, parallel_impedance, get_delay, get_nominal_supply
 
 
-class PinnedPhotodiodeEnergy(object):
+class _EnergyModel(object):
+    # energy models keep their constructor arguments in ``_init_args``, including the ``None``
+    # ones that the constructor derives from other arguments (e.g., ``output_vs`` of APS), so
+    # a model can be rebuilt with new parameters and derive those arguments again.
+    def __new__(cls, *args, **kwargs):
+        self = super(_EnergyModel, cls).__new__(cls)
+        # ``copy`` and ``pickle`` call ``__new__`` without arguments and restore ``_init_args``.
+        init_args = signature(cls.__init__).bind_partial(self, *args, **kwargs)
+        init_args.apply_defaults()
+        self._init_args = dict(list(init_args.arguments.items())[1:])
+        return self
+
+
+class PinnedPhotodiodeEnergy(_EnergyModel):
     """Pinned photodiode (PD).
 
     The model only contains the dynamic energy of the PD's internal capacitance.
@@ -89,23 +103,18 @@ class ActivePixelSensorEnergy(PinnedPhotodiodeEnergy):
         Returns:
             float: the energy consumption of this analog compoenent in unit of ``J``.
         """
-        if self.num_transistor == 3:
-            energy_fd = 0
-        elif self.num_transistor == 4:
-            energy_fd = self.fd_capacitance * (self.pd_supply ** 2)
-        else:
+        if not np.all(np.isin(self.num_transistor, [3, 4])):
             raise Exception("Defined APS is not supported.")
+        energy_fd = np.where(
+            np.equal(self.num_transistor, 4),
+            self.fd_capacitance * (self.pd_supply ** 2),
+            0
+        )
 
-        if self.dynamic_sf:
-            energy_sf = (
-                self.load_capacitance +
-                get_pixel_parasitic(self.array_vsize, self.tech_node, self.pitch)
-            ) * self.output_vs ** 2
-        else:
-            energy_sf = (
-                self.load_capacitance +
-                get_pixel_parasitic(self.array_vsize, self.tech_node, self.pitch)
-            ) * self.pd_supply * self.output_vs
+        energy_sf = (
+            self.load_capacitance +
+            get_pixel_parasitic(self.array_vsize, self.tech_node, self.pitch)
+        ) * np.where(self.dynamic_sf, self.output_vs, self.pd_supply) * self.output_vs
 
         energy_pd = super(ActivePixelSensorEnergy, self).energy()
         energy = energy_pd + energy_fd + self.num_readout * energy_sf
@@ -255,7 +264,7 @@ class PulseWidthModulationPixelEnergy(PinnedPhotodiodeEnergy):
         return energy
 
 
-class ColumnAmplifierEnergy(object):
+class ColumnAmplifierEnergy(_EnergyModel):
     """ Switched-capacitor amplifier.
     
     The model is based on Fig. 13.5 in [Book-Razavi].
@@ -295,6 +304,7 @@ class ColumnAmplifierEnergy(object):
         self.t_hold = t_hold
         self.supply = supply
         self.gain_cl = gain_cl
+        self.differential = differential
         self.fb_capacitance = self.input_capacitance / self.gain_cl
         [self.i_opamp, self.gm] = gm_id(
             load_capacitance=self.load_capacitance,
@@ -331,7 +341,7 @@ class ColumnAmplifierEnergy(object):
         return [input_capacitance, output_capacitance]
 
 
-class SourceFollowerEnergy(object):
+class SourceFollowerEnergy(_EnergyModel):
     """ Source follower (SF) with constant current bias.
 
     This model is applicable to not only the simplest single-transistor source follower 
@@ -379,7 +389,7 @@ class SourceFollowerEnergy(object):
         return [input_capacitance, output_capacitance]
 
 
-class ActiveAnalogMemoryEnergy(object):
+class ActiveAnalogMemoryEnergy(_EnergyModel):
     """ Analog memory with active feedback.
 
     The model is based on the design in [JSSC-2004].
@@ -445,7 +455,7 @@ class ActiveAnalogMemoryEnergy(object):
         return [input_capacitance, output_capacitance]
 
 
-class PassiveAnalogMemoryEnergy(object):
+class PassiveAnalogMemoryEnergy(_EnergyModel):
     """ Analog memory without active feedback.
     
     The model only contains a sample capacitor. Compared to ActiveAnalogMemory it has higher data leakage rate.
@@ -483,7 +493,7 @@ class PassiveAnalogMemoryEnergy(object):
         return [input_capacitance, output_capacitance]
 
 
-class DigitalToCurrentConverterEnergy(object):
+class DigitalToCurrentConverterEnergy(_EnergyModel):
     """ Current digital-to-analog converter.
 
     The model consists of a constant current path and a load capacitor.
@@ -511,7 +521,7 @@ class DigitalToCurrentConverterEnergy(object):
         return energy
 
 
-class CurrentMirrorEnergy(object):
+class CurrentMirrorEnergy(_EnergyModel):
     """ Current mirror.
     
     The model consists of a constant current path and a load capacitor.
@@ -551,7 +561,7 @@ class CurrentMirrorEnergy(object):
         return energy
 
 
-class PassiveSwitchedCapacitorArrayEnergy(object):
+class PassiveSwitchedCapacitorArrayEnergy(_EnergyModel):
     """ Passive switched-capacitor array.
 
     The model consists of a list of capacitors and a list of voltages that corresponds to 
@@ -577,11 +587,17 @@ class PassiveSwitchedCapacitorArrayEnergy(object):
         Returns:
             float: the energy consumption of this analog compoenent in unit of ``J``.
         """
-        energy = np.sum(np.multiply(self.capacitance_array, [vs ** 2 for vs in self.vs_array]))
+        # the first axis indexes capacitors, any trailing axes are parameter sweeps.
+        capacitance_array = np.stack(np.broadcast_arrays(*[np.asarray(c, dtype=float) for c in self.capacitance_array]))
+        vs_array = np.stack(np.broadcast_arrays(*[np.asarray(vs, dtype=float) for vs in self.vs_array]))
+        ndim = max(capacitance_array.ndim, vs_array.ndim)
+        capacitance_array = capacitance_array.reshape(capacitance_array.shape + (1,) * (ndim - capacitance_array.ndim))
+        vs_array = vs_array.reshape(vs_array.shape + (1,) * (ndim - vs_array.ndim))
+        energy = np.sum(capacitance_array * np.square(vs_array), axis=0)
         return energy
 
 
-class MaximumVoltageEnergy(object):
+class MaximumVoltageEnergy(_EnergyModel):
     """ A circuit that outputs the maximum voltage among the input voltages.
 
     The model is based on the design in [Sensors-2020].
@@ -594,6 +610,7 @@ class MaximumVoltageEnergy(object):
         t_hold (float): [unit: s] holding time, during which the circuit is turned on and consumes power relentlessly.
         t_readout (float): [unit: s] readout time, during which the maximum voltage is output.
         load_capacitance (float): [unit: F] load capacitance
+        gain (float): open-loop gain of the common-source amplifiers.
 
     References Link:
         * Sensors-2020: Design of an Always-On Image Sensor Using an Analog Lightweight Convolutional Neural Network.
@@ -606,11 +623,13 @@ class MaximumVoltageEnergy(object):
             t_hold=30e-3,  # [s]
             t_readout=1e-6,  # [s]
             load_capacitance=1e-12,  # [F]
+            gain=1,
     ):
         self.supply = supply
         self.load_capacitance = load_capacitance
         self.t_hold = t_hold
         self.t_readout = t_readout
+        self.gain = gain
 
     def energy(self):
         """Calculate Energy
@@ -620,7 +639,7 @@ class MaximumVoltageEnergy(object):
         """
         i_bias, _ = gm_id(
             self.load_capacitance,
-            gain=1,
+            gain=self.gain,
             bandwidth=1 / self.t_readout,
             differential=True,
             inversion_level='moderate'
@@ -631,7 +650,7 @@ class MaximumVoltageEnergy(object):
         return energy
 
 
-class ComparatorEnergy(object):
+class ComparatorEnergy(_EnergyModel):
     """ Dynamic voltage comparator.
 
     Args:
@@ -660,7 +679,7 @@ class ComparatorEnergy(object):
         return energy
 
 
-class AnalogToDigitalConverterEnergy(object):
+class AnalogToDigitalConverterEnergy(_EnergyModel):
     """ Analog-to-digital converter.
 
     Args:
@@ -688,7 +707,7 @@ class AnalogToDigitalConverterEnergy(object):
         Returns:
             float: the energy consumption of this analog compoenent in unit of ``J``.
         """
-        energy = self.fom * (2 ** self.resolution)
+        energy = self.fom * np.exp2(self.resolution)
         return energy
 
     def _quantization_noise(self):  # [unit: V]
@@ -696,7 +715,7 @@ class AnalogToDigitalConverterEnergy(object):
         return 1 / 12 * LSB ** 2
 
 
-class GeneralCircuitEnergy(object):
+class GeneralCircuitEnergy(_EnergyModel):
     """ Energy model for general circuits from first principle.
 
     Args:
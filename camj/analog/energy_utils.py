@@ -23,18 +23,20 @@ def gm_id(
         differential (bool): if using differential-input amplifier or single-input amplifier.
         inversion_level (str): ['weak', 'moderate', or 'strong'] the inversion level of the transistors in the amplifier.
 
+    All numerical arguments (and ``differential``/``inversion_level``) can also be NumPy arrays,
+    in which case they are broadcast against each other and arrays are returned.
+
     Returns:
         float, float: drain current (id) [unit: A], transconductance (gm) [unit: S]
     """
 
-    if inversion_level == 'strong':
-        gm_id_ratio = 10
-    elif inversion_level == 'moderate':
-        gm_id_ratio = 16
-    elif inversion_level == 'weak':
-        gm_id_ratio = 20
-    else:
+    inversion_level = np.asarray(inversion_level)
+    if not np.all(np.isin(inversion_level, ['strong', 'moderate', 'weak'])):
         raise Exception("Defined inversion_level is not supported.")
+    gm_id_ratio = np.select(
+        [inversion_level == 'strong', inversion_level == 'moderate', inversion_level == 'weak'],
+        [10, 16, 20]
+    )
     num_branch = np.where(differential, 2, 1)
     gm = 2 * np.pi * load_capacitance * gain * bandwidth
     id = gm / gm_id_ratio * num_branch  # [A]
@@ -74,20 +76,22 @@ def get_nominal_supply(tech_node):
     """ Compute nominal supply voltage under different process nodes.
 
     Args:
-        tech_node (int): [unit: nm] pixel's process node.
+        tech_node (int or array): [unit: nm] pixel's process node.
 
     Returns:
-        float: supply voltage [unit: V]
+        float: supply voltage [unit: V], an array if ``tech_node`` is an array.
     """
 
-    if 130 < tech_node <= 180:
-        supply = 1.8
-    elif 65 < tech_node <= 130:
-        supply = 1.5
-    elif tech_node <= 65:
-        supply = 1.1
-    else:
+    tech_node = np.asarray(tech_node)
+    if np.any(tech_node > 180):
         raise Exception("Defined tech_node is not supported.")
+    supply = np.select(
+        [tech_node <= 65, tech_node <= 130],
+        [1.1, 1.5],
+        default=1.8
+    )
+    if supply.ndim == 0:
+        supply = float(supply)
     return supply
 
 
@@ -95,13 +99,14 @@ def parallel_impedance(impedance_array):
     """ Compute parallel impedance of an array of input impedance.
 
     Args:
-        impedance_array (array, float): [unit: Ohm] input impedance array.
+        impedance_array (array, float): [unit: Ohm] input impedance array. Each element can
+            itself be an array of impedances, in which case the elements are combined element-wise.
 
     Returns:
         float: parallel impedance [unit: Ohm]
     """
 
-    impedance = np.reciprocal(np.sum(np.reciprocal(impedance_array)))
+    impedance = np.reciprocal(sum(np.reciprocal(np.asarray(z, dtype=float)) for z in impedance_array))
     return impedance
 
 
@@ -0,0 +1,76 @@
+"""Fixed-Pattern Noise Cache
+
+Fixed-pattern noise (PRNU gains and DCNU) belongs to a sensor instance, not to a run. When a
+function model is seeded (see ``camj.analog.rng``), its fixed-pattern noise maps are drawn
+from their own stream derived from the seed, so the maps only depend on the seed and the
+model parameters. This module stores these maps as ``.npy`` files in a cache directory, keyed
+by the model parameters, the map shape and the seed. Later runs, in this process or in any
+other one, load the maps as read-only ``np.memmap`` arrays instead of drawing them again. The
+maps are only read from disk when they are used, and the pages are shared by all processes.
+
+Maps of unseeded function models are never cached, they are different in every run anyway.
+
+Examples:
+        To share the fixed-pattern noise of one simulated sensor across worker processes:
+
+        >>> with fpn_cache("/tmp/camj_fpn"):
+                functional_simulation(sw_desc, hw_desc, mapping, input_mapping, seed = 2023)
+
+"""
+
+import contextlib
+import hashlib
+import os
+import numpy as np
+
+# the directory of cached fixed-pattern noise maps, ``None`` disables the cache.
+_cache_dir = None
+
+
+def set_cache_dir(cache_dir):
+    """Set the directory of cached fixed-pattern noise maps, ``None`` disables the cache."""
+    global _cache_dir
+    _cache_dir = cache_dir
+
+
+@contextlib.contextmanager
+def fpn_cache(cache_dir):
+    """Use ``cache_dir`` as the fixed-pattern noise cache within a context, see ``set_cache_dir``."""
+    global _cache_dir
+    prev_cache_dir = _cache_dir
+    _cache_dir = cache_dir
+    try:
+        yield
+    finally:
+        _cache_dir = prev_cache_dir
+
+
+def cache_path(key):
+    """the file of the fixed-pattern noise map of ``key`` in the cache directory."""
+    return os.path.join(_cache_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".npy")
+
+
+def cached_fixed_pattern_noise(key, draw):
+    """Load a fixed-pattern noise map from the cache, or draw and store it.
+
+    Args:
+        key (tuple): everything the map depends on, i.e., the model parameters, the shape,
+            the floating point type and the seed.
+        draw (function): draws the map if it is not in the cache.
+
+    Returns:
+        tensor: the map, it is a read-only ``np.memmap`` if the cache is enabled.
+    """
+    if _cache_dir is None:
+        return draw()
+
+    path = cache_path(key)
+    if not os.path.exists(path):
+        os.makedirs(_cache_dir, exist_ok = True)
+        # write to a private file first, so other processes never see a partial map.
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            np.save(f, draw())
+        os.replace(tmp_path, path)
+
+    return np.load(path, mmap_mode = "r")
@@ -27,6 +27,16 @@ This module includes all basic noise model for CamJ functional simulation.
     parameter in the circuit and the "gain variation" is not analytically derived from the circuit parameters.
     However, the proxy trades low level circuit details off for the model's simplicity.
     
+.. note::
+    Besides simulating noisy samples, most function models propagate the per-pixel mean and
+    variance of their input analytically in ``simulate_moments``, see ``SignalMoments``. One pass
+    of moments gives the SNR of every pixel, which otherwise needs many simulated frames.
+
+.. note::
+    Function models never modify their input signals, so signals can be passed along the
+    simulation without copies. Each ``simulate_output`` returns a new array, or writes into
+    the array given by the optional ``out`` argument.
+
 References Link:
     * JSSC-2019: A Data-Compressive 1.5/2.75-bit Log-Gradient QVGA Image Sensor With Multi-Scale Readout for Always-On Object Detection.
         https://ieeexplore.ieee.org/document/8844721
@@ -34,10 +44,235 @@ References Link:
         https://www.mdpi.com/1424-8220/20/11/3101
 """
 
+import contextlib
+import threading
+from collections import namedtuple
 import numpy as np
 import math
-import time
-import copy
+
+# import local modules
+from camj.analog.fpn_cache import cached_fixed_pattern_noise
+from camj.analog.rng import new_generator, normal_noise, add_normal_noise, poisson_noise, fixed_pattern_seed
+
+# the floating point type of signals outside ``signal_precision``.
+_DEFAULT_SIGNAL_DTYPE = np.dtype(np.float64)
+# the number of leading frame axes of input signals and the floating point type of signals in
+# each thread, see ``frame_batch`` and ``signal_precision``.
+_signal_state = threading.local()
+# ``(row_offset, frame_rows)`` of the current row strip in each thread, see ``row_strip``.
+_row_strip_state = threading.local()
+
+
+@contextlib.contextmanager
+def frame_batch(num_frame_axes = 1):
+    """Batched Frame Context
+
+    Inside this context, every input signal has ``num_frame_axes`` leading frame axes, e.g.,
+    ``(num_frames, height, width, channel)``, and every ``simulate_output`` broadcasts over
+    these axes. Fixed-pattern noise (PRNU gains and DCNU) is generated in the shape of one frame
+    and shared by all frames, while temporal noise is drawn independently for each frame.
+
+    Args:
+        num_frame_axes (int): the number of leading frame axes, the default value is ``1``.
+    """
+    prev_num_frame_axes = _current_num_frame_axes()
+    _signal_state.num_frame_axes = num_frame_axes
+    try:
+        yield
+    finally:
+        _signal_state.num_frame_axes = prev_num_frame_axes
+
+
+def frame_shape(signal_shape):
+    """the shape of one frame, i.e., ``signal_shape`` without the leading frame axes."""
+    return tuple(signal_shape[_current_num_frame_axes():])
+
+
+def _current_num_frame_axes():
+    # the number of frame axes of this thread, signals are not batched by default.
+    return getattr(_signal_state, "num_frame_axes", 0)
+
+
+@contextlib.contextmanager
+def signal_precision(dtype = np.float32):
+    """Signal Precision Context
+
+    Inside this context, function models generate their outputs and fixed-pattern noise in
+    ``dtype``, e.g., ``np.float32`` halves the memory of every intermediate signal.
+
+    Args:
+        dtype: the floating point type of signals, the default value is ``np.float32``.
+    """
+    prev_signal_dtype = signal_dtype()
+    _signal_state.dtype = np.dtype(dtype)
+    try:
+        yield
+    finally:
+        _signal_state.dtype = prev_signal_dtype
+
+
+def signal_dtype():
+    """the floating point type of signals in this thread, see ``signal_precision``."""
+    return getattr(_signal_state, "dtype", _DEFAULT_SIGNAL_DTYPE)
+
+
+@contextlib.contextmanager
+def row_strip(row_offset, frame_rows):
+    """Row Strip Context
+
+    Inside this context, every input signal is a strip of rows of a taller frame, it starts
+    at row ``row_offset`` of a frame of ``frame_rows`` rows. Fixed-pattern noise is generated
+    for the full frame and each strip uses its own rows of it, so a frame simulated strip by
+    strip sees the same fixed-pattern noise as a frame simulated at once.
+
+    Args:
+        row_offset (int): the index of the first row of the strip in the frame.
+        frame_rows (int): the number of rows of the full frame.
+    """
+    prev_row_strip = _current_row_strip()
+    _row_strip_state.row_strip = (row_offset, frame_rows)
+    try:
+        yield
+    finally:
+        _row_strip_state.row_strip = prev_row_strip
+
+
+def _current_row_strip():
+    # the row strip of this thread, each analog array in a thread pool has its own strip.
+    return getattr(_row_strip_state, "row_strip", None)
+
+
+def _advance_row_strip(kernel_rows, stride_rows):
+    # move the current row strip to the output of a stage that reduces ``kernel_rows`` input
+    # rows to one output row every ``stride_rows`` rows, e.g., a convolution or a binning.
+    curr_row_strip = _current_row_strip()
+    if curr_row_strip is not None:
+        row_offset, frame_rows = curr_row_strip
+        _row_strip_state.row_strip = (row_offset // stride_rows, (frame_rows - kernel_rows) // stride_rows + 1)
+
+
+def _fixed_pattern_noise(model, fpn, loc, scale, size):
+    # a fixed-pattern noise map for signals of one frame in ``size``, ``fpn`` is reused if it
+    # is already drawn in the right shape. In a row strip, the map covers the full frame.
+    curr_row_strip = _current_row_strip()
+    if curr_row_strip is not None:
+        size = (curr_row_strip[1],) + tuple(size[1:])
+    if fpn is None or fpn.shape != tuple(size):
+        fpn = _draw_fixed_pattern_noise(model, loc, scale, size)
+    return fpn
+
+
+def _draw_fixed_pattern_noise(model, loc, scale, size):
+    # draw a fixed-pattern noise map of ``model``. A seeded model draws it from its own
+    # fixed-pattern stream through the cache, see ``camj.analog.fpn_cache``.
+    seed = fixed_pattern_seed(model.rs)
+    if seed is None:
+        return normal_noise(model.rs, loc = loc, scale = scale, size = size, dtype = signal_dtype())
+
+    key = (
+        type(model).__name__, float(loc), float(scale), tuple(size), signal_dtype().str,
+        seed.entropy, seed.spawn_key
+    )
+    return cached_fixed_pattern_noise(
+        key,
+        lambda: normal_noise(
+            np.random.Generator(np.random.PCG64(seed)), loc = loc, scale = scale, size = size, dtype = signal_dtype()
+        )
+    )
+
+
+def _strip_rows(fpn, signal_shape):
+    # the rows of a full-frame fixed-pattern noise map that belong to the current row strip.
+    curr_row_strip = _current_row_strip()
+    if curr_row_strip is None:
+        return fpn
+    row_offset = curr_row_strip[0]
+    return fpn[row_offset:row_offset + frame_shape(signal_shape)[0]]
+
+
+def _new_output(shape, out):
+    # a new output signal in the current precision, or the caller-provided ``out``.
+    if out is None:
+        return np.empty(shape, dtype = signal_dtype())
+    if out.shape != tuple(shape):
+        raise Exception("'out' needs to be in the shape of %s, but got %s." % (tuple(shape), out.shape))
+    return out
+
+
+def _reduced_shape(shape, axis):
+    # the shape of a signal after reducing ``axis``, and ``axis`` with non-negative indices.
+    axis = tuple(a % len(shape) for a in axis)
+    return tuple(n for i, n in enumerate(shape) if i not in axis), axis
+
+
+class SignalMoments(namedtuple("SignalMoments", ["mean", "var", "reset"])):
+    """Per-pixel moments of a signal
+
+    The analytic counterpart of a signal, ``simulate_moments`` of a function model takes and
+    returns moments instead of noisy samples. Temporal noise of different pixels and different
+    function models is independent, except the reset noise of ``FloatingDiffusionFunc``, which
+    is in both signals of CDS. ``reset`` tracks it, so ``CorrelatedDoubleSamplingFunc`` cancels
+    the reset noise as the sampled CDS does.
+
+    Args:
+        mean: the mean of each pixel.
+        var: the variance of each pixel, it is broadcast to the shape of ``mean``. The default
+            value is ``0``, i.e., a noiseless signal.
+        reset: the reset noise in each pixel as a multiple of a standard normal reset sample, it
+            is broadcast to the shape of ``mean``. The default value is ``0``.
+    """
+    __slots__ = ()
+
+    def __new__(cls, mean, var = 0., reset = 0.):
+        mean = np.asarray(mean, dtype = signal_dtype())
+        return super(SignalMoments, cls).__new__(
+            cls,
+            mean,
+            np.broadcast_to(np.asarray(var, dtype = signal_dtype()), mean.shape),
+            np.broadcast_to(np.asarray(reset, dtype = signal_dtype()), mean.shape)
+        )
+
+
+def snr_map(signal_moments, db = True):
+    """the per-pixel signal-to-noise ratio of ``SignalMoments``, in dB if ``db`` is ``True``."""
+    with np.errstate(divide = "ignore"):
+        snr = np.abs(signal_moments.mean) / np.sqrt(signal_moments.var)
+        if db:
+            return 20 * np.log10(snr)
+    return snr
+
+
+def _linear_gain(model, shape):
+    # the gain of a linear function model for a signal in ``shape``, i.e., its PRNU gain map
+    # if PRNU is enabled. It is the same map that ``simulate_output`` uses.
+    if not model.enable_prnu:
+        return model.gain
+    model.prnu_gain = _fixed_pattern_noise(
+        model,
+        model.prnu_gain,
+        loc = model.gain,
+        scale = model.gain * model.prnu_std,
+        size = frame_shape(shape)
+    )
+    return _strip_rows(model.prnu_gain, shape)
+
+
+def _linear_moments(moments, gain, noise, offset = 0.):
+    # the moments of ``gain * in + offset + Norm(noise)``.
+    return SignalMoments(
+        mean = gain * moments.mean + offset,
+        var = gain ** 2 * moments.var + noise ** 2,
+        reset = gain * moments.reset
+    )
+
+
+def _average_moments(moments_list, noise):
+    # the moments of ``Average(in_1, ..., in_N) + Norm(noise)``, the inputs are independent.
+    num_input = len(moments_list)
+    return SignalMoments(
+        mean = sum(m.mean for m in moments_list) / num_input,
+        var = sum(m.var for m in moments_list) / num_input ** 2 + noise ** 2
+    )
 
 
 class PhotodiodeFunc(object):
@@ -47,7 +282,8 @@ class PhotodiodeFunc(object):
     and dark current non-uniformity.
 
     Mathematical Expression:
-        output_signal = Poisson(x_in) + Norm(DCNU * dark_current)
+        output_signal = Poisson(x_in) + Poisson(DCNU * dark_current)
+                      = Poisson(x_in + DCNU * dark_current)
 
     Args:
         name (str): the name of this noise.
@@ -56,6 +292,11 @@ class PhotodiodeFunc(object):
         dcnu_std (float): dcnu standard deviation percentage. it is relative number respect
             to ``dark_current_noise``, the dcnu standard deviation is,
             ``dcnu_std`` * ``dark_current_noise``, the default value is 0.001.
+        poisson_threshold (float): the number of electrons from which shot noise is drawn from
+            the normal approximation of the Poisson distribution, which is much faster and
+            indistinguishable at high signal levels, see ``camj.analog.rng.poisson_noise``.
+            ``None`` always draws exact Poisson samples. The default value is ``None``, batched
+            and sweep simulations can opt in to the approximation, e.g., with ``1000``.
 
     """
     def __init__(self, 
@@ -63,6 +304,7 @@ class PhotodiodeFunc(object):
         dark_current_noise: float,
         enable_dcnu = False,
         dcnu_std = 0.001,
+        poisson_threshold = None,
     ):
         super(PhotodiodeFunc, self).__init__()
         self.name = name
@@ -70,16 +312,17 @@ class PhotodiodeFunc(object):
         self.enable_dcnu = enable_dcnu
         self.dcnu_noise = None
         self.dcnu_std = dcnu_std
+        self.poisson_threshold = poisson_threshold
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal):
+    def simulate_output(self, input_signal, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal: input signal to photodiode in unit of photons in a 2D tensor.
+            out: an optional array to write the output into.
 
         Returns:
             2D tensor: signal out of photodiode in unit of voltage.
@@ -87,32 +330,56 @@ class PhotodiodeFunc(object):
 
         input_shape = input_signal.shape
 
-        # simulate photon shot noise using Poisson random function  
-        signal_after_shot_noise = self.rs.poisson(input_signal, input_shape)
-
         # check if DCNU needs to be applied.
         if self.enable_dcnu:
             # first generate dcnu variant for each pixel
-            if self.dcnu_noise is None or self.dcnu_noise.shape != input_signal.shape:  
-                self.dcnu_noise = self.rs.normal(
-                    loc = self.dark_current_noise,
-                    scale = self.dark_current_noise * self.dcnu_std,
-                    size = input_shape
-                )
-
-            # then apply poisson distribution on dcnu
-            signal_after_dc_noise = self.rs.poisson(
-                self.dcnu_noise, 
-                size = input_shape
-            ) + signal_after_shot_noise
+            self.dcnu_noise = _fixed_pattern_noise(
+                self,
+                self.dcnu_noise,
+                loc = self.dark_current_noise,
+                scale = self.dark_current_noise * self.dcnu_std,
+                size = frame_shape(input_shape)
+            )
+            dark_current = _strip_rows(self.dcnu_noise, input_shape)
         else:
-            # directly apply dc noise
-            signal_after_dc_noise = self.rs.poisson(
-                self.dark_current_noise, 
-                size = input_shape
-            ) + signal_after_shot_noise
-            
-        return np.clip(signal_after_dc_noise, a_min = 0, a_max = None)
+            dark_current = self.dark_current_noise
+
+        # photon shot noise and dark current noise are independent Poisson noise, their sum
+        # is one Poisson noise of the summed mean, which is drawn at once.
+        output_signal = poisson_noise(
+            self.rs,
+            np.add(input_signal, dark_current, dtype = signal_dtype()),
+            threshold = self.poisson_threshold,
+            out = _new_output(input_shape, out)
+        )
+
+        return np.clip(output_signal, a_min = 0, a_max = None, out = output_signal)
+
+    def simulate_moments(self, input_moments):
+        """propagate the per-pixel mean and variance of the input signal
+
+        Photon shot noise and dark current noise are Poisson, their variance is equal to their
+        mean, the variance of the input signal adds to it.
+
+        Args:
+            input_moments (SignalMoments): moments of the input signal in unit of photons.
+
+        Returns:
+            SignalMoments: moments of the signal out of photodiode.
+        """
+        dark_current = self.dark_current_noise
+        if self.enable_dcnu:
+            self.dcnu_noise = _fixed_pattern_noise(
+                self,
+                self.dcnu_noise,
+                loc = self.dark_current_noise,
+                scale = self.dark_current_noise * self.dcnu_std,
+                size = frame_shape(input_moments.mean.shape)
+            )
+            dark_current = _strip_rows(self.dcnu_noise, input_moments.mean.shape)
+
+        mean = input_moments.mean + dark_current
+        return SignalMoments(mean = mean, var = input_moments.var + mean)
 
     def __str__(self):
         return self.name
@@ -151,28 +418,42 @@ class AnalogToDigitalConverterFunc(object):
         self.max_resolution_val = 2 ** resolution - 1
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal):
+    def simulate_output(self, input_signal, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal: input signal to ADC in unit of voltage in a 2D/3D tensor.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: digital values after quantization of ADC.
         """
+        # simulate quantization noise
+        signal_after_noise = _new_output(input_signal.shape, out)
+        signal_after_noise[...] = input_signal
+        add_normal_noise(self.rs, signal_after_noise, self.adc_noise)
 
-        input_shape = input_signal.shape
+        np.clip(signal_after_noise, a_min = 0, a_max = self.max_val, out = signal_after_noise)
+        signal_after_noise *= self.max_resolution_val / self.max_val
+        return signal_after_noise
 
-        # simulate quantization noise
-        signal_after_noise = self.rs.normal(
-            scale = self.adc_noise,
-            size = input_shape
-        ) + input_signal
+    def simulate_moments(self, input_moments):
+        """propagate the per-pixel mean and variance of the input signal
+
+        The input is assumed to stay in ``[0, max_val]``, so clipping is ignored. Like
+        ``simulate_output``, the digital values are not rounded, so no quantization variance
+        is added.
+
+        Args:
+            input_moments (SignalMoments): moments of the input signal in unit of voltage.
 
-        return np.clip(signal_after_noise, a_min = 0, a_max = self.max_val) / self.max_val * self.max_resolution_val
+        Returns:
+            SignalMoments: moments of the digital values.
+        """
+        gain = self.max_resolution_val / self.max_val
+        return _linear_moments(input_moments, gain, gain * self.adc_noise)
 
     def __str__(self):
         return self.name
@@ -218,15 +499,15 @@ class AbsoluteDifferenceFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal1, input_signal2):
+    def simulate_output(self, input_signal1, input_signal2, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal1: the first input signal to ABS component in a 2D/3D tensor.
             input_signal2: the second input signal to ABS component in a 2D/3D tensor.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: signal values after ABS component.
@@ -234,27 +515,26 @@ class AbsoluteDifferenceFunc(object):
         if input_signal1.shape != input_signal2.shape:
             raise Exception("Two input shapes are not equal in absolute difference!")
 
-        diff_signal = np.abs(input_signal1 - input_signal2)
+        diff_signal = np.subtract(input_signal1, input_signal2, out = _new_output(input_signal1.shape, out))
+        np.abs(diff_signal, out = diff_signal)
 
         input_shape = diff_signal.shape
         if self.enable_prnu:
-            if self.prnu_gain is None or self.prnu_gain.shape != diff_signal.shape:
-                self.prnu_gain = self.rs.normal(
-                    loc = self.gain,
-                    scale = self.gain * self.prnu_std,
-                    size = input_shape
-                )
+            self.prnu_gain = _fixed_pattern_noise(
+                self,
+                self.prnu_gain,
+                loc = self.gain,
+                scale = self.gain * self.prnu_std,
+                size = frame_shape(input_shape)
+            )
             # generate random gain values
-            diff_after_gain = self.prnu_gain * diff_signal
+            diff_signal *= _strip_rows(self.prnu_gain, input_shape)
         else:
-            diff_after_gain = self.gain * diff_signal
+            diff_signal *= self.gain
 
-        diff_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = input_shape
-        ) + diff_after_gain
+        diff_after_noise = add_normal_noise(self.rs, diff_signal, self.noise)
 
-        return np.clip(diff_after_noise, a_min = 0, a_max = None)
+        return np.clip(diff_after_noise, a_min = 0, a_max = None, out = diff_after_noise)
 
     def __str__(self):
         return self.name
@@ -305,15 +585,15 @@ class CurrentMirrorFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal, weight_signal=None):
+    def simulate_output(self, input_signal, weight_signal=None, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal: the input signal to current mirror in a 2D/3D tensor.
             weight_signal: the weight signal to current mirror in a 2D/3D tensor.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: signal values after current mirror.
@@ -322,36 +602,98 @@ class CurrentMirrorFunc(object):
             if input_signal.shape != weight_signal.shape:
                 raise Exception("Two inputs, input_signal and weight_signal need to be in the same shape.")
 
-        # initialize a new output matrix, avoid overwrite the input.
-        output_signal = np.zeros(input_signal.shape)
+        output_signal = _new_output(input_signal.shape, out)
         if self.enable_compute:
             if weight_signal is not None:
-                output_signal = input_signal * weight_signal
+                np.multiply(input_signal, weight_signal, out = output_signal)
             else:
                 raise Exception("Weight signal is missing when compute is enabled in current mirror.")
         else:
-            output_signal = copy.deepcopy(input_signal)
+            output_signal[...] = input_signal
 
         input_shape = input_signal.shape
         # enable prnu and generate gain variance.
         if self.enable_prnu:
-            if self.prnu_gain is None or self.prnu_gain.shape != input_signal.shape:
+            self.prnu_gain = _fixed_pattern_noise(
+                self,
+                self.prnu_gain,
+                loc = self.gain,
+                scale = self.gain * self.prnu_std,
+                size = frame_shape(input_shape)
+            )
+            output_signal *= _strip_rows(self.prnu_gain, input_shape)
+        else:
+            output_signal *= self.gain
+
+        return add_normal_noise(self.rs, output_signal, self.noise)
+
+    def simulate_moments(self, input_moments, weight_moments=None):
+        """propagate the per-pixel mean and variance of the input signal
+
+        Args:
+            input_moments (SignalMoments): moments of the input signal.
+            weight_moments (SignalMoments): moments of the weight signal, it is independent of
+                the input signal.
+
+        Returns:
+            SignalMoments: moments of the signal after current mirror.
+        """
+        if self.enable_compute:
+            if weight_moments is None:
+                raise Exception("Weight signal is missing when compute is enabled in current mirror.")
+            # the product of two independent signals.
+            input_moments = SignalMoments(
+                mean = input_moments.mean * weight_moments.mean,
+                var = input_moments.var * weight_moments.var \
+                    + input_moments.var * weight_moments.mean ** 2 \
+                    + weight_moments.var * input_moments.mean ** 2
+            )
+
+        return _linear_moments(input_moments, _linear_gain(self, input_moments.mean.shape), self.noise)
+
+    def simulate_accumulated_output(self, input_windows, weight_signal):
+        """apply gain and noise to many input windows and accumulate each window
+
+        This is the batched version of ``np.sum(simulate_output(window, weight))`` for every
+        window and every weight channel. The PRNU gain is the same as ``simulate_output``, and
+        the read noise of all elements in one window is drawn at once, since the sum of
+        ``N`` i.i.d. ``Norm(noise)`` is ``Norm(sqrt(N) * noise)``.
+
+        Args:
+            input_windows: input windows in a shape of (..., height, width).
+            weight_signal: the weight signal in a shape of (height, width, channel).
+
+        Returns:
+            tensor: accumulated values in a shape of (..., channel).
+        """
+        if not self.enable_compute:
+            raise Exception("Compute needs to be enabled to accumulate current mirror outputs.")
+
+        window_shape = weight_signal.shape[:2]
+        if input_windows.shape[-2:] != window_shape:
+            raise Exception("Input windows and weight_signal need to be in the same window shape.")
+
+        if self.enable_prnu:
+            if self.prnu_gain is None or self.prnu_gain.shape != window_shape:
                 # generate random gain values
-                self.prnu_gain = self.rs.normal(
+                self.prnu_gain = _draw_fixed_pattern_noise(
+                    self,
                     loc = self.gain,
                     scale = self.gain * self.prnu_std,
-                    size = input_shape
+                    size = window_shape
                 )
-            input_after_gain = self.prnu_gain * output_signal
+            weight_after_gain = self.prnu_gain[:, :, np.newaxis] * weight_signal
         else:
-            input_after_gain = self.gain * output_signal
+            weight_after_gain = self.gain * weight_signal
 
-        input_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = input_shape
-        ) + input_after_gain
+        output_signal = np.tensordot(input_windows, weight_after_gain, axes = ([-2, -1], [0, 1]))
+        output_after_noise = add_normal_noise(
+            self.rs,
+            output_signal,
+            scale = self.noise * np.sqrt(window_shape[0] * window_shape[1])
+        )
 
-        return input_after_noise
+        return output_after_noise
 
     def __str__(self):
         return self.name
@@ -388,14 +730,14 @@ class PassiveSwitchedCapacitorArrayFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal_list: list):
+    def simulate_output(self, input_signal_list: list, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal_list: a list of input signals to passive switched capacitor array.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: averaged signal value after passive switched capacitor array.
@@ -411,22 +753,83 @@ class PassiveSwitchedCapacitorArrayFunc(object):
             if input_signal.shape != input_shape:
                 raise Exception("Input signal shapes in list are not consistent!")
 
-        average_input_signal = np.zeros(input_shape)
+        # accumulate the inputs in the output, no intermediate sum is needed.
+        input_after_noise = _new_output(input_shape, out)
+        input_after_noise[...] = input_signal_list[0]
+        for input_signal in input_signal_list[1:]:
+            input_after_noise += input_signal
+        input_after_noise /= len(input_signal_list)
 
-        for input_signal in input_signal_list:
-            average_input_signal += input_signal
+        add_normal_noise(self.rs, input_after_noise, self.noise)
+
+        return input_after_noise
 
-        average_input_signal = average_input_signal / len(input_signal_list)
+    def simulate_window_output(self, window_signal, axis, *, out = None):
+        """average the input signals stacked along ``axis`` and apply noise
 
-        input_shape = average_input_signal.shape
+        This is the list-free version of ``simulate_output``, e.g., for a view of binning windows,
+        the input signals are the slices of ``window_signal`` along ``axis``.
 
-        input_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = input_shape
-        ) + average_input_signal
+        Args:
+            window_signal: the stacked input signals to passive switched capacitor array.
+            axis (tuple): the axes that the input signals are stacked along.
+            out: an optional array to write the output into.
+
+        Returns:
+            2D/3D tensor: averaged signal value after passive switched capacitor array.
+        """
+        output_shape, axis = _reduced_shape(window_signal.shape, axis)
+        num_input = int(np.prod([window_signal.shape[a] for a in axis]))
+        if num_input != self.num_capacitor:
+            raise Exception(
+                "Number of input signals (%d) needs to be equal to the number of capacitor (%d)!"\
+                % (num_input, self.num_capacitor))
+
+        input_after_noise = _new_output(output_shape, out)
+        np.mean(window_signal, axis = axis, out = input_after_noise)
+
+        add_normal_noise(self.rs, input_after_noise, self.noise)
 
         return input_after_noise
 
+    def simulate_moments(self, input_moments_list: list):
+        """propagate the per-pixel mean and variance of the input signals
+
+        Args:
+            input_moments_list: a list of moments of independent input signals.
+
+        Returns:
+            SignalMoments: moments of the averaged signal after passive switched capacitor array.
+        """
+        if len(input_moments_list) != self.num_capacitor:
+            raise Exception(
+                "Input signal list length (%d) needs to be equal to the number of capacitor (%d)!"\
+                % (len(input_moments_list), self.num_capacitor))
+
+        return _average_moments(input_moments_list, self.noise)
+
+    def simulate_window_moments(self, window_moments, axis):
+        """propagate the per-pixel mean and variance of the input signals stacked along ``axis``
+
+        Args:
+            window_moments (SignalMoments): moments of the stacked input signals.
+            axis (tuple): the axes that the input signals are stacked along.
+
+        Returns:
+            SignalMoments: moments of the averaged signal after passive switched capacitor array.
+        """
+        _, axis = _reduced_shape(window_moments.mean.shape, axis)
+        num_input = int(np.prod([window_moments.mean.shape[a] for a in axis]))
+        if num_input != self.num_capacitor:
+            raise Exception(
+                "Number of input signals (%d) needs to be equal to the number of capacitor (%d)!"\
+                % (num_input, self.num_capacitor))
+
+        return SignalMoments(
+            mean = np.mean(window_moments.mean, axis = axis),
+            var = np.sum(window_moments.var, axis = axis) / num_input ** 2 + self.noise ** 2
+        )
+
     def __str__(self):
         return self.name
 
@@ -459,14 +862,14 @@ class MaximumVoltageFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal_list: list):
+    def simulate_output(self, input_signal_list: list, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal_list: a list of input signals to maximum voltage.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: maximum signal after maximum voltage.
@@ -477,15 +880,36 @@ class MaximumVoltageFunc(object):
             if input_signal.shape != input_shape:
                 raise Exception("In 'MaximumVoltageFunc', input signal shapes in list are not consistent!")
 
-        max_signal = np.zeros(input_shape)
+        max_signal = _new_output(input_shape, out)
+        max_signal.fill(0)
 
         for input_signal in input_signal_list:
-            max_signal = np.maximum(input_signal, max_signal)
+            np.maximum(input_signal, max_signal, out = max_signal)
 
-        max_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = input_shape
-        ) + max_signal
+        max_after_noise = add_normal_noise(self.rs, max_signal, self.noise)
+
+        return max_after_noise
+
+    def simulate_window_output(self, window_signal, axis, *, out = None):
+        """apply maximum and noise to the input signals stacked along ``axis``
+
+        This is the list-free version of ``simulate_output``, e.g., for a view of pooling windows,
+        the input signals are the slices of ``window_signal`` along ``axis``.
+
+        Args:
+            window_signal: the stacked input signals to maximum voltage.
+            axis (tuple): the axes that the input signals are stacked along.
+            out: an optional array to write the output into.
+
+        Returns:
+            2D/3D tensor: maximum signal after maximum voltage.
+        """
+        output_shape, axis = _reduced_shape(window_signal.shape, axis)
+        max_signal = _new_output(output_shape, out)
+        # the same as starting from a zero signal in ``simulate_output``.
+        np.max(window_signal, axis = axis, out = max_signal, initial = 0)
+
+        max_after_noise = add_normal_noise(self.rs, max_signal, self.noise)
 
         return max_after_noise
 
@@ -535,37 +959,44 @@ class PixelwiseFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal):
+    def simulate_output(self, input_signal, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal: the input signals.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: signal values after processed by analog component.
         """
         input_shape = input_signal.shape
         if self.enable_prnu:
-            if self.prnu_gain is None or self.prnu_gain.shape != input_signal.shape:
-                self.prnu_gain = self.rs.normal(
-                    loc = self.gain,
-                    scale = self.gain * self.prnu_std,
-                    size = input_shape
-                )
+            self.prnu_gain = _fixed_pattern_noise(
+                self,
+                self.prnu_gain,
+                loc = self.gain,
+                scale = self.gain * self.prnu_std,
+                size = frame_shape(input_shape)
+            )
             # generate random gain values
-            input_after_gain = self.prnu_gain * input_signal
+            input_after_gain = np.multiply(input_signal, _strip_rows(self.prnu_gain, input_shape), out = _new_output(input_shape, out))
         else:
-            input_after_gain = self.gain * input_signal
+            input_after_gain = np.multiply(input_signal, self.gain, out = _new_output(input_shape, out))
 
-        input_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = input_shape
-        ) + input_after_gain
+        return add_normal_noise(self.rs, input_after_gain, self.noise)
 
-        return input_after_noise
+    def simulate_moments(self, input_moments):
+        """propagate the per-pixel mean and variance of the input signal
+
+        Args:
+            input_moments (SignalMoments): moments of the input signal.
+
+        Returns:
+            SignalMoments: moments of the signal after processed by analog component.
+        """
+        return _linear_moments(input_moments, _linear_gain(self, input_moments.mean.shape), self.noise)
 
     def __str__(self):
         return self.name
@@ -619,14 +1050,14 @@ class FloatingDiffusionFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal):
+    def simulate_output(self, input_signal, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal: the input signals.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: signal values after processed by floating diffusion. If ``enable_cds`` is
@@ -634,28 +1065,55 @@ class FloatingDiffusionFunc(object):
         """       
         input_shape = input_signal.shape
         if self.enable_prnu:
-            if self.prnu_gain is None or self.prnu_gain.shape != input_signal.shape:
-                self.prnu_gain = self.rs.normal(
-                    loc = self.gain,
-                    scale = self.gain * self.prnu_std,
-                    size = input_shape
-                )
+            self.prnu_gain = _fixed_pattern_noise(
+                self,
+                self.prnu_gain,
+                loc = self.gain,
+                scale = self.gain * self.prnu_std,
+                size = frame_shape(input_shape)
+            )
             # generate random gain values
-            input_after_gain = self.prnu_gain * input_signal
+            input_after_gain = np.multiply(input_signal, _strip_rows(self.prnu_gain, input_shape), out = _new_output(input_shape, out))
         else:
-            input_after_gain = self.gain * input_signal
+            input_after_gain = np.multiply(input_signal, self.gain, out = _new_output(input_shape, out))
 
-        reset_noise = self.rs.normal(
+        reset_noise = normal_noise(
+            self.rs,
             scale = self.noise,
-            size = input_shape
+            size = input_shape,
+            dtype = signal_dtype()
         )
-        input_after_noise = reset_noise + input_after_gain
+        input_after_noise = np.add(input_after_gain, reset_noise, out = input_after_gain)
 
         if self.enable_cds:
             return input_after_noise, reset_noise
         else:
             return input_after_noise
 
+    def simulate_moments(self, input_moments):
+        """propagate the per-pixel mean and variance of the input signal
+
+        Args:
+            input_moments (SignalMoments): moments of the input signal.
+
+        Returns:
+            SignalMoments: moments of the signal after processed by floating diffusion. If
+            ``enable_cds`` is ``True``, then the second return value is the moments of reset noise.
+        """
+        output_moments = _linear_moments(input_moments, _linear_gain(self, input_moments.mean.shape), self.noise)
+        # the reset noise is one standard normal sample scaled by ``noise``.
+        output_moments = output_moments._replace(reset = output_moments.reset + self.noise)
+
+        if self.enable_cds:
+            reset_moments = SignalMoments(
+                mean = np.zeros_like(output_moments.mean),
+                var = self.noise ** 2,
+                reset = self.noise
+            )
+            return output_moments, reset_moments
+        else:
+            return output_moments
+
     def __str__(self):
         return self.name
 
@@ -700,15 +1158,15 @@ class CorrelatedDoubleSamplingFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal, reset_noise):
+    def simulate_output(self, input_signal, reset_noise, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal: the input signals.
             reset_noise: reset noise signal from floating diffusion.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: signal values after processed by CDS.
@@ -718,27 +1176,46 @@ class CorrelatedDoubleSamplingFunc(object):
                 
         input_shape = input_signal.shape
 
-        input_diff = input_signal - reset_noise
+        input_diff = np.subtract(input_signal, reset_noise, out = _new_output(input_shape, out))
 
         if self.enable_prnu:
-            if self.prnu_gain is None or self.prnu_gain.shape != input_signal.shape:
-                self.prnu_gain = self.rs.normal(
-                    loc = self.gain,
-                    scale = self.gain * self.prnu_std,
-                    size = input_shape
-                )
+            self.prnu_gain = _fixed_pattern_noise(
+                self,
+                self.prnu_gain,
+                loc = self.gain,
+                scale = self.gain * self.prnu_std,
+                size = frame_shape(input_shape)
+            )
             # generate random gain values
-            input_after_gain = self.prnu_gain * input_diff
+            input_diff *= _strip_rows(self.prnu_gain, input_shape)
         else:
-            input_after_gain = self.gain * input_diff
+            input_diff *= self.gain
 
+        return add_normal_noise(self.rs, input_diff, self.noise)
 
-        input_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = input_shape
-        ) + input_after_gain
+    def simulate_moments(self, input_moments, reset_moments):
+        """propagate the per-pixel mean and variance of the input signal
 
-        return input_after_noise
+        The reset noise in both input signals is the same sample, so it cancels out.
+
+        Args:
+            input_moments (SignalMoments): moments of the input signal.
+            reset_moments (SignalMoments): moments of the reset noise signal from floating diffusion.
+
+        Returns:
+            SignalMoments: moments of the signal after processed by CDS.
+        """
+        if input_moments.mean.shape != reset_moments.mean.shape:
+            raise Exception("input_signal and reset_noise need to be the same shape in 'CorrelatedDoubleSamplingFunc'")
+
+        diff_moments = SignalMoments(
+            mean = input_moments.mean - reset_moments.mean,
+            var = np.maximum(
+                input_moments.var + reset_moments.var - 2 * input_moments.reset * reset_moments.reset, 0
+            ),
+            reset = input_moments.reset - reset_moments.reset
+        )
+        return _linear_moments(diff_moments, _linear_gain(self, diff_moments.mean.shape), self.noise)
 
     def __str__(self):
         return self.name
@@ -784,15 +1261,15 @@ class ComparatorFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal1, input_signal2):
+    def simulate_output(self, input_signal1, input_signal2, *, out = None):
         """apply gain and noise to input signals.
 
         Args:
             input_signal1: the first input signal.
             input_signal2: the second input signal.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: signal values in ``input_signal1`` that are greater that corresponding values in ``input_signal2``. Otherwise, output zeros.
@@ -801,28 +1278,27 @@ class ComparatorFunc(object):
             raise Exception("two inputs to 'ComparatorFunc' should be in the same shape.")
 
         input_shape = input_signal1.shape
-        input_diff = input_signal1 - input_signal2
+        input_diff = np.subtract(input_signal1, input_signal2, dtype = signal_dtype())
         
         if self.enable_prnu:
-            if self.prnu_gain is None or self.prnu_gain.shape != input_signal1.shape:
-                self.prnu_gain = self.rs.normal(
-                    loc = self.gain,
-                    scale = self.gain * self.prnu_std,
-                    size = input_shape
-                )
+            self.prnu_gain = _fixed_pattern_noise(
+                self,
+                self.prnu_gain,
+                loc = self.gain,
+                scale = self.gain * self.prnu_std,
+                size = frame_shape(input_shape)
+            )
             # generate random gain values
-            input_after_gain = self.prnu_gain * input_diff
+            input_diff *= _strip_rows(self.prnu_gain, input_shape)
         else:
-            input_after_gain = self.gain * input_diff
+            input_diff *= self.gain
 
-        input_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = input_shape
-        ) + input_after_gain
+        input_after_noise = add_normal_noise(self.rs, input_diff, self.noise)
 
         # find value less than 0 and mask them 0.
-        result = copy.deepcopy(input_signal1)
-        result[input_after_noise<0] = 0
+        result = _new_output(input_shape, out)
+        np.copyto(result, input_signal1)
+        result[input_after_noise < 0] = 0
 
         return result
 
@@ -883,54 +1359,125 @@ class ColumnwiseFunc(object):
             raise Exception("Insufficient parameters: noise is None.")
 
         # initialize random number generator
-        random_seed = int(time.time())
-        self.rs = np.random.RandomState(random_seed)
+        self.rs = new_generator()
 
-    def simulate_output(self, input_signal):
+    def simulate_output(self, input_signal, *, out = None):
         """apply gain and noise to input signal
 
         Args:
             input_signal: the input signals.
+            out: an optional array to write the output into.
 
         Returns:
             2D/3D tensor: signal values after processed by column-wise noise component.
         """  
-        if len(input_signal.shape) != 3:
+        if len(frame_shape(input_signal.shape)) != 3:
             raise Exception("input signal in noise model needs to be in (height, width, channel) 3D shape.")
                 
-        input_height, input_width, input_channel = input_signal.shape
+        input_height, input_width, input_channel = frame_shape(input_signal.shape)
+        output_signal = _new_output(input_signal.shape, out)
         if self.enable_offset:
-            input_signal += self.pixel_offset_voltage
-        if self.enable_prnu:
-            if self.prnu_gain is None or self.prnu_gain.shape != input_signal.shape:
-                self.prnu_gain = np.repeat(
-                    np.repeat(
-                        self.rs.normal(
-                            loc = self.gain,
-                            scale = self.gain * self.prnu_std,
-                            size = (1, input_width, 1)
-                        ),
-                        input_height,
-                        axis = 0
-                    ),
-                    input_channel,
-                    axis = 2
-                )
-            # generate random gain values
-            input_after_gain = self.prnu_gain * input_signal
+            # don't add the offset in place, the input belongs to the caller.
+            np.add(input_signal, self.pixel_offset_voltage, out = output_signal)
         else:
-            input_after_gain = self.gain * input_signal
+            output_signal[...] = input_signal
+        output_signal *= self._column_gain(input_width)
 
-        input_after_noise = self.rs.normal(
-            scale = self.noise,
-            size = (input_height, input_width, input_channel)
-        ) + input_after_gain
+        input_after_noise = add_normal_noise(self.rs, output_signal, self.noise)
 
         if self.enable_offset:
-            input_after_gain += self.col_offset_voltage
+            input_after_noise += self.col_offset_voltage
 
         return input_after_noise
 
+    def _column_gain(self, input_width):
+        # the gain of each column, it is broadcast to all rows and channels.
+        if not self.enable_prnu:
+            return self.gain
+        if self.prnu_gain is None or self.prnu_gain.shape != (1, input_width, 1):
+            # generate random gain values
+            self.prnu_gain = _draw_fixed_pattern_noise(
+                self,
+                loc = self.gain,
+                scale = self.gain * self.prnu_std,
+                size = (1, input_width, 1)
+            )
+        return self.prnu_gain
+
+    def simulate_moments(self, input_moments):
+        """propagate the per-pixel mean and variance of the input signal
+
+        Args:
+            input_moments (SignalMoments): moments of the input signal.
+
+        Returns:
+            SignalMoments: moments of the signal after processed by column-wise noise component.
+        """
+        # leading axes, e.g., stacked input signals, share the gains of the columns.
+        if len(input_moments.mean.shape) < 3:
+            raise Exception("input signal in noise model needs to be in (height, width, channel) 3D shape.")
+        gain = self._column_gain(input_moments.mean.shape[-2])
+        if self.enable_offset:
+            return _linear_moments(
+                input_moments._replace(mean = input_moments.mean + self.pixel_offset_voltage),
+                gain,
+                self.noise,
+                offset = self.col_offset_voltage
+            )
+        return _linear_moments(input_moments, gain, self.noise)
+
+    def simulate_average_moments(self, stacked_moments, axis):
+        """propagate the per-pixel mean and variance of the input signals stacked along ``axis``
+
+        This is the analytic counterpart of ``simulate_average_output``, the input signals are
+        independent.
+
+        Args:
+            stacked_moments (SignalMoments): moments of the stacked input signals.
+            axis (tuple): the axes that the input signals are stacked along.
+
+        Returns:
+            SignalMoments: moments of the averaged signal.
+        """
+        output_moments = self.simulate_moments(stacked_moments)
+        _, axis = _reduced_shape(output_moments.mean.shape, axis)
+        num_input = int(np.prod([output_moments.mean.shape[a] for a in axis]))
+        return SignalMoments(
+            mean = np.mean(output_moments.mean, axis = axis),
+            var = np.sum(output_moments.var, axis = axis) / num_input ** 2
+        )
+
+    def simulate_average_output(self, stacked_signal, axis, *, out = None):
+        """apply gain and noise to the input signals stacked along ``axis`` and average them
+
+        This is the list-free version of averaging the outputs of ``simulate_output`` over many
+        input signals, e.g., the positions of a binning window. All input signals are processed
+        in one pass, in a single buffer.
+
+        Args:
+            stacked_signal: the stacked input signals, the last three axes are still
+                (height, width, channel).
+            axis (tuple): the axes that the input signals are stacked along, they need to be
+                in front of the height axis.
+            out: an optional array to write the output into.
+
+        Returns:
+            2D/3D tensor: averaged signal values after processed by column-wise noise component.
+        """
+        output_shape, axis = _reduced_shape(stacked_signal.shape, axis)
+        if max(axis) >= len(stacked_signal.shape) - 3:
+            raise Exception("In 'ColumnwiseFunc', input signals need to be stacked in front of the height axis.")
+
+        signal_after_noise = _new_output(stacked_signal.shape, None)
+        signal_after_noise[...] = stacked_signal
+        # every row of every input signal has the gain of its column, so all rows are
+        # processed as the rows of one frame, in place.
+        row_shape = (1, ) * _current_num_frame_axes() + (-1, ) + stacked_signal.shape[-2:]
+        row_signal = signal_after_noise.reshape(row_shape)
+        self.simulate_output(row_signal, out = row_signal)
+
+        return np.mean(signal_after_noise, axis = axis, out = _new_output(output_shape, out))
+
     def __str__(self):
         return self.name
 
@@ -1,8 +1,10 @@
-from inspect import signature
+import numpy as np
+from inspect import signature, Parameter
 from math import sqrt
 
 # import local modules
 from camj.general.flags import OP_TEMP, ELECTRON_CHARGE, K_B
+from camj.analog.function_model import SignalMoments
 
 def _cap_thermal_noise(capacitance):
 
@@ -21,51 +23,167 @@ def _single_pole_rc_circuit_thermal_noise(num_transistor, inversion_level, capac
 
     return sqrt(num_transistor * ELECTRON_CHARGE / (2 * gm_id_ratio * capacitance))
 
+def _sliding_window_view(input_signal, window_shape, stride):
+    # a read-only view of all convolution windows over the last two axes in a shape of
+    # (..., out_height, out_width, window_height, window_width), no data is copied.
+    windows = np.lib.stride_tricks.sliding_window_view(input_signal, window_shape, axis = (-2, -1))
+    return windows[..., ::stride[0], ::stride[1], :, :]
 
-def process_signal_stage(stage, input_signals):
+def _kernel_windows(input_signal, kernel_size):
+    # a (..., height // kh, kh, width // kw, kw, channel) view of the non-overlapping (kh, kw)
+    # windows of a (..., height, width, channel) signal, the window axes are -4 and -2.
+    kh, kw = kernel_size[:2]
+    height, width, channel = input_signal.shape[-3:]
+    out_height, out_width = height // kh, width // kw
+    if out_height == 0 or out_width == 0:
+        raise Exception(
+            "Input signal (%d, %d) is smaller than the kernel (%d, %d)." % (height, width, kh, kw)
+        )
+    # the trailing rows and columns that don't fill a window are dropped, as in a convolution
+    # without padding. Only dropping columns makes the signal non-contiguous and copies it.
+    input_signal = input_signal[..., :out_height * kh, :out_width * kw, :]
+    return input_signal.reshape(input_signal.shape[:-3] + (out_height, kh, out_width, kw, channel))
 
-    output_signals = []
+def _window_stack(windows):
+    # a (..., kh, kw, out_height, out_width, channel) view of the windows of ``_kernel_windows``,
+    # the kernel positions are in front of the frame, as a stack of signals. No data is copied.
+    return np.moveaxis(windows, (-4, -2), (-5, -4))
+
+def _num_signal_inputs(stage):
+    # the number of input signals of ``stage.simulate_output``, keyword-only parameters,
+    # e.g., ``out``, are not input signals.
     sig = signature(stage.simulate_output)
-    
-    if len(sig.parameters) == 1:
+    return len([
+        p for p in sig.parameters.values() if p.kind != Parameter.KEYWORD_ONLY
+    ])
+
+
+class FunctionalPlan(tuple):
+    """a compiled functional pipeline, see ``compile_functional_pipeline``."""
+
+    def compiled_from(self, functional_pipeline_list):
+        """whether this plan runs exactly the function models of ``functional_pipeline_list``."""
+        if len(self) != len(functional_pipeline_list):
+            return False
+        for step, stage in zip(self, functional_pipeline_list):
+            stages = stage if isinstance(stage, (tuple, list)) else [stage]
+            if len(step) != len(stages) or any(s is not step_stage for s, (step_stage, _) in zip(stages, step)):
+                return False
+        return True
+
+
+def compile_functional_pipeline(functional_pipeline_list, plan = None):
+    """Compile Functional Pipeline
+
+    Resolve the number of input signals of every function model in a functional pipeline once,
+    so ``default_functional_simulation`` runs the pipeline without inspecting the models on
+    every call. A model that returns a tuple, e.g., ``FloatingDiffusionFunc`` with CDS, has all
+    its returned signals passed on.
+
+    Args:
+        functional_pipeline_list (list): a list of function models, an item can also be a tuple
+            or a list of function models that all take the outputs of the previous item.
+        plan (FunctionalPlan): a previously compiled plan, it is returned as it is if it is
+            compiled from the same function models. The default value is ``None``.
+
+    Returns:
+        Plan (FunctionalPlan): a tuple of steps, each step is a tuple of
+        ``(function model, num_inputs)``.
+    """
+    if plan is not None and plan.compiled_from(functional_pipeline_list):
+        return plan
+
+    plan = []
+    for stage in functional_pipeline_list:
+        stages = stage if isinstance(stage, (tuple, list)) else [stage]
+        step = []
+        for s in stages:
+            num_inputs = _num_signal_inputs(s)
+            if num_inputs not in (1, 2):
+                raise Exception("Incompatible input and processing stage pair!")
+            step.append((s, num_inputs))
+        plan.append(tuple(step))
+
+    return FunctionalPlan(plan)
+
+
+def _run_stage(stage, num_inputs, input_signals, output_signals, simulate_name = "simulate_output"):
+    # run one function model and append its output signals to ``output_signals``, the model
+    # runs ``simulate_output``, or ``simulate_moments`` to propagate signal moments.
+    simulate = getattr(stage, simulate_name)
+    if num_inputs == 1:
         for input_signal in input_signals:
-            output_signal = stage.simulate_output(input_signal)
-            if isinstance(output_signal, tuple):
-                for item in output_signal:
-                    output_signals.append(item)
-            else:
-                output_signals.append(output_signal)
-    elif len(sig.parameters) == 2:
+            _append_output(simulate(input_signal), output_signals)
+    else:
         if len(input_signals) != 2:
             raise Exception("Input for this stage needs to be 2!")
-        output_signal = stage.simulate_output(input_signals[0], input_signals[1])
-        if isinstance(output_signal, tuple):
-                for item in output_signal:
-                    output_signals.append(item)
-        else:
-            output_signals.append(output_signal)
+        _append_output(simulate(input_signals[0], input_signals[1]), output_signals)
+
+
+def _append_output(output_signal, output_signals):
+    # a model that returns a tuple of signals, e.g., ``FloatingDiffusionFunc`` with CDS, has
+    # all its signals appended, ``SignalMoments`` is one signal.
+    if isinstance(output_signal, tuple) and not isinstance(output_signal, SignalMoments):
+        output_signals.extend(output_signal)
     else:
+        output_signals.append(output_signal)
+
+
+def process_signal_stage(stage, input_signals):
+
+    output_signals = []
+    num_inputs = _num_signal_inputs(stage)
+    if num_inputs not in (1, 2):
         raise Exception("Incompatible input and processing stage pair!")
+    _run_stage(stage, num_inputs, input_signals, output_signals)
 
     return output_signals
 
 def default_functional_simulation(functional_pipeline_list, input_list):
+    """Run a functional pipeline
 
-    curr_input = input_list
-    curr_output = []
+    Args:
+        functional_pipeline_list: a plan from ``compile_functional_pipeline``, or a list of
+            function models, which is compiled on every call.
+        input_list (list): a list of input signals.
 
-    for stage in functional_pipeline_list:
-        if isinstance(stage, tuple) or isinstance(stage, list):
-            for s in stage:
-                output_signals = process_signal_stage(s, curr_input)
-                for output_signal in output_signals:
-                    curr_output.append(output_signal)
-        else:
-            output_signals = process_signal_stage(stage, curr_input)
-            for output_signal in output_signals:
-                curr_output.append(output_signal)
+    Returns:
+        Output signals (list): the output signals of the last step.
+    """
+    if not isinstance(functional_pipeline_list, FunctionalPlan):
+        functional_pipeline_list = compile_functional_pipeline(functional_pipeline_list)
 
+    curr_input = input_list
+    for step in functional_pipeline_list:
+        curr_output = []
+        for stage, num_inputs in step:
+            _run_stage(stage, num_inputs, curr_input, curr_output)
         curr_input = curr_output
+
+    return curr_input
+
+def default_moment_simulation(functional_pipeline_list, input_moments_list):
+    """Propagate signal moments through a functional pipeline
+
+    The analytic counterpart of ``default_functional_simulation``, every function model runs
+    ``simulate_moments`` instead of ``simulate_output``.
+
+    Args:
+        functional_pipeline_list: a plan from ``compile_functional_pipeline``, or a list of
+            function models, which is compiled on every call.
+        input_moments_list (list): a list of input ``SignalMoments``.
+
+    Returns:
+        Output moments (list): the output moments of the last step.
+    """
+    if not isinstance(functional_pipeline_list, FunctionalPlan):
+        functional_pipeline_list = compile_functional_pipeline(functional_pipeline_list)
+
+    curr_input = input_moments_list
+    for step in functional_pipeline_list:
         curr_output = []
+        for stage, num_inputs in step:
+            _run_stage(stage, num_inputs, curr_input, curr_output, simulate_name = "simulate_moments")
+        curr_input = curr_output
 
-    return curr_input
\ No newline at end of file
+    return curr_input
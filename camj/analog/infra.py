@@ -1,8 +1,24 @@
 import numpy as np
 import copy
+from inspect import signature
 
+from camj.analog import energy_model
 from camj.analog.component import Voltage2VoltageConv, Time2VoltageConv, BinaryWeightConv,\
                                 PassiveBinning, ActiveAverage, ActiveBinning, MaxPool
+from camj.analog.function_model import _advance_row_strip
+
+
+def _row_geometry(component):
+    """the row geometry ``(kernel_rows, stride_rows)`` of a component, one output row is
+    computed from ``kernel_rows`` input rows every ``stride_rows`` rows."""
+    if getattr(component, "kernel_size", None) is None:
+        return 1, 1
+    if isinstance(component, (Voltage2VoltageConv, Time2VoltageConv, BinaryWeightConv)):
+        return component.kernel_size[0], component.stride[0]
+    if isinstance(component, (PassiveBinning, ActiveBinning, MaxPool)):
+        return component.kernel_size[0], component.kernel_size[0]
+    return 1, 1
+
 
 class AnalogComponent(object):
     """Analog Component
@@ -86,7 +102,30 @@ class AnalogComponent(object):
 
         return total_energy
 
-    
+    def _energy_batch(self, param_overrides, used_keys, relative=False):
+        """Calculate the energy of this component with overridden energy model parameters.
+
+        See ``AnalogArray.energy_batch`` for the format of ``param_overrides``. Keys that match at
+        least one energy model parameter are added to ``used_keys``.
+        """
+        component_overrides = {}
+        for key, value in param_overrides.items():
+            if "." in key:
+                component_name, param = key.split(".", 1)
+                if component_name != self.name:
+                    continue
+            else:
+                param = key
+            component_overrides[param] = (key, value)
+
+        total_energy = 0
+        for comp, count in self.component_list:
+            total_energy += _override_energy_models(
+                comp, component_overrides, used_keys, relative
+            ).energy() * count
+
+        return total_energy
+
     def noise(self, input_signal_list):
         """Noise Simulation
 
@@ -100,7 +139,8 @@ class AnalogComponent(object):
         Returns:
             Simulated output signal after each analog component (dict)
         """
-        output_signal_list = copy.deepcopy(input_signal_list)
+        # function models never modify their inputs, no need to copy the signals.
+        output_signal_list = list(input_signal_list)
 
         for component in self.component_list:
             output_signal_list = component.noise(output_signal_list)
@@ -253,7 +293,62 @@ class AnalogArray(object):
 
         return total_compute_energy
 
-    def noise(self, input_signal_list: list):
+    def energy_batch(self, param_overrides: dict, relative: bool = False):
+        """Vectorized energy consumption over parameter sweeps
+
+        Calculate the energy needed to generate the given output shape for many parameter
+        settings at once. Instead of constructing one analog array per design point, every
+        overridden parameter holds an array of values and all energy models are evaluated
+        once with broadcasting.
+
+        Args:
+            param_overrides (dict): a dict that maps a parameter key to an array of values.
+                A key is an argument name of the energy models in ``analog.energy_model``,
+                e.g. ``"supply"``, ``"load_capacitance"`` or ``"tech_node"``, which overrides
+                that argument in every energy model that has it. To only override the
+                energy models in one ``AnalogComponent``, prefix the argument with the
+                component's name, e.g. ``"ColumnAmplifier.t_hold"``.
+            relative (bool): if ``True``, the override values are scaling factors applied to
+                the current value of each overridden argument instead of absolute values. This
+                is useful when one key matches energy models with different parameter values.
+                Arguments that an energy model derives from the others (``None``, e.g., ``i_dc``
+                of ``CurrentMirror``) can't be scaled.
+
+        Examples:
+            Sweep the supply voltage of all components and the load capacitance of the
+            column amplifier at 10k design points.
+
+            >>> analog_array.energy_batch({
+                "supply": np.linspace(1.0, 1.8, 10000),
+                "ColumnAmplifier.load_capacitance": np.full(10000, 1e-12),
+            })
+
+        Return:
+            Energy (np.ndarray): energy consumption in J, broadcast across all override arrays.
+        """
+        param_overrides = {key: np.asarray(value) for key, value in param_overrides.items()}
+        shape = np.broadcast_shapes(*[value.shape for value in param_overrides.values()])
+
+        used_keys = set()
+        total_compute_energy = np.zeros(shape)
+        for component in self.components:
+            output_ratio = self._calc_output_ratio(
+                self.num_output,
+                component.num_output
+            )
+            total_compute_energy = total_compute_energy + \
+                component._energy_batch(param_overrides, used_keys, relative) * output_ratio
+
+        unused_keys = set(param_overrides) - used_keys
+        if len(unused_keys) > 0:
+            raise Exception(
+                "In '%s', parameter override(s) %s do not match any energy model." \
+                % (self.name, sorted(unused_keys))
+            )
+
+        return total_compute_energy
+
+    def noise(self, input_signal_list: list, probes = None):
         """Function and Noise Simulation
 
         This function will iterate each component in the component list and perform
@@ -261,27 +356,103 @@ class AnalogArray(object):
 
         Args:
             input_signal_list (list): a list of input signal to this analog array.
+            probes (set): if not ``None``, only the outputs of the sub-components whose
+                hierarchical keys (see ``probe_keys``) are in ``probes`` are kept, the other
+                intermediate signals are released as soon as the next sub-component has run.
+                The default value is ``None``, which keeps all outputs.
 
         Returns:
             Simulation result (list): the signal simulation result after each analog component.
             Each item in this list is a tuple in (component_name, output_signal_list) format.
+            With ``probes``, the items are in (key, output_signal_list) format, and the output
+            of this array is always the last item, its key is ``None`` if it is not probed.
         """
-        output_signal_list = copy.deepcopy(input_signal_list)
+        keys = self.probe_keys() if probes is not None else None
+        # function models never modify their inputs, no need to copy the signals.
+        output_signal_list = list(input_signal_list)
         simulation_res = []
+        i = 0
         # iterate components in order and model noise suquentially
         for component in self.components:
             # also iterate the sub-components
             for subcomponent, _ in component.component_list:
                 subcomponent_name, output_signal_list = subcomponent.noise(output_signal_list)
-                simulation_res.append(
-                    (
-                        subcomponent_name,
-                        output_signal_list
+                # a convolution or a binning shrinks the current row strip, see ``row_strip``.
+                _advance_row_strip(*_row_geometry(subcomponent))
+                if probes is None:
+                    simulation_res.append(
+                        (
+                            subcomponent_name,
+                            output_signal_list
+                        )
                     )
-                )
+                elif keys[i] in probes:
+                    simulation_res.append((keys[i], output_signal_list))
+                i += 1
+
+        if probes is not None and keys[-1] not in probes:
+            simulation_res.append((None, output_signal_list))
+
+        return simulation_res
+
+    def moments(self, input_moments_list: list):
+        """Signal Moment Propagation
+
+        The analytic counterpart of ``noise``, the per-pixel mean and variance of the signals are
+        propagated through each component instead of noisy samples, see
+        ``analog.function_model.SignalMoments``. Non-linear components, e.g., comparators and
+        max pooling, don't support it.
+
+        Args:
+            input_moments_list (list): a list of input signal moments to this analog array.
+
+        Returns:
+            Simulation result (list): the output moments after each analog component. Each item
+            in this list is a tuple in (component_name, output_moments_list) format.
+        """
+        output_moments_list = list(input_moments_list)
+        simulation_res = []
+        for component in self.components:
+            for subcomponent, _ in component.component_list:
+                if not hasattr(subcomponent, "moments"):
+                    raise Exception(
+                        "'%s' in '%s' doesn't support signal moment propagation." \
+                        % (type(subcomponent).__name__, self.name)
+                    )
+                subcomponent_name, output_moments_list = subcomponent.moments(output_moments_list)
+                simulation_res.append((subcomponent_name, output_moments_list))
 
         return simulation_res
 
+    def probe_keys(self):
+        """Probe Keys
+
+        The hierarchical key of each sub-component output, in the order of ``noise``. Each key is
+        in ``array/component/subcomponent`` format, e.g., ``PixelArray/Pixel/ActivePixelSensor``.
+        If a key repeats in this array, ``_1``, ``_2``, ... is appended to it.
+
+        Returns:
+            Keys (list): a list of keys.
+        """
+        keys = []
+        for component in self.components:
+            for subcomponent, _ in component.component_list:
+                key = "%s/%s/%s" % (self.name, component.name, subcomponent.name)
+                if key in keys:
+                    key = "%s_%d" % (key, len([k for k in keys if k.startswith(key + "_")]) + 1)
+                keys.append(key)
+
+        return keys
+
+    def _row_geometry(self):
+        """the row geometry ``(kernel_rows, stride_rows)`` of each sub-component, in the order
+        of ``noise``."""
+        return [
+            _row_geometry(subcomponent)
+            for component in self.components
+            for subcomponent, _ in component.component_list
+        ]
+
     def _set_source_component(self, source_components: list):
         """Set Source Component
 
@@ -329,6 +500,70 @@ class AnalogArray(object):
         return self.name
 
 
+# this function returns a shallow copy of an analog component (e.g., ``ActivePixelSensor``)
+# whose energy models are rebuilt with the overridden parameters. Energy models derive some
+# quantities (e.g., the bias current) in their constructors, so they are rebuilt rather than patched.
+# The other arguments are taken from the constructor arguments of the model, see ``_init_arg``.
+def _override_energy_models(comp, overrides, used_keys, relative=False):
+    new_comp = None
+    for attr_name, model in vars(comp).items():
+        if type(model).__module__ != energy_model.__name__:
+            continue
+
+        params = signature(type(model).__init__).parameters
+        model_overrides = {
+            param: value for param, value in overrides.items() if param in params
+        }
+        if len(model_overrides) == 0:
+            continue
+
+        kwargs = {}
+        for param in list(params)[1:]:
+            if param in model_overrides:
+                key, value = model_overrides[param]
+                if relative:
+                    # non-scalar arguments (e.g., capacitance lists) keep their leading axes.
+                    value = np.multiply.outer(_scalable_init_arg(model, param), value)
+                kwargs[param] = value
+                used_keys.add(key)
+            else:
+                kwargs[param] = _init_arg(model, param)
+
+        if new_comp is None:
+            new_comp = copy.copy(comp)
+        setattr(new_comp, attr_name, type(model)(**kwargs))
+
+    return comp if new_comp is None else new_comp
+
+
+def _init_arg(model, param):
+    # the constructor argument ``param`` of an energy model. A ``None`` argument is derived by
+    # the constructor, it stays ``None`` so it is derived again from the overridden parameters.
+    # Other arguments follow later changes of the attribute of the same name.
+    value = model._init_args[param]
+    return value if value is None else getattr(model, param, value)
+
+
+def _scalable_init_arg(model, param):
+    # the constructor argument ``param`` of an energy model as an array that relative overrides
+    # scale. Derived (``None``) and non-numerical arguments can't be scaled.
+    value = _init_arg(model, param)
+    if value is None:
+        reason = "derived from other arguments"
+    elif isinstance(value, (bool, str)):
+        reason = "not a number"
+    else:
+        try:
+            return np.asarray(value, dtype = float)
+        except (TypeError, ValueError):
+            reason = "not a number"
+
+    raise Exception(
+        "In '%s', argument '%s' is %s, it can't be scaled by a relative override." \
+        % (type(model).__name__, param, reason)
+    )
+
+
 # this function is used to convert size (H, W, C) to (X, Y, Z)
 # it is hard to change the internal simulation code, this is an easy fix!
 def _convert_hwc_to_xyz(name, size_list):
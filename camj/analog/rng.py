@@ -0,0 +1,271 @@
+"""Random Number Generator
+
+Every function model draws its noise from its own ``np.random.Generator(PCG64)`` stream
+created by ``new_generator``. Without a seed, each stream is seeded from fresh OS entropy.
+After ``set_seed``, the streams are spawned from one root ``np.random.SeedSequence`` in the
+order the function models are created, so the same hardware description built by the same
+script always gives the same noise, and no two streams overlap.
+
+For parallel runs, give each process its own child of the root seed, either by
+``set_seed(seed, worker_id)`` or by passing one of ``spawn_seeds(seed, num_workers)`` to
+each worker. The results then only depend on the seed and the worker id, not on how the
+work is scheduled.
+
+Fixed-pattern noise of a seeded function model is drawn from a separate stream derived from
+its seed (see ``fixed_pattern_seed``), so it can be cached across runs, see
+``camj.analog.fpn_cache``.
+
+Examples:
+        To build a reproducible hardware description:
+
+        >>> with seed_context(2023):
+                hw_desc = hw_config()
+        >>> functional_simulation(sw_desc, hw_desc, mapping, input_mapping)
+
+"""
+
+import contextlib
+from enum import Enum
+import numpy as np
+
+# root seed sequence of all function model streams, ``None`` means fresh OS entropy.
+_root_seed_sequence = None
+# the last spawn key of fixed-pattern noise streams, see ``fixed_pattern_seed``.
+_FIXED_PATTERN_KEY = 0x46504e
+# the spawn key in front of the run index of temporal noise streams, see ``reseed``.
+_RUN_KEY = 0x52554e
+
+
+def set_seed(seed, *spawn_key):
+    """Set the root seed of all generators created afterwards.
+
+    Args:
+        seed (int): the root seed, or a ``np.random.SeedSequence``, ``None`` resets to fresh
+            OS entropy.
+        spawn_key (int): optional ids, e.g., the worker id, to derive an independent child
+            of ``seed``.
+    """
+    global _root_seed_sequence
+    if seed is None:
+        _root_seed_sequence = None
+    elif isinstance(seed, np.random.SeedSequence):
+        if len(spawn_key) > 0:
+            raise Exception("spawn_key can't be used with a SeedSequence, spawn it instead.")
+        _root_seed_sequence = seed
+    else:
+        _root_seed_sequence = np.random.SeedSequence(seed, spawn_key = tuple(spawn_key))
+
+
+@contextlib.contextmanager
+def seed_context(seed, *spawn_key):
+    """Set the root seed within a context, see ``set_seed``."""
+    global _root_seed_sequence
+    prev_seed_sequence = _root_seed_sequence
+    set_seed(seed, *spawn_key)
+    try:
+        yield
+    finally:
+        _root_seed_sequence = prev_seed_sequence
+
+
+def spawn_seeds(seed, num_seeds):
+    """Spawn independent child seeds, e.g., one for each worker process.
+
+    Returns:
+        Seeds (list): a list of ``np.random.SeedSequence``, which can be passed to ``set_seed``.
+    """
+    return np.random.SeedSequence(seed).spawn(num_seeds)
+
+
+def new_generator():
+    """Create a new ``np.random.Generator(PCG64)`` stream for one function model."""
+    if _root_seed_sequence is None:
+        return np.random.Generator(np.random.PCG64())
+
+    return np.random.Generator(np.random.PCG64(_root_seed_sequence.spawn(1)[0]))
+
+
+def fixed_pattern_seed(generator):
+    """The seed of the fixed-pattern noise of a function model stream.
+
+    Fixed-pattern noise is drawn from its own stream, derived from the seed of ``generator``,
+    so it only depends on the seed, not on how much temporal noise was drawn before it.
+
+    Returns:
+        Seed (SeedSequence): the seed of the fixed-pattern noise stream, or ``None`` if
+        ``generator`` is not spawned from a root seed, e.g., it is seeded from fresh OS entropy.
+    """
+    seed_sequence = _seed_sequence(generator.bit_generator)
+    # streams spawned from a root seed, see ``new_generator`` and ``reseed``, have a spawn key.
+    if not isinstance(seed_sequence, np.random.SeedSequence) or len(seed_sequence.spawn_key) == 0:
+        return None
+
+    spawn_key = tuple(seed_sequence.spawn_key)
+    # all runs of the same sensor share the fixed-pattern noise.
+    if len(spawn_key) >= 2 and spawn_key[-2] == _RUN_KEY:
+        spawn_key = spawn_key[:-2]
+    return np.random.SeedSequence(
+        seed_sequence.entropy,
+        spawn_key = spawn_key + (_FIXED_PATTERN_KEY,)
+    )
+
+
+def _seed_sequence(bit_generator):
+    # the seed sequence of a bit generator. ``seed_seq`` is only public since NumPy 1.25, older
+    # versions keep the same object in ``_seed_seq``.
+    seed_sequence = getattr(bit_generator, "seed_seq", None)
+    if seed_sequence is None:
+        seed_sequence = getattr(bit_generator, "_seed_seq", None)
+    return seed_sequence
+
+
+def normal_noise(generator, scale, size = None, loc = 0., dtype = np.float64, out = None):
+    """Draw Gaussian samples in bulk.
+
+    This is the fast path of ``generator.normal(loc, scale, size)``, all samples are drawn
+    from the standard normal distribution in one call and then scaled and shifted in place.
+
+    Args:
+        generator: a ``np.random.Generator``.
+        scale (float): the standard deviation.
+        size (tuple): the shape of the samples, it can be ``None`` if ``out`` is given.
+        loc (float): the mean, the default value is ``0``.
+        dtype: ``np.float64`` or ``np.float32``, the default value is ``np.float64``.
+        out: an optional array to write the samples into.
+
+    Returns:
+        tensor: the samples in the shape of ``size``, or ``out``.
+    """
+    if out is None:
+        samples = generator.standard_normal(size = size, dtype = dtype)
+    elif out.flags.c_contiguous:
+        samples = generator.standard_normal(dtype = out.dtype, out = out)
+    else:
+        # the generator only fills contiguous arrays, e.g., not a channel slice.
+        out[...] = generator.standard_normal(size = out.shape, dtype = out.dtype)
+        samples = out
+
+    samples *= scale
+    if loc != 0:
+        samples += loc
+    return samples
+
+
+def poisson_noise(generator, lam, size = None, threshold = None, dtype = np.float64, out = None):
+    """Draw Poisson samples, with a normal approximation for large means.
+
+    Poisson sampling is several times slower than normal sampling. Samples whose mean ``lam``
+    is at least ``threshold`` are drawn as ``round(lam + sqrt(lam) * Norm(0, 1))`` clipped at
+    ``0``, which has the same mean and variance as ``Poisson(lam)`` and is indistinguishable
+    from it for large ``lam``. Samples below ``threshold`` are exact Poisson samples, the same
+    as ``generator.poisson(lam, size)`` if all of them are below it.
+
+    Args:
+        generator: a ``np.random.Generator``.
+        lam: the mean, a number or an array broadcastable to ``size``.
+        size (tuple): the shape of the samples, it can be ``None`` if ``out`` is given.
+        threshold (float): the smallest mean that is approximated, ``None`` always draws exact
+            Poisson samples. The default value is ``None``.
+        dtype: ``np.float64`` or ``np.float32``, the default value is ``np.float64``.
+        out: an optional array to write the samples into.
+
+    Returns:
+        tensor: the samples in the shape of ``size``, or ``out``.
+    """
+    samples = np.empty(size, dtype = dtype) if out is None else out
+    lam = np.asarray(lam)
+    if threshold is None or np.all(lam < threshold):
+        samples[...] = generator.poisson(lam, size = samples.shape)
+        return samples
+
+    lam = np.broadcast_to(lam, samples.shape)
+    normal_noise(generator, 1., out = samples)
+    samples *= np.sqrt(lam)
+    samples += lam
+    np.rint(samples, out = samples)
+    np.maximum(samples, 0, out = samples)
+
+    exact = lam < threshold
+    if np.any(exact):
+        samples[exact] = generator.poisson(lam[exact])
+    return samples
+
+
+def add_normal_noise(generator, signal, scale, chunk_size = 1 << 20):
+    """Add zero-mean Gaussian noise to a signal in place.
+
+    The noise is drawn in chunks of at most ``chunk_size`` samples, so no temporary array of
+    the size of ``signal`` is allocated. The noise is the same as one bulk draw of
+    ``normal_noise(generator, scale, signal.shape, dtype = signal.dtype)``.
+
+    Args:
+        generator: a ``np.random.Generator``.
+        signal: the signal to add noise to, it is modified in place.
+        scale (float): the standard deviation of the noise.
+        chunk_size (int): the maximum number of samples drawn at once.
+
+    Returns:
+        tensor: ``signal``.
+    """
+    if not signal.flags.c_contiguous:
+        signal += normal_noise(generator, scale, size = signal.shape, dtype = signal.dtype)
+        return signal
+
+    flat_signal = signal.reshape(-1)
+    buffer = np.empty(min(chunk_size, flat_signal.size), dtype = signal.dtype)
+    for start in range(0, flat_signal.size, chunk_size):
+        chunk = buffer[:min(chunk_size, flat_signal.size - start)]
+        generator.standard_normal(dtype = signal.dtype, out = chunk)
+        chunk *= scale
+        flat_signal[start:start + chunk.size] += chunk
+
+    return signal
+
+
+def reseed(obj, seed, run = None):
+    """Reseed all function models in an object, e.g., the analog arrays of a hardware description.
+
+    Every function model reachable from ``obj`` gets a new stream spawned from ``seed``. The
+    models are visited in a fixed order, so the streams only depend on ``seed`` and the
+    structure of ``obj``, not on when the models were created. The fixed-pattern noise maps
+    are cleared, so they are drawn again from the new streams.
+
+    Args:
+        obj: an object or a list of objects that contain function models.
+        seed (int): the seed, or a ``np.random.SeedSequence``.
+        run (int): if not ``None``, the index of a run of the same sensor. Every run has its own
+            temporal noise, but the fixed-pattern noise only depends on ``seed``. The default
+            value is ``None``.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    visited = set()
+    to_visit = [obj]
+    while len(to_visit) > 0:
+        curr = to_visit.pop()
+        if isinstance(curr, (list, tuple)):
+            to_visit.extend(reversed(curr))
+            continue
+        if isinstance(curr, dict):
+            to_visit.extend(reversed(list(curr.values())))
+            continue
+        if not hasattr(curr, "__dict__") or isinstance(curr, (type, Enum)) or id(curr) in visited:
+            continue
+
+        visited.add(id(curr))
+        if isinstance(getattr(curr, "rs", None), np.random.Generator):
+            stream_seed = seed.spawn(1)[0]
+            if run is not None:
+                stream_seed = np.random.SeedSequence(
+                    stream_seed.entropy,
+                    spawn_key = tuple(stream_seed.spawn_key) + (_RUN_KEY, run)
+                )
+            curr.rs = np.random.Generator(np.random.PCG64(stream_seed))
+            for key in ["prnu_gain", "dcnu_noise"]:
+                if hasattr(curr, key):
+                    setattr(curr, key, None)
+        for key in sorted(vars(curr), reverse = True):
+            value = vars(curr)[key]
+            if not isinstance(value, (np.ndarray, np.random.Generator)):
+                to_visit.append(value)
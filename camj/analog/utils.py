@@ -178,10 +178,12 @@ def _find_analog_output_stages(sw_stages):
     return output_stages
 
 
-def compute_total_energy(analog_arrays, analog_sw_desc, mapping):
-    """Compute Energy in Analog Domain
+def compute_analog_array_cnt(analog_arrays, analog_sw_desc, mapping):
+    """Compute Analog Array Activity
 
-    This function calculates the overall energy consumption of simulated CIS in analog domain.
+    This function calculates how many times each analog array needs to be launched to
+    generate the output of its software stages. Each analog array is also configured with
+    its software stage (e.g., kernel size) so that its ``energy()`` can be called afterwards.
 
     Args:
         analog_arrays: a list of analog arrays.
@@ -189,27 +191,48 @@ def compute_total_energy(analog_arrays, analog_sw_desc, mapping):
         mapping: software-hardware mapping.
 
     Returns:
-        Energy Result (dict): energy numbers from simulation, stores in a dictionary.
+        Activity Result (dict): the number of launches of each analog array, keyed by analog array.
     """
-    
+
     analog_to_sw = _reverse_sw_to_analog_mapping(analog_arrays, analog_sw_desc, mapping)
 
-    ret_dict = {}
+    cnt_dict = {}
     for analog_array in analog_to_sw.keys():
         # check data dependency
         output_stages = _find_analog_output_stages(analog_to_sw[analog_array])
         for output_stage in output_stages:
             sw_size = output_stage.output_size
             hw_size = analog_array.num_output
-            cnt = (sw_size[0] * sw_size[1] * sw_size[2]) / (hw_size[0] * hw_size[1] * hw_size[2])
-            print(analog_array, analog_to_sw[analog_array][0])
-            # check if the analog array contains the Conv instance and config the convolution instance
-            # if the analog_to_sw contains multiple sw_stages, we will still use the first sw stage parameters
-            # to configure the analog array computation
-            analog_array._configure_operation(sw_stage = analog_to_sw[analog_array][0])
-            analog_array_energy = analog_array.energy()
-            ret_dict[analog_array.name] = int(cnt * analog_array_energy * 1e12) # concert J to pJ
-            print("[Energy]", analog_array.name, int(cnt * analog_array_energy * 1e12), "pJ")
+            cnt_dict[analog_array] = (sw_size[0] * sw_size[1] * sw_size[2]) / (hw_size[0] * hw_size[1] * hw_size[2])
+        # check if the analog array contains the Conv instance and config the convolution instance
+        # if the analog_to_sw contains multiple sw_stages, we will still use the first sw stage parameters
+        # to configure the analog array computation
+        analog_array._configure_operation(sw_stage = analog_to_sw[analog_array][0])
+
+    return cnt_dict
+
+
+def compute_total_energy(analog_arrays, analog_sw_desc, mapping):
+    """Compute Energy in Analog Domain
+
+    This function calculates the overall energy consumption of simulated CIS in analog domain.
+
+    Args:
+        analog_arrays: a list of analog arrays.
+        sw_desc: software pipeline description corresponding to analog domain.
+        mapping: software-hardware mapping.
+
+    Returns:
+        Energy Result (dict): energy numbers from simulation, stores in a dictionary.
+    """
+    
+    cnt_dict = compute_analog_array_cnt(analog_arrays, analog_sw_desc, mapping)
+
+    ret_dict = {}
+    for analog_array, cnt in cnt_dict.items():
+        analog_array_energy = analog_array.energy()
+        ret_dict[analog_array.name] = int(cnt * analog_array_energy * 1e12) # concert J to pJ
+        print("[Energy]", analog_array.name, int(cnt * analog_array_energy * 1e12), "pJ")
 
     return ret_dict
 
@@ -0,0 +1,337 @@
+"""Digital Func Model Module
+
+This module includes the functional kernels of digital software stages, so that functional
+simulation can continue after the analog/digital boundary. A kernel is attached to a
+``ProcessStage`` or a ``DNNProcessStage`` with ``set_functional_kernel``, and
+``functional_simulation`` runs it on the outputs of the stage's input stages.
+
+.. note::
+    Digital kernels are noise-free. Every kernel takes the list of input signals in
+    (height, width, channel) shape, with any number of leading frame axes, and returns one
+    output signal, so batched frames are simulated in one pass.
+
+.. note::
+    Fixed-point arithmetic is modeled by ``FixedPoint``. A kernel with a ``quantization``
+    quantizes its weights and its output, while the accumulation is exact, which is the
+    behavior of a fixed-point MAC array with a wide accumulator.
+
+Examples:
+        To simulate a 2x2 binning followed by a quantized convolution in the digital domain:
+
+        >>> resize_stage.set_functional_kernel(ResizeFunc("Resize", kernel_size = (2, 2)))
+        >>> conv_stage.set_functional_kernel(
+                dnn_function(conv_stage, weights, quantization = FixedPoint(8, 4), relu = True)
+            )
+
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# import local modules
+from camj.analog.function_model import signal_dtype
+
+
+class FixedPoint(object):
+    """Fixed-point Quantization
+
+    Mathematical Expression:
+        output = clip(round(input * 2^frac_bits), min, max) / 2^frac_bits
+
+    Args:
+        num_bits (int): the total number of bits.
+        frac_bits (int): the number of fractional bits, the default value is ``0``.
+        signed (bool): if the numbers are signed, the default value is ``True``.
+    """
+    def __init__(self, num_bits, frac_bits = 0, signed = True):
+        super(FixedPoint, self).__init__()
+        self.num_bits = num_bits
+        self.frac_bits = frac_bits
+        self.signed = signed
+        self.scale = 2. ** frac_bits
+        if signed:
+            self.min_value = -2 ** (num_bits - 1)
+            self.max_value = 2 ** (num_bits - 1) - 1
+        else:
+            self.min_value = 0
+            self.max_value = 2 ** num_bits - 1
+
+    def __call__(self, signal):
+        output = np.multiply(signal, self.scale, dtype = signal_dtype())
+        np.rint(output, out = output)
+        np.clip(output, self.min_value, self.max_value, out = output)
+        output /= self.scale
+        return output
+
+
+def _quantize(signal, quantization):
+    if quantization is None:
+        return signal
+    return quantization(signal)
+
+
+def _single_input(name, input_signal_list):
+    if len(input_signal_list) != 1:
+        raise Exception("'%s' needs one input signal, but gets %d." % (name, len(input_signal_list)))
+    return np.asarray(input_signal_list[0], dtype = signal_dtype())
+
+
+def _pad(input_signal, kernel_size):
+    # pad ``kernel_size // 2`` zeros on both sides of the height and width axes.
+    pad_width = [(0, 0)] * (input_signal.ndim - 3) \
+        + [(kernel_size[0] // 2, kernel_size[0] // 2), (kernel_size[1] // 2, kernel_size[1] // 2), (0, 0)]
+    return np.pad(input_signal, pad_width)
+
+
+def _conv_windows(input_signal, kernel_size, stride, padding):
+    # the ``(..., out_height, out_width, channel, kernel_height, kernel_width)`` view of all
+    # kernel windows of the input.
+    if padding:
+        input_signal = _pad(input_signal, kernel_size)
+    if input_signal.shape[-3] < kernel_size[0] or input_signal.shape[-2] < kernel_size[1]:
+        raise Exception(
+            "Input signal (%d, %d) is smaller than the kernel (%d, %d)." % (
+                input_signal.shape[-3], input_signal.shape[-2], kernel_size[0], kernel_size[1]
+            )
+        )
+    windows = sliding_window_view(input_signal, tuple(kernel_size[:2]), axis = (-3, -2))
+    return windows[..., ::stride, ::stride, :, :, :]
+
+
+class ResizeFunc(object):
+    """Resize Function
+
+    Downsample the input by averaging non-overlapping windows, i.e., binning. Trailing rows and
+    columns that don't fill a window are dropped.
+
+    Args:
+        name (str): the name of the function.
+        kernel_size (tuple): the window size in (height, width).
+        quantization (FixedPoint): if not ``None``, the output is quantized, the default value
+            is ``None``.
+    """
+    def __init__(self, name, kernel_size, quantization = None):
+        super(ResizeFunc, self).__init__()
+        self.name = name
+        self.kernel_size = kernel_size
+        self.quantization = quantization
+
+    def simulate_output(self, input_signal_list):
+        input_signal = _single_input(self.name, input_signal_list)
+        kh, kw = self.kernel_size[0], self.kernel_size[1]
+        height, width = input_signal.shape[-3] // kh, input_signal.shape[-2] // kw
+        if height == 0 or width == 0:
+            raise Exception(
+                "Input signal (%d, %d) is smaller than the kernel (%d, %d)." % (
+                    input_signal.shape[-3], input_signal.shape[-2], kh, kw
+                )
+            )
+        input_signal = input_signal[..., :height * kh, :width * kw, :]
+        windows = input_signal.reshape(input_signal.shape[:-3] + (height, kh, width, kw, input_signal.shape[-1]))
+        return _quantize(np.mean(windows, axis = (-4, -2), dtype = signal_dtype()), self.quantization)
+
+
+class ElementwiseFunc(object):
+    """Elementwise Function
+
+    Apply a NumPy ufunc elementwise, e.g., ``"add"``, ``"subtract"``, ``"multiply"``,
+    ``"maximum"`` or ``"absolute"``. A unary ufunc is applied to the only input, a binary ufunc
+    is applied to ``operand`` if given, otherwise it reduces all inputs from left to right.
+
+    Args:
+        name (str): the name of the function.
+        op (str): the name of the NumPy ufunc.
+        operand (float): if not ``None``, the second operand of a binary ufunc, the default
+            value is ``None``.
+        quantization (FixedPoint): if not ``None``, the output is quantized, the default value
+            is ``None``.
+    """
+    def __init__(self, name, op, operand = None, quantization = None):
+        super(ElementwiseFunc, self).__init__()
+        self.name = name
+        self.op = op
+        self.operand = operand
+        self.quantization = quantization
+        self.ufunc = getattr(np, op, None)
+        if not isinstance(self.ufunc, np.ufunc):
+            raise Exception("'%s' in '%s' is not a NumPy ufunc." % (op, name))
+
+    def simulate_output(self, input_signal_list):
+        input_signal_list = [np.asarray(input_signal, dtype = signal_dtype()) for input_signal in input_signal_list]
+        if self.ufunc.nin == 1 or self.operand is not None:
+            input_signal = _single_input(self.name, input_signal_list)
+            output = self.ufunc(input_signal) if self.ufunc.nin == 1 else self.ufunc(input_signal, self.operand)
+        else:
+            if len(input_signal_list) < 2:
+                raise Exception("'%s' needs at least two input signals for '%s'." % (self.name, self.op))
+            output = self.ufunc(input_signal_list[0], input_signal_list[1])
+            for input_signal in input_signal_list[2:]:
+                self.ufunc(output, input_signal, out = output)
+        return _quantize(output, self.quantization)
+
+
+class ThresholdFunc(object):
+    """Threshold Function
+
+    Mathematical Expression:
+        output = high if input > threshold else low
+
+    Args:
+        name (str): the name of the function.
+        threshold (float): the threshold.
+        high (float): the output above the threshold, the default value is ``1``.
+        low (float): the output at or below the threshold, the default value is ``0``.
+    """
+    def __init__(self, name, threshold, high = 1., low = 0.):
+        super(ThresholdFunc, self).__init__()
+        self.name = name
+        self.threshold = threshold
+        self.high = high
+        self.low = low
+
+    def simulate_output(self, input_signal_list):
+        input_signal = _single_input(self.name, input_signal_list)
+        return np.where(input_signal > self.threshold, self.high, self.low).astype(signal_dtype())
+
+
+class Conv2DFunc(object):
+    """2D Convolution Function
+
+    Mathematical Expression:
+        output = relu(conv2d(input, weights) + bias)
+
+    Args:
+        name (str): the name of the function.
+        weights: the weights in (kernel_height, kernel_width, in_channel, out_channel) shape.
+        bias: if not ``None``, the bias of each output channel, the default value is ``None``.
+        stride (int): the stride of the convolution, the default value is ``1``.
+        padding (bool): if ``kernel_size // 2`` zeros are padded on both sides of the input,
+            the default value is ``True``.
+        relu (bool): if ReLU is applied to the output, the default value is ``False``.
+        quantization (FixedPoint): if not ``None``, the weights, the bias and the output are
+            quantized, the default value is ``None``.
+    """
+    def __init__(self, name, weights, bias = None, stride = 1, padding = True, relu = False, quantization = None):
+        super(Conv2DFunc, self).__init__()
+        self.name = name
+        if np.ndim(weights) != 4:
+            raise Exception("Weights of '%s' need to be in (H, W, C_in, C_out) shape." % name)
+        self.weights = _quantize(np.asarray(weights, dtype = signal_dtype()), quantization)
+        self.bias = None if bias is None else _quantize(np.asarray(bias, dtype = signal_dtype()), quantization)
+        self.stride = stride
+        self.padding = padding
+        self.relu = relu
+        self.quantization = quantization
+
+    def simulate_output(self, input_signal_list):
+        input_signal = _single_input(self.name, input_signal_list)
+        if input_signal.shape[-1] != self.weights.shape[2]:
+            raise Exception(
+                "Input channel %d of '%s' doesn't match the weights %s." % (input_signal.shape[-1], self.name, self.weights.shape)
+            )
+        windows = _conv_windows(input_signal, self.weights.shape, self.stride, self.padding)
+        output = np.tensordot(windows, self.weights, axes = ([-3, -2, -1], [2, 0, 1]))
+        return self._finalize(output)
+
+    def _finalize(self, output):
+        if self.bias is not None:
+            output += self.bias
+        if self.relu:
+            np.maximum(output, 0, out = output)
+        return _quantize(output, self.quantization)
+
+
+class DWConv2DFunc(Conv2DFunc):
+    """Depthwise 2D Convolution Function
+
+    Each input channel is convolved with its own kernel.
+
+    Args:
+        name (str): the name of the function.
+        weights: the weights in (kernel_height, kernel_width, channel) shape, or
+            (kernel_height, kernel_width, channel, 1).
+        bias: if not ``None``, the bias of each channel, the default value is ``None``.
+        stride (int): the stride of the convolution, the default value is ``1``.
+        padding (bool): if ``kernel_size // 2`` zeros are padded on both sides of the input,
+            the default value is ``True``.
+        relu (bool): if ReLU is applied to the output, the default value is ``False``.
+        quantization (FixedPoint): if not ``None``, the weights, the bias and the output are
+            quantized, the default value is ``None``.
+    """
+    def __init__(self, name, weights, bias = None, stride = 1, padding = True, relu = False, quantization = None):
+        if np.ndim(weights) == 4 and np.shape(weights)[3] == 1:
+            weights = np.asarray(weights)[..., 0]
+        if np.ndim(weights) != 3:
+            raise Exception("Weights of '%s' need to be in (H, W, C) shape." % name)
+        super(DWConv2DFunc, self).__init__(
+            name, np.asarray(weights)[..., np.newaxis], bias, stride, padding, relu, quantization
+        )
+        self.weights = self.weights[..., 0]
+
+    def simulate_output(self, input_signal_list):
+        input_signal = _single_input(self.name, input_signal_list)
+        if input_signal.shape[-1] != self.weights.shape[2]:
+            raise Exception(
+                "Input channel %d of '%s' doesn't match the weights %s." % (input_signal.shape[-1], self.name, self.weights.shape)
+            )
+        windows = _conv_windows(input_signal, self.weights.shape, self.stride, self.padding)
+        output = np.einsum("...chw,hwc->...c", windows, self.weights)
+        return self._finalize(output)
+
+
+class FCFunc(Conv2DFunc):
+    """Fully Connected Function
+
+    The input frame is flattened in (height, width, channel) order, and the output is in
+    (1, 1, out_features) shape.
+
+    Args:
+        name (str): the name of the function.
+        weights: the weights in (in_features, out_features) shape.
+        bias: if not ``None``, the bias of each output feature, the default value is ``None``.
+        relu (bool): if ReLU is applied to the output, the default value is ``False``.
+        quantization (FixedPoint): if not ``None``, the weights, the bias and the output are
+            quantized, the default value is ``None``.
+    """
+    def __init__(self, name, weights, bias = None, relu = False, quantization = None):
+        if np.ndim(weights) != 2:
+            raise Exception("Weights of '%s' need to be in (in_features, out_features) shape." % name)
+        super(FCFunc, self).__init__(
+            name, np.asarray(weights)[np.newaxis, np.newaxis], bias, 1, False, relu, quantization
+        )
+        self.weights = self.weights[0, 0]
+
+    def simulate_output(self, input_signal_list):
+        input_signal = _single_input(self.name, input_signal_list)
+        features = input_signal.reshape(input_signal.shape[:-3] + (-1, ))
+        if features.shape[-1] != self.weights.shape[0]:
+            raise Exception(
+                "Input size %d of '%s' doesn't match the weights %s." % (features.shape[-1], self.name, self.weights.shape)
+            )
+        output = np.matmul(features, self.weights)
+        return self._finalize(output)[..., np.newaxis, np.newaxis, :]
+
+
+def dnn_function(dnn_stage, weights, bias = None, relu = False, quantization = None):
+    """Build the functional kernel of a ``DNNProcessStage`` from its operation type, stride
+    and padding.
+
+    Args:
+        dnn_stage (DNNProcessStage): the DNN stage.
+        weights: the weights, see ``Conv2DFunc``, ``DWConv2DFunc`` and ``FCFunc``.
+        bias: if not ``None``, the bias, the default value is ``None``.
+        relu (bool): if ReLU is applied to the output, the default value is ``False``.
+        quantization (FixedPoint): if not ``None``, the quantization, the default value is ``None``.
+
+    Returns:
+        Functional kernel.
+    """
+    stride = dnn_stage.stride[0][0]
+    if dnn_stage.op_type == "Conv2D":
+        return Conv2DFunc(dnn_stage.name, weights, bias, stride, dnn_stage.padding, relu, quantization)
+    elif dnn_stage.op_type == "DWConv2D":
+        return DWConv2DFunc(dnn_stage.name, weights, bias, stride, dnn_stage.padding, relu, quantization)
+    elif dnn_stage.op_type == "FC":
+        return FCFunc(dnn_stage.name, np.reshape(weights, (-1, np.shape(weights)[-1])), bias, relu, quantization)
+    else:
+        raise Exception("Unsupported op type '%s' in 'dnn_function'." % dnn_stage.op_type)
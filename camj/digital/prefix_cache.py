@@ -0,0 +1,227 @@
+"""Prefix Cache for Digital Simulation
+
+When only the late-stage units of a design change, the upstream stages behave exactly the
+same as in a previous run. This module records the cycle-stamped activity of each software
+stage, i.e., its buffer reads, its writes into the output buffer and the cycle it finishes,
+and caches the record by the structural hash of the stage's dependency group. In the next
+run, every stage whose dependency group is unchanged is replayed from the cache, and only the
+remaining downstream stages are cycle-level simulated against that replay.
+
+The dependency group of a stage includes everything that can change its timing:
+
+* its input stages, recursively,
+* all stages mapped to the same hardware unit (they compete for the unit),
+* all stages whose hardware unit accesses its input buffer (they change the stored data),
+* all stages whose hardware unit accesses its output buffer, unless the output buffer is a
+  ``DoubleBuffer``, which never stalls a write.
+
+Energy parameters are excluded from the structural hash, since they don't change the timing,
+the replayed energy is always computed from the current energy parameters.
+
+Examples:
+        To share the cache between two design points:
+
+        >>> prefix_cache = PrefixCache()
+        >>> energy_simulation(hw_desc, mapping, sw_desc, prefix_cache = prefix_cache)
+        >>> energy_simulation(new_hw_desc, mapping, sw_desc, prefix_cache = prefix_cache)
+
+"""
+
+import hashlib
+import numbers
+from enum import Enum
+import numpy as np
+
+# import local modules
+from camj.digital.memory import DoubleBuffer
+from camj.digital.utils import write_output_throughput
+
+
+class PrefixCache(object):
+    """Prefix Cache
+
+    A key-value store from the structural hash of a stage's dependency group to the
+    ``StageRecord`` of that stage. The same ``PrefixCache`` instance can be passed to multiple
+    ``energy_simulation`` or ``digital_energy_simulation`` calls.
+
+    Args:
+        max_size (int): if not ``None``, the maximum number of records, the least recently used
+            record is evicted first, the default value is ``None``.
+    """
+    def __init__(self, max_size: int = None):
+        super(PrefixCache, self).__init__()
+        self.max_size = max_size
+        # records in the order of their last use, the oldest first.
+        self.records = {}
+        self.hit_cnt = 0
+        self.miss_cnt = 0
+
+    def lookup(self, prefix_keys):
+        """Find the cached records of a list of stages.
+
+        Args:
+            prefix_keys (dict): software stage to its structural hash.
+
+        Returns:
+            Records (dict): software stage to its ``StageRecord``, only for the cached stages.
+        """
+        replay_records = {}
+        for sw_stage, key in prefix_keys.items():
+            if key in self.records:
+                # move the record to the end, it is the most recently used one.
+                replay_records[sw_stage] = self.records.pop(key)
+                self.records[key] = replay_records[sw_stage]
+                self.hit_cnt += 1
+            else:
+                self.miss_cnt += 1
+
+        return replay_records
+
+    def store(self, key, record):
+        self.records.pop(key, None)
+        self.records[key] = record
+        if self.max_size is not None:
+            while len(self.records) > self.max_size:
+                self.records.pop(next(iter(self.records)))
+
+    def __len__(self):
+        return len(self.records)
+
+
+class StageRecord(object):
+    """Cycle-stamped activity of one software stage.
+
+    ``events`` maps a cycle to the list of buffer accesses in that cycle, each access is
+    either ``("read", read_cnt)`` from the input buffer or ``("write", write_index, write_cnt)``
+    to the output buffer.
+    """
+    def __init__(self):
+        super(StageRecord, self).__init__()
+        self.events = {}
+        self.finish_cycle = -1
+        self.compute_cycle = 0
+        self.reserved_cycle = 0
+
+    def record_read(self, cycle, read_cnt):
+        self.events.setdefault(cycle, []).append(("read", read_cnt))
+
+    def record_write(self, cycle, write_index, write_cnt):
+        self.events.setdefault(cycle, []).append(("write", write_index, write_cnt))
+
+    def record_compute(self):
+        self.compute_cycle += 1
+
+    def record_finish(self, cycle):
+        self.finish_cycle = cycle
+
+
+def replay_stage(record, cycle, sw_stage, hw_unit, hw2sw):
+    """Replay the recorded activity of one stage in one cycle.
+
+    Returns:
+        Finish (bool): ``True`` if the stage finishes in this cycle.
+    """
+    for event in record.events.get(cycle, []):
+        if event[0] == "read":
+            hw_unit.input_buffer._read_data(event[1])
+        else:
+            _, write_index, write_cnt = event
+            hw_unit.output_buffer._write_data(write_cnt)
+            write_output_throughput(hw_unit, sw_stage, hw2sw, write_index, write_cnt)
+
+    return cycle == record.finish_cycle
+
+
+def compute_prefix_keys(sw_stage_list, sw2hw):
+    """Compute the structural hash of each stage's dependency group.
+
+    This needs to be called before the buffers are allocated, so that the hardware units
+    are still in their initial states.
+
+    Args:
+        sw_stage_list (list): software stages in digital simulation.
+        sw2hw (dict): mapping from software stage to hardware unit.
+
+    Returns:
+        Keys (dict): software stage to its structural hash.
+    """
+    prefix_keys = {}
+    for sw_stage in sw_stage_list:
+        group = _find_dependency_group(sw_stage, sw_stage_list, sw2hw)
+        # keep the simulation order of the group, it decides the order within one cycle.
+        desc = [sw_stage.name]
+        for stage in sw_stage_list:
+            if stage in group:
+                hw_unit = sw2hw[stage]
+                desc.append((
+                    _describe(stage),
+                    _describe(hw_unit),
+                    _describe(hw_unit.input_buffer),
+                    _describe(hw_unit.output_buffer)
+                ))
+        prefix_keys[sw_stage] = hashlib.sha1(repr(desc).encode()).hexdigest()
+
+    return prefix_keys
+
+
+def _find_dependency_group(sw_stage, sw_stage_list, sw_stages_hw):
+    group = [sw_stage]
+    idx = 0
+    while idx < len(group):
+        stage = group[idx]
+        hw_unit = sw_stages_hw[stage]
+        shared_buffers = []
+        if hw_unit.input_buffer is not None:
+            shared_buffers.append(hw_unit.input_buffer)
+        if hw_unit.output_buffer is not None and not isinstance(hw_unit.output_buffer, DoubleBuffer):
+            shared_buffers.append(hw_unit.output_buffer)
+
+        dependent_stages = list(stage.input_stages)
+        for other_stage in sw_stage_list:
+            other_unit = sw_stages_hw[other_stage]
+            if other_unit is hw_unit \
+                or other_unit.input_buffer in shared_buffers \
+                or other_unit.output_buffer in shared_buffers:
+                dependent_stages.append(other_stage)
+
+        for other_stage in dependent_stages:
+            if other_stage not in group:
+                group.append(other_stage)
+        idx += 1
+
+    return group
+
+
+def _describe(obj):
+    """describe the timing-related structure of a stage, a hardware unit or a buffer"""
+    if obj is None:
+        return None
+
+    desc = [type(obj).__name__]
+    for key, value in sorted(vars(obj).items()):
+        # energy doesn't change the timing, the output stages don't change a stage's behavior.
+        if "energy" in key or key == "output_stages":
+            continue
+        desc.append((key, _normalize(value)))
+
+    return tuple(desc)
+
+
+def _normalize(value):
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, numbers.Number):
+        return value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, Enum):
+        return str(value)
+    if isinstance(value, np.ndarray):
+        return _normalize(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        # runtime states, they are empty before the simulation starts.
+        return len(value)
+    if hasattr(value, "name"):
+        return value.name
+
+    return type(value).__name__
@@ -444,3 +444,33 @@ def check_input_stage_finish(sw_stage, finished_stage):
             return False
 
     return True
+
+# this function records the activity of each digital energy parameter after the digital
+# simulation is finished. The digital energy is linear in those parameters, i.e.,
+# energy = parameter value * activity, so the energy of other parameter values can be
+# computed from this record without re-running the cycle-level simulation.
+def record_digital_activity(hw_dict):
+    activity = {}
+    for hw_unit in hw_dict["compute"]:
+        if hasattr(hw_unit, "energy_per_pixel"):
+            activity[hw_unit.name, "energy_per_pixel"] = (
+                hw_unit.energy_per_pixel,
+                hw_unit.sys_all_compute_cycle * hw_unit.total_write
+            )
+        else:
+            activity[hw_unit.name, "energy_per_cycle"] = (
+                hw_unit.energy_per_cycle,
+                hw_unit.sys_all_compute_cycle
+            )
+
+    for mem_unit in hw_dict["memory"]:
+        activity[mem_unit.name, "write_energy_per_word"] = (
+            mem_unit.write_energy_per_word,
+            mem_unit.total_write_cnt / mem_unit.pixels_per_write_word
+        )
+        activity[mem_unit.name, "read_energy_per_word"] = (
+            mem_unit.read_energy_per_word,
+            mem_unit.total_read_cnt / mem_unit.pixels_per_read_word
+        )
+
+    return activity
@@ -0,0 +1,80 @@
+"""Simulation Client
+
+A thin client of the simulation service in ``camj.general.serve``. It only uses the standard
+library, so scripts that import it don't pay the imports of the simulator.
+
+Examples:
+        To submit a batch to a running service:
+
+        >>> client = SimulationClient(port = 8765)
+        >>> results = client.simulate_batch([
+                {"hw": hw_json, "sw": sw_json, "mapping": mapping},
+                {"hw": new_hw_json, "sw": sw_json, "mapping": mapping},
+            ])
+
+"""
+
+import json
+from urllib import request as urllib_request
+from urllib.error import HTTPError
+
+
+class SimulationClient(object):
+    """Simulation Client
+
+    Args:
+        host (str): the address of the service, the default value is ``"127.0.0.1"``.
+        port (int): the port of the service, the default value is ``8765``.
+        timeout (float): timeout of each call in seconds, the default value is ``None``.
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        timeout: float = None,
+    ):
+        super(SimulationClient, self).__init__()
+        self.url = "http://%s:%d" % (host, port)
+        self.timeout = timeout
+
+    def simulate(self, hw_json, sw_json, mapping):
+        """Simulate one description.
+
+        Returns:
+            Result (dict): ``total_energy``, ``energy_breakdown`` and ``cycle_cnt``.
+        """
+        result = self.simulate_batch([{"hw": hw_json, "sw": sw_json, "mapping": mapping}])[0]
+        if "error" in result:
+            raise Exception("Simulation failed: %s" % result["error"])
+
+        return result
+
+    def simulate_batch(self, requests):
+        """Simulate a batch of descriptions in one call.
+
+        Args:
+            requests (list): a list of ``{"hw": ..., "sw": ..., "mapping": ...}`` dicts.
+
+        Returns:
+            Results (list): a result dict for each request, in the same order. A failed
+            simulation has an ``error`` message instead.
+        """
+        return self._call("/simulate", {"requests": list(requests)})["results"]
+
+    def status(self):
+        return self._call("/status")
+
+    def _call(self, path, data = None):
+        if data is None:
+            req = urllib_request.Request(self.url + path)
+        else:
+            req = urllib_request.Request(
+                self.url + path,
+                data = json.dumps(data).encode(),
+                headers = {"Content-Type": "application/json"}
+            )
+        try:
+            with urllib_request.urlopen(req, timeout = self.timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            raise Exception("Simulation service error: %s" % json.loads(e.read()).get("error"))
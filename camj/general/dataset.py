@@ -0,0 +1,237 @@
+"""Sharded Dataset
+
+This module converts an image dataset once into electron maps, the noise-free input of the
+functional simulation, so that the simulation doesn't decode and convert the images in every
+run. Each image is loaded, center cropped to a fixed size, converted to a linear signal in
+``[0, 1]`` by ``convert``, and scaled by ``full_well_capacity``. The default ``convert`` is
+``image / 255``, ``utility/prepare_dataset.py`` converts the images through the inverse ISP
+into raw Bayer images instead.
+
+The electron maps are written to ``.npy`` shards of ``shard_size`` images in
+(image, height, width, channel) shape, plus an ``index.json`` with the shape, the full well
+capacity, the shard files and the image names. The images are converted by a pool of worker
+processes, and each worker writes its images directly into the memory-mapped shards. The index
+is written last, so an interrupted preparation is not mistaken for a dataset.
+
+``ShardedDataset`` reads the shards with ``np.load(mmap_mode = "r")``, so reading an image
+doesn't decode or copy it, and processes that read the same shards share the page cache.
+``DatasetEvaluator.evaluate`` takes a ``ShardedDataset`` and its workers map the shards
+themselves, so the images are not sent to the workers at all.
+
+Examples:
+        To prepare a directory of images and read it back:
+
+        >>> prepare_dataset("test_imgs", "test_data", full_well_capacity = 10000, shard_size = 64)
+        >>> dataset = ShardedDataset("test_data")
+        >>> for image_name, electrons in dataset:
+                print(image_name, electrons.shape)
+
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+INDEX_FILE = "index.json"
+
+# worker process states, the last shard is kept open in each worker.
+_worker_convert = None
+_worker_config = None
+_worker_shard = (None, None)
+
+
+def load_image(image_path, grayscale = True):
+    """Load an image in (height, width, channel) shape with PIL."""
+    from PIL import Image
+
+    image = Image.open(image_path)
+    image = image.convert("L" if grayscale else "RGB")
+    image = np.asarray(image)
+    return image[..., np.newaxis] if grayscale else image
+
+
+def list_images(image_dir):
+    """the sorted image file names in a directory."""
+    return [
+        file_name for file_name in sorted(os.listdir(image_dir))
+        if file_name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def normalize_image(image, index):
+    """the default conversion from an 8-bit image to a linear signal in ``[0, 1]``."""
+    return image / 255.
+
+
+def center_crop(image, size):
+    """Center crop an image in (height, width, channel) shape to ``size = (height, width)``."""
+    height, width = size
+    if image.shape[0] < height or image.shape[1] < width:
+        raise Exception("Image (%d, %d) is smaller than the dataset size (%d, %d)." % (image.shape[0], image.shape[1], height, width))
+    top = (image.shape[0] - height) // 2
+    left = (image.shape[1] - width) // 2
+    return image[top : top + height, left : left + width]
+
+
+def _init_worker(convert, config):
+    global _worker_convert, _worker_config
+    _worker_convert = convert
+    _worker_config = config
+
+
+def _convert_image(image_path, index, convert, config):
+    image = center_crop(load_image(image_path, config["grayscale"]), config["size"])
+    electrons = np.asarray(convert(image, index)) * config["full_well_capacity"]
+    if config["shape"] is not None and electrons.shape != config["shape"]:
+        raise Exception("Converted shape %s of '%s' doesn't match dataset shape %s." % (electrons.shape, image_path, config["shape"]))
+    return electrons
+
+
+def _write_image(image_path, index, shard_path, offset):
+    global _worker_shard
+    electrons = _convert_image(image_path, index, _worker_convert, _worker_config)
+    if _worker_shard[0] != shard_path:
+        _worker_shard = (shard_path, np.load(shard_path, mmap_mode = "r+"))
+    _worker_shard[1][offset] = electrons
+
+
+def prepare_dataset(
+    image_dir: str,
+    output_dir: str,
+    full_well_capacity: float = 10000.,
+    size: tuple = None,
+    convert = None,
+    grayscale: bool = True,
+    shard_size: int = 256,
+    dtype: str = "float32",
+    num_workers: int = None,
+):
+    """Convert a directory of images into sharded electron maps.
+
+    Args:
+        image_dir (str): the directory of images.
+        output_dir (str): the directory of the shards and the index.
+        full_well_capacity (float): the number of electrons of a white pixel, the default value
+            is ``10000``.
+        size (tuple): the ``(height, width)`` that every image is center cropped to, the default
+            value is ``None``, which uses the size of the first image.
+        convert: a picklable function of ``(image, image_index)`` that returns the linear signal
+            of an 8-bit image in ``[0, 1]``, the default value is ``None``, which is ``image / 255``.
+        grayscale (bool): if the images are loaded in grayscale, the default value is ``True``.
+        shard_size (int): the number of images in each shard, the default value is ``256``.
+        dtype (str): the data type of the electron maps, the default value is ``"float32"``.
+        num_workers (int): the number of worker processes, the default value is ``None``, which
+            uses the number of CPUs.
+
+    Returns:
+        dataset (ShardedDataset): the prepared dataset.
+    """
+    if convert is None:
+        convert = normalize_image
+    image_names = list_images(image_dir)
+    if len(image_names) == 0:
+        raise Exception("No images in '%s'." % image_dir)
+    image_paths = [os.path.join(image_dir, image_name) for image_name in image_names]
+    if size is None:
+        size = load_image(image_paths[0], grayscale).shape[:2]
+
+    # the first image is converted here to find the shape of the electron maps.
+    config = {"size": tuple(size), "grayscale": grayscale, "full_well_capacity": full_well_capacity, "shape": None}
+    electrons = _convert_image(image_paths[0], 0, convert, config)
+    config["shape"] = electrons.shape
+
+    os.makedirs(output_dir, exist_ok = True)
+    # a stale index is removed first, the shards are rewritten below.
+    if os.path.exists(os.path.join(output_dir, INDEX_FILE)):
+        os.remove(os.path.join(output_dir, INDEX_FILE))
+    shards = []
+    for start in range(0, len(image_paths), shard_size):
+        num_images = min(shard_size, len(image_paths) - start)
+        shard_file = "shard_%05d.npy" % len(shards)
+        shard = np.lib.format.open_memmap(
+            os.path.join(output_dir, shard_file), mode = "w+", dtype = dtype, shape = (num_images, ) + config["shape"]
+        )
+        if start == 0:
+            shard[0] = electrons
+        del shard
+        shards.append({"file": shard_file, "num_images": num_images})
+
+    with ProcessPoolExecutor(max_workers = num_workers, initializer = _init_worker, initargs = (convert, config)) as pool:
+        futures = [
+            pool.submit(
+                _write_image,
+                image_path,
+                index,
+                os.path.join(output_dir, shards[index // shard_size]["file"]),
+                index % shard_size
+            )
+            for index, image_path in enumerate(image_paths) if index > 0
+        ]
+        for future in futures:
+            future.result()
+
+    index = {
+        "shape": list(config["shape"]),
+        "dtype": np.dtype(dtype).name,
+        "full_well_capacity": full_well_capacity,
+        "shard_size": shard_size,
+        "shards": shards,
+        "image_names": image_names,
+    }
+    with open(os.path.join(output_dir, INDEX_FILE + ".tmp"), "w") as f:
+        json.dump(index, f, indent = 2)
+    os.replace(os.path.join(output_dir, INDEX_FILE + ".tmp"), os.path.join(output_dir, INDEX_FILE))
+
+    return ShardedDataset(output_dir)
+
+
+class ShardedDataset(object):
+    """Sharded Dataset
+
+    A dataset written by ``prepare_dataset``, the shards are memory-mapped when they are first
+    read.
+
+    Args:
+        dataset_dir (str): the directory of the shards and the index.
+    """
+    def __init__(self, dataset_dir: str):
+        super(ShardedDataset, self).__init__()
+        index_path = os.path.join(dataset_dir, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise Exception("'%s' is not a prepared dataset, '%s' doesn't exist." % (dataset_dir, INDEX_FILE))
+        with open(index_path) as f:
+            index = json.load(f)
+
+        self.dataset_dir = dataset_dir
+        self.shape = tuple(index["shape"])
+        self.dtype = np.dtype(index["dtype"])
+        self.full_well_capacity = index["full_well_capacity"]
+        self.shard_size = index["shard_size"]
+        self.shard_paths = [os.path.join(dataset_dir, shard["file"]) for shard in index["shards"]]
+        self.image_names = index["image_names"]
+        # memory-mapped shards, opened on demand.
+        self.shards = [None] * len(self.shard_paths)
+
+    def locate(self, index):
+        """the shard path and the offset in the shard of an image."""
+        if index < 0 or index >= len(self):
+            raise Exception("Image index %d is out of range of %d images." % (index, len(self)))
+        return self.shard_paths[index // self.shard_size], index % self.shard_size
+
+    def __len__(self):
+        return len(self.image_names)
+
+    def __getitem__(self, index):
+        """the read-only electron map of an image, a view of the memory-mapped shard."""
+        self.locate(index)
+        shard_index = index // self.shard_size
+        if self.shards[shard_index] is None:
+            self.shards[shard_index] = np.load(self.shard_paths[shard_index], mmap_mode = "r")
+        return self.shards[shard_index][index % self.shard_size]
+
+    def __iter__(self):
+        for index, image_name in enumerate(self.image_names):
+            yield image_name, self[index]
@@ -0,0 +1,460 @@
+"""JSON Description
+
+This module builds the hardware description, the software pipeline and the mapping from a
+JSON-compatible description, so that designs can be sent to CamJ from other processes, e.g.,
+through the simulation service in ``camj.general.serve``.
+
+Every object is a dict with a ``"class"`` key and the constructor arguments of that class.
+The class is either a CamJ class name, e.g., ``"FIFO"`` or ``"ActivePixelSensor"``, or a
+dotted path to a customized class, e.g., ``"examples.ieee_vr22.customized_analog_component.EventificationUnit"``.
+Only classes are built: a CamJ class name is a class defined in the analog, digital or software
+modules, and a dotted path is a class defined in that module, so a description can't call a
+function or another CamJ class, e.g., the simulation service.
+Enums are written as strings, e.g., ``"ProcessorLocation.SENSOR_LAYER"``, and a list of numbers
+is converted to a tuple. The connections are given by names:
+
+* a compute unit has optional ``"input_buffer"`` and ``"output_buffer"`` memory names,
+* an analog array has a ``"components"`` list of ``{"component": ..., "size": [H, W, C]}``
+  and an optional ``"input_arrays"`` list of analog array names,
+* a software stage has an optional ``"input_stages"`` list of stage names.
+
+Descriptions can also be written in JSON or YAML files and loaded with ``load_description``.
+The loader validates the description once with ``validate_description``, which reports every
+unknown class, unknown argument, duplicated name and dangling connection or mapping at once.
+With ``cache_dir``, the built model is pickled under the hash of the file content, so loading
+the same file again skips the parsing, the validation and the construction. The cached model
+also records the modification time and size of the source files of CamJ and the customized
+modules, and it is rebuilt when any of them changes. Like any pickle, the cache should only be
+read from a directory that you trust.
+
+Examples:
+        A description with one pixel input processed by one compute unit:
+
+        >>> build_description({
+                "hw": {
+                    "memory": [{"class": "DoubleBuffer", "name": "DoubleBuffer", "size": [4, 4096, 4096], ...}],
+                    "compute": [{"class": "ADC", "name": "ADC", ..., "output_buffer": "DoubleBuffer"}, ...],
+                    "analog": []
+                },
+                "sw": [{"class": "PixelInput", "name": "Input", "size": [16, 16, 1]}, ...],
+                "mapping": {"Input": "ADC", ...}
+            })
+
+        To load the same description from a YAML file, with a compiled cache:
+
+        >>> hw_desc, mapping, sw_desc = load_description("design.yaml", cache_dir = ".camj_cache")
+
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import numbers
+import os
+import pickle
+import sys
+
+# import local modules
+from camj.analog import component as analog_component
+from camj.analog import infra as analog_infra
+from camj.digital import compute as digital_compute
+from camj.digital import memory as digital_memory
+from camj.general import enum as camj_enum
+from camj.sw import interface as sw_interface
+
+# modules to look up the CamJ class names
+_CLASS_MODULES = [analog_component, analog_infra, digital_compute, digital_memory, sw_interface]
+_ENUM_CLASSES = [camj_enum.ProcessorLocation, camj_enum.ProcessDomain]
+# the format of the compiled cache, cached models of another format are not used.
+_CACHE_VERSION = 2
+
+
+def build_description(desc, allowed_modules = ("camj", )):
+    """Build Description
+
+    Args:
+        desc (dict): a JSON-compatible description with ``"hw"``, ``"sw"`` and ``"mapping"``.
+        allowed_modules (tuple): module prefixes that customized classes can be imported from,
+            the default value is ``("camj", )``.
+
+    Returns:
+        hw_desc (dict): hardware description.
+        mapping (dict): mapping between software stages and hardware structures.
+        sw_desc (list): software pipeline list.
+    """
+    for key in ["hw", "sw", "mapping"]:
+        if key not in desc:
+            raise Exception("Description needs to have '%s'." % key)
+
+    hw_desc = build_hw_desc(desc["hw"], allowed_modules)
+    sw_desc = build_sw_desc(desc["sw"], allowed_modules)
+    mapping = dict(desc["mapping"])
+
+    return hw_desc, mapping, sw_desc
+
+
+def build_hw_desc(hw_json, allowed_modules = ("camj", )):
+    """Build the hardware description from its JSON-compatible description."""
+    hw_desc = {"memory": [], "compute": [], "analog": []}
+
+    memory_dict = {}
+    for spec in hw_json.get("memory", []):
+        mem_unit = _build_object(spec, allowed_modules)
+        memory_dict[mem_unit.name] = mem_unit
+        hw_desc["memory"].append(mem_unit)
+
+    for spec in hw_json.get("compute", []):
+        spec = dict(spec)
+        input_buffer = spec.pop("input_buffer", None)
+        output_buffer = spec.pop("output_buffer", None)
+        hw_unit = _build_object(spec, allowed_modules)
+        if input_buffer is not None:
+            hw_unit.set_input_buffer(_find_by_name(memory_dict, input_buffer, hw_unit.name))
+        if output_buffer is not None:
+            hw_unit.set_output_buffer(_find_by_name(memory_dict, output_buffer, hw_unit.name))
+        hw_desc["compute"].append(hw_unit)
+
+    analog_dict = {}
+    input_array_dict = {}
+    for spec in hw_json.get("analog", []):
+        spec = dict(spec)
+        components = spec.pop("components", [])
+        input_array_dict[spec.get("name")] = spec.pop("input_arrays", [])
+        analog_array = _build_object(spec, allowed_modules)
+        for comp_spec in components:
+            analog_array.add_component(
+                _build_object(comp_spec["component"], allowed_modules),
+                _decode(comp_spec["size"], allowed_modules)
+            )
+        analog_dict[analog_array.name] = analog_array
+        hw_desc["analog"].append(analog_array)
+
+    for analog_array in hw_desc["analog"]:
+        for name in input_array_dict[analog_array.name]:
+            input_array = _find_by_name(analog_dict, name, analog_array.name)
+            input_array.add_output_array(analog_array)
+            analog_array.add_input_array(input_array)
+
+    return hw_desc
+
+
+def build_sw_desc(sw_json, allowed_modules = ("camj", )):
+    """Build the software pipeline from its JSON-compatible description."""
+    sw_desc = []
+    stage_dict = {}
+    input_stage_dict = {}
+    for spec in sw_json:
+        spec = dict(spec)
+        input_stage_dict[spec.get("name")] = spec.pop("input_stages", [])
+        sw_stage = _build_object(spec, allowed_modules)
+        stage_dict[sw_stage.name] = sw_stage
+        sw_desc.append(sw_stage)
+
+    for sw_stage in sw_desc:
+        for name in input_stage_dict[sw_stage.name]:
+            sw_stage.set_input_stage(_find_by_name(stage_dict, name, sw_stage.name))
+
+    return sw_desc
+
+
+def load_description(path, allowed_modules = ("camj", ), cache_dir = None):
+    """Load Description
+
+    Load a description from a JSON (``.json``) or YAML (``.yaml``, ``.yml``) file, validate it
+    and build it. YAML files need PyYAML.
+
+    Args:
+        path (str): the description file.
+        allowed_modules (tuple): module prefixes that customized classes can be imported from,
+            the default value is ``("camj", )``.
+        cache_dir (str): if not ``None``, the directory of the compiled cache, the default value
+            is ``None``.
+
+    Returns:
+        hw_desc (dict): hardware description.
+        mapping (dict): mapping between software stages and hardware structures.
+        sw_desc (list): software pipeline list.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+
+    cache_path = None
+    if cache_dir is not None:
+        key = hashlib.sha256(content)
+        key.update(repr((_CACHE_VERSION, tuple(allowed_modules))).encode())
+        cache_path = os.path.join(cache_dir, key.hexdigest() + ".pkl")
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    # the source stamps are read first, the model is only unpickled if the
+                    # sources are unchanged.
+                    if _source_stamps(pickle.load(f)) == pickle.load(f):
+                        return pickle.load(f)
+            except Exception:
+                # a broken cache file is rebuilt below.
+                pass
+
+    desc = parse_description(content, path)
+    validate_description(desc, allowed_modules)
+    model = build_description(desc, allowed_modules)
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok = True)
+        source_paths = _source_paths(("camj", ) + tuple(allowed_modules))
+        # write to a temporary file first, so a concurrent load never reads a partial file.
+        tmp_path = "%s.%d.tmp" % (cache_path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            pickle.dump(source_paths, f, protocol = pickle.HIGHEST_PROTOCOL)
+            pickle.dump(_source_stamps(source_paths), f, protocol = pickle.HIGHEST_PROTOCOL)
+            pickle.dump(model, f, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+
+    return model
+
+
+def _source_paths(module_prefixes):
+    # the source files of the loaded modules under ``module_prefixes``, they include every
+    # class that the built model can refer to.
+    source_paths = []
+    for name, module in list(sys.modules.items()):
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in module_prefixes):
+            source_path = getattr(module, "__file__", None)
+            if source_path is not None:
+                source_paths.append(source_path)
+
+    return sorted(set(source_paths))
+
+
+def _source_stamps(source_paths):
+    # the modification time and size of each source file, ``None`` if it is removed.
+    stamps = []
+    for source_path in source_paths:
+        try:
+            stat = os.stat(source_path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)
+
+    return stamps
+
+
+def parse_description(content, path):
+    """Parse the content of a JSON or YAML description file, the format is decided by ``path``."""
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise Exception("Loading YAML description '%s' needs PyYAML." % path)
+        return yaml.safe_load(content)
+    if path.lower().endswith(".json"):
+        return json.loads(content)
+
+    raise Exception("Description '%s' needs to be a .json, .yaml or .yml file." % path)
+
+
+def validate_description(desc, allowed_modules = ("camj", )):
+    """Validate Description
+
+    Check a JSON-compatible description without building it: the structure, the classes, the
+    constructor arguments, the names and the connections. All errors are reported at once.
+
+    Args:
+        desc (dict): a JSON-compatible description with ``"hw"``, ``"sw"`` and ``"mapping"``.
+        allowed_modules (tuple): module prefixes that customized classes can be imported from,
+            the default value is ``("camj", )``.
+    """
+    errors = []
+    if not isinstance(desc, dict):
+        raise Exception("Description needs to be a dict, got %s." % type(desc).__name__)
+    for key in ["hw", "sw", "mapping"]:
+        if key not in desc:
+            errors.append("Description needs to have '%s'." % key)
+    hw_json = desc.get("hw", {})
+    sw_json = desc.get("sw", [])
+    mapping = desc.get("mapping", {})
+
+    if not isinstance(hw_json, dict):
+        errors.append("'hw' needs to be a dict of 'memory', 'compute' and 'analog'.")
+        hw_json = {}
+    for key in hw_json:
+        if key not in ["memory", "compute", "analog"]:
+            errors.append("Unknown hardware section '%s'." % key)
+    # the connections are checked below, they are not constructor arguments.
+    memory_specs = _validate_section("memory", hw_json.get("memory", []), [], allowed_modules, errors)
+    compute_specs = _validate_section(
+        "compute", hw_json.get("compute", []), ["input_buffer", "output_buffer"], allowed_modules, errors
+    )
+    analog_specs = _validate_section(
+        "analog", hw_json.get("analog", []), ["components", "input_arrays"], allowed_modules, errors
+    )
+    sw_specs = _validate_section("sw", sw_json, ["input_stages"], allowed_modules, errors)
+
+    memory_names = [spec["name"] for spec in memory_specs]
+    for spec in compute_specs:
+        for key in ["input_buffer", "output_buffer"]:
+            if spec.get(key) is not None and spec[key] not in memory_names:
+                errors.append("In '%s', %s '%s' is not defined in the description." % (spec["name"], key, spec[key]))
+
+    analog_names = [spec["name"] for spec in analog_specs]
+    for spec in analog_specs:
+        for name in spec.get("input_arrays", []):
+            if name not in analog_names:
+                errors.append("In '%s', input array '%s' is not defined in the description." % (spec["name"], name))
+        for comp_spec in spec.get("components", []):
+            if not isinstance(comp_spec, dict) or "component" not in comp_spec or "size" not in comp_spec:
+                errors.append("In '%s', a component needs to be a dict with 'component' and 'size'." % spec["name"])
+                continue
+            _validate_value(comp_spec["component"], spec["name"], allowed_modules, errors)
+
+    sw_names = [spec["name"] for spec in sw_specs]
+    for spec in sw_specs:
+        for name in spec.get("input_stages", []):
+            if name not in sw_names:
+                errors.append("In '%s', input stage '%s' is not defined in the description." % (spec["name"], name))
+
+    if not isinstance(mapping, dict):
+        errors.append("'mapping' needs to be a dict from software stages to hardware units.")
+        mapping = {}
+    hw_names = set(spec["name"] for spec in compute_specs) | set(analog_names)
+    for sw_name, hw_name in mapping.items():
+        if sw_name not in sw_names:
+            errors.append("Mapping of '%s': the software stage is not defined in the description." % sw_name)
+        if hw_name not in hw_names:
+            errors.append("Mapping of '%s': '%s' is not a compute unit or an analog array." % (sw_name, hw_name))
+    for sw_name in sw_names:
+        if sw_name not in mapping:
+            errors.append("Software stage '%s' is not mapped to hardware." % sw_name)
+
+    if len(errors) > 0:
+        raise Exception("Invalid description:\n  " + "\n  ".join(errors))
+
+
+def _validate_section(section, specs, connection_keys, allowed_modules, errors):
+    # validate the objects of one section, and return the ones with a name.
+    named_specs = []
+    if not isinstance(specs, list):
+        errors.append("'%s' needs to be a list." % section)
+        return named_specs
+
+    for spec in specs:
+        if not isinstance(spec, dict) or "name" not in spec:
+            errors.append("Object in '%s' needs to be a dict with 'name', got %s." % (section, spec))
+            continue
+        if any(spec["name"] == named_spec["name"] for named_spec in named_specs):
+            errors.append("Name '%s' is defined twice in '%s'." % (spec["name"], section))
+        named_specs.append(spec)
+        _validate_object(
+            {k: v for k, v in spec.items() if k not in connection_keys}, spec["name"], allowed_modules, errors
+        )
+
+    return named_specs
+
+
+def _validate_object(spec, user_name, allowed_modules, errors):
+    if not isinstance(spec, dict) or "class" not in spec:
+        errors.append("In '%s', object description needs to be a dict with 'class', got %s." % (user_name, spec))
+        return
+
+    try:
+        cls = _find_class(spec["class"], allowed_modules)
+    except Exception as e:
+        errors.append("In '%s', %s" % (user_name, e))
+        cls = None
+    if cls is not None:
+        try:
+            params = inspect.signature(cls).parameters
+        except (TypeError, ValueError):
+            params = None
+        # classes with ``**kwargs`` take any argument.
+        if params is not None and not any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values()):
+            for key in spec:
+                if key != "class" and key not in params:
+                    errors.append("In '%s', '%s' has no argument '%s'." % (user_name, spec["class"], key))
+            for name, param in params.items():
+                if param.default is inspect.Parameter.empty and \
+                        param.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY) and \
+                        name not in spec:
+                    errors.append("In '%s', '%s' needs argument '%s'." % (user_name, spec["class"], name))
+
+    for key, value in spec.items():
+        if key != "class":
+            _validate_value(value, user_name, allowed_modules, errors)
+
+
+def _validate_value(value, user_name, allowed_modules, errors):
+    # validate the objects nested in an argument, e.g., the component list of an analog component.
+    if isinstance(value, dict):
+        if "class" in value:
+            _validate_object(value, user_name, allowed_modules, errors)
+        else:
+            for v in value.values():
+                _validate_value(v, user_name, allowed_modules, errors)
+    elif isinstance(value, list):
+        for v in value:
+            _validate_value(v, user_name, allowed_modules, errors)
+
+
+def _find_by_name(obj_dict, name, user_name):
+    if name not in obj_dict:
+        raise Exception("In '%s', '%s' is not defined in the description." % (user_name, name))
+
+    return obj_dict[name]
+
+
+def _find_class(class_name, allowed_modules):
+    # only classes are built, never functions or other attributes, so a description can't call
+    # arbitrary code with its arguments.
+    if "." not in class_name:
+        for module in _CLASS_MODULES:
+            cls = getattr(module, class_name, None)
+            # classes imported by these modules, e.g., the function models, are not included.
+            if inspect.isclass(cls) and cls.__module__ == module.__name__:
+                return cls
+        raise Exception("Class '%s' is not found in CamJ." % class_name)
+
+    module_name, _, attr_name = class_name.rpartition(".")
+    if not any(module_name == prefix or module_name.startswith(prefix + ".") for prefix in allowed_modules):
+        raise Exception("Module '%s' is not allowed in the description." % module_name)
+    # within CamJ, only the hardware and software classes can be built, e.g., not the service.
+    if (module_name == "camj" or module_name.startswith("camj.")) and \
+            module_name not in [module.__name__ for module in _CLASS_MODULES]:
+        raise Exception("Module '%s' is not allowed in the description." % module_name)
+
+    cls = getattr(importlib.import_module(module_name), attr_name, None)
+    if not inspect.isclass(cls) or cls.__module__ != module_name:
+        raise Exception("'%s' is not a class defined in '%s'." % (attr_name, module_name))
+
+    return cls
+
+
+def _build_object(spec, allowed_modules):
+    if not isinstance(spec, dict) or "class" not in spec:
+        raise Exception("Object description needs to be a dict with 'class', got %s." % (spec, ))
+
+    cls = _find_class(spec["class"], allowed_modules)
+    kwargs = {k: _decode(v, allowed_modules) for k, v in spec.items() if k != "class"}
+    try:
+        return cls(**kwargs)
+    except TypeError as e:
+        raise Exception("Fail to build '%s': %s" % (spec["class"], e))
+
+
+def _decode(value, allowed_modules):
+    if isinstance(value, dict):
+        if "class" in value:
+            return _build_object(value, allowed_modules)
+        return {k: _decode(v, allowed_modules) for k, v in value.items()}
+    if isinstance(value, list):
+        items = [_decode(v, allowed_modules) for v in value]
+        # a list of numbers is a shape, e.g., (H, W, C)
+        if len(items) > 0 and all(isinstance(v, numbers.Number) for v in items):
+            return tuple(items)
+        return items
+    if isinstance(value, str):
+        enum_name, _, member = value.partition(".")
+        for enum_class in _ENUM_CLASSES:
+            if enum_class.__name__ == enum_name and member in enum_class.__members__:
+                return enum_class[member]
+
+    return value
@@ -0,0 +1,338 @@
+"""Dataset Evaluation
+
+This module evaluates the functional simulation of a sensor on an image dataset. Each image
+is converted to electrons, ``image / 255 * full_well_capacity``, simulated, and the output is
+scored against the clean input with MSE, PSNR and SSIM. Both are normalized to ``[0, 1]``,
+the output by ``output_range``, e.g., ``255`` for an 8-bit ADC.
+
+The images are simulated by a pool of worker processes. Each worker builds the model once,
+either from a JSON-compatible description (see ``camj.general.description``) or from a
+function that returns ``(hw_desc, mapping, sw_desc)``. The electron maps are written to
+shared memory slots and only the slot names are sent to the workers, so the frames are not
+pickled. At most ``max_in_flight`` frames are in flight, so the memory doesn't grow with the
+dataset, and the results are returned in the order of the images.
+
+``evaluate`` also takes a ``ShardedDataset`` (see ``camj.general.dataset``), then the workers
+memory-map the prepared shards and no shared memory is needed.
+
+With ``seed``, every image is simulated on the same sensor, i.e., the same fixed-pattern
+noise, with the image index as the run index (see ``functional_simulation``), so the result
+doesn't depend on the number of workers.
+
+Examples:
+        To evaluate the sensor of an example on a directory of images:
+
+        >>> evaluator = DatasetEvaluator(
+                model = my_model,   # returns (hw_config(), mapping_function(), sw_pipeline())
+                input_name = "Input",
+                output_key = "AnalogToDigitalConverter",
+                full_well_capacity = 10000,
+                seed = 2023
+            )
+        >>> for image_name, metrics in evaluator.evaluate("test_imgs"):
+                print(image_name, metrics["psnr"])
+        >>> evaluator.summary()
+
+"""
+
+import contextlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# import local modules
+from camj.general.dataset import ShardedDataset, list_images, load_image
+from camj.general.description import build_description
+from camj.general.launch import functional_simulation
+
+# worker process states, the model is built once in each worker.
+_worker_model = None
+_worker_config = None
+_worker_shards = {}
+
+
+def mse(output, reference):
+    """the mean squared error between two images."""
+    return float(np.mean(np.square(np.subtract(output, reference, dtype = np.float64))))
+
+
+def psnr(output, reference, data_range = 1.):
+    """the peak signal-to-noise ratio between two images in dB."""
+    error = mse(output, reference)
+    if error == 0:
+        return float("inf")
+    return float(10 * np.log10(data_range ** 2 / error))
+
+
+def ssim(output, reference, data_range = 1., win_size = 7):
+    """the mean structural similarity between two images in (height, width, channel) shape.
+
+    The local statistics are computed in ``win_size x win_size`` uniform windows with the
+    sample covariance, which is the default of ``skimage.metrics.structural_similarity``.
+    """
+    output = np.asarray(output, dtype = np.float64)
+    reference = np.asarray(reference, dtype = np.float64)
+    if output.shape != reference.shape:
+        raise Exception("Image shape %s doesn't match reference shape %s." % (output.shape, reference.shape))
+    if min(output.shape[0], output.shape[1]) < win_size:
+        raise Exception("Image (%d, %d) is smaller than the SSIM window %d." % (output.shape[0], output.shape[1], win_size))
+
+    num_pixels = win_size ** 2
+    mean_x = _window_mean(output, win_size)
+    mean_y = _window_mean(reference, win_size)
+    # sample covariance in each window.
+    cov_norm = num_pixels / (num_pixels - 1)
+    var_x = cov_norm * (_window_mean(output * output, win_size) - mean_x * mean_x)
+    var_y = cov_norm * (_window_mean(reference * reference, win_size) - mean_y * mean_y)
+    cov_xy = cov_norm * (_window_mean(output * reference, win_size) - mean_x * mean_y)
+
+    c1 = (0.01 * data_range) ** 2
+    c2 = (0.03 * data_range) ** 2
+    ssim_map = ((2 * mean_x * mean_y + c1) * (2 * cov_xy + c2)) / \
+        ((mean_x ** 2 + mean_y ** 2 + c1) * (var_x + var_y + c2))
+    return float(np.mean(ssim_map))
+
+
+def _window_mean(image, win_size):
+    # the mean of every full ``win_size x win_size`` window along the first two axes, with
+    # summed-area tables.
+    table = np.zeros((image.shape[0] + 1, image.shape[1] + 1) + image.shape[2:])
+    np.cumsum(np.cumsum(image, axis = 0), axis = 1, out = table[1:, 1:])
+    window_sum = table[win_size:, win_size:] - table[:-win_size, win_size:] \
+        - table[win_size:, :-win_size] + table[:-win_size, :-win_size]
+    return window_sum / win_size ** 2
+
+
+def image_metrics(output, reference, data_range = 1.):
+    """MSE, PSNR and SSIM between two images in (height, width, channel) shape."""
+    return {
+        "mse": mse(output, reference),
+        "psnr": psnr(output, reference, data_range),
+        "ssim": ssim(output, reference, data_range)
+    }
+
+
+def _init_worker(model, config):
+    global _worker_model, _worker_config
+    if callable(model):
+        hw_desc, mapping, sw_desc = model()
+    else:
+        hw_desc, mapping, sw_desc = build_description(model, config["allowed_modules"])
+    _worker_model = (sw_desc, hw_desc, mapping)
+    _worker_config = config
+
+
+def _score_frame(electrons, index):
+    config = _worker_config
+    # the simulation log is not useful in a worker.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        simulation_res = functional_simulation(
+            *_worker_model,
+            {config["input_name"]: [electrons]},
+            seed = config["seed"],
+            run = None if config["seed"] is None else index,
+            probes = config["probes"]
+        )
+    output = simulation_res[config["output_key"]][0]
+    if output.shape != electrons.shape:
+        raise Exception(
+            "Output shape %s of '%s' doesn't match input shape %s." % (output.shape, config["output_key"], electrons.shape)
+        )
+    return image_metrics(output / config["output_range"], electrons / config["full_well_capacity"])
+
+
+def _evaluate_frame(shm_name, shape, index):
+    shm = shared_memory.SharedMemory(name = shm_name)
+    try:
+        electrons = np.ndarray(shape, dtype = np.float64, buffer = shm.buf)
+        metrics = _score_frame(electrons, index)
+        # the views of the shared memory need to be released before it is closed.
+        del electrons
+    finally:
+        shm.close()
+
+    return metrics
+
+
+def _evaluate_shard_frame(shard_path, offset, index):
+    if shard_path not in _worker_shards:
+        _worker_shards[shard_path] = np.load(shard_path, mmap_mode = "r")
+    return _score_frame(_worker_shards[shard_path][offset], index)
+
+
+class DatasetEvaluator(object):
+    """Dataset Evaluator
+
+    Args:
+        model: a JSON-compatible description with ``"hw"``, ``"sw"`` and ``"mapping"``, or a
+            picklable function that returns ``(hw_desc, mapping, sw_desc)``.
+        input_name (str): the name of the input stage that the electron maps are given to.
+        output_key (str): the key of the scored output in the simulation result, e.g., the
+            sub-component name or a probe key.
+        full_well_capacity (float): the number of electrons of a white pixel, the default value
+            is ``10000``.
+        output_range (float): the full scale of the output, the default value is ``255``.
+        grayscale (bool): if the images are converted to grayscale, the default value is ``True``.
+        seed (int): if not ``None``, the seed of the simulated sensor, the default value is ``None``.
+        probes (list): if not ``None``, only these outputs are kept in the workers, e.g.,
+            ``[output_key]`` (see ``functional_simulation``), the default value is ``None``.
+        num_workers (int): the number of worker processes, the default value is ``None``, which
+            uses the number of CPUs.
+        max_in_flight (int): the maximum number of frames in shared memory at a time, the
+            default value is ``None``, which is two frames per worker.
+        allowed_modules (tuple): module prefixes that customized classes in descriptions can be
+            imported from, the default value is ``("camj", )``.
+    """
+    def __init__(
+        self,
+        model,
+        input_name: str,
+        output_key: str,
+        full_well_capacity: float = 10000.,
+        output_range: float = 255.,
+        grayscale: bool = True,
+        seed: int = None,
+        probes: list = None,
+        num_workers: int = None,
+        max_in_flight: int = None,
+        allowed_modules: tuple = ("camj", ),
+    ):
+        super(DatasetEvaluator, self).__init__()
+        config = {
+            "input_name": input_name,
+            "output_key": output_key,
+            "full_well_capacity": full_well_capacity,
+            "output_range": output_range,
+            "seed": seed,
+            "probes": probes,
+            "allowed_modules": tuple(allowed_modules)
+        }
+        self.full_well_capacity = full_well_capacity
+        self.grayscale = grayscale
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        # the workers need to share the resource tracker of this process, otherwise a worker
+        # that first attaches a shared memory slot starts its own tracker, which reports the
+        # slot as leaked when the worker exits.
+        resource_tracker.ensure_running()
+        self.pool = ProcessPoolExecutor(
+            max_workers = num_workers,
+            initializer = _init_worker,
+            initargs = (model, config)
+        )
+        if max_in_flight is None:
+            max_in_flight = 2 * num_workers
+        self.max_in_flight = max_in_flight
+        # shared memory slots, each one holds one frame in flight.
+        self.slots = []
+        self.free_slots = []
+        self.reset()
+
+    def reset(self):
+        """Reset the aggregated metrics."""
+        self.num_images = 0
+        self.metric_sums = {"mse": 0., "psnr": 0., "ssim": 0.}
+
+    def evaluate(self, images):
+        """Evaluate a dataset.
+
+        Args:
+            images: a directory of images, an iterable of ``(image_name, image)`` pairs with
+                8-bit images in (height, width, channel) shape, or a ``ShardedDataset`` of
+                electron maps with the same ``full_well_capacity``.
+
+        Yields:
+            (image_name, metrics): the metrics of each image, in the order of the images.
+        """
+        if isinstance(images, ShardedDataset):
+            yield from self._evaluate_dataset(images)
+            return
+        if isinstance(images, (str, os.PathLike)):
+            images = self._iterate_directory(images)
+
+        in_flight = deque()
+        for index, (image_name, image) in enumerate(images):
+            if len(in_flight) == self.max_in_flight:
+                yield self._collect(*in_flight.popleft())
+
+            slot = self._write_slot(np.asarray(image, dtype = np.float64) / 255. * self.full_well_capacity)
+            future = self.pool.submit(_evaluate_frame, self.slots[slot].name, np.shape(image), index)
+            in_flight.append((image_name, slot, future))
+
+        while len(in_flight) > 0:
+            yield self._collect(*in_flight.popleft())
+
+    def summary(self):
+        """the mean metrics of all evaluated images."""
+        summary = {"num_images": self.num_images}
+        for name, metric_sum in self.metric_sums.items():
+            summary[name] = metric_sum / self.num_images if self.num_images > 0 else float("nan")
+        return summary
+
+    def close(self):
+        self.pool.shutdown()
+        for shm in self.slots:
+            shm.close()
+            shm.unlink()
+        self.slots = []
+        self.free_slots = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _evaluate_dataset(self, dataset):
+        if dataset.full_well_capacity != self.full_well_capacity:
+            raise Exception(
+                "Dataset full well capacity %s doesn't match %s." % (dataset.full_well_capacity, self.full_well_capacity)
+            )
+        # the workers map the shards, only the shard paths and offsets are sent.
+        in_flight = deque()
+        for index, image_name in enumerate(dataset.image_names):
+            if len(in_flight) == self.max_in_flight:
+                yield self._collect(*in_flight.popleft())
+
+            future = self.pool.submit(_evaluate_shard_frame, *dataset.locate(index), index)
+            in_flight.append((image_name, None, future))
+
+        while len(in_flight) > 0:
+            yield self._collect(*in_flight.popleft())
+
+    def _iterate_directory(self, image_dir):
+        for file_name in list_images(image_dir):
+            yield file_name, load_image(os.path.join(image_dir, file_name), self.grayscale)
+
+    def _write_slot(self, electrons):
+        if len(self.free_slots) > 0:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.slots)
+            self.slots.append(None)
+
+        shm = self.slots[slot]
+        if shm is None or shm.size < electrons.nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = shared_memory.SharedMemory(create = True, size = max(electrons.nbytes, 1))
+            self.slots[slot] = shm
+
+        np.ndarray(electrons.shape, dtype = np.float64, buffer = shm.buf)[...] = electrons
+        return slot
+
+    def _collect(self, image_name, slot, future):
+        try:
+            metrics = future.result()
+        finally:
+            if slot is not None:
+                self.free_slots.append(slot)
+
+        self.num_images += 1
+        for name in self.metric_sums:
+            self.metric_sums[name] += metrics[name]
+        return image_name, metrics
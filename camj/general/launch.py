@@ -1,13 +1,19 @@
+import contextlib
 import copy
-from pprint import pprint
-from prettytable import PrettyTable
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import fnmatch
+import os
 import numpy as np
-from inspect import signature
 
 # import local modules
+from camj.analog.function_model import frame_batch, signal_precision, signal_dtype, frame_shape, row_strip,\
+                                SignalMoments, _current_num_frame_axes
+from camj.analog.fpn_cache import fpn_cache
+from camj.analog.rng import reseed
 from camj.analog.utils import _find_analog_sw_stages, _find_analog_sw_mapping, analog_energy_simulation
 from camj.digital.compute import SystolicArray
 from camj.digital.infra import ReservationBoard, BufferMonitor
+from camj.digital.prefix_cache import StageRecord, compute_prefix_keys, replay_stage
 from camj.digital.utils import map_sw_hw, check_buffer_consistency, build_buffer_edges, \
                     allocate_output_buffer, increment_buffer_index, check_stage_finish, \
                     write_output_throughput, check_input_buffer_data_ready, \
@@ -19,7 +25,7 @@ from camj.sw.interface import PixelInput
 from camj.sw.utils import build_sw_graph
 
  
-def energy_simulation(hw_desc, mapping, sw_desc):
+def energy_simulation(hw_desc, mapping, sw_desc, return_cycle_cnt = False, prefix_cache = None):
     """Launch Energy Simulation
 
     The overall harness function to simulate analog and digital computation.
@@ -28,6 +34,15 @@ def energy_simulation(hw_desc, mapping, sw_desc):
         hw_desc (dict): hardware description.
         mapping (dict): mapping between software stages and hardware structures.
         sw_desc (list): software pipeline list.
+        return_cycle_cnt (bool): also return the overall system cycle count of the digital
+            simulation, the default value is ``False``.
+        prefix_cache (PrefixCache): a cache of previous digital simulations, unchanged upstream
+            stages are replayed from it instead of being simulated, the default value is ``None``.
+
+    Returns:
+        total_energy (int): total energy in pJ.
+        energy_breakdown (dict): energy of each analog array and digital compute unit in pJ.
+        cycle_cnt (int): overall system cycle count, only if ``return_cycle_cnt`` is ``True``.
     """
     # deep copy in case the function modify the orginal data
     hw_dict = copy.deepcopy(hw_desc)
@@ -37,7 +52,12 @@ def energy_simulation(hw_desc, mapping, sw_desc):
     analog_energy_dict = analog_energy_simulation(hw_dict["analog"], sw_stage_list, mapping_dict)
 
     print("\n###  Launch digital simulation  ###")
-    digital_energy_dict = digital_energy_simulation(hw_dict, mapping_dict, sw_stage_list)
+    digital_energy_dict, cycle_cnt = digital_energy_simulation(
+        hw_dict, mapping_dict, sw_stage_list, return_cycle_cnt = True, prefix_cache = prefix_cache
+    )
+
+    # only imported when a report is printed, it is slow to import.
+    from prettytable import PrettyTable
 
     ret_energy_dict = {}
     print_tab = PrettyTable(["Component Name", "Energy (pJ)"])
@@ -56,10 +76,13 @@ def energy_simulation(hw_desc, mapping, sw_desc):
     print("Energy breakdown:")
     print(print_tab)
 
+    if return_cycle_cnt:
+        return total_energy, ret_energy_dict, cycle_cnt
+
     return total_energy, ret_energy_dict
 
 
-def digital_energy_simulation(hw_desc, mapping, sw_desc):
+def digital_energy_simulation(hw_desc, mapping, sw_desc, return_cycle_cnt = False, prefix_cache = None):
     """Launch Digital Simulation
 
     The function to simulate digital computation.
@@ -68,6 +91,11 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
         hw_desc (dict): hardware description.
         mapping (dict): mapping between software stages and hardware structures.
         sw_desc (list): software pipeline list.
+        return_cycle_cnt (bool): also return the overall system cycle count, the default
+            value is ``False``.
+        prefix_cache (PrefixCache): a cache of previous digital simulations, see
+            ``camj.digital.prefix_cache``. Every stage whose dependency group is unchanged is
+            replayed from the cache, the default value is ``None``.
     """
     # some infras for digital simulation
     reservation_board = ReservationBoard(hw_desc["compute"])
@@ -76,6 +104,8 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
 
     if len(sw_stage_list) == 0:
         print("[DIGITAL] No software stages are mapped to digital domain.\n")
+        if return_cycle_cnt:
+            return {}, 0
         return {}
 
     # find interface stages
@@ -90,6 +120,18 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
 
     sw2hw, hw2sw = map_sw_hw(mapping_dict, sw_stage_list, hw_desc)
 
+    # find the stages that can be replayed from the prefix cache,
+    # the other stages are simulated and recorded.
+    replay_records = {}
+    stage_records = {}
+    if prefix_cache is not None:
+        prefix_keys = compute_prefix_keys(sw_stage_list, sw2hw)
+        replay_records = prefix_cache.lookup(prefix_keys)
+        for sw_stage in sw_stage_list:
+            if sw_stage not in replay_records:
+                stage_records[sw_stage] = StageRecord()
+        print("[DIGITAL] Replay %d of %d stages from prefix cache." % (len(replay_records), len(sw_stage_list)))
+
     buffer_edge_dict = build_buffer_edges(sw_stage_list, hw_desc, sw2hw)
 
     allocate_output_buffer(
@@ -126,6 +168,16 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
                     print("[FINISH]", sw_stage, "is finished already")
                 continue
 
+            # replay the recorded activity of an unchanged stage
+            if sw_stage in replay_records:
+                if cycle % PRINT_CYCLE == 0:
+                    print("[REPLAY]", sw_stage, "is replayed from prefix cache")
+                if replay_stage(replay_records[sw_stage], cycle, sw_stage, hw_unit, hw2sw):
+                    finished_stage[sw_stage] = True
+                    idle_stage.pop(sw_stage)
+                    check_finish_data_dependency(sw_stage, finished_stage)
+                continue
+
             if sw_stage in reserved_cycle_cnt:
                 reserved_cycle_cnt[sw_stage] += 1
 
@@ -151,6 +203,8 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
                 elif input_buffer._have_data_read(remain_read_cnt):
                     input_buffer._read_data(remain_read_cnt)
                     hw_unit._read_from_input_buffer(remain_read_cnt)
+                    if sw_stage in stage_records:
+                        stage_records[sw_stage].record_read(cycle, remain_read_cnt)
                     if hw_unit._check_read_finish():
                         if cycle % PRINT_CYCLE == 0:
                             print("[READ]", hw_unit, "is ready to compute")
@@ -179,6 +233,8 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
                 if cycle % PRINT_CYCLE == 0:
                     print("[PROCESS]", sw_stage, "in processing_stage")
                 hw_unit._process_one_cycle()
+                if sw_stage in stage_records:
+                    stage_records[sw_stage].record_compute()
                 # check_input_buffer(hw_unit, sw_stage)
                 if hw_unit._finish_computation():
                     # # output data to the targeted buffer and increment output buffer index
@@ -214,6 +270,8 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
                     write_index = hw_unit._write_to_output_buffer(remain_write_cnt)
                     # output data to the targeted buffer and increment output buffer index
                     write_output_throughput(hw_unit, sw_stage, hw2sw, write_index, remain_write_cnt)
+                    if sw_stage in stage_records:
+                        stage_records[sw_stage].record_write(cycle, write_index, remain_write_cnt)
                     if hw_unit._check_write_finish():
                         if cycle % PRINT_CYCLE == 0:
                             print("[WRITE]", hw_unit, "finishes writing")
@@ -230,6 +288,8 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
                         print("[WRITE]", sw_stage, "finish writing the buffer.", hw_unit, "is released.")
                     reservation_board.release_hw_unit(sw_stage, hw_unit)
                     finished_stage[sw_stage] = True
+                    if sw_stage in stage_records:
+                        stage_records[sw_stage].record_finish(cycle)
                     # also need to pop sw_stage from the idle stage
                     idle_stage.pop(sw_stage)
                     # check if all input stages of sw_stage have been finished,
@@ -288,6 +348,15 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
             print("[Finished stage]: ", finished_stage)
 
         if len(finished_stage.keys()) == len(sw_stage_list):
+            # add the compute cycles of replayed stages and cache the simulated stages
+            for sw_stage, record in replay_records.items():
+                sw2hw[sw_stage].sys_all_compute_cycle += record.compute_cycle
+                sw2hw[sw_stage].get_total_write()
+                reserved_cycle_cnt[sw_stage] = record.reserved_cycle
+            for sw_stage, record in stage_records.items():
+                record.reserved_cycle = reserved_cycle_cnt.get(sw_stage, 0)
+                prefix_cache.store(prefix_keys[sw_stage], record)
+
             hw_list = hw_desc["compute"]
             print("\n\n[Summary]")
             print("Overall system cycle count: ", cycle)
@@ -303,27 +372,120 @@ def digital_energy_simulation(hw_desc, mapping, sw_desc):
                 print(mem_unit, "total memory energy: %d pJ" % mem_unit.total_memory_access_energy())
 
             print("[End] Digitial Simulation is DONE!")
+            if return_cycle_cnt:
+                return ret_dict, cycle
             return ret_dict
             
 
     print("\nSimulation is not finished, increase your cycle counts or debug your code.")
 
 
-def functional_simulation(sw_desc, hw_desc, mapping, input_mapping):
+def functional_simulation(
+    sw_desc,
+    hw_desc,
+    mapping,
+    input_mapping,
+    batched = False,
+    seed = None,
+    dtype = np.float64,
+    strip_height = None,
+    probes = None,
+    probe_dir = None,
+    fpn_cache_dir = None,
+    num_threads = None,
+    run = None
+):
     """Launch Functional Simulation
 
     The function to simulate functional computation.
 
+    In batched mode, every input signal in ``input_mapping`` is a stack of frames with a leading
+    frame axis, e.g., ``(num_frames, height, width, channel)``, and all frames are simulated in
+    one pass. Fixed-pattern noise is shared by all frames and temporal noise is drawn for each
+    frame, so the result is the same as simulating the frames one-by-one on the same sensor.
+    Weight inputs of convolution stay in ``(height, width, num_kernels)``, they are shared by
+    all frames.
+
+    With ``strip_height``, the frames are simulated in strips of rows, so the intermediate
+    signals only hold one strip at a time. Each strip is extended by the rows that the
+    convolutions and binnings of the pipeline need from the next strip, so the result is the
+    same as simulating the full frame. Fixed-pattern noise is drawn for the full frame and
+    shared by all strips.
+
+    Digital stages with a functional kernel (see ``camj.digital.function_model``) run after
+    the analog arrays, on the outputs of their input stages, so the full pipeline is simulated
+    in one pass. Their outputs are keyed by stage names. Inputs in ``input_mapping`` can also
+    be given to stages mapped to the digital domain.
+
     Args:
         hw_desc (dict): hardware description.
         mapping (dict): mapping between software stages and hardware structures.
         sw_desc (list): software pipeline list.
         input_mapping (dict): input data mapping.
+        batched (bool): if ``True``, input signals have a leading frame axis, the default
+            value is ``False``.
+        seed (int): if not ``None``, all function models are reseeded from ``seed`` (see
+            ``camj.analog.rng.reseed``), so the result is reproducible, the default value is
+            ``None``.
+        dtype: the floating point type of all signals, ``np.float32`` halves the memory of
+            the simulation, the default value is ``np.float64``.
+        strip_height (int): if not ``None``, the number of new input rows in each strip. The
+            input signals with the most rows are split into strips, smaller inputs, e.g.,
+            convolution weights, are given to every strip as a whole. The height is rounded up
+            to a multiple of the overall stride of the pipeline. The default value is ``None``.
+        probes (list): if not ``None``, only these sub-component outputs are returned, every
+            other intermediate signal is released as soon as the analog arrays that need it
+            have run. Each probe is a hierarchical key in ``array/component/subcomponent``
+            format (see ``AnalogArray.probe_keys``) or a shell-style pattern of keys, e.g.,
+            ``PixelArray/*``. The returned dictionary is keyed by the hierarchical keys. The
+            default value is ``None``, which returns all outputs keyed by sub-component names.
+            Digital stage outputs are returned if their stage names match a probe.
+        probe_dir (str): if not ``None``, the probed signals are written to ``.npy`` files in
+            this directory and returned as ``np.memmap`` arrays, one file for each signal,
+            e.g., ``PixelArray/Pixel/ActivePixelSensor.0.npy``. The default value is ``None``.
+        fpn_cache_dir (str): if not ``None``, the fixed-pattern noise maps of seeded function
+            models are cached in this directory (see ``camj.analog.fpn_cache``), so the same
+            sensor keeps the same fixed-pattern noise across runs and processes. The default
+            value is ``None``, which uses the cache set by ``camj.analog.fpn_cache.set_cache_dir``.
+        num_threads (int): the number of threads to simulate independent analog arrays
+            concurrently, ``1`` simulates all analog arrays in this thread. The result doesn't
+            depend on the number of threads. The default value is ``None``, which uses the
+            default of ``concurrent.futures.ThreadPoolExecutor``.
+        run (int): if not ``None``, the index of a run of the sensor given by ``seed``, e.g., for
+            Monte Carlo noise statistics (see ``camj.general.noise_statistics``). Every run has
+            independent temporal noise and the same fixed-pattern noise. The default value is
+            ``None``.
+
+    Returns:
+        Simulation result (dict): a dictionary of the output signal list of each sub-component
+            and each digital stage with a functional kernel.
     """
+    if probe_dir is not None and probes is None:
+        raise Exception("'probe_dir' needs 'probes' to know which signals to write.")
+    if run is not None and seed is None:
+        raise Exception("'run' needs 'seed' to know which sensor to simulate.")
+
+    cache_context = fpn_cache(fpn_cache_dir) if fpn_cache_dir is not None else contextlib.nullcontext()
+    with frame_batch(1 if batched else 0), signal_precision(dtype), cache_context:
+        return _functional_simulation(
+            sw_desc, hw_desc, mapping, input_mapping, seed, run, strip_height, probes, probe_dir, num_threads
+        )
+
+
+def _functional_simulation(
+    sw_desc, hw_desc, mapping, input_mapping, seed, run, strip_height, probes, probe_dir, num_threads
+):
     # deep copy in case the function modify the orginal data
     hw_dict = copy.deepcopy(hw_desc)
     mapping_dict = copy.deepcopy(mapping)
     sw_stage_list = copy.deepcopy(sw_desc)
+    if seed is not None:
+        reseed(hw_dict["analog"], seed, run = run)
+    # input signals are never modified, they are only converted if they are not in ``dtype``.
+    input_mapping = {
+        k: [np.asarray(input_signal, dtype = signal_dtype()) for input_signal in input_signal_list]
+        for k, input_signal_list in input_mapping.items()
+    }
     # complete the software stages data dependency graph.
     build_sw_graph(sw_stage_list)
 
@@ -331,73 +493,486 @@ def functional_simulation(sw_desc, hw_desc, mapping, input_mapping):
     analog_sw_stages = _find_analog_sw_stages(sw_stage_list, hw_dict["analog"], mapping_dict)
     analog_sw_mapping = _find_analog_sw_mapping(sw_stage_list, hw_dict["analog"], mapping_dict)
 
-    finished_stages = []
-    ready_input = {}
-    visited_analog_array = []
-    simulation_res = {}
+    # digital stages with functional kernels run after the analog arrays.
+    digital_sw_stages = _find_functional_digital_stages(sw_stage_list, analog_sw_stages)
+    if len(digital_sw_stages) > 0 and strip_height is not None:
+        raise Exception("Digital functional kernels don't support 'strip_height'.")
+
+    if probes is not None:
+        probes = _find_probe_keys(hw_dict["analog"], probes, [sw_stage.name for sw_stage in digital_sw_stages])
+
+    if strip_height is not None:
+        return _strip_functional_simulation(
+            analog_sw_stages, analog_sw_mapping, input_mapping, strip_height, probes, probe_dir, num_threads
+        )
+
+    def simulate_array(analog_array, input_signal_list):
+        noise_res_list = analog_array.noise(input_signal_list, probes = probes)
+        if probe_dir is None:
+            return noise_res_list
+        # move the probed signals to disk right away, the arrays in memory are released.
+        return [
+            (key, output_signal_list if key is None else _probe_signal_list(probe_dir, key, output_signal_list))
+            for key, output_signal_list in noise_res_list
+        ]
+
+    if len(digital_sw_stages) == 0:
+        return _simulate_analog_arrays(
+            analog_sw_stages, analog_sw_mapping, input_mapping, simulate_array, num_threads
+        )
+
+    # keep the output signal lists of the analog stages that digital stages read.
+    stage_outputs = {
+        in_stage.name: None
+        for sw_stage in digital_sw_stages for in_stage in sw_stage.input_stages if in_stage in analog_sw_stages
+    }
+    simulation_res = _simulate_analog_arrays(
+        analog_sw_stages,
+        analog_sw_mapping,
+        {k: v for k, v in input_mapping.items() if k in analog_sw_mapping},
+        simulate_array,
+        num_threads,
+        stage_outputs
+    )
+    for sw_stage, output_signal in _simulate_digital_stages(digital_sw_stages, input_mapping, stage_outputs):
+        if probes is None:
+            simulation_res[sw_stage.name] = [output_signal]
+        elif sw_stage.name in probes:
+            simulation_res[sw_stage.name] = [output_signal] if probe_dir is None \
+                else _probe_signal_list(probe_dir, sw_stage.name, [output_signal])
+
+    return simulation_res
+
+
+def _find_functional_digital_stages(sw_stage_list, analog_sw_stages):
+    # the digital stages with functional kernels, in data dependency order.
+    remain_stages = [
+        sw_stage for sw_stage in sw_stage_list
+        if sw_stage not in analog_sw_stages and getattr(sw_stage, "functional_kernel", None) is not None
+    ]
+    stage_order = []
+    while len(remain_stages) > 0:
+        next_remain_stages = [
+            sw_stage for sw_stage in remain_stages
+            if any(in_stage in remain_stages for in_stage in sw_stage.input_stages)
+        ]
+        stage_order.extend(sw_stage for sw_stage in remain_stages if sw_stage not in next_remain_stages)
+        if len(next_remain_stages) == len(remain_stages):
+            raise Exception("Digital stages %s have a cyclic data dependency." % [s.name for s in remain_stages])
+        remain_stages = next_remain_stages
+
+    return stage_order
+
+
+def _simulate_digital_stages(digital_sw_stages, input_mapping, stage_outputs):
+    """
+    This function runs the functional kernels of the digital stages in data dependency order,
+    the input of a stage is the outputs of its input stages, followed by its signals in
+    ``input_mapping``. It yields each stage and its output.
+
+    """
+    for sw_stage in digital_sw_stages:
+        input_signal_list = []
+        for in_stage in sw_stage.input_stages:
+            if stage_outputs.get(in_stage.name) is not None:
+                input_signal_list.extend(stage_outputs[in_stage.name])
+            elif in_stage.name in input_mapping:
+                input_signal_list.extend(input_mapping[in_stage.name])
+            else:
+                raise Exception(
+                    "Digital stage '%s' needs the output of '%s', which is not simulated." % (sw_stage.name, in_stage.name)
+                )
+        input_signal_list.extend(input_mapping.get(sw_stage.name, []))
+
+        output_signal = sw_stage.functional_kernel.simulate_output(input_signal_list)
+        stage_outputs[sw_stage.name] = [output_signal]
+        yield sw_stage, output_signal
+
+
+def moment_simulation(sw_desc, hw_desc, mapping, input_mapping, seed = None, dtype = np.float64):
+    """Launch Signal Moment Simulation
+
+    The analytic counterpart of ``functional_simulation``. Instead of noisy samples, the
+    per-pixel mean and variance of every signal are propagated through the analog arrays in
+    one pass (see ``camj.analog.function_model.SignalMoments``), e.g., to get the SNR map of a
+    sensor with ``camj.analog.function_model.snr_map``. With the same ``seed``, the
+    fixed-pattern noise is the same as in ``functional_simulation``, so the moments are those
+    of many frames simulated on the same sensor.
+
+    Args:
+        hw_desc (dict): hardware description.
+        mapping (dict): mapping between software stages and hardware structures.
+        sw_desc (list): software pipeline list.
+        input_mapping (dict): input data mapping, an input is a noiseless signal in a numpy
+            array, or its ``SignalMoments``.
+        seed (int): if not ``None``, all function models are reseeded from ``seed``, the default
+            value is ``None``.
+        dtype: the floating point type of all moments, the default value is ``np.float64``.
+
+    Returns:
+        Simulation result (dict): a dictionary of the output moments list of each sub-component.
+    """
+    with signal_precision(dtype):
+        hw_dict = copy.deepcopy(hw_desc)
+        mapping_dict = copy.deepcopy(mapping)
+        sw_stage_list = copy.deepcopy(sw_desc)
+        if seed is not None:
+            reseed(hw_dict["analog"], seed)
+        input_mapping = {
+            k: [
+                SignalMoments(*input_signal) if isinstance(input_signal, SignalMoments) else SignalMoments(input_signal)
+                for input_signal in input_signal_list
+            ]
+            for k, input_signal_list in input_mapping.items()
+        }
+        build_sw_graph(sw_stage_list)
+
+        analog_sw_stages = _find_analog_sw_stages(sw_stage_list, hw_dict["analog"], mapping_dict)
+        analog_sw_mapping = _find_analog_sw_mapping(sw_stage_list, hw_dict["analog"], mapping_dict)
+
+        return _simulate_analog_arrays(
+            analog_sw_stages,
+            analog_sw_mapping,
+            input_mapping,
+            lambda analog_array, input_moments_list: analog_array.moments(input_moments_list),
+            num_threads = 1
+        )
+
+
+def _find_probe_keys(analog_arrays, probes, digital_stage_names = ()):
+    # expand the probe patterns into the hierarchical keys of the analog arrays and the names
+    # of digital stages.
+    keys = [key for analog_array in analog_arrays for key in analog_array.probe_keys()] + list(digital_stage_names)
+    probe_keys = set()
+    for probe in probes:
+        matched_keys = fnmatch.filter(keys, probe)
+        if len(matched_keys) == 0:
+            raise Exception("Probe '%s' doesn't match any of %s." % (probe, keys))
+        probe_keys.update(matched_keys)
+
+    return probe_keys
+
+
+def _new_probe_signal(probe_dir, key, index, shape, dtype):
+    # a new signal for probe ``key``, it is a memory-mapped ``.npy`` file if ``probe_dir`` is set.
+    if probe_dir is None:
+        return np.empty(shape, dtype = dtype)
+
+    path = os.path.join(probe_dir, *key.split("/")) + ".%d.npy" % index
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    return np.lib.format.open_memmap(path, mode = "w+", dtype = dtype, shape = tuple(shape))
+
+
+def _probe_signal_list(probe_dir, key, output_signal_list):
+    # write the signals of probe ``key`` to memory-mapped files.
+    probe_signal_list = []
+    for i, output_signal in enumerate(output_signal_list):
+        probe_signal = _new_probe_signal(probe_dir, key, i, output_signal.shape, output_signal.dtype)
+        probe_signal[...] = output_signal
+        probe_signal_list.append(probe_signal)
+
+    return probe_signal_list
+
+
+def _find_analog_stage_order(analog_sw_stages, input_mapping):
+    """
+    This function finds the order to simulate the analog stages that are not in the input
+    mapping. A stage is simulated once all its input stages are finished.
+
+    """
+    finished_stages = set(input_mapping.keys())
+    stage_order = []
+    remain_stages = [sw_stage for sw_stage in analog_sw_stages if sw_stage.name not in finished_stages]
+    while len(remain_stages) > 0:
+        next_remain_stages = []
+        for sw_stage in remain_stages:
+            if all(in_stage.name in finished_stages for in_stage in sw_stage.input_stages):
+                finished_stages.add(sw_stage.name)
+                stage_order.append(sw_stage)
+            else:
+                next_remain_stages.append(sw_stage)
+
+        if len(next_remain_stages) == len(remain_stages):
+            raise Exception(
+                "Analog stages %s have input stages that are never computed." \
+                % [sw_stage.name for sw_stage in remain_stages]
+            )
+        remain_stages = next_remain_stages
+
+    return stage_order
+
+
+def _simulate_analog_arrays(
+    analog_sw_stages, analog_sw_mapping, input_mapping, simulate_array, num_threads = None, stage_outputs = None
+):
+    """
+    This function walks the analog arrays in data dependency order, each analog array is
+    simulated by ``simulate_array(analog_array, input_signal_list)``, which returns the
+    simulation result of ``AnalogArray.noise``. Results with a ``None`` key are not kept.
+    The output of a stage is released once all the stages that need it have run, except for
+    the stages that are keys of ``stage_outputs``, their outputs are stored in it.
+
+    Analog arrays that don't depend on each other run concurrently on ``num_threads`` threads,
+    the simulation result is the same as running them one by one.
+
+    """
+    stage_order = _find_analog_stage_order(analog_sw_stages, input_mapping)
+
+    # each task is (stage name, input stage names, analog array to simulate or ``None``).
+    tasks = []
+    visited_analog_array = set()
     # first process those analog stages that are initial stage in analog pipeline.
     for k in input_mapping.keys():
         analog_array = analog_sw_mapping[k]
-
         # if no input array, then it is the source, perform noise modeling
         if len(analog_array.input_arrays) == 0:
-            noise_res_list = analog_array.noise(input_mapping[k])
-            for pair in noise_res_list:
-                simulation_res[pair[0]] = pair[1]
-            ready_input[k] = noise_res_list[-1][1]
-            finished_stages.append(k)
-            visited_analog_array.append(analog_array)
+            tasks.append((k, [], analog_array))
+            visited_analog_array.add(analog_array)
         # if this analog array has any input array, then, this is just part of input for this analog
         # array. no need to perform noise modeling
         else:
-            finished_stages.append(k)
-            ready_input[k] = input_mapping[k]
+            tasks.append((k, [], None))
+
+    # we assume for one particular analog stage, one analog array will only be accessed once, only
+    # the first stage mapped to an analog array simulates it.
+    for sw_stage in stage_order:
+        analog_array = analog_sw_mapping[sw_stage.name]
+        input_stage_names = [in_stage.name for in_stage in sw_stage.input_stages]
+        if analog_array in visited_analog_array:
+            tasks.append((sw_stage.name, input_stage_names, None))
+        else:
+            # check if the analog array contains the Conv instance and config the convolution instance
+            analog_array._configure_operation(sw_stage = sw_stage)
+            tasks.append((sw_stage.name, input_stage_names, analog_array))
+            visited_analog_array.add(analog_array)
 
-    # iteratively process the remain analog stages
-    while len(finished_stages) != len(analog_sw_stages):
-        for sw_stage in analog_sw_stages:
-            if sw_stage.name in finished_stages:
-                continue
+    # the number of analog stages that still need the output of each stage.
+    num_consumers = {}
+    for _, input_stage_names, _ in tasks:
+        for in_stage_name in input_stage_names:
+            num_consumers[in_stage_name] = num_consumers.get(in_stage_name, 0) + 1
 
-            ready_flag = True
-            for in_stage in sw_stage.input_stages:
-                if in_stage.name not in finished_stages:
-                    ready_flag = False
+    ready_input = {}
+    stage_res = {}
+    waiting_tasks = tasks
+    running_tasks = {}
+    pool = ThreadPoolExecutor(num_threads) if num_threads != 1 else None
+    if pool is not None:
+        # frame batch and signal precision are per thread, the workers use the ones of this thread.
+        num_frame_axes, dtype = _current_num_frame_axes(), signal_dtype()
+        simulate_in_thread = simulate_array
+
+        def simulate_array(analog_array, input_signal_list):
+            with frame_batch(num_frame_axes), signal_precision(dtype):
+                return simulate_in_thread(analog_array, input_signal_list)
+
+    try:
+        while len(waiting_tasks) > 0 or len(running_tasks) > 0:
+            next_waiting_tasks = []
+            for name, input_stage_names, analog_array in waiting_tasks:
+                if not all(in_stage_name in ready_input for in_stage_name in input_stage_names):
+                    next_waiting_tasks.append((name, input_stage_names, analog_array))
+                    continue
 
-            # check if all input stages are ready
-            if ready_flag:
-                analog_array = analog_sw_mapping[sw_stage.name]
                 curr_input_list = []
                 # include any input that is generated from input stage
-                for in_stage in sw_stage.input_stages:
-                    for input_data in ready_input[in_stage.name]:
-                        curr_input_list.append(input_data)
+                for in_stage_name in input_stage_names:
+                    curr_input_list.extend(ready_input[in_stage_name])
+                    num_consumers[in_stage_name] -= 1
+                    if num_consumers[in_stage_name] == 0:
+                        del ready_input[in_stage_name]
                 # include any input from input mapping file
-                for k in input_mapping.keys():
-                    if analog_array == analog_sw_mapping[k] and k == sw_stage.name:
-                        for input_data in input_mapping[k]:
-                            curr_input_list.append(input_data)
-
-                # if the analog array is already computed, we assume for one particular
-                # analog stage, one analog array will only be accessed once.
-                if analog_array in visited_analog_array:
-                    ready_input[sw_stage.name] = curr_input_list
-                    finished_stages.append(sw_stage.name)
-                # else we will perform functional simulation routine.
+                if name in input_mapping and (analog_array is None or analog_array == analog_sw_mapping[name]):
+                    curr_input_list.extend(input_mapping[name])
+
+                if analog_array is None:
+                    if num_consumers.get(name, 0) > 0:
+                        ready_input[name] = curr_input_list
+                elif pool is None:
+                    running_tasks[_finished_future(simulate_array, analog_array, curr_input_list)] = name
                 else:
-                    # check if the analog array contains the Conv instance and config the convolution instance
-                    analog_array._configure_operation(sw_stage = sw_stage)
-                    noise_res_list = analog_array.noise(curr_input_list)
-                    for pair in noise_res_list:
-                        simulation_res[pair[0]] = pair[1]
-                    ready_input[sw_stage.name] = noise_res_list[-1][1]
-                    finished_stages.append(sw_stage.name)
-                    visited_analog_array.append(analog_array)
+                    running_tasks[pool.submit(simulate_array, analog_array, curr_input_list)] = name
+                del curr_input_list
+
+            # a pass-through stage may make other stages ready without waiting.
+            if len(next_waiting_tasks) < len(waiting_tasks) and len(running_tasks) == 0:
+                waiting_tasks = next_waiting_tasks
+                continue
+            waiting_tasks = next_waiting_tasks
+
+            done_tasks, _ = wait(running_tasks, return_when = FIRST_COMPLETED)
+            for future in done_tasks:
+                name = running_tasks.pop(future)
+                noise_res_list = future.result()
+                stage_res[name] = [pair for pair in noise_res_list if pair[0] is not None]
+                if num_consumers.get(name, 0) > 0:
+                    ready_input[name] = noise_res_list[-1][1]
+                if stage_outputs is not None and name in stage_outputs:
+                    stage_outputs[name] = noise_res_list[-1][1]
+                del noise_res_list
+    finally:
+        if pool is not None:
+            pool.shutdown(wait = True)
+
+    # merge the results in stage order, so the result doesn't depend on the thread timing.
+    simulation_res = {}
+    for name, _, _ in tasks:
+        for pair in stage_res.get(name, []):
+            simulation_res[pair[0]] = pair[1]
 
     # return a dictionaray, key is the software stage name, the value is the simulation result.
     return simulation_res
 
 
+def _finished_future(fn, *args):
+    # run ``fn`` in this thread and wrap its result in a finished future.
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except BaseException as e:
+        future.set_exception(e)
+    return future
+
+
+def _strip_functional_simulation(
+    analog_sw_stages, analog_sw_mapping, input_mapping, strip_height, probes, probe_dir, num_threads
+):
+    """
+    This function simulates the analog arrays strip by strip. The row geometry of a signal is
+    ``(stride_rows, kernel_rows)``: its row ``r`` is computed from the input rows
+    ``[r * stride_rows, r * stride_rows + kernel_rows)``. Signals that don't depend on the strips,
+    e.g., weights, have no row geometry and are only simulated once.
+
+    """
+    # the input signals with the most rows are the frames, they are split into strips.
+    num_rows = {
+        id(input_signal): input_signal.shape[np.ndim(input_signal) - len(frame_shape(input_signal.shape))]
+        for input_signal_list in input_mapping.values() for input_signal in input_signal_list
+    }
+    frame_rows = max(num_rows.values())
+
+    # first find the row geometry of every signal, without simulation.
+    geometry_list = []
+    def array_geometry(analog_array, input_geometry_list):
+        geometry = set([g for g in input_geometry_list if g is not None])
+        if len(geometry) > 1:
+            raise Exception("Inputs of '%s' are in different row strips." % analog_array.name)
+        geometry = geometry.pop() if len(geometry) > 0 else None
+        geometry_res = []
+        for kernel_rows, stride_rows in analog_array._row_geometry():
+            if geometry is not None:
+                geometry = (geometry[0] * stride_rows, (kernel_rows - 1) * geometry[0] + geometry[1])
+                geometry_list.append(geometry)
+            geometry_res.append((None, [geometry]))
+        return geometry_res
+
+    _simulate_analog_arrays(
+        analog_sw_stages,
+        analog_sw_mapping,
+        {
+            k: [(1, 1) if num_rows[id(s)] == frame_rows else None for s in input_signal_list]
+            for k, input_signal_list in input_mapping.items()
+        },
+        array_geometry,
+        num_threads = 1
+    )
+    if len(geometry_list) == 0:
+        geometry_list.append((1, 1))
+
+    # new rows of each strip, which is a multiple of all strides so that every strip starts at
+    # an output row, and the extra rows that the strip needs from the next strip.
+    stride_rows = int(np.lcm.reduce([g[0] for g in geometry_list]))
+    strip_step = -(-strip_height // stride_rows) * stride_rows
+    halo_rows = max([g[1] - g[0] for g in geometry_list])
+    kernel_rows = max([g[1] for g in geometry_list])
+
+    simulation_res = {}
+    res_geometry = {}
+    num_finished_rows = {}
+    unstriped_res = {}
+    for strip_start in range(0, max(frame_rows - kernel_rows, 0) + 1, strip_step):
+        # the last strip takes all remaining rows.
+        strip_end = strip_start + strip_step + halo_rows
+        if strip_start + strip_step > frame_rows - kernel_rows:
+            strip_end = frame_rows
+
+        signal_geometry = {}
+        strip_input_mapping = {}
+        for k, input_signal_list in input_mapping.items():
+            strip_input_mapping[k] = []
+            for input_signal in input_signal_list:
+                if num_rows[id(input_signal)] == frame_rows:
+                    row_axis = np.ndim(input_signal) - len(frame_shape(input_signal.shape))
+                    input_signal = input_signal[(slice(None),) * row_axis + (slice(strip_start, strip_end),)]
+                    signal_geometry[id(input_signal)] = (1, 1)
+                strip_input_mapping[k].append(input_signal)
+
+        def simulate_strip(analog_array, input_signal_list):
+            geometry = set([signal_geometry[id(s)] for s in input_signal_list if id(s) in signal_geometry])
+            # arrays that don't depend on the strips are only simulated once.
+            if len(geometry) == 0:
+                if analog_array.name not in unstriped_res:
+                    unstriped_res[analog_array.name] = [
+                        (key, output_signal_list if key is None or probe_dir is None \
+                            else _probe_signal_list(probe_dir, key, output_signal_list))
+                        for key, output_signal_list in analog_array.noise(input_signal_list, probes = probes)
+                    ]
+                for pair in unstriped_res[analog_array.name]:
+                    res_geometry[id(pair[1])] = None
+                return unstriped_res[analog_array.name]
+
+            geometry = geometry.pop()
+            with row_strip(strip_start // geometry[0], (frame_rows - geometry[1]) // geometry[0] + 1):
+                noise_res_list = analog_array.noise(input_signal_list, probes = probes)
+            geometry_list = []
+            for kernel_rows, stride_rows in analog_array._row_geometry():
+                geometry = (geometry[0] * stride_rows, (kernel_rows - 1) * geometry[0] + geometry[1])
+                geometry_list.append(geometry)
+            # with probes, only some sub-component outputs are in the result.
+            if probes is not None:
+                keys = analog_array.probe_keys() + [None]
+                geometry_list = geometry_list + geometry_list[-1:]
+                geometry_list = [geometry_list[keys.index(pair[0])] for pair in noise_res_list]
+
+            for pair, geometry in zip(noise_res_list, geometry_list):
+                for output_signal in pair[1]:
+                    signal_geometry[id(output_signal)] = geometry
+                res_geometry[id(pair[1])] = geometry
+            return noise_res_list
+
+        strip_res = _simulate_analog_arrays(
+            analog_sw_stages, analog_sw_mapping, strip_input_mapping, simulate_strip, num_threads
+        )
+
+        # write the new rows of each strip result into the full-frame result.
+        for key, output_signal_list in strip_res.items():
+            if res_geometry[id(output_signal_list)] is None:
+                simulation_res[key] = output_signal_list
+                continue
+
+            stride, kernel = res_geometry[id(output_signal_list)]
+            first_row = strip_start // stride
+            if key not in simulation_res:
+                simulation_res[key] = []
+                for output_signal in output_signal_list:
+                    row_axis = np.ndim(output_signal) - len(frame_shape(output_signal.shape))
+                    shape = list(output_signal.shape)
+                    shape[row_axis] = (frame_rows - kernel) // stride + 1
+                    simulation_res[key].append(
+                        _new_probe_signal(probe_dir, key, len(simulation_res[key]), shape, output_signal.dtype)
+                    )
+                num_finished_rows[key] = 0
+
+            for output_signal, full_signal in zip(output_signal_list, simulation_res[key]):
+                row_axis = np.ndim(output_signal) - len(frame_shape(output_signal.shape))
+                new_rows = output_signal[(slice(None),) * row_axis + (slice(num_finished_rows[key] - first_row, None),)]
+                end_row = first_row + output_signal.shape[row_axis]
+                full_signal[(slice(None),) * row_axis + (slice(num_finished_rows[key], end_row),)] = new_rows
+            num_finished_rows[key] = end_row
+
+    return simulation_res
+
+
 def _find_analog_interface_stages(sw_stage_list, org_sw_stage_list, org_mapping_dict):
     """
     This function finds those functions that are at the interface between analog and digital
@@ -0,0 +1,183 @@
+"""Noise Statistics
+
+This module accumulates per-pixel statistics of simulated signals over many
+``functional_simulation`` runs, without keeping the frames. Each signal has running mean,
+variance, minimum and maximum of every pixel, updated in place with Welford's algorithm in
+``float64``, so the memory is in the order of one frame regardless of the number of runs.
+The means of each row and each column of every frame are accumulated in the same way, so
+row and column fixed-pattern noise can be separated from temporal noise.
+
+Examples:
+        To characterize the noise of one sensor over 100 runs:
+
+        >>> statistics = NoiseStatistics()
+        >>> for run in range(100):
+                statistics.update(
+                    functional_simulation(
+                        sw_desc, hw_desc, mapping, input_mapping, seed = 2023, run = run,
+                        probes = ["PixelArray/*"]
+                    )
+                )
+        >>> pixel_statistics = statistics["PixelArray/Pixel/ActivePixelSensor"][0]
+        >>> pixel_statistics.temporal_noise(), pixel_statistics.row_fpn()
+
+"""
+
+import fnmatch
+import numpy as np
+
+
+def _welford_update(mean, m2, num_prev_frames, frames):
+    # merge a batch of frames along axis 0 into a running mean and sum of squared deviations
+    # of ``num_prev_frames`` frames in place, i.e., Chan et al.'s parallel form of Welford's
+    # algorithm. With one frame, it is Welford's update.
+    num_batch_frames = frames.shape[0]
+    num_frames = num_prev_frames + num_batch_frames
+    delta = np.mean(frames, axis = 0, dtype = np.float64)
+    delta -= mean
+    mean += delta * (num_batch_frames / num_frames)
+    if num_batch_frames > 1:
+        m2 += np.var(frames, axis = 0, dtype = np.float64) * num_batch_frames
+    delta **= 2
+    m2 += delta * (num_prev_frames * num_batch_frames / num_frames)
+
+
+class PixelStatistics(object):
+    """Pixel Statistics
+
+    Running statistics of one signal in (height, width, channel) shape over many frames.
+
+    Args:
+        shape (tuple): the shape of one frame of the signal.
+
+    Attributes:
+        num_frames (int): the number of accumulated frames.
+        mean: the mean of each pixel.
+        min: the minimum of each pixel.
+        max: the maximum of each pixel.
+        row_mean: the mean of each row, in (height, channel) shape.
+        column_mean: the mean of each column, in (width, channel) shape.
+    """
+    def __init__(self, shape):
+        super(PixelStatistics, self).__init__()
+        if len(shape) != 3:
+            raise Exception("Signal in 'PixelStatistics' needs to be in (height, width, channel) 3D shape.")
+
+        self.shape = tuple(shape)
+        self.num_frames = 0
+        self.mean = np.zeros(shape, dtype = np.float64)
+        self.m2 = np.zeros(shape, dtype = np.float64)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        self.row_mean = np.zeros((shape[0], shape[2]), dtype = np.float64)
+        self.row_m2 = np.zeros((shape[0], shape[2]), dtype = np.float64)
+        self.column_mean = np.zeros((shape[1], shape[2]), dtype = np.float64)
+        self.column_m2 = np.zeros((shape[1], shape[2]), dtype = np.float64)
+
+    def update(self, signal, batched = False):
+        """Accumulate the frames of a signal.
+
+        Args:
+            signal: one frame, or a stack of frames with a leading frame axis if ``batched``.
+            batched (bool): if ``signal`` has a leading frame axis, the default value is ``False``.
+        """
+        frames = signal if batched else signal[np.newaxis]
+        if frames.shape[1:] != self.shape:
+            raise Exception(
+                "Frame shape %s doesn't match the accumulated shape %s." % (frames.shape[1:], self.shape)
+            )
+
+        _welford_update(self.mean, self.m2, self.num_frames, frames)
+        _welford_update(self.row_mean, self.row_m2, self.num_frames, np.mean(frames, axis = 2, dtype = np.float64))
+        _welford_update(self.column_mean, self.column_m2, self.num_frames, np.mean(frames, axis = 1, dtype = np.float64))
+        np.minimum(self.min, np.min(frames, axis = 0), out = self.min)
+        np.maximum(self.max, np.max(frames, axis = 0), out = self.max)
+        self.num_frames += frames.shape[0]
+
+    def var(self, ddof = 1):
+        """the temporal variance of each pixel, ``ddof = 1`` gives the unbiased estimate."""
+        return self.m2 / (self.num_frames - ddof)
+
+    def row_var(self, ddof = 1):
+        """the temporal variance of each row mean."""
+        return self.row_m2 / (self.num_frames - ddof)
+
+    def column_var(self, ddof = 1):
+        """the temporal variance of each column mean."""
+        return self.column_m2 / (self.num_frames - ddof)
+
+    def temporal_noise(self):
+        """the temporal noise, i.e., the RMS of the temporal standard deviation of all pixels."""
+        return np.sqrt(np.mean(self.var()))
+
+    def pixel_fpn(self):
+        """the pixel fixed-pattern noise, i.e., the spatial standard deviation of the pixel means.
+
+        The temporal noise left in the means, ``var / num_frames``, is subtracted.
+        """
+        return _spatial_std(self.mean, self.var(), self.num_frames)
+
+    def row_fpn(self):
+        """the row fixed-pattern noise, i.e., the spatial standard deviation of the row means."""
+        return _spatial_std(self.row_mean, self.row_var(), self.num_frames)
+
+    def column_fpn(self):
+        """the column fixed-pattern noise, i.e., the spatial standard deviation of the column means."""
+        return _spatial_std(self.column_mean, self.column_var(), self.num_frames)
+
+    def row_temporal_noise(self):
+        """the temporal noise of the row means, e.g., row-wise read noise."""
+        return np.sqrt(np.mean(self.row_var()))
+
+    def column_temporal_noise(self):
+        """the temporal noise of the column means."""
+        return np.sqrt(np.mean(self.column_var()))
+
+
+def _spatial_std(mean, var, num_frames):
+    # the spatial standard deviation of ``mean`` without the temporal noise left in it.
+    return np.sqrt(max(np.var(mean) - np.mean(var) / num_frames, 0.))
+
+
+class NoiseStatistics(object):
+    """Noise Statistics
+
+    Running ``PixelStatistics`` of every signal of many ``functional_simulation`` results.
+
+    Args:
+        keys (list): if not ``None``, only the signals whose keys match one of these shell-style
+            patterns are accumulated, e.g., ``["PixelArray/*"]``. The default value is ``None``,
+            which accumulates all signals.
+
+    Attributes:
+        statistics (dict): the list of ``PixelStatistics`` of the output signals of each key.
+    """
+    def __init__(self, keys = None):
+        super(NoiseStatistics, self).__init__()
+        self.keys = keys
+        self.statistics = {}
+
+    def update(self, simulation_res, batched = False):
+        """Accumulate one simulation result.
+
+        Args:
+            simulation_res (dict): the result of ``functional_simulation``, a dictionary of the
+                output signal list of each key.
+            batched (bool): if the signals have a leading frame axis, i.e., the simulation is in
+                batched mode, the default value is ``False``.
+        """
+        for key, output_signal_list in simulation_res.items():
+            if self.keys is not None and not any(fnmatch.fnmatch(key, k) for k in self.keys):
+                continue
+
+            statistics_list = self.statistics.setdefault(key, [])
+            for i, output_signal in enumerate(output_signal_list):
+                if i == len(statistics_list):
+                    statistics_list.append(PixelStatistics(output_signal.shape[1:] if batched else output_signal.shape))
+                statistics_list[i].update(output_signal, batched = batched)
+
+    def __getitem__(self, key):
+        return self.statistics[key]
+
+    def __contains__(self, key):
+        return key in self.statistics
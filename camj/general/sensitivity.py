@@ -0,0 +1,149 @@
+"""Parameter Sensitivity Analysis
+
+This module ranks the hardware parameters by their impact on the total energy. Each parameter
+is perturbed by central differences and the result is reported as a normalized elasticity,
+
+    elasticity = (dE / E) / (dp / p),
+
+i.e., the percentage change of the total energy per percentage change of the parameter.
+
+Instead of running two full simulations per parameter, all perturbations are evaluated in
+one batch. The analog energy goes through the vectorized ``AnalogArray.energy_batch`` path and
+the digital energy reuses the activity record of a single cycle-level simulation, since the
+digital energy is linear in the per-cycle and per-access energy parameters.
+
+Examples:
+        To rank all parameters:
+
+        >>> total_energy, elasticity = sensitivity_analysis(hw_desc, mapping, sw_desc)
+
+"""
+
+import copy
+import numbers
+import numpy as np
+from inspect import signature
+
+# import local modules
+from camj.analog import energy_model
+from camj.analog.infra import _init_arg
+from camj.analog.utils import _find_analog_sw_stages, analog_energy_simulation, compute_analog_array_cnt
+from camj.digital.utils import record_digital_activity
+from camj.general.launch import digital_energy_simulation
+
+# parameters that select a circuit structure rather than a quantity, they can't be perturbed.
+_DISCRETE_PARAMS = ["num_transistor", "num_readout", "dynamic_sf", "differential"]
+
+
+def sensitivity_analysis(hw_desc, mapping, sw_desc, params = None, rel_step = 0.01):
+    """Launch Sensitivity Analysis
+
+    The total energy here is the sum of analog energy, digital compute energy and digital
+    memory access energy, all in unit of pJ.
+
+    Args:
+        hw_desc (dict): hardware description.
+        mapping (dict): mapping between software stages and hardware structures.
+        sw_desc (list): software pipeline list.
+        params (list): a list of parameter names to analyze, the default value is ``None``,
+            which analyzes all parameters. Analog parameter names are in
+            ``"<analog array>.<analog component>.<argument>"`` format, e.g.,
+            ``"PixelArray.Pixel.pd_capacitance"``, digital parameter names are in
+            ``"<hw unit>.<argument>"`` format, e.g., ``"ADC.energy_per_pixel"``.
+        rel_step (float): relative perturbation of each parameter, the default value is ``0.01``.
+
+    Returns:
+        total_energy (float): total energy in pJ.
+        elasticity (dict): normalized elasticity of each parameter, ranked by magnitude.
+    """
+    # deep copy in case the function modify the orginal data
+    hw_dict = copy.deepcopy(hw_desc)
+    mapping_dict = copy.deepcopy(mapping)
+    sw_stage_list = copy.deepcopy(sw_desc)
+    print("###  Launch analog simulation  ###")
+    analog_energy_simulation(hw_dict["analog"], sw_stage_list, mapping_dict)
+    analog_sw_stages = _find_analog_sw_stages(sw_stage_list, hw_dict["analog"], mapping_dict)
+    analog_cnt = compute_analog_array_cnt(hw_dict["analog"], analog_sw_stages, mapping_dict)
+
+    print("\n###  Launch digital simulation  ###")
+    digital_energy_simulation(hw_dict, mapping_dict, sw_stage_list)
+    digital_activity = record_digital_activity(hw_dict)
+
+    # collect parameters
+    param_values = {}
+    analog_params = {}
+    for analog_array in analog_cnt.keys():
+        analog_params[analog_array] = _find_analog_params(analog_array)
+        for key, value in analog_params[analog_array].items():
+            param_values["%s.%s" % (analog_array.name, key)] = value
+    for (unit_name, param), (value, _) in digital_activity.items():
+        param_values["%s.%s" % (unit_name, param)] = value
+
+    if params is None:
+        params = list(param_values.keys())
+    for param in params:
+        if param not in param_values:
+            raise Exception("Parameter '%s' is not found in the hardware description." % param)
+
+    # each parameter has two perturbed points, (1 + rel_step) and (1 - rel_step).
+    num_param = len(params)
+    factors = np.ones((num_param, 2 * num_param))
+    factors[np.arange(num_param), 2 * np.arange(num_param)] = 1 + rel_step
+    factors[np.arange(num_param), 2 * np.arange(num_param) + 1] = 1 - rel_step
+    param_factors = dict(zip(params, factors))
+
+    total_energy = 0.
+    batch_energy = np.zeros(2 * num_param)
+    for analog_array, cnt in analog_cnt.items():
+        total_energy += cnt * analog_array.energy() * 1e12 # convert J to pJ
+        overrides = {}
+        for key in analog_params[analog_array].keys():
+            name = "%s.%s" % (analog_array.name, key)
+            if name in param_factors:
+                overrides[key] = param_factors[name]
+        batch_energy += cnt * analog_array.energy_batch(overrides, relative = True) * 1e12
+
+    for (unit_name, param), (value, activity) in digital_activity.items():
+        total_energy += value * activity
+        batch_energy += value * activity * param_factors.get("%s.%s" % (unit_name, param), 1.)
+
+    elasticity = {}
+    if total_energy != 0:
+        diff = (batch_energy[0::2] - batch_energy[1::2]) / (2 * rel_step * total_energy)
+        for i in np.argsort(-np.abs(diff), kind = "stable"):
+            elasticity[params[i]] = float(diff[i])
+
+    # only imported when a report is printed, it is slow to import.
+    from prettytable import PrettyTable
+
+    print_tab = PrettyTable(["Rank", "Parameter", "Value", "Elasticity"])
+    for rank, (name, value) in enumerate(elasticity.items()):
+        print_tab.add_row([rank + 1, name, param_values[name], "%.4f" % value])
+
+    print("\nTotal energy: ", total_energy, "pJ")
+    print("Energy sensitivity:")
+    print(print_tab)
+
+    return float(total_energy), elasticity
+
+
+def _find_analog_params(analog_array):
+    """find the perturbable energy model parameters in one analog array
+
+    Returns a dict that maps ``"<analog component>.<argument>"`` to the parameter value.
+    """
+    analog_params = {}
+    for component in analog_array.components:
+        for comp, _ in component.component_list:
+            for model in vars(comp).values():
+                if type(model).__module__ != energy_model.__name__:
+                    continue
+                for param in list(signature(type(model).__init__).parameters)[1:]:
+                    # derived arguments (``None``) follow the other parameters, they are skipped.
+                    value = _init_arg(model, param)
+                    if param in _DISCRETE_PARAMS or isinstance(value, bool) \
+                        or not isinstance(value, numbers.Real):
+                        continue
+                    analog_params["%s.%s" % (component.name, param)] = value
+
+    return analog_params
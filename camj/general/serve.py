@@ -0,0 +1,210 @@
+"""Simulation Service
+
+A long-lived simulation process that listens on a localhost HTTP port, so that short-lived
+scripts don't pay the Python startup, the module imports and the model construction for every
+simulation. Requests are JSON descriptions (see ``camj.general.description``) and they are
+simulated by a pool of warm worker processes. Each worker keeps the built descriptions and a
+digital ``PrefixCache``, and the server keeps the results of finished requests.
+
+HTTP interface:
+
+* ``POST /simulate`` with ``{"requests": [{"hw": ..., "sw": ..., "mapping": ...}, ...]}``,
+  returns ``{"results": [...]}`` in the same order. Each result has ``total_energy``,
+  ``energy_breakdown`` and ``cycle_cnt``, or ``error`` if the simulation fails.
+* ``GET /status`` returns the cache statistics.
+
+Examples:
+        To start the service from command line:
+
+        $ python -m camj serve --port 8765 --workers 4
+
+        To submit a batch, see ``camj.general.client.SimulationClient``.
+
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# import local modules
+from camj.digital.prefix_cache import PrefixCache
+from camj.general.description import build_description
+from camj.general.launch import energy_simulation
+
+# worker process states, they stay warm across requests.
+_worker_allowed_modules = ("camj", )
+_worker_desc_cache = {}
+_worker_prefix_cache = None
+_WORKER_DESC_CACHE_SIZE = 64
+
+
+def _init_worker(allowed_modules, prefix_cache_size):
+    global _worker_allowed_modules, _worker_prefix_cache
+    _worker_allowed_modules = tuple(allowed_modules)
+    _worker_prefix_cache = PrefixCache(max_size = prefix_cache_size)
+
+
+def _run_request(key, request):
+    if key in _worker_desc_cache:
+        desc = _worker_desc_cache[key]
+    else:
+        desc = build_description(request, _worker_allowed_modules)
+        if len(_worker_desc_cache) >= _WORKER_DESC_CACHE_SIZE:
+            _worker_desc_cache.pop(next(iter(_worker_desc_cache)))
+        _worker_desc_cache[key] = desc
+
+    hw_desc, mapping, sw_desc = desc
+    # the simulation log is not useful in a service.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # energy_simulation deep copies the description, so the cached one stays unchanged.
+        total_energy, energy_breakdown, cycle_cnt = energy_simulation(
+            hw_desc, mapping, sw_desc, return_cycle_cnt = True, prefix_cache = _worker_prefix_cache
+        )
+
+    return {
+        "total_energy": float(total_energy),
+        "energy_breakdown": {name: float(energy) for name, energy in energy_breakdown.items()},
+        "cycle_cnt": int(cycle_cnt)
+    }
+
+
+class SimulationServer(object):
+    """Simulation Server
+
+    Args:
+        host (str): the address to listen on, the default value is ``"127.0.0.1"``.
+        port (int): the port to listen on, ``0`` picks a free port, the default value is ``8765``.
+        num_workers (int): the number of worker processes, the default value is ``None``, which
+            uses the number of CPUs.
+        allowed_modules (tuple): module prefixes that customized classes in descriptions can be
+            imported from, the default value is ``("camj", )``.
+        result_cache_size (int): the maximum number of cached results, the default value is ``1024``.
+        prefix_cache_size (int): the maximum number of stage records in the ``PrefixCache`` of
+            each worker, the default value is ``4096``.
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        num_workers: int = None,
+        allowed_modules: tuple = ("camj", ),
+        result_cache_size: int = 1024,
+        prefix_cache_size: int = 4096,
+    ):
+        super(SimulationServer, self).__init__()
+        self.pool = ProcessPoolExecutor(
+            max_workers = num_workers,
+            initializer = _init_worker,
+            initargs = (tuple(allowed_modules), prefix_cache_size)
+        )
+        self.result_cache_size = result_cache_size
+        self.result_cache = {}
+        self.hit_cnt = 0
+        self.miss_cnt = 0
+        self.lock = threading.Lock()
+
+        self.http_server = ThreadingHTTPServer((host, port), _SimulationRequestHandler)
+        self.http_server.simulation_server = self
+        self.address = self.http_server.server_address
+
+    def simulate_batch(self, requests):
+        """Simulate a batch of requests on the worker pool.
+
+        Args:
+            requests (list): a list of JSON-compatible descriptions.
+
+        Returns:
+            Results (list): a result dict for each request, in the same order.
+        """
+        keys = [
+            hashlib.sha1(json.dumps(request, sort_keys = True).encode()).hexdigest()
+            for request in requests
+        ]
+
+        results = [None] * len(requests)
+        futures = {}
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key in self.result_cache:
+                    results[i] = self.result_cache[key]
+                    self.hit_cnt += 1
+                else:
+                    self.miss_cnt += 1
+
+        for i, (key, request) in enumerate(zip(keys, requests)):
+            if results[i] is None:
+                if key not in futures:
+                    futures[key] = self.pool.submit(_run_request, key, request)
+
+        for i, key in enumerate(keys):
+            if results[i] is not None:
+                continue
+            try:
+                results[i] = futures[key].result()
+            except Exception as e:
+                results[i] = {"error": "%s: %s" % (type(e).__name__, e)}
+                continue
+
+            with self.lock:
+                if len(self.result_cache) >= self.result_cache_size:
+                    self.result_cache.pop(next(iter(self.result_cache)))
+                self.result_cache[key] = results[i]
+
+        return results
+
+    def status(self):
+        with self.lock:
+            return {
+                "result_cache_size": len(self.result_cache),
+                "hit_cnt": self.hit_cnt,
+                "miss_cnt": self.miss_cnt
+            }
+
+    def serve_forever(self):
+        self.http_server.serve_forever()
+
+    def shutdown(self):
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        self.pool.shutdown()
+
+
+class _SimulationRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path != "/status":
+            self._send_json(404, {"error": "Unknown path '%s'." % self.path})
+            return
+        self._send_json(200, self.server.simulation_server.status())
+
+    def do_POST(self):
+        if self.path != "/simulate":
+            self._send_json(404, {"error": "Unknown path '%s'." % self.path})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            requests = json.loads(self.rfile.read(length))["requests"]
+            assert isinstance(requests, list), "'requests' needs to be a list."
+        except Exception as e:
+            self._send_json(400, {"error": "Invalid request: %s" % e})
+            return
+
+        results = self.server.simulation_server.simulate_batch(requests)
+        self._send_json(200, {"results": results})
+
+    def _send_json(self, code, data):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # keep the service quiet, the client gets the error messages.
+        pass
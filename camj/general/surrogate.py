@@ -0,0 +1,273 @@
+"""Surrogate Energy Model
+
+This module fits a lightweight surrogate on completed ``energy_simulation`` results, so that
+the total energy and the cycle count of unseen hardware parameters can be predicted without
+running the simulation. Each hardware configuration is encoded as a parameter vector (see
+``encode_hw_params``) and the surrogate is a polynomial least-squares regression on the
+standardized, log-scaled parameters.
+
+The prediction also comes with an uncertainty estimate, which sweep drivers can use to only
+simulate the points where the surrogate is uncertain or near the optimum (see ``suggest``).
+
+Examples:
+        To fit a surrogate from a sweep:
+
+        >>> surrogate = SurrogateModel(param_names = ["PixelArray.Pixel.pd_capacitance", "ADC.energy_per_pixel"])
+        >>> for hw_desc in hw_desc_list:
+                surrogate.add_simulation(hw_desc, mapping, sw_desc)
+        >>> surrogate.fit()
+        >>> energy, energy_std, cycle, cycle_std = surrogate.predict(param_vectors)
+
+"""
+
+import copy
+import itertools
+import numpy as np
+
+# import local modules
+from camj.analog.infra import _override_energy_models
+from camj.general.launch import energy_simulation
+from camj.general.sensitivity import _find_analog_params
+
+
+def find_hw_params(hw_desc):
+    """Find Hardware Parameters
+
+    Find all continuous energy parameters in a hardware description. Analog parameter names are in
+    ``"<analog array>.<analog component>.<argument>"`` format and digital parameter names are in
+    ``"<hw unit>.<argument>"`` format, the same as ``sensitivity_analysis``.
+
+    Args:
+        hw_desc (dict): hardware description.
+
+    Returns:
+        Parameters (dict): parameter name to parameter value.
+    """
+    hw_params = {}
+    for analog_array in hw_desc["analog"]:
+        for key, value in _find_analog_params(analog_array).items():
+            hw_params["%s.%s" % (analog_array.name, key)] = value
+
+    for hw_unit in hw_desc["compute"]:
+        param = "energy_per_pixel" if hasattr(hw_unit, "energy_per_pixel") else "energy_per_cycle"
+        hw_params["%s.%s" % (hw_unit.name, param)] = getattr(hw_unit, param)
+
+    for mem_unit in hw_desc["memory"]:
+        hw_params["%s.write_energy_per_word" % mem_unit.name] = mem_unit.write_energy_per_word
+        hw_params["%s.read_energy_per_word" % mem_unit.name] = mem_unit.read_energy_per_word
+
+    return hw_params
+
+
+def encode_hw_params(hw_desc, param_names):
+    """Encode a hardware description into a parameter vector.
+
+    Args:
+        hw_desc (dict): hardware description.
+        param_names (list): parameter names, see ``find_hw_params``.
+
+    Returns:
+        Parameter vector (np.ndarray): parameter values in the order of ``param_names``.
+    """
+    hw_params = find_hw_params(hw_desc)
+    for name in param_names:
+        if name not in hw_params:
+            raise Exception("Parameter '%s' is not found in the hardware description." % name)
+
+    return np.array([hw_params[name] for name in param_names], dtype = float)
+
+
+def decode_hw_params(hw_desc, param_names, param_vector):
+    """Decode a parameter vector into a hardware description.
+
+    Args:
+        hw_desc (dict): the base hardware description, which is not modified.
+        param_names (list): parameter names, see ``find_hw_params``.
+        param_vector (np.ndarray): parameter values in the order of ``param_names``.
+
+    Returns:
+        Hardware description (dict): a copy of ``hw_desc`` with the given parameter values.
+    """
+    hw_dict = copy.deepcopy(hw_desc)
+    analog_dict = {analog_array.name: analog_array for analog_array in hw_dict["analog"]}
+    digital_dict = {hw_unit.name: hw_unit for hw_unit in hw_dict["compute"] + hw_dict["memory"]}
+
+    for name, value in zip(param_names, param_vector):
+        names = name.split(".")
+        if len(names) == 3 and names[0] in analog_dict:
+            used_keys = set()
+            for component in analog_dict[names[0]].components:
+                if component.name != names[1]:
+                    continue
+                for i, (comp, count) in enumerate(component.component_list):
+                    component.component_list[i] = (
+                        _override_energy_models(comp, {names[2]: (name, value)}, used_keys),
+                        count
+                    )
+            if name not in used_keys:
+                raise Exception("Parameter '%s' is not found in the hardware description." % name)
+        elif len(names) == 2 and names[0] in digital_dict and hasattr(digital_dict[names[0]], names[1]):
+            setattr(digital_dict[names[0]], names[1], value)
+        else:
+            raise Exception("Parameter '%s' is not found in the hardware description." % name)
+
+    return hw_dict
+
+
+class SurrogateModel(object):
+    """Polynomial Surrogate Model
+
+    A polynomial least-squares regression from the hardware parameter vector to the total
+    energy and the overall cycle count. Parameters and targets are log-scaled when they are
+    all positive (energy roughly follows power laws of the circuit parameters), and the
+    parameters are standardized before building the polynomial features.
+
+    The uncertainty estimate is the standard error of the prediction of the regression,
+    ``std = sigma * sqrt(1 + phi^T (Phi^T Phi + ridge * I)^-1 phi)``, in the log space if the
+    target is log-scaled.
+
+    Args:
+        param_names (list): parameter names that form the parameter vector, see ``find_hw_params``.
+        degree (int): polynomial degree including all interaction terms, the default value is ``2``.
+        ridge (float): ridge regularization that keeps under-determined fits stable, the default
+            value is ``1e-6``.
+    """
+    def __init__(
+        self,
+        param_names: list,
+        degree: int = 2,
+        ridge: float = 1e-6,
+    ):
+        super(SurrogateModel, self).__init__()
+        self.param_names = list(param_names)
+        self.degree = degree
+        self.ridge = ridge
+        self.param_vectors = []
+        self.energy_list = []
+        self.cycle_list = []
+        # fitted states
+        self.coef = None
+
+    def add_result(self, param_vector, total_energy, cycle_cnt):
+        """Add one completed simulation result.
+
+        Args:
+            param_vector (np.ndarray): parameter vector of the simulated point.
+            total_energy (float): total energy returned by ``energy_simulation``.
+            cycle_cnt (int): overall system cycle count returned by ``energy_simulation``.
+
+        Returns:
+            None
+        """
+        param_vector = np.asarray(param_vector, dtype = float)
+        assert param_vector.shape == (len(self.param_names), ), \
+            "Parameter vector needs to be a size of %d." % len(self.param_names)
+
+        self.param_vectors.append(param_vector)
+        self.energy_list.append(total_energy)
+        self.cycle_list.append(cycle_cnt)
+
+    def add_simulation(self, hw_desc, mapping, sw_desc):
+        """Run ``energy_simulation`` on one hardware description and add its result.
+
+        Returns:
+            total_energy (float): simulated total energy in pJ.
+            cycle_cnt (int): simulated overall system cycle count.
+        """
+        total_energy, _, cycle_cnt = energy_simulation(
+            hw_desc, mapping, sw_desc, return_cycle_cnt = True
+        )
+        self.add_result(encode_hw_params(hw_desc, self.param_names), total_energy, cycle_cnt)
+
+        return total_energy, cycle_cnt
+
+    def fit(self):
+        """Fit the surrogate on all added results.
+
+        Returns:
+            None
+        """
+        assert len(self.param_vectors) > 0, "No simulation result is added to the surrogate."
+
+        x = np.stack(self.param_vectors)
+        y = np.stack([self.energy_list, self.cycle_list], axis = 1).astype(float)
+
+        self.log_x = np.all(x > 0, axis = 0)
+        self.log_y = np.all(y > 0, axis = 0)
+        x = np.where(self.log_x, np.log(np.where(self.log_x, x, 1)), x)
+        y = np.where(self.log_y, np.log(np.where(self.log_y, y, 1)), y)
+
+        self.x_mean = x.mean(axis = 0)
+        self.x_std = x.std(axis = 0)
+        # constant parameters carry no information
+        self.x_std[self.x_std == 0] = 1
+
+        phi = self._features(x)
+        gram = phi.T @ phi + self.ridge * np.eye(phi.shape[1])
+        self.gram_inv = np.linalg.pinv(gram)
+        self.coef = self.gram_inv @ phi.T @ y
+
+        residual = y - phi @ self.coef
+        dof = max(phi.shape[0] - phi.shape[1], 1)
+        self.sigma = np.sqrt(np.sum(residual ** 2, axis = 0) / dof)
+
+    def predict(self, param_vectors):
+        """Predict total energy and cycle count.
+
+        Args:
+            param_vectors (np.ndarray): a parameter vector or a 2D array of parameter vectors.
+
+        Returns:
+            energy (np.ndarray): predicted total energy.
+            energy_std (np.ndarray): uncertainty (standard deviation) of the predicted energy.
+            cycle (np.ndarray): predicted cycle count.
+            cycle_std (np.ndarray): uncertainty (standard deviation) of the predicted cycle count.
+        """
+        assert self.coef is not None, "The surrogate needs to be fitted before prediction."
+
+        x = np.atleast_2d(np.asarray(param_vectors, dtype = float))
+        x = np.where(self.log_x, np.log(np.where(self.log_x, np.maximum(x, np.finfo(float).tiny), 1)), x)
+        phi = self._features(x)
+
+        mean = phi @ self.coef
+        std = self.sigma * np.sqrt(1 + np.einsum("ij,jk,ik->i", phi, self.gram_inv, phi))[:, None]
+
+        # convert log-scaled targets back, the std is propagated to the linear scale.
+        mean = np.where(self.log_y, np.exp(np.where(self.log_y, mean, 0)), mean)
+        std = np.where(self.log_y, mean * std, std)
+
+        return mean[:, 0], std[:, 0], mean[:, 1], std[:, 1]
+
+    def suggest(self, candidates, num_points = 1, target = "energy", kappa = 2.0):
+        """Suggest the candidate points that are worth simulating next.
+
+        Candidates are ranked by the lower confidence bound ``mean - kappa * std`` of the
+        target, so points that are close to the optimum or have a large uncertainty come first.
+
+        Args:
+            candidates (np.ndarray): a 2D array of candidate parameter vectors.
+            num_points (int): the number of points to suggest.
+            target (str): ``"energy"`` or ``"cycle"``, the target to minimize.
+            kappa (float): exploration weight of the uncertainty.
+
+        Returns:
+            Indices (np.ndarray): indices of the suggested candidates.
+        """
+        energy, energy_std, cycle, cycle_std = self.predict(candidates)
+        if target == "energy":
+            bound = energy - kappa * energy_std
+        elif target == "cycle":
+            bound = cycle - kappa * cycle_std
+        else:
+            raise Exception("Surrogate target '%s' is not supported." % target)
+
+        return np.argsort(bound, kind = "stable")[:num_points]
+
+    def _features(self, x):
+        x = (x - self.x_mean) / self.x_std
+        features = [np.ones(x.shape[0])]
+        for d in range(1, self.degree + 1):
+            for index in itertools.combinations_with_replacement(range(x.shape[1]), d):
+                features.append(np.prod(x[:, index], axis = 1))
+
+        return np.stack(features, axis = 1)
@@ -184,6 +184,7 @@ class ProcessStage(object):
         self.output_stages = []
         self.ready_board = {}
         self.padding = padding
+        self.functional_kernel = None
         self._check_consistency()
 
     def set_input_stage(self, stage):
@@ -208,6 +209,17 @@ class ProcessStage(object):
         """
         self.output_stages.append(stage)
 
+    def set_functional_kernel(self, kernel):
+        """Attach a functional kernel to this ``ProcessStage``.
+
+        The kernel computes the output of this stage in functional simulation when the stage
+        is mapped to the digital domain, see ``camj.digital.function_model``.
+
+        Args:
+            kernel: a functional kernel with ``simulate_output(input_signal_list)``.
+        """
+        self.functional_kernel = kernel
+
     def _check_consistency(self):
         if len(self.input_size) != len(self.kernel_size):
             raise Exception(
@@ -337,6 +349,8 @@ class DNNProcessStage(object):
         self.output_stages = []
         self.ready_board = {}
         self.needs_flatten = False
+        self.padding = padding
+        self.functional_kernel = None
 
         if op_type == "Conv2D" or op_type == "DWConv2D":
             if padding:
@@ -386,6 +400,17 @@ class DNNProcessStage(object):
         """
         self.output_stages.append(stage)
 
+    def set_functional_kernel(self, kernel):
+        """Attach a functional kernel to this ``DNNProcessStage``.
+
+        The kernel computes the output of this stage in functional simulation when the stage
+        is mapped to the digital domain, see ``camj.digital.function_model``.
+
+        Args:
+            kernel: a functional kernel with ``simulate_output(input_signal_list)``.
+        """
+        self.functional_kernel = kernel
+
     def _is_parent_of(self, process_stage):
 
         if process_stage in self.input_stages:
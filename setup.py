@@ -17,6 +17,9 @@ setup(
     url="https://github.com/horizon-research/CamJ",
     packages=find_packages(),
     install_requires=requirements,
+    entry_points={
+        "console_scripts": ["camj=camj.__main__:main"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3.8",
     ],
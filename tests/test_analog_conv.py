@@ -0,0 +1,82 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import Voltage2VoltageConv, Time2VoltageConv, BinaryWeightConv
+
+
+def conv_component(cls, num_kernels, stride = 1, **kwargs):
+    if cls is Voltage2VoltageConv:
+        kwargs.setdefault("capacitance_array", [1e-12] * 9)
+        kwargs.setdefault("vs_array", [1.0] * 9)
+    component = cls(**kwargs)
+    component._set_conv_config(
+        kernel_size = [(3, 3, 1)],
+        num_kernels = [num_kernels],
+        stride = [(stride, stride, 1)]
+    )
+    return component
+
+
+def loop_convolution(component, image, kernels):
+    return np.stack(
+        [component._single_channel_convolution(image, kernels[:, :, i]) for i in range(kernels.shape[-1])],
+        axis = 2
+    )
+
+
+def test_conv_equivalence():
+    rs = np.random.RandomState(0)
+    image = rs.uniform(-1, 1, size = (23, 17))
+    kernels = rs.uniform(0, 1, size = (3, 3, 4))
+
+    for stride in [1, 2]:
+        v2v = conv_component(Voltage2VoltageConv, 4, stride, psca_noise = 0., sf_noise = 0.)
+        assert np.allclose(v2v._vectorized_convolution(image, kernels), loop_convolution(v2v, image, kernels)), \
+            "Voltage2VoltageConv mismatch with stride %d." % stride
+
+        t2v = conv_component(Time2VoltageConv, 4, stride, cm_noise = 0., cm_enable_prnu = True)
+        # the loop version generates the PRNU gain, the vectorized version reuses it.
+        loop_result = loop_convolution(t2v, image, kernels)
+        assert np.allclose(t2v._vectorized_convolution(image, kernels), loop_result), \
+            "Time2VoltageConv mismatch with stride %d." % stride
+
+        bwc = conv_component(BinaryWeightConv, 1, stride)
+        for vec, loop in zip(bwc._vectorized_convolution(image, kernels[:, :, 0]),
+                             bwc._single_channel_convolution(image, kernels[:, :, 0])):
+            assert np.allclose(vec, loop), "BinaryWeightConv mismatch with stride %d." % stride
+
+
+def test_conv_noise_statistics():
+    rs = np.random.RandomState(1)
+    image = rs.uniform(0, 1, size = (40, 40))
+    kernels = rs.uniform(0, 1, size = (3, 3, 4))
+    expected = conv_component(Voltage2VoltageConv, 4, psca_noise = 0., sf_noise = 0.)._vectorized_convolution(
+        image, kernels
+    )
+    noise = 0.01
+
+    # the loop version of Voltage2VoltageConv draws the PSCA noise for each kernel in 'noise'.
+    v2v = conv_component(Voltage2VoltageConv, 4, psca_noise = noise, sf_noise = 0.)
+    vec_residual = v2v._vectorized_convolution(image, kernels) - expected
+    assert abs(np.std(vec_residual) / noise - 1) < 0.05, "Voltage2VoltageConv noise mismatch."
+    assert abs(np.mean(vec_residual)) < 3 * noise / np.sqrt(vec_residual.size), "Voltage2VoltageConv noise is biased."
+
+    t2v = conv_component(Time2VoltageConv, 4, cm_noise = noise)
+    loop_residual = loop_convolution(t2v, image, kernels) - expected
+    vec_residual = t2v._vectorized_convolution(image, kernels) - expected
+    assert abs(np.std(loop_residual) / (3 * noise) - 1) < 0.05, "Time2VoltageConv loop noise mismatch."
+    assert abs(np.std(vec_residual) / np.std(loop_residual) - 1) < 0.05, "Time2VoltageConv noise mismatch."
+    assert abs(np.mean(vec_residual)) < 3 * 3 * noise / np.sqrt(vec_residual.size), "Time2VoltageConv noise is biased."
+
+    # the end-to-end output keeps the same shape as before.
+    output = v2v.noise([image[:, :, None], kernels])[1][0]
+    assert output.shape == (38, 38, 4), "Voltage2VoltageConv output shape mismatch."
+
+
+if __name__ == '__main__':
+    test_conv_equivalence()
+    test_conv_noise_statistics()
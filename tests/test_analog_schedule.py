@@ -0,0 +1,101 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import numpy as np
+
+from camj.analog.component import SourceFollower, Adder
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput, ProcessStage
+
+
+def voltage_array(name, component):
+    array = AnalogArray(
+        name = name,
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 8, 1)],
+        num_output = (1, 8, 1)
+    )
+    array.add_component(
+        AnalogComponent(
+            name = name + "Component",
+            input_domain = [ProcessDomain.VOLTAGE],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [(component, 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (1, 8, 1)
+    )
+    return array
+
+
+def hw_config():
+    # two independent branches that are merged by an adder.
+    branch1 = voltage_array("Branch1", SourceFollower(noise = 0.1, enable_prnu = True))
+    branch2 = voltage_array("Branch2", SourceFollower(noise = 0.1, enable_prnu = True))
+    adder = voltage_array("AdderArray", Adder(noise = 0.1))
+    for branch in [branch1, branch2]:
+        adder.add_input_array(branch)
+        branch.add_output_array(adder)
+
+    return {"memory": [], "compute": [], "analog": [branch1, branch2, adder]}
+
+
+def sw_config():
+    input1 = PixelInput(name = "Input1", size = (8, 8, 1))
+    input2 = PixelInput(name = "Input2", size = (8, 8, 1))
+    add_stage = ProcessStage(
+        name = "Add",
+        input_size = [(8, 8, 1), (8, 8, 1)],
+        kernel_size = [(1, 1, 1), (1, 1, 1)],
+        num_kernels = [1, 1],
+        stride = [(1, 1, 1), (1, 1, 1)],
+        padding = [False, False]
+    )
+    add_stage.set_input_stage(input1)
+    add_stage.set_input_stage(input2)
+
+    return [input1, input2, add_stage]
+
+
+def simulate(num_threads):
+    return functional_simulation(
+        sw_config(),
+        hw_config(),
+        {"Input1": "Branch1", "Input2": "Branch2", "Add": "AdderArray"},
+        {"Input1": [np.full((8, 8, 1), 1.0)], "Input2": [np.full((8, 8, 1), 2.0)]},
+        seed = 0,
+        num_threads = num_threads
+    )
+
+
+def test_concurrent_arrays():
+    # the branches run on the thread pool, not in this thread.
+    thread_names = []
+    org_noise = SourceFollower.noise
+    def noise(self, input_signal_list):
+        thread_names.append(threading.current_thread().name)
+        return org_noise(self, input_signal_list)
+
+    SourceFollower.noise = noise
+    try:
+        threaded_res = simulate(num_threads = 2)
+    finally:
+        SourceFollower.noise = org_noise
+    assert len(thread_names) == 2 and threading.current_thread().name not in thread_names, \
+        "Branches are not simulated on the thread pool."
+
+    serial_res = simulate(num_threads = 1)
+    assert threaded_res.keys() == serial_res.keys(), "Different simulation results."
+    output = threaded_res["Adder"][0]
+    assert np.array_equal(output, serial_res["Adder"][0]), "Threads change the simulation result."
+    assert np.isclose(np.mean(output), 3.0, atol = 0.3), "Wrong adder output."
+
+
+if __name__ == '__main__':
+    test_concurrent_arrays()
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from camj.general.dataset import ShardedDataset, prepare_dataset
+from camj.general.evaluation import DatasetEvaluator
+
+from test_evaluation import model, images
+
+
+def write_images(image_dir):
+    Image = pytest.importorskip("PIL.Image")
+    for image_name, image in images():
+        Image.fromarray(image[..., 0]).save(os.path.join(image_dir, image_name + ".png"))
+
+
+def test_missing_index():
+    with tempfile.TemporaryDirectory() as dataset_dir:
+        try:
+            ShardedDataset(dataset_dir)
+        except Exception:
+            return
+    assert False, "A directory without an index is read as a dataset."
+
+
+def test_sharded_dataset():
+    # images are written and read with PIL.
+    pytest.importorskip("PIL")
+    with tempfile.TemporaryDirectory() as image_dir, tempfile.TemporaryDirectory() as dataset_dir:
+        write_images(image_dir)
+        dataset = prepare_dataset(image_dir, dataset_dir, size = (12, 14), shard_size = 3, num_workers = 2)
+        assert len(dataset) == 7 and len(dataset.shard_paths) == 3, "Wrong number of images or shards."
+        assert dataset.shape == (12, 14, 1), "Wrong dataset shape."
+        for i, (image_name, image) in enumerate(images()):
+            electrons = dataset[i]
+            assert isinstance(electrons, np.memmap) and not electrons.flags.writeable, "Image is not memory-mapped."
+            expected = image[2:14, 1:15] / 255. * 10000.
+            assert np.allclose(electrons, expected, rtol = 1e-6), "Wrong electrons of '%s'." % image_name
+
+        # the workers read the shards, the same as sending the electron maps.
+        with DatasetEvaluator(model, "Input", "DigitalPixelSensor", seed = 2023, num_workers = 2) as evaluator:
+            dataset = prepare_dataset(image_dir, dataset_dir, shard_size = 3, dtype = "float64", num_workers = 2)
+            results = list(evaluator.evaluate(dataset))
+            expected = list(evaluator.evaluate(image_dir))
+        assert [name for name, _ in results] == [name + ".png" for name, _ in images()], "Results are not in order."
+        for (image_name, metrics), (_, expected_metrics) in zip(results, expected):
+            for name, value in expected_metrics.items():
+                assert abs(metrics[name] - value) < 1e-9, "Wrong %s of '%s'." % (name, image_name)
+
+
+if __name__ == '__main__':
+    test_missing_index()
+    test_sharded_dataset()
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import tempfile
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camj.general import description as camj_description
+from camj.general.description import build_description, load_description, validate_description
+from camj.general.launch import energy_simulation
+
+from test_serve import description
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+def test_validate_description():
+    validate_description(description())
+
+    bad_desc = description()
+    bad_desc["hw"]["compute"][0]["output_buffer"] = "SRAM"
+    bad_desc["sw"][1]["kernel"] = [2, 2, 1]
+    bad_desc["hw"]["analog"][0]["components"][0]["component"]["component_list"][0][0]["num_transistors"] = 4
+    bad_desc["mapping"]["Binning"] = "BinningUnit"
+    try:
+        validate_description(bad_desc)
+        assert False, "Invalid description should raise an exception."
+    except Exception as e:
+        # all errors are reported at once.
+        for error in ["'SRAM'", "'kernel'", "'num_transistors'", "'BinningUnit'"]:
+            assert error in str(e), "Error of %s is not reported: %s" % (error, e)
+
+
+def test_load_description():
+    expected_energy, _ = energy_simulation(*build_description(description()))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, "cache")
+        paths = [os.path.join(tmp_dir, "design.json")]
+        with open(paths[0], "w") as f:
+            json.dump(description(), f)
+        if yaml is not None:
+            paths.append(os.path.join(tmp_dir, "design.yaml"))
+            with open(paths[1], "w") as f:
+                yaml.safe_dump(description(), f)
+
+        for path in paths:
+            total_energy, _ = energy_simulation(*load_description(path, cache_dir = cache_dir))
+            assert total_energy == expected_energy, "Wrong energy of '%s'." % path
+        assert len(os.listdir(cache_dir)) == len(paths), "Model is not cached."
+
+        # a cached model is not validated again.
+        validate = camj_description.validate_description
+        camj_description.validate_description = None
+        try:
+            hw_desc, mapping, sw_desc = load_description(paths[0], cache_dir = cache_dir)
+        finally:
+            camj_description.validate_description = validate
+        assert hw_desc["compute"][1].input_buffer is hw_desc["memory"][0], "Cached model is not connected."
+        total_energy, _ = energy_simulation(hw_desc, mapping, sw_desc)
+        assert total_energy == expected_energy, "Wrong energy of the cached model."
+
+        # a changed file is compiled again.
+        with open(paths[0], "w") as f:
+            json.dump(description(energy_per_cycle = 20), f)
+        total_energy, _ = energy_simulation(*load_description(paths[0], cache_dir = cache_dir))
+        assert total_energy > expected_energy, "Changed description is loaded from the cache."
+        assert len(os.listdir(cache_dir)) == len(paths) + 1, "Changed description is not cached."
+
+
+def test_stale_cache():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, "cache")
+        module_path = os.path.join(tmp_dir, "custom_units.py")
+        with open(module_path, "w") as f:
+            f.write("from camj.digital.compute import ComputeUnit\n\nclass CustomUnit(ComputeUnit):\n    pass\n")
+        sys.path.append(tmp_dir)
+        desc = description()
+        desc["hw"]["compute"][1]["class"] = "custom_units.CustomUnit"
+        path = os.path.join(tmp_dir, "design.json")
+        with open(path, "w") as f:
+            json.dump(desc, f)
+
+        allowed_modules = ("camj", "custom_units")
+        try:
+            hw_desc, _, _ = load_description(path, allowed_modules, cache_dir)
+            assert type(hw_desc["compute"][1]).__name__ == "CustomUnit", "Customized class is not built."
+
+            validate = camj_description.validate_description
+            camj_description.validate_description = None
+            try:
+                load_description(path, allowed_modules, cache_dir)
+                # a changed customized module makes the cached model stale.
+                with open(module_path, "a") as f:
+                    f.write("\n# a new revision\n")
+                try:
+                    load_description(path, allowed_modules, cache_dir)
+                    assert False, "Stale model is loaded from the cache."
+                except TypeError:
+                    pass
+            finally:
+                camj_description.validate_description = validate
+        finally:
+            sys.path.remove(tmp_dir)
+            sys.modules.pop("custom_units", None)
+
+
+if __name__ == '__main__':
+    test_validate_description()
+    test_load_description()
+    test_stale_cache()
@@ -0,0 +1,145 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import DigitalPixelSensor
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.digital.function_model import FixedPoint, ResizeFunc, ElementwiseFunc, ThresholdFunc, \
+                                    Conv2DFunc, DWConv2DFunc, FCFunc, dnn_function
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput, ProcessStage, DNNProcessStage
+
+
+def reference_conv(input_signal, weights, stride, padding):
+    # a loop-based convolution in (H, W, C_in) x (kh, kw, C_in, C_out).
+    kh, kw = weights.shape[:2]
+    if padding:
+        input_signal = np.pad(input_signal, ((kh // 2, kh // 2), (kw // 2, kw // 2), (0, 0)))
+    out_height = (input_signal.shape[0] - kh) // stride + 1
+    out_width = (input_signal.shape[1] - kw) // stride + 1
+    output = np.zeros((out_height, out_width, weights.shape[3]))
+    for i in range(out_height):
+        for j in range(out_width):
+            window = input_signal[i * stride : i * stride + kh, j * stride : j * stride + kw, :]
+            for k in range(weights.shape[3]):
+                output[i, j, k] = np.sum(window * weights[..., k])
+    return output
+
+
+def test_kernels():
+    rs = np.random.RandomState(0)
+    input_signal = rs.uniform(-1, 1, size = (9, 10, 3))
+    weights = rs.uniform(-1, 1, size = (3, 3, 3, 4))
+    for stride in [1, 2]:
+        for padding in [True, False]:
+            output = Conv2DFunc("Conv", weights, stride = stride, padding = padding).simulate_output([input_signal])
+            assert np.allclose(output, reference_conv(input_signal, weights, stride, padding)), \
+                "Wrong Conv2D with stride %d and padding %s." % (stride, padding)
+
+    dw_weights = rs.uniform(-1, 1, size = (3, 3, 3))
+    output = DWConv2DFunc("DWConv", dw_weights, stride = 2).simulate_output([input_signal])
+    for c in range(3):
+        expected = reference_conv(input_signal[..., c : c + 1], dw_weights[..., c : c + 1, np.newaxis], 2, True)
+        assert np.allclose(output[..., c : c + 1], expected), "Wrong DWConv2D."
+
+    fc_weights = rs.uniform(-1, 1, size = (9 * 10 * 3, 5))
+    output = FCFunc("FC", fc_weights, bias = np.ones(5), relu = True).simulate_output([input_signal])
+    assert output.shape == (1, 1, 5), "Wrong FC output shape."
+    assert np.allclose(output[0, 0], np.maximum(input_signal.reshape(-1) @ fc_weights + 1, 0)), "Wrong FC."
+
+    output = ResizeFunc("Resize", (2, 2)).simulate_output([input_signal])
+    assert np.allclose(output, input_signal[:8].reshape(4, 2, 5, 2, 3).mean(axis = (1, 3))), "Wrong resize."
+
+    output = ElementwiseFunc("Diff", "subtract").simulate_output([input_signal, 2 * input_signal])
+    output = ThresholdFunc("Threshold", 0.5).simulate_output(
+        [ElementwiseFunc("Abs", "absolute").simulate_output([output])]
+    )
+    assert np.array_equal(output, (np.abs(input_signal) > 0.5).astype(np.float64)), "Wrong elementwise ops."
+
+    # weights and outputs are on the fixed-point grid.
+    quantization = FixedPoint(8, 4)
+    output = Conv2DFunc("Conv", weights, quantization = quantization).simulate_output([input_signal])
+    assert np.array_equal(output * 16, np.rint(output * 16)) and np.all(np.abs(output) <= 8), "Output is not quantized."
+    expected = quantization(reference_conv(input_signal, quantization(weights), 1, True))
+    assert np.allclose(output, expected), "Wrong quantized Conv2D."
+
+
+def hw_config():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 16, 1)],
+        num_output = (1, 16, 1)
+    )
+    pixel_array.add_component(
+        AnalogComponent(
+            name = "Pixel",
+            input_domain = [ProcessDomain.OPTICAL],
+            output_domain = ProcessDomain.DIGITAL,
+            component_list = [(DigitalPixelSensor(pd_supply = 1000., enable_prnu = True, fd_noise = 5.), 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (16, 16, 1)
+    )
+    return {"memory": [], "compute": [], "analog": [pixel_array]}
+
+
+def sw_config(weights):
+    pixel_input = PixelInput(name = "Input", size = (16, 16, 1))
+    resize_stage = ProcessStage(
+        name = "Resize",
+        input_size = [(16, 16, 1)],
+        kernel_size = [(2, 2, 1)],
+        num_kernels = [1],
+        stride = [(2, 2, 1)],
+        padding = [False]
+    )
+    resize_stage.set_input_stage(pixel_input)
+    resize_stage.set_functional_kernel(ResizeFunc("Resize", (2, 2)))
+    conv_stage = DNNProcessStage(
+        name = "Conv",
+        op_type = "Conv2D",
+        ifmap_size = [8, 8, 1],
+        kernel_size = [3, 3, 1, 2],
+        stride = 2,
+        padding = True
+    )
+    conv_stage.set_input_stage(resize_stage)
+    conv_stage.set_functional_kernel(dnn_function(conv_stage, weights, relu = True, quantization = FixedPoint(16, 4)))
+    return [pixel_input, resize_stage, conv_stage]
+
+
+MAPPING = {"Input": "PixelArray", "Resize": "ResizeUnit", "Conv": "SystolicArray"}
+
+
+def test_end_to_end():
+    rs = np.random.RandomState(0)
+    weights = rs.uniform(-1, 1, size = (3, 3, 1, 2))
+    frames = rs.uniform(0, 1000, size = (3, 16, 16, 1))
+    res = functional_simulation(sw_config(weights), hw_config(), MAPPING, {"Input": [frames]}, batched = True, seed = 0)
+    assert res["Conv"][0].shape == (3, 4, 4, 2), "Wrong end-to-end output shape."
+
+    # the digital stages run on the simulated sensor output.
+    sensor_output = res["DigitalPixelSensor"][0]
+    expected = ResizeFunc("Resize", (2, 2)).simulate_output([sensor_output])
+    assert np.allclose(res["Resize"][0], expected), "Resize doesn't read the sensor output."
+    quantization = FixedPoint(16, 4)
+    for i in range(3):
+        expected = quantization(np.maximum(reference_conv(res["Resize"][0][i], quantization(weights), 2, True), 0))
+        assert np.allclose(res["Conv"][0][i], expected), "Wrong Conv of frame %d." % i
+
+    # probes select digital stages by name.
+    res = functional_simulation(
+        sw_config(weights), hw_config(), MAPPING, {"Input": [frames[0]]}, seed = 0, probes = ["Conv"]
+    )
+    assert list(res.keys()) == ["Conv"], "Digital stage is not probed."
+
+
+if __name__ == '__main__':
+    test_kernels()
+    test_end_to_end()
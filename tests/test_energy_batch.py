@@ -0,0 +1,158 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, ColumnAmplifier, CurrentMirror
+from camj.analog.energy_model import ActivePixelSensorEnergy, ColumnAmplifierEnergy,\
+                                PassiveSwitchedCapacitorArrayEnergy
+from camj.analog.energy_utils import get_nominal_supply
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+
+
+def single_component_array(comp):
+    analog_array = AnalogArray(
+        name = "Array",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    component = AnalogComponent(
+        name = "Component",
+        input_domain = [ProcessDomain.VOLTAGE],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(comp, 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    analog_array.add_component(component, (1, 1, 1))
+
+    return analog_array
+
+
+def simple_analog_array():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 32, 1)],
+        num_output = (1, 32, 1)
+    )
+    pixel = AnalogComponent(
+        name = "Pixel",
+        input_domain = [ProcessDomain.OPTICAL],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ActivePixelSensor(num_transistor = 4, enable_cds = True), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    col_amp = AnalogComponent(
+        name = "ColumnAmplifier",
+        input_domain = [ProcessDomain.VOLTAGE],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ColumnAmplifier(), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    pixel_array.add_component(pixel, (32, 32, 1))
+    pixel_array.add_component(col_amp, (1, 32, 1))
+
+    return pixel_array
+
+
+def test_energy_model_broadcast():
+    tech_nodes = np.array([65, 110, 130, 180])
+    supplies = np.array([1.2, 1.5, 1.8, 3.3])
+    batch_energy = ActivePixelSensorEnergy(
+        pd_capacitance = 100e-15,
+        pd_supply = supplies,
+        output_vs = None,
+        tech_node = tech_nodes
+    ).energy()
+
+    for i in range(len(tech_nodes)):
+        energy = ActivePixelSensorEnergy(
+            pd_capacitance = 100e-15,
+            pd_supply = supplies[i],
+            output_vs = None,
+            tech_node = tech_nodes[i]
+        ).energy()
+        assert np.isclose(batch_energy[i], energy, atol = 0), "APS energy mismatch at index %d." % i
+
+    assert np.allclose(get_nominal_supply(tech_nodes), [1.1, 1.5, 1.5, 1.8]), "Wrong nominal supply."
+
+    load_caps = np.array([1e-13, 1e-12, 1e-11])
+    batch_energy = ColumnAmplifierEnergy(load_capacitance = load_caps).energy()
+    for i in range(len(load_caps)):
+        energy = ColumnAmplifierEnergy(load_capacitance = load_caps[i]).energy()
+        assert np.isclose(batch_energy[i], energy, atol = 0), "Column amplifier energy mismatch at index %d." % i
+
+    batch_energy = PassiveSwitchedCapacitorArrayEnergy([1e-12, 2e-12], [1.0, np.array([1.0, 2.0])]).energy()
+    assert np.allclose(batch_energy, [3e-12, 9e-12]), "PSCA energy mismatch."
+
+
+def test_energy_batch():
+    analog_array = simple_analog_array()
+    supplies = np.linspace(1.0, 1.8, 5)
+    t_holds = np.array([1e-3, 1e-2])[:, None]
+
+    batch_energy = analog_array.energy_batch({
+        "pd_supply": supplies,
+        "ColumnAmplifier.t_hold": t_holds
+    })
+    assert batch_energy.shape == (2, 5), "Energy batch has a wrong shape."
+
+    for i in range(t_holds.shape[0]):
+        for j in range(len(supplies)):
+            analog_array.components[0].component_list[0][0].energy_model.pd_supply = supplies[j]
+            analog_array.components[1].component_list[0][0].energy_model.t_hold = t_holds[i, 0]
+            assert np.isclose(batch_energy[i, j], analog_array.energy(), atol = 0), \
+                "Energy batch mismatch at index (%d, %d)." % (i, j)
+
+    assert np.isclose(analog_array.energy_batch({}), analog_array.energy()), "Empty override mismatch."
+
+    try:
+        analog_array.energy_batch({"Pixel.t_hold": t_holds})
+        assert False, "Unmatched override should raise an exception."
+    except Exception as e:
+        assert "do not match" in str(e), "Unexpected exception: %s" % e
+
+
+def test_derived_arguments():
+    # ``output_vs`` and ``i_dc`` are derived from the swept supply, the same as a direct build.
+    supplies = np.array([2.5, 3.3])
+    batch_energy = single_component_array(ActivePixelSensor(output_vs = None)).energy_batch({"pd_supply": supplies})
+    for i in range(len(supplies)):
+        energy = single_component_array(ActivePixelSensor(pd_supply = supplies[i], output_vs = None)).energy()
+        assert np.isclose(batch_energy[i], energy, atol = 0), "APS energy mismatch at %.1f V." % supplies[i]
+
+    supplies = np.array([1.0, 1.8])
+    batch_energy = single_component_array(CurrentMirror(i_dc = None)).energy_batch({"supply": supplies})
+    for i in range(len(supplies)):
+        energy = single_component_array(CurrentMirror(supply = supplies[i], i_dc = None)).energy()
+        assert np.isclose(batch_energy[i], energy, atol = 0), "Current mirror energy mismatch at %.1f V." % supplies[i]
+
+
+def test_relative_derived_arguments():
+    factors = np.array([0.5, 1.5])
+    analog_array = single_component_array(CurrentMirror(i_dc = None))
+    batch_energy = analog_array.energy_batch({"supply": factors}, relative = True)
+    for i in range(len(factors)):
+        energy = single_component_array(CurrentMirror(supply = 1.8 * factors[i], i_dc = None)).energy()
+        assert np.isclose(batch_energy[i], energy, atol = 0), "Current mirror energy mismatch at %.1fx." % factors[i]
+
+    # a derived argument has no value of its own to scale.
+    try:
+        analog_array.energy_batch({"i_dc": factors}, relative = True)
+        assert False, "Scaling a derived argument should raise an exception."
+    except Exception as e:
+        assert "can't be scaled" in str(e), "Unexpected exception: %s" % e
+
+
+if __name__ == '__main__':
+    test_energy_model_broadcast()
+    test_energy_batch()
+    test_derived_arguments()
+    test_relative_derived_arguments()
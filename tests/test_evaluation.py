@@ -0,0 +1,81 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import DigitalPixelSensor
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.evaluation import DatasetEvaluator, image_metrics, ssim
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput
+
+
+def model():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 16, 1)],
+        num_output = (1, 16, 1)
+    )
+    pixel_array.add_component(
+        AnalogComponent(
+            name = "Pixel",
+            input_domain = [ProcessDomain.OPTICAL],
+            output_domain = ProcessDomain.DIGITAL,
+            component_list = [(DigitalPixelSensor(pd_supply = 10000., enable_prnu = True, fd_noise = 20.), 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (16, 16, 1)
+    )
+    hw_desc = {"memory": [], "compute": [], "analog": [pixel_array]}
+    return hw_desc, {"Input": "PixelArray"}, [PixelInput(name = "Input", size = (16, 16, 1))]
+
+
+def images():
+    rs = np.random.RandomState(0)
+    for i in range(7):
+        yield "image%d" % i, rs.randint(0, 256, size = (16, 16, 1)).astype(np.uint8)
+
+
+def test_metrics():
+    rs = np.random.RandomState(0)
+    image = rs.uniform(size = (32, 32, 3))
+    assert abs(ssim(image, image) - 1.) < 1e-12, "SSIM of the same image is not 1."
+    noisy = image + rs.normal(0., 0.1, size = image.shape)
+    metrics = image_metrics(noisy, image)
+    assert abs(metrics["mse"] - np.mean((noisy - image) ** 2)) < 1e-12, "Wrong MSE."
+    assert abs(metrics["psnr"] - 20.) < 0.2, "Wrong PSNR."
+    assert 0 < metrics["ssim"] < ssim(image + 0.01 * (noisy - image), image) < 1, "SSIM doesn't decrease with noise."
+
+
+def test_parallel_evaluation():
+    with DatasetEvaluator(
+        model, "Input", "DigitalPixelSensor", seed = 2023, num_workers = 2, max_in_flight = 3
+    ) as evaluator:
+        results = list(evaluator.evaluate(images()))
+        summary = evaluator.summary()
+        assert len(evaluator.slots) <= 3, "Too many frames in flight."
+
+    assert [name for name, _ in results] == ["image%d" % i for i in range(7)], "Results are not in order."
+    # the same as simulating the images one-by-one on the same sensor.
+    hw_desc, mapping, sw_desc = model()
+    for i, (image_name, image) in enumerate(images()):
+        electrons = image / 255. * 10000.
+        output = functional_simulation(
+            sw_desc, hw_desc, mapping, {"Input": [electrons]}, seed = 2023, run = i
+        )["DigitalPixelSensor"][0]
+        expected = image_metrics(output / 255., electrons / 10000.)
+        for name, value in expected.items():
+            assert abs(results[i][1][name] - value) < 1e-9, "Wrong %s of '%s'." % (name, image_name)
+
+    assert summary["num_images"] == 7, "Wrong number of images."
+    assert abs(summary["psnr"] - np.mean([metrics["psnr"] for _, metrics in results])) < 1e-9, "Wrong mean PSNR."
+
+
+if __name__ == '__main__':
+    test_metrics()
+    test_parallel_evaluation()
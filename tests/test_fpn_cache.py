@@ -0,0 +1,119 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, ColumnAmplifier
+from camj.analog.fpn_cache import fpn_cache
+from camj.analog.function_model import PixelwiseFunc, PhotodiodeFunc, CurrentMirrorFunc
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.analog.rng import seed_context
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput
+
+
+def hw_config():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 8, 1)],
+        num_output = (1, 8, 1)
+    )
+    pixel = AnalogComponent(
+        name = "Pixel",
+        input_domain = [ProcessDomain.OPTICAL],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ActivePixelSensor(num_transistor = 4, enable_cds = True, enable_prnu = True), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    col_amp = AnalogComponent(
+        name = "ColumnAmplifier",
+        input_domain = [ProcessDomain.VOLTAGE],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ColumnAmplifier(enable_prnu = True), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    pixel_array.add_component(pixel, (8, 8, 1))
+    pixel_array.add_component(col_amp, (1, 8, 1))
+
+    return {"memory": [], "compute": [], "analog": [pixel_array]}
+
+
+def seeded_prnu_gain(prnu_std = 0.1, num_draws = 0):
+    with seed_context(2023):
+        func = PixelwiseFunc(name = "Pixelwise", noise = 1.0, enable_prnu = True, prnu_std = prnu_std)
+    # temporal noise drawn before doesn't change the fixed-pattern noise.
+    func.rs.standard_normal(num_draws)
+    func.simulate_output(np.ones((4, 6, 1)))
+    return func.prnu_gain
+
+
+def seeded_accumulation_gain(num_draws = 0):
+    with seed_context(2023):
+        func = CurrentMirrorFunc(name = "CurrentMirror", noise = 0.1, enable_compute = True, enable_prnu = True, prnu_std = 0.1)
+    func.rs.standard_normal(num_draws)
+    func.simulate_accumulated_output(np.ones((2, 3, 3)), np.ones((3, 3, 2)))
+    return func.prnu_gain
+
+
+def test_fpn_cache():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with fpn_cache(cache_dir):
+            prnu_gain = seeded_prnu_gain()
+            assert isinstance(prnu_gain, np.memmap), "Cached map is not memory-mapped."
+            assert not prnu_gain.flags.writeable, "Cached map needs to be read-only."
+            assert len(os.listdir(cache_dir)) == 1, "Map is not stored."
+
+            assert np.array_equal(seeded_prnu_gain(num_draws = 10), prnu_gain), "Cached map is not reused."
+            assert len(os.listdir(cache_dir)) == 1, "Same map is stored twice."
+
+            assert not np.allclose(seeded_prnu_gain(prnu_std = 0.2), prnu_gain), "Different parameters share a map."
+            assert len(os.listdir(cache_dir)) == 2, "Map of new parameters is not stored."
+
+            # unseeded models are not cached.
+            func = PhotodiodeFunc(name = "Photodiode", dark_current_noise = 100.0, enable_dcnu = True, dcnu_std = 0.1)
+            func.simulate_output(np.zeros((4, 6, 1)))
+            assert len(os.listdir(cache_dir)) == 2, "Unseeded map is stored."
+
+        # the cache doesn't change the maps.
+        assert np.array_equal(seeded_prnu_gain(), prnu_gain), "Cached map differs from an uncached one."
+
+    # the PRNU of accumulated current mirror outputs also comes from the fixed-pattern stream.
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with fpn_cache(cache_dir):
+            accumulation_gain = seeded_accumulation_gain()
+            assert len(os.listdir(cache_dir)) == 1, "Accumulation map is not stored."
+        assert np.array_equal(seeded_accumulation_gain(num_draws = 10), accumulation_gain), \
+            "Accumulation map depends on the temporal noise."
+
+
+def test_fpn_cache_functional_simulation():
+    sw_desc = [PixelInput(name = "Input", size = (8, 8, 1))]
+    mapping = {"Input": "PixelArray"}
+    input_mapping = {"Input": [np.full((8, 8, 1), 1000.0)]}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        output1 = functional_simulation(
+            sw_desc, hw_config(), mapping, input_mapping, seed = 1, fpn_cache_dir = cache_dir
+        )["ColumnAmplifier"][0]
+        num_maps = len(os.listdir(cache_dir))
+        assert num_maps > 0, "No map is stored."
+        output2 = functional_simulation(
+            sw_desc, hw_config(), mapping, input_mapping, seed = 1, fpn_cache_dir = cache_dir
+        )["ColumnAmplifier"][0]
+        assert len(os.listdir(cache_dir)) == num_maps, "Maps are stored again."
+
+    uncached_output = functional_simulation(sw_desc, hw_config(), mapping, input_mapping, seed = 1)["ColumnAmplifier"][0]
+    assert np.array_equal(output1, output2) and np.array_equal(output1, uncached_output), \
+        "Cached simulation is not reproducible."
+
+
+if __name__ == '__main__':
+    test_fpn_cache()
+    test_fpn_cache_functional_simulation()
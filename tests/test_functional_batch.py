@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, ColumnAmplifier, MaxPool
+from camj.analog.function_model import PhotodiodeFunc, PixelwiseFunc, ColumnwiseFunc, frame_batch, frame_shape, \
+                                signal_precision, signal_dtype
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput
+
+
+def hw_config():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 16, 1)],
+        num_output = (1, 16, 1)
+    )
+    pixel = AnalogComponent(
+        name = "Pixel",
+        input_domain = [ProcessDomain.OPTICAL],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ActivePixelSensor(num_transistor = 4, enable_cds = True, enable_prnu = True), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    col_amp = AnalogComponent(
+        name = "ColumnAmplifier",
+        input_domain = [ProcessDomain.VOLTAGE],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ColumnAmplifier(enable_prnu = True), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    pixel_array.add_component(pixel, (16, 16, 1))
+    pixel_array.add_component(col_amp, (1, 16, 1))
+
+    return {"memory": [], "compute": [], "analog": [pixel_array]}
+
+
+def test_fixed_pattern_noise_shared():
+    frames = np.ones((6, 8, 10, 1))
+    with frame_batch():
+        pixelwise = PixelwiseFunc(name = "Pixelwise", gain = 1.0, noise = 0.0, enable_prnu = True, prnu_std = 0.1)
+        output = pixelwise.simulate_output(frames)
+        assert pixelwise.prnu_gain.shape == (8, 10, 1), "PRNU gain needs to be in the shape of one frame."
+        assert np.allclose(output, output[0]), "PRNU gain is not shared across frames."
+        assert np.std(output[0]) > 0.01, "PRNU gain is not applied."
+
+        columnwise = ColumnwiseFunc(name = "Columnwise", gain = 1.0, noise = 0.0, enable_prnu = True, prnu_std = 0.1)
+        output = columnwise.simulate_output(frames)
+        assert np.allclose(output, output[:1, :1]), "Column gain is not shared across frames and rows."
+
+        photodiode = PhotodiodeFunc(name = "Photodiode", dark_current_noise = 100.0, enable_dcnu = True, dcnu_std = 0.1)
+        photodiode.simulate_output(np.zeros((2, 8, 10, 1)))
+        assert photodiode.dcnu_noise.shape == (8, 10, 1), "DCNU needs to be in the shape of one frame."
+
+
+def test_temporal_noise_per_frame():
+    with frame_batch():
+        pixelwise = PixelwiseFunc(name = "Pixelwise", gain = 1.0, noise = 1.0)
+        output = pixelwise.simulate_output(np.zeros((200, 8, 10, 1)))
+    # every frame draws its own read noise
+    assert not np.allclose(output[0], output[1]), "Temporal noise is shared across frames."
+    assert np.isclose(np.std(output), 1.0, atol = 0.05), "Temporal noise has wrong scale."
+
+
+def test_maxpool_batch():
+    maxpool = MaxPool(noise = 0.0)
+    maxpool._set_binning_config(kernel_size = [(2, 2, 1)])
+    frames = np.random.RandomState(0).uniform(size = (3, 8, 6, 2))
+    with frame_batch():
+        batch_output = maxpool.noise([frames])[1][0]
+
+    assert batch_output.shape == (3, 4, 3, 2), "Wrong MaxPool output shape."
+    for i in range(len(frames)):
+        frame_output = maxpool.noise([frames[i]])[1][0]
+        assert np.allclose(batch_output[i], frame_output), "Frame %d mismatch." % i
+
+
+def test_batched_functional_simulation():
+    sw_desc = [PixelInput(name = "Input", size = (16, 16, 1))]
+    mapping = {"Input": "PixelArray"}
+    frames = np.full((4, 16, 16, 1), 1000.0)
+
+    simulation_res = functional_simulation(sw_desc, hw_config(), mapping, {"Input": [frames]}, batched = True)
+    output = simulation_res["ColumnAmplifier"][0]
+    assert output.shape == frames.shape, "Batched output needs to keep the frame axis."
+    assert not np.allclose(output[0], output[1]), "Temporal noise is shared across frames."
+
+    # unbatched mode is unchanged.
+    simulation_res = functional_simulation(sw_desc, hw_config(), mapping, {"Input": [frames[0]]})
+    assert simulation_res["ColumnAmplifier"][0].shape == (16, 16, 1), "Wrong unbatched output shape."
+
+
+def test_thread_local_settings():
+    # the frame batch and the precision of one thread don't leak into another.
+    barrier = threading.Barrier(2)
+
+    def settings(batched):
+        if not batched:
+            barrier.wait()
+            res = (frame_shape((4, 16, 16, 1)), signal_dtype())
+            barrier.wait()
+            return res
+        with frame_batch(), signal_precision(np.float32):
+            barrier.wait()
+            barrier.wait()
+            return (frame_shape((4, 16, 16, 1)), signal_dtype())
+
+    with ThreadPoolExecutor(2) as pool:
+        batched_settings, unbatched_settings = pool.map(settings, [True, False])
+    assert batched_settings == ((16, 16, 1), np.float32), "Wrong settings in the batched thread."
+    assert unbatched_settings == ((4, 16, 16, 1), np.float64), "Settings leak into another thread."
+
+    # concurrent simulations, each with its own settings, on their own analog threads.
+    sw_desc = [PixelInput(name = "Input", size = (16, 16, 1))]
+    mapping = {"Input": "PixelArray"}
+    frames = np.full((4, 16, 16, 1), 1000.0)
+
+    def simulate(batched):
+        input_signal = frames if batched else frames[0]
+        return functional_simulation(
+            sw_desc, hw_config(), mapping, {"Input": [input_signal]}, batched = batched,
+            dtype = np.float32 if batched else np.float64, num_threads = 2
+        )["ColumnAmplifier"][0]
+
+    with ThreadPoolExecutor(2) as pool:
+        batched_output, unbatched_output = pool.map(simulate, [True, False])
+    assert batched_output.shape == frames.shape and batched_output.dtype == np.float32, "Wrong batched output."
+    assert unbatched_output.shape == (16, 16, 1) and unbatched_output.dtype == np.float64, "Wrong unbatched output."
+
+
+if __name__ == '__main__':
+    test_fixed_pattern_noise_shared()
+    test_temporal_noise_per_frame()
+    test_maxpool_batch()
+    test_batched_functional_simulation()
+    test_thread_local_settings()
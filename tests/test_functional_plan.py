@@ -0,0 +1,71 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import copy
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, DigitalPixelSensor
+from camj.analog.function_model import FloatingDiffusionFunc, CorrelatedDoubleSamplingFunc, PixelwiseFunc
+from camj.analog.function_utils import compile_functional_pipeline, default_functional_simulation
+from camj.analog.rng import reseed
+
+
+def test_compiled_plan():
+    pipeline = [
+        FloatingDiffusionFunc(name = "FD", noise = 0.1, enable_cds = True),
+        CorrelatedDoubleSamplingFunc(name = "CDS", noise = 0.1),
+        [PixelwiseFunc(name = "SF1", noise = 0.1), PixelwiseFunc(name = "SF2", noise = 0.1)]
+    ]
+    plan = compile_functional_pipeline(pipeline)
+    assert [[num_inputs for _, num_inputs in step] for step in plan] == [[1], [2], [1, 1]], \
+        "Wrong number of inputs."
+
+    input_list = [np.full((4, 4, 1), 10.0)]
+    reseed(pipeline, 0)
+    plan_output = default_functional_simulation(plan, input_list)
+    reseed(pipeline, 0)
+    list_output = default_functional_simulation(pipeline, input_list)
+    assert len(plan_output) == 2, "Wrong number of outputs."
+    for plan_signal, list_signal in zip(plan_output, list_output):
+        assert np.array_equal(plan_signal, list_signal), "Compiled plan gives a different result."
+
+
+def test_component_plan():
+    for component in [ActivePixelSensor(num_transistor = 4, enable_cds = True), DigitalPixelSensor()]:
+        assert [stage for step in component.noise_plan for stage, _ in step] == component.noise_components, \
+            "Plan doesn't follow the noise components."
+        # the plan still refers to the copied function models.
+        component_copy = copy.deepcopy(component)
+        assert component_copy.noise_plan[0][0][0] is component_copy.noise_components[0], \
+            "Copied plan refers to the original function models."
+        input_list = [np.full((4, 4, 1), 100.0)]
+        assert len(component_copy.noise(input_list)[1]) == \
+            len(default_functional_simulation(component_copy.noise_components, input_list)), "Wrong number of outputs."
+
+
+def test_changed_noise_components():
+    component = ActivePixelSensor(num_transistor = 4)
+    plan = component.noise_plan
+    assert component.noise_plan is plan, "Unchanged noise components are compiled again."
+
+    # a replaced function model is simulated, not the one in the previous plan.
+    component.noise_components[-1] = PixelwiseFunc(name = "SourceFollower", gain = 2.0, noise = 0.0)
+    assert component.noise_plan[-1][0][0] is component.noise_components[-1], "Plan ignores a replaced model."
+    component.noise_components.append(PixelwiseFunc(name = "Buffer", gain = 3.0, noise = 0.0))
+    assert len(component.noise_plan) == 4, "Plan ignores an appended model."
+
+    reference = copy.deepcopy(component)
+    input_list = [np.full((4, 4, 1), 100.0)]
+    reseed(component, 0)
+    reseed(reference, 0)
+    assert np.array_equal(
+        component.noise(input_list)[1][0], default_functional_simulation(reference.noise_components, input_list)[0]
+    ), "Changed noise components are not simulated."
+
+
+if __name__ == '__main__':
+    test_compiled_plan()
+    test_component_plan()
+    test_changed_noise_components()
@@ -0,0 +1,40 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import pytest
+
+from import_time import IMPORT_BUDGETS, DEFERRED_MODULES, import_time_without_numpy
+
+
+def test_lazy_api():
+    import camj
+
+    _, imported = import_time_without_numpy("camj", num_runs = 1)
+    assert "numpy" not in imported and "camj.general.launch" not in imported, "'import camj' is not lazy."
+    assert camj.energy_simulation.__module__ == "camj.general.launch", "Wrong top-level API."
+    assert "functional_simulation" in dir(camj), "Lazy API is not listed."
+
+
+def test_deferred_imports():
+    for module in IMPORT_BUDGETS:
+        _, imported = import_time_without_numpy(module, num_runs = 1)
+        deferred = [name for name in DEFERRED_MODULES if name in imported]
+        assert len(deferred) == 0, "'%s' imports %s." % (module, deferred)
+
+
+def test_import_budget():
+    # wall-clock budgets are opt-in, they depend on the machine and its load.
+    if os.environ.get("CAMJ_IMPORT_BUDGET") != "1":
+        pytest.skip("set CAMJ_IMPORT_BUDGET=1 to enforce the import time budgets.")
+    for module, budget in IMPORT_BUDGETS.items():
+        best_time, _ = import_time_without_numpy(module)
+        assert best_time < budget, "'%s' takes %.2f ms, over the budget of %.2f ms." % (module, best_time / 1000., budget / 1000.)
+
+
+if __name__ == '__main__':
+    test_lazy_api()
+    test_deferred_imports()
+    test_import_budget()
@@ -0,0 +1,288 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utility"))
+
+import numpy as np
+import pytest
+
+from isp_utils import convert_bayer, get_luminance, edge_aware_interpolation, \
+                      edge_aware_interpolation_green_channel, edge_aware_interpolation_red_channel, \
+                      edge_aware_interpolation_blue_channel
+
+TEST_IMG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_imgs")
+
+# the per-pixel loop versions of the interpolations, the vectorized versions need to give the
+# same outputs.
+
+def loop_get_luminance(raw_img):
+    gaussian_filter = [
+        [-2,  3, -6,  3, -2],
+        [ 3,  4,  2,  4,  3],
+        [-6,  2, 48,  2,  6],
+        [ 3,  4,  2,  4,  3],
+        [-2,  3, -6,  3, -2]
+    ]
+
+    luminance = np.zeros(raw_img.shape)
+    H, W = raw_img.shape
+
+    for r in range(5):
+        for c in range(5):
+            r_offset = 2 - r
+            c_offset = 2 - c
+            luminance[int(max(r_offset, 0)):int(min(r_offset+H, H)), int(max(c_offset, 0)):int(min(c_offset+W, W))]= \
+                raw_img[int(max(-r_offset, 0)):int(min(-r_offset+H, H)), int(max(-c_offset, 0)):int(min(-c_offset+W, W))]*gaussian_filter[r][c]
+
+    return luminance / 64.
+
+
+def loop_edge_aware_interpolation_green_channel(green_channel):
+    (H, W) = green_channel.shape
+    # auto fill first and last row
+    for i in range(W):
+        if [0, i] == 0:
+            green_channel[0, i] = green_channel[1, i]
+        if green_channel[-1, i] == 0:
+            green_channel[-1, i] = green_channel[-2, i]
+
+    # auto fill first and last column
+    for i in range(H):
+        if green_channel[i, 0] == 0:
+            green_channel[i, 0] = green_channel[i, 1]
+        if green_channel[i, -1] == 0:
+            green_channel[i, -1] = green_channel[i, -2]
+
+    # edge aware interpolation first green
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2
+            c = j*2
+            # skip those rows and cols
+            if r == 0 or c == 0 or r >= H-1 or c >= W-1:
+                continue
+            
+            delta_h = np.abs(green_channel[r, c-1] - green_channel[r, c+1])
+            delta_v = np.abs(green_channel[r-1, c] - green_channel[r+1, c])
+
+            if delta_h > delta_v:
+                green_channel[r, c] = 1/2*(green_channel[r-1, c]+green_channel[r+1, c])
+            else:
+                green_channel[r, c] = 1/2*(green_channel[r, c-1]+green_channel[r, c+1])
+
+    # edge aware interpolation second green
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2+1
+            c = j*2+1
+            # skip those rows and cols
+            if r >= H-1 or c >= W-1:
+                continue
+            
+            delta_h = np.abs(green_channel[r, c-1] - green_channel[r, c+1])
+            delta_v = np.abs(green_channel[r-1, c] - green_channel[r+1, c])
+
+            if delta_h > delta_v:
+                green_channel[r, c] = 1/2*(green_channel[r-1, c]+green_channel[r+1, c])
+            else:
+                green_channel[r, c] = 1/2*(green_channel[r, c-1]+green_channel[r, c+1])
+
+    return green_channel
+
+
+def loop_edge_aware_interpolation_red_channel(red_channel):
+    (H, W) = red_channel.shape
+    red_channel[1::2, -1] = red_channel[0::2, -2]
+    red_channel[-1:, 1::2] = red_channel[-2, 0::2]
+
+    # R22 interpolation
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2+1
+            c = j*2+1
+            # skip those rows and cols
+            if r >= H-1 or c >= W-1:
+                continue
+            red_channel[r, c] = 1/4*(
+                red_channel[r-1, c-1]+red_channel[r-1, c+1]+
+                red_channel[r+1, c-1]+red_channel[r+1, c+1])
+
+    # auto fill first and last row
+    for i in range(W):
+        if [0, i] == 0:
+            red_channel[0, i] = red_channel[1, i]
+        if red_channel[-1, i] == 0:
+            red_channel[-1, i] = red_channel[-2, i]
+
+    # auto fill first and last column
+    for i in range(H):
+        if red_channel[i, 0] == 0:
+            red_channel[i, 0] = red_channel[i, 1]
+        if red_channel[i, -1] == 0:
+            red_channel[i, -1] = red_channel[i, -2]
+
+    # edge aware interpolation first red
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2+1
+            c = j*2
+            # skip those rows and cols
+            if r == 0 or c == 0 or r >= H-1 or c >= W-1:
+                continue
+            
+            delta_h = np.abs(red_channel[r, c-1] - red_channel[r, c+1])
+            delta_v = np.abs(red_channel[r-1, c] - red_channel[r+1, c])
+
+            if delta_h > delta_v:
+                red_channel[r, c] = 1/2*(red_channel[r-1, c]+red_channel[r+1, c])
+            else:
+                red_channel[r, c] = 1/2*(red_channel[r, c-1]+red_channel[r, c+1])
+
+    # edge aware interpolation second green
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2
+            c = j*2+1
+            # skip those rows and cols
+            if r >= H-1 or c >= W-1:
+                continue
+            
+            delta_h = np.abs(red_channel[r, c-1] - red_channel[r, c+1])
+            delta_v = np.abs(red_channel[r-1, c] - red_channel[r+1, c])
+
+            if delta_h > delta_v:
+                red_channel[r, c] = 1/2*(red_channel[r-1, c]+red_channel[r+1, c])
+            else:
+                red_channel[r, c] = 1/2*(red_channel[r, c-1]+red_channel[r, c+1])
+
+    return red_channel
+
+
+def loop_edge_aware_interpolation_blue_channel(blue_channel):
+    (H, W) = blue_channel.shape
+    blue_channel[0::2, 0] = blue_channel[1::2, 1]
+    blue_channel[0:, 0::2] = blue_channel[1, 1::2]
+
+    # B11 interpolation
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2
+            c = j*2
+            # skip those rows and cols
+            if c == 0 or r == 0 or r >= H-1 or c >= W-1:
+                continue
+            blue_channel[r, c] = 1/4*(
+                blue_channel[r-1, c-1]+blue_channel[r-1, c+1]+
+                blue_channel[r+1, c-1]+blue_channel[r+1, c+1]
+            )
+
+    # auto fill first and last row
+    for i in range(W):
+        if [0, i] == 0:
+            blue_channel[0, i] = blue_channel[1, i]
+        if blue_channel[-1, i] == 0:
+            blue_channel[-1, i] = blue_channel[-2, i]
+
+    # auto fill first and last column
+    for i in range(H):
+        if blue_channel[i, 0] == 0:
+            blue_channel[i, 0] = blue_channel[i, 1]
+        if blue_channel[i, -1] == 0:
+            blue_channel[i, -1] = blue_channel[i, -2]
+
+    # edge aware interpolation first blue
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2+1
+            c = j*2
+            # skip those rows and cols
+            if r == 0 or c == 0 or r >= H-1 or c >= W-1:
+                continue
+            
+            delta_h = np.abs(blue_channel[r, c-1] - blue_channel[r, c+1])
+            delta_v = np.abs(blue_channel[r-1, c] - blue_channel[r+1, c])
+
+            if delta_h > delta_v:
+                blue_channel[r, c] = 1/2*(blue_channel[r-1, c]+blue_channel[r+1, c])
+            else:
+                blue_channel[r, c] = 1/2*(blue_channel[r, c-1]+blue_channel[r, c+1])
+
+    # edge aware interpolation second green
+    for i in range(H//2):
+        for j in range(W//2):
+            r = i*2
+            c = j*2+1
+            # skip those rows and cols
+            if r >= H-1 or c >= W-1:
+                continue
+            
+            delta_h = np.abs(blue_channel[r, c-1] - blue_channel[r, c+1])
+            delta_v = np.abs(blue_channel[r-1, c] - blue_channel[r+1, c])
+
+            if delta_h > delta_v:
+                blue_channel[r, c] = 1/2*(blue_channel[r-1, c]+blue_channel[r+1, c])
+            else:
+                blue_channel[r, c] = 1/2*(blue_channel[r, c-1]+blue_channel[r, c+1])
+
+    return blue_channel
+
+
+def loop_edge_aware_interpolation(bayer_img):
+    (H, W, _) = bayer_img.shape
+    rgb_img = np.zeros((H*2, W*2, 3))
+
+    rgb_img[0::2, 0::2, 0] = bayer_img[:, :, 0]
+    rgb_img[1::2, 0::2, 1] = bayer_img[:, :, 1]
+    rgb_img[0::2, 1::2, 1] = bayer_img[:, :, 2]
+    rgb_img[1::2, 1::2, 2] = bayer_img[:, :, 3]
+
+    rgb_img[:, :, 1] = loop_edge_aware_interpolation_green_channel(rgb_img[:, :, 1])
+    rgb_img[:, :, 0] = loop_edge_aware_interpolation_red_channel(rgb_img[:, :, 0])
+    rgb_img[:, :, 2] = loop_edge_aware_interpolation_blue_channel(rgb_img[:, :, 2])
+
+    return rgb_img
+
+
+def load_raw_images():
+    cv2 = pytest.importorskip("cv2")
+    for img_name in sorted(os.listdir(TEST_IMG_DIR)):
+        img = np.array(cv2.imread(os.path.join(TEST_IMG_DIR, img_name), cv2.IMREAD_COLOR), dtype=np.float64)/255.
+        (H, W, _) = img.shape
+        img = img[:(H//2)*2, :(W//2)*2, :]
+        # sample an RGGB mosaic from the image.
+        raw_img = np.zeros(img.shape[:2])
+        raw_img[0::2, 0::2] = img[0::2, 0::2, 2]
+        raw_img[1::2, 0::2] = img[1::2, 0::2, 1]
+        raw_img[0::2, 1::2] = img[0::2, 1::2, 1]
+        raw_img[1::2, 1::2] = img[1::2, 1::2, 0]
+        yield img_name, raw_img
+
+
+def test_demosaic_regression():
+    for img_name, raw_img in load_raw_images():
+        bayer_img = convert_bayer(raw_img)
+        assert np.array_equal(edge_aware_interpolation(bayer_img), loop_edge_aware_interpolation(bayer_img)), \
+            "Edge aware interpolation of '%s' is changed." % img_name
+        assert np.array_equal(get_luminance(raw_img), loop_get_luminance(raw_img)), \
+            "Luminance of '%s' is changed." % img_name
+
+
+def test_channel_regression():
+    rs = np.random.RandomState(0)
+    for shape in [(8, 8), (10, 14), (32, 48)]:
+        channel = rs.uniform(size = shape)
+        # zeros are filled from the neighbors.
+        channel[rs.uniform(size = shape) < 0.3] = 0
+        for func, loop_func in [
+            (edge_aware_interpolation_green_channel, loop_edge_aware_interpolation_green_channel),
+            (edge_aware_interpolation_red_channel, loop_edge_aware_interpolation_red_channel),
+            (edge_aware_interpolation_blue_channel, loop_edge_aware_interpolation_blue_channel)
+        ]:
+            assert np.array_equal(func(channel.copy()), loop_func(channel.copy())), \
+                "'%s' is changed on %s." % (func.__name__, shape)
+
+
+if __name__ == '__main__':
+    test_demosaic_regression()
+    test_channel_regression()
@@ -0,0 +1,124 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor
+from camj.analog.function_model import PhotodiodeFunc, PixelwiseFunc
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.analog.rng import reseed
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.general.noise_statistics import NoiseStatistics, PixelStatistics
+from camj.sw.interface import PixelInput
+
+from test_rng import without_public_seed_seq
+
+
+def hw_config():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 8, 1)],
+        num_output = (1, 8, 1)
+    )
+    pixel_array.add_component(
+        AnalogComponent(
+            name = "Pixel",
+            input_domain = [ProcessDomain.OPTICAL],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [(ActivePixelSensor(num_transistor = 3, enable_prnu = True, fd_noise = 2., sf_noise = 1.), 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (8, 8, 1)
+    )
+    return {"memory": [], "compute": [], "analog": [pixel_array]}
+
+
+def test_running_statistics():
+    rs = np.random.RandomState(0)
+    frames = rs.normal(100., 5., size = (10, 6, 8, 2)).astype(np.float32)
+    statistics = PixelStatistics((6, 8, 2))
+    # mix single frames and batches of frames.
+    statistics.update(frames[0])
+    statistics.update(frames[1:4], batched = True)
+    statistics.update(frames[4])
+    statistics.update(frames[5:], batched = True)
+
+    assert statistics.num_frames == 10, "Wrong number of frames."
+    assert np.allclose(statistics.mean, np.mean(frames, axis = 0, dtype = np.float64)), "Wrong running mean."
+    assert np.allclose(statistics.var(), np.var(frames, axis = 0, ddof = 1, dtype = np.float64)), "Wrong running variance."
+    assert np.array_equal(statistics.min, np.min(frames, axis = 0)), "Wrong running minimum."
+    assert np.array_equal(statistics.max, np.max(frames, axis = 0)), "Wrong running maximum."
+    assert np.allclose(statistics.row_mean, np.mean(frames, axis = (0, 2), dtype = np.float64)), "Wrong row mean."
+    assert np.allclose(statistics.column_var(), np.var(np.mean(frames, axis = 1), axis = 0, ddof = 1)), \
+        "Wrong column variance."
+
+
+def test_fixed_pattern_separation():
+    rs = np.random.RandomState(0)
+    row_offset = rs.normal(0., 3., size = (32, 1, 1))
+    column_offset = rs.normal(0., 2., size = (1, 32, 1))
+    statistics = PixelStatistics((32, 32, 1))
+    for _ in range(200):
+        statistics.update(100. + row_offset + column_offset + rs.normal(0., 1., size = (32, 32, 1)))
+
+    assert abs(statistics.temporal_noise() - 1.) < 0.02, "Wrong temporal noise."
+    assert abs(statistics.row_fpn() - np.std(row_offset)) < 0.05, "Wrong row fixed-pattern noise."
+    assert abs(statistics.column_fpn() - np.std(column_offset)) < 0.05, "Wrong column fixed-pattern noise."
+    assert abs(statistics.row_temporal_noise() - 1. / np.sqrt(32)) < 0.02, "Wrong row temporal noise."
+
+
+def test_simulation_runs():
+    sw_desc = [PixelInput(name = "PixelInput", size = (8, 8, 1))]
+    mapping = {"PixelInput": "PixelArray"}
+    input_mapping = {"PixelInput": [np.full((8, 8, 1), 500.)]}
+    statistics = NoiseStatistics(keys = ["*ActivePixelSensor"])
+    outputs = []
+    for run in range(20):
+        res = functional_simulation(sw_desc, hw_config(), mapping, input_mapping, seed = 2023, run = run)
+        statistics.update(res)
+        outputs.append(res["ActivePixelSensor"][0])
+
+    # each run has different temporal noise on the same fixed-pattern noise.
+    assert not np.array_equal(outputs[0], outputs[1]), "Runs have the same temporal noise."
+    res = functional_simulation(sw_desc, hw_config(), mapping, input_mapping, seed = 2023, run = 0)
+    assert np.array_equal(res["ActivePixelSensor"][0], outputs[0]), "Run is not reproducible."
+    pixel_statistics = statistics["ActivePixelSensor"][0]
+    assert list(statistics.statistics.keys()) == ["ActivePixelSensor"], "Keys are not selected."
+    assert np.allclose(pixel_statistics.mean, np.mean(outputs, axis = 0)), "Wrong mean over runs."
+    assert pixel_statistics.pixel_fpn() > 0 and pixel_statistics.temporal_noise() > 0, "Missing noise."
+
+    try:
+        functional_simulation(sw_desc, hw_config(), mapping, input_mapping, run = 0)
+    except Exception as e:
+        assert "'run' needs 'seed'" in str(e), "Unexpected error: %s" % e
+    else:
+        raise AssertionError("'run' without 'seed' is not reported.")
+
+
+def test_runs_share_fixed_pattern_noise():
+    # runs of the same seed share PRNU and DCNU maps, also without the public ``seed_seq``.
+    photodiode = PhotodiodeFunc(name = "Photodiode", dark_current_noise = 100.0, enable_dcnu = True, dcnu_std = 0.1)
+    pixelwise = PixelwiseFunc(name = "Pixelwise", noise = 1.0, enable_prnu = True, prnu_std = 0.1)
+    maps = []
+    outputs = []
+    for run in range(2):
+        with without_public_seed_seq():
+            reseed([photodiode, pixelwise], 2023, run = run)
+        outputs.append(pixelwise.simulate_output(photodiode.simulate_output(np.full((4, 6, 1), 500.))))
+        maps.append((photodiode.dcnu_noise, pixelwise.prnu_gain))
+
+    assert np.array_equal(maps[0][0], maps[1][0]), "Runs have different DCNU maps."
+    assert np.array_equal(maps[0][1], maps[1][1]), "Runs have different PRNU maps."
+    assert not np.array_equal(outputs[0], outputs[1]), "Runs have the same temporal noise."
+
+
+if __name__ == '__main__':
+    test_running_statistics()
+    test_fixed_pattern_separation()
+    test_simulation_runs()
+    test_runs_share_fixed_pattern_noise()
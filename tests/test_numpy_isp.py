@@ -0,0 +1,89 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utility"))
+
+import numpy as np
+import pytest
+
+from numpy_forward_process import process, demosaic, apply_smoothstep, gamma_compression
+from numpy_reverse_process import unprocess, mosaic, inverse_smoothstep, gamma_expansion
+
+
+def smooth_images(num_images = 3):
+    y, x = np.mgrid[0:32, 0:48] / 48.
+    return np.stack([
+        np.stack([0.1 + 0.5 * x + 0.1 * i, 0.3 + 0.4 * y, 0.6 - 0.3 * x * y], axis = -1)
+        for i in range(num_images)
+    ]).astype(np.float32)
+
+
+def test_inverse_functions():
+    image = np.linspace(0, 1, 101, dtype = np.float32)
+    assert np.allclose(apply_smoothstep(inverse_smoothstep(image)), image, atol = 1e-5), "Wrong inverse smoothstep."
+    # gamma functions clamp at 1e-8, so zero isn't recovered exactly.
+    assert np.allclose(gamma_compression(gamma_expansion(image))[1:], image[1:], atol = 1e-5), "Wrong gamma expansion."
+
+    # bilinear demosaicing reconstructs a linear ramp away from the borders.
+    y, x = np.mgrid[0:16, 0:20].astype(np.float32)
+    ramp = np.stack([x, y, x + y], axis = -1) / 40.
+    assert np.allclose(demosaic(mosaic(ramp))[2:-2, 2:-2], ramp[2:-2, 2:-2], atol = 1e-6), "Wrong demosaicing."
+
+
+def test_batched_unprocess():
+    images = smooth_images()
+    bayer_images, metadata = unprocess(images, rng = 0)
+    assert bayer_images.shape == (3, 16, 24, 4), "Wrong Bayer shape."
+    assert metadata["cam2rgb"].shape == (3, 3, 3) and metadata["red_gain"].shape == (3, ), "Wrong metadata shape."
+    assert len(np.unique(metadata["red_gain"])) == 3, "Images don't have their own metadata."
+
+    # the same seed gives the same raw images.
+    same_bayer_images, same_metadata = unprocess(images, rng = 0)
+    assert np.array_equal(bayer_images, same_bayer_images), "Seeded unprocess is not reproducible."
+    assert np.array_equal(metadata["cam2rgb"], same_metadata["cam2rgb"]), "Seeded metadata is not reproducible."
+
+    # a batch is the same as processing the images one by one.
+    rgb_images = process(bayer_images, metadata["red_gain"], metadata["blue_gain"], metadata["cam2rgb"])
+    for i in range(len(images)):
+        rgb_image = process(bayer_images[i], metadata["red_gain"][i], metadata["blue_gain"][i], metadata["cam2rgb"][i])
+        assert np.allclose(rgb_images[i], rgb_image), "Batched process is different from image %d." % i
+
+    # without the brightening, the forward process undoes the inverse process.
+    ccm = metadata["cam2rgb"][0]
+    rgb_image = process(
+        bayer_images[0] * metadata["rgb_gain"][0], metadata["red_gain"][0], metadata["blue_gain"][0], ccm
+    )
+    assert np.abs(rgb_image - images[0])[2:-2, 2:-2].max() < 0.02, "Forward process doesn't invert unprocess."
+
+
+def test_tensorflow_equivalence():
+    # only runs where TensorFlow is installed.
+    tf = pytest.importorskip("tensorflow")
+    import forward_process
+    import reverse_process
+
+    images = smooth_images(1)
+    bayer_images, metadata = unprocess(images, rng = 0)
+    image = images[0]
+    rgb2cam = np.linalg.inv(metadata["cam2rgb"][0])
+    gains = [metadata[name][0] for name in ["rgb_gain", "red_gain", "blue_gain"]]
+
+    tf_image = reverse_process.apply_ccm(
+        reverse_process.gamma_expansion(reverse_process.inverse_smoothstep(tf.constant(image))), tf.constant(rgb2cam)
+    )
+    tf_image = tf.clip_by_value(reverse_process.safe_invert_gains(tf_image, *gains), 0.0, 1.0)
+    tf_bayer = reverse_process.mosaic(tf_image).numpy()
+    assert np.allclose(tf_bayer, bayer_images[0], atol = 1e-5), "Unprocess is different from TensorFlow."
+
+    tf_rgb = forward_process.process(
+        tf.constant(tf_bayer[np.newaxis]), gains[1], gains[2], tf.constant(metadata["cam2rgb"][0])
+    ).numpy()
+    rgb = process(tf_bayer[np.newaxis], gains[1], gains[2], metadata["cam2rgb"][0])
+    assert np.allclose(tf_rgb, rgb, atol = 1e-5), "Process is different from TensorFlow."
+
+
+if __name__ == '__main__':
+    test_inverse_functions()
+    test_batched_unprocess()
+    test_tensorflow_equivalence()
@@ -0,0 +1,56 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.function_model import PhotodiodeFunc
+from camj.analog.rng import poisson_noise
+
+NUM_SAMPLES = 200000
+
+
+def ks_statistic(samples1, samples2):
+    # the largest distance between the empirical CDFs of two sample sets.
+    values = np.union1d(samples1, samples2)
+    cdf1 = np.searchsorted(np.sort(samples1), values, side = "right") / len(samples1)
+    cdf2 = np.searchsorted(np.sort(samples2), values, side = "right") / len(samples2)
+    return np.max(np.abs(cdf1 - cdf2))
+
+
+def test_distribution_equivalence():
+    for lam in [1000., 10000.]:
+        exact = poisson_noise(np.random.default_rng(0), lam, size = NUM_SAMPLES)
+        approx = poisson_noise(np.random.default_rng(1), lam, size = NUM_SAMPLES, threshold = lam)
+        assert np.array_equal(approx, np.rint(approx)) and np.all(approx >= 0), "Samples are not counts."
+        assert abs(np.mean(approx) - lam) < 5 * np.sqrt(lam / NUM_SAMPLES), "Wrong mean."
+        assert abs(np.var(approx) / lam - 1) < 0.02, "Wrong variance."
+        # two-sample Kolmogorov-Smirnov test, 1.95 * sqrt(2 / n) is the 0.001 critical value.
+        assert ks_statistic(exact, approx) < 1.95 * np.sqrt(2. / NUM_SAMPLES), \
+            "Approximated samples are distinguishable from Poisson samples at %d." % lam
+
+
+def test_exactness_threshold():
+    lam = np.array([[5., 50.], [5000., 50000.]])
+    samples = poisson_noise(np.random.default_rng(0), lam, threshold = 1000., out = np.empty((1000, 2, 2)))
+    # means below the threshold are exact, and small means are never approximated.
+    assert np.all(samples[:, 0, 0] >= 0) and np.allclose(np.mean(samples, axis = 0), lam, rtol = 0.1), \
+        "Wrong mixed samples."
+
+    # below the threshold, or without one, the samples are the same as exact Poisson samples.
+    for threshold in [None, 1e6]:
+        func = PhotodiodeFunc(name = "Photodiode", dark_current_noise = 10., poisson_threshold = threshold)
+        func.rs = np.random.default_rng(0)
+        input_signal = np.full((4, 6, 1), 20000.)
+        # shot noise and dark current noise are drawn as one Poisson noise.
+        reference = np.random.default_rng(0).poisson(input_signal + 10., input_signal.shape)
+        assert np.array_equal(func.simulate_output(input_signal), reference), "Exact sampling is changed."
+
+    # the approximation is opt-in, the default is exact sampling.
+    assert PhotodiodeFunc(name = "Photodiode", dark_current_noise = 10.).poisson_threshold is None, "Approximation is on by default."
+
+
+if __name__ == '__main__':
+    test_distribution_equivalence()
+    test_exactness_threshold()
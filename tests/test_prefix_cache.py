@@ -0,0 +1,144 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camj.digital.compute import ADC, ComputeUnit
+from camj.digital.memory import DoubleBuffer, FIFO
+from camj.digital.prefix_cache import PrefixCache
+from camj.general.enum import ProcessorLocation
+from camj.general.launch import digital_energy_simulation
+from camj.sw.interface import PixelInput, ProcessStage
+
+
+def hw_config(post_num_of_stages = 2, post_energy_per_cycle = 20):
+    fifo = FIFO(
+        name = "FIFO",
+        size = 4096,
+        write_energy_per_word = 2,
+        read_energy_per_word = 2,
+        pixels_per_write_word = 1,
+        pixels_per_read_word = 1,
+        location = ProcessorLocation.COMPUTE_LAYER,
+    )
+    double_buffer = DoubleBuffer(
+        name = "DoubleBuffer",
+        size = (4, 4096, 4096),
+        write_energy_per_word = 3,
+        read_energy_per_word = 1,
+        pixels_per_write_word = 1,
+        pixels_per_read_word = 1,
+        location = ProcessorLocation.COMPUTE_LAYER,
+    )
+    adc = ADC(
+        name = "ADC",
+        output_pixels_per_cycle = (1, 16, 1),
+        location = ProcessorLocation.SENSOR_LAYER,
+        energy_per_pixel = 600,
+    )
+    adc.set_output_buffer(fifo)
+    bin_unit = ComputeUnit(
+        name = "BinUnit",
+        location = ProcessorLocation.COMPUTE_LAYER,
+        input_pixels_per_cycle = [(2, 16, 1)],
+        output_pixels_per_cycle = (1, 8, 1),
+        energy_per_cycle = 10,
+        num_of_stages = 2,
+    )
+    bin_unit.set_input_buffer(fifo)
+    bin_unit.set_output_buffer(double_buffer)
+    post_unit = ComputeUnit(
+        name = "PostUnit",
+        location = ProcessorLocation.COMPUTE_LAYER,
+        input_pixels_per_cycle = [(2, 8, 1)],
+        output_pixels_per_cycle = (1, 4, 1),
+        energy_per_cycle = post_energy_per_cycle,
+        num_of_stages = post_num_of_stages,
+    )
+    post_unit.set_input_buffer(double_buffer)
+    post_unit.set_output_buffer(double_buffer)
+
+    return {
+        "memory": [fifo, double_buffer],
+        "compute": [adc, bin_unit, post_unit],
+        "analog": []
+    }
+
+
+def sw_pipeline():
+    input_data = PixelInput(name = "Input", size = (16, 16, 1))
+    binning_stage = ProcessStage(
+        name = "Binning",
+        input_size = [(16, 16, 1)],
+        kernel_size = [(2, 2, 1)],
+        num_kernels = [1],
+        stride = [(2, 2, 1)],
+        padding = [False]
+    )
+    binning_stage.set_input_stage(input_data)
+    post_stage = ProcessStage(
+        name = "Post",
+        input_size = [(8, 8, 1)],
+        kernel_size = [(2, 2, 1)],
+        num_kernels = [1],
+        stride = [(2, 2, 1)],
+        padding = [False]
+    )
+    post_stage.set_input_stage(binning_stage)
+
+    return [input_data, binning_stage, post_stage]
+
+
+def mapping_function():
+    return {
+        "Input" : "ADC",
+        "Binning" : "BinUnit",
+        "Post" : "PostUnit",
+    }
+
+
+def simulate(hw_desc, prefix_cache = None):
+    energy_dict, cycle_cnt = digital_energy_simulation(
+        hw_desc, mapping_function(), sw_pipeline(), return_cycle_cnt = True, prefix_cache = prefix_cache
+    )
+    mem_energy = {mem_unit.name: mem_unit.total_memory_access_energy() for mem_unit in hw_desc["memory"]}
+
+    return energy_dict, mem_energy, cycle_cnt
+
+
+def test_prefix_cache():
+    prefix_cache = PrefixCache()
+    base_result = simulate(hw_config(), prefix_cache)
+    assert prefix_cache.hit_cnt == 0, "Empty cache should not hit."
+
+    # only the downstream unit changes, the upstream stages are replayed.
+    new_result = simulate(hw_config(post_num_of_stages = 20, post_energy_per_cycle = 30), prefix_cache)
+    assert prefix_cache.hit_cnt == 2, "Upstream stages should be replayed."
+    assert new_result == simulate(hw_config(post_num_of_stages = 20, post_energy_per_cycle = 30)), \
+        "Replayed simulation mismatch."
+    assert new_result[2] != base_result[2], "Downstream change should change the cycle count."
+
+    # energy parameters don't change the timing, all stages are replayed.
+    hit_cnt = prefix_cache.hit_cnt
+    hw_desc_list = [hw_config(), hw_config()]
+    for hw_desc in hw_desc_list:
+        hw_desc["compute"][0].energy_per_pixel = 300
+    assert simulate(hw_desc_list[0], prefix_cache) == simulate(hw_desc_list[1]), \
+        "Fully replayed simulation mismatch."
+    assert prefix_cache.hit_cnt == hit_cnt + 3, "All stages should be replayed."
+
+
+def test_bounded_prefix_cache():
+    prefix_cache = PrefixCache(max_size = 3)
+    simulate(hw_config(), prefix_cache)
+    simulate(hw_config(post_num_of_stages = 20), prefix_cache)
+    assert len(prefix_cache) == 3, "Cache is not bounded."
+    # the records of the upstream stages are used again, so they are not evicted.
+    hit_cnt = prefix_cache.hit_cnt
+    assert simulate(hw_config(), prefix_cache) == simulate(hw_config()), "Bounded cache simulation mismatch."
+    assert prefix_cache.hit_cnt == hit_cnt + 2, "Recently used records are evicted."
+
+
+if __name__ == '__main__':
+    test_prefix_cache()
+    test_bounded_prefix_cache()
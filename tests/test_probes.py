@@ -0,0 +1,138 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import numpy as np
+
+from camj.analog.component import SourceFollower, ColumnAmplifier, MaxPool
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput, ProcessStage
+
+
+def hw_config():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 8, 1)],
+        num_output = (1, 8, 1)
+    )
+    # two source followers, their outputs would collide by sub-component name.
+    pixel_array.add_component(
+        AnalogComponent(
+            name = "Pixel",
+            input_domain = [ProcessDomain.VOLTAGE],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [
+                (SourceFollower(noise = 0.1, enable_prnu = True), 1),
+                (SourceFollower(noise = 0.1, gain = 2.0), 1)
+            ],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (8, 8, 1)
+    )
+    pixel_array.add_component(
+        AnalogComponent(
+            name = "ColumnAmplifier",
+            input_domain = [ProcessDomain.VOLTAGE],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [(ColumnAmplifier(noise = 0.1), 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (1, 8, 1)
+    )
+    pool_array = AnalogArray(
+        name = "PoolArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(2, 8, 1)],
+        num_output = (1, 4, 1)
+    )
+    pool_array.add_component(
+        AnalogComponent(
+            name = "Pool",
+            input_domain = [ProcessDomain.VOLTAGE],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [(MaxPool(noise = 0.1), 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (1, 4, 1)
+    )
+    pool_array.add_input_array(pixel_array)
+    pixel_array.add_output_array(pool_array)
+
+    return {"memory": [], "compute": [], "analog": [pixel_array, pool_array]}
+
+
+def simulate(**kwargs):
+    input_data = PixelInput(name = "Input", size = (8, 8, 1))
+    pool_stage = ProcessStage(
+        name = "Pool",
+        input_size = [(8, 8, 1)],
+        kernel_size = [(2, 2, 1)],
+        num_kernels = [1],
+        stride = [(2, 2, 1)],
+        padding = [False]
+    )
+    pool_stage.set_input_stage(input_data)
+
+    return functional_simulation(
+        [input_data, pool_stage],
+        hw_config(),
+        {"Input": "PixelArray", "Pool": "PoolArray"},
+        {"Input": [np.random.RandomState(0).uniform(1, 2, size = (8, 8, 1))]},
+        seed = 0,
+        **kwargs
+    )
+
+
+def test_probe_keys():
+    assert hw_config()["analog"][0].probe_keys() == [
+        "PixelArray/Pixel/SourceFollower",
+        "PixelArray/Pixel/SourceFollower_1",
+        "PixelArray/ColumnAmplifier/ColumnAmplifier"
+    ], "Wrong probe keys."
+
+    simulation_res = simulate(probes = ["PixelArray/Pixel/*", "PoolArray/Pool/MaxPool"])
+    assert sorted(simulation_res.keys()) == [
+        "PixelArray/Pixel/SourceFollower",
+        "PixelArray/Pixel/SourceFollower_1",
+        "PoolArray/Pool/MaxPool"
+    ], "Wrong probed signals."
+    # the probed signals are the same as the signals of a full simulation.
+    full_res = simulate()
+    assert np.array_equal(simulation_res["PoolArray/Pool/MaxPool"][0], full_res["MaxPool"][0]), \
+        "Probes change the simulation."
+
+    try:
+        simulate(probes = ["PixelArray/Pixel/Photodiode"])
+    except Exception as e:
+        assert "doesn't match" in str(e), "Unexpected error: %s" % e
+    else:
+        raise AssertionError("Unknown probe is not reported.")
+
+
+def test_probe_dir():
+    with tempfile.TemporaryDirectory() as probe_dir:
+        for strip_height in [None, 2]:
+            simulation_res = simulate(
+                probes = ["PixelArray/Pixel/SourceFollower", "PoolArray/Pool/MaxPool"],
+                probe_dir = probe_dir,
+                strip_height = strip_height
+            )
+            output_signal = simulation_res["PoolArray/Pool/MaxPool"][0]
+            assert isinstance(output_signal, np.memmap), "Probed signal is not memory-mapped."
+            saved_signal = np.load(os.path.join(probe_dir, "PoolArray", "Pool", "MaxPool.0.npy"))
+            assert np.array_equal(saved_signal, output_signal), "Wrong probe file."
+            assert output_signal.shape == (4, 4, 1), "Wrong probed signal shape."
+            del simulation_res, output_signal
+
+
+if __name__ == '__main__':
+    test_probe_keys()
+    test_probe_dir()
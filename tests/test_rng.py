@@ -0,0 +1,146 @@
+import contextlib
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, ColumnAmplifier
+from camj.analog.function_model import PixelwiseFunc
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.analog.rng import seed_context, set_seed, spawn_seeds, new_generator, reseed, fixed_pattern_seed
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput
+
+
+def hw_config():
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 8, 1)],
+        num_output = (1, 8, 1)
+    )
+    pixel = AnalogComponent(
+        name = "Pixel",
+        input_domain = [ProcessDomain.OPTICAL],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ActivePixelSensor(num_transistor = 4, enable_cds = True, enable_prnu = True), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    col_amp = AnalogComponent(
+        name = "ColumnAmplifier",
+        input_domain = [ProcessDomain.VOLTAGE],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ColumnAmplifier(enable_prnu = True), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    pixel_array.add_component(pixel, (8, 8, 1))
+    pixel_array.add_component(col_amp, (1, 8, 1))
+
+    return {"memory": [], "compute": [], "analog": [pixel_array]}
+
+
+class _PCG64WithoutSeedSeq(np.random.PCG64):
+    # a ``PCG64`` of NumPy before 1.25, whose ``seed_seq`` is not public.
+    @property
+    def seed_seq(self):
+        raise AttributeError("'PCG64' object has no attribute 'seed_seq'")
+
+
+@contextlib.contextmanager
+def without_public_seed_seq():
+    """streams created in this context don't have the public ``seed_seq`` of NumPy 1.25."""
+    pcg64 = np.random.PCG64
+    np.random.PCG64 = _PCG64WithoutSeedSeq
+    try:
+        yield
+    finally:
+        np.random.PCG64 = pcg64
+
+
+def pixelwise_output(signal):
+    func = PixelwiseFunc(name = "Pixelwise", noise = 1.0, enable_prnu = True, prnu_std = 0.1)
+    return func.simulate_output(signal)
+
+
+def test_seed_context():
+    signal = np.ones((4, 4, 1))
+    with seed_context(2023):
+        output1 = pixelwise_output(signal)
+        output2 = pixelwise_output(signal)
+    with seed_context(2023):
+        assert np.array_equal(pixelwise_output(signal), output1), "Seeded streams are not reproducible."
+    # streams of different function models are independent.
+    assert not np.allclose(output1, output2), "Two function models share one stream."
+    # without a seed, streams come from fresh entropy.
+    assert not np.allclose(pixelwise_output(signal), pixelwise_output(signal)), "Unseeded streams repeat."
+
+
+def test_parallel_seeds():
+    draws = []
+    for worker_id in range(3):
+        set_seed(7, worker_id)
+        draws.append(new_generator().standard_normal(4))
+    set_seed(None)
+    assert not np.allclose(draws[0], draws[1]), "Workers share one stream."
+
+    set_seed(7, 1)
+    assert np.array_equal(new_generator().standard_normal(4), draws[1]), "Worker streams are not reproducible."
+    set_seed(None)
+
+    seeds = spawn_seeds(7, 2)
+    with seed_context(seeds[1]):
+        draw = new_generator().standard_normal(4)
+    with seed_context(spawn_seeds(7, 2)[1]):
+        assert np.array_equal(new_generator().standard_normal(4), draw), "Spawned seeds are not reproducible."
+
+
+def test_seeded_functional_simulation():
+    sw_desc = [PixelInput(name = "Input", size = (8, 8, 1))]
+    mapping = {"Input": "PixelArray"}
+    input_mapping = {"Input": [np.full((8, 8, 1), 1000.0)]}
+
+    # two independently built descriptions give the same result with the same seed.
+    output1 = functional_simulation(sw_desc, hw_config(), mapping, input_mapping, seed = 1)["ColumnAmplifier"][0]
+    output2 = functional_simulation(sw_desc, hw_config(), mapping, input_mapping, seed = 1)["ColumnAmplifier"][0]
+    output3 = functional_simulation(sw_desc, hw_config(), mapping, input_mapping, seed = 2)["ColumnAmplifier"][0]
+    assert np.array_equal(output1, output2), "Seeded functional simulation is not reproducible."
+    assert not np.allclose(output1, output3), "Different seeds give the same result."
+
+    # reseed also redraws the fixed-pattern noise.
+    func = PixelwiseFunc(name = "Pixelwise", noise = 0.0, enable_prnu = True, prnu_std = 0.1)
+    func.simulate_output(np.ones((4, 4, 1)))
+    reseed([func], 1)
+    assert func.prnu_gain is None, "Fixed-pattern noise is not cleared."
+
+
+def test_fixed_pattern_seed():
+    with seed_context(2023):
+        seed = fixed_pattern_seed(new_generator())
+    with without_public_seed_seq(), seed_context(2023):
+        generator = new_generator()
+        func = PixelwiseFunc(name = "Pixelwise", noise = 1.0, enable_prnu = True, prnu_std = 0.1)
+    assert getattr(generator.bit_generator, "seed_seq", None) is None, "Public 'seed_seq' is not hidden."
+    old_seed = fixed_pattern_seed(generator)
+    assert old_seed is not None, "Seeded stream has no fixed-pattern seed."
+    assert old_seed.entropy == seed.entropy and old_seed.spawn_key == seed.spawn_key, "Wrong fixed-pattern seed."
+
+    # the fixed-pattern noise doesn't depend on the temporal noise drawn before it.
+    with without_public_seed_seq(), seed_context(2023):
+        new_generator()
+        same_func = PixelwiseFunc(name = "Pixelwise", noise = 1.0, enable_prnu = True, prnu_std = 0.1)
+    same_func.rs.standard_normal(10)
+    func.simulate_output(np.ones((4, 4, 1)))
+    same_func.simulate_output(np.ones((4, 4, 1)))
+    assert np.array_equal(func.prnu_gain, same_func.prnu_gain), "PRNU depends on the temporal noise."
+
+
+if __name__ == '__main__':
+    test_seed_context()
+    test_parallel_seeds()
+    test_seeded_functional_simulation()
+    test_fixed_pattern_seed()
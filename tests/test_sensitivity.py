@@ -0,0 +1,144 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, ColumnAmplifier
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.digital.compute import ADC, ComputeUnit
+from camj.digital.memory import DoubleBuffer
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import energy_simulation
+from camj.general.sensitivity import sensitivity_analysis
+from camj.sw.interface import PixelInput, ProcessStage
+
+
+def hw_config(pd_supply = 1.8, output_vs = 1):
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 16, 1)],
+        num_output = (1, 16, 1)
+    )
+    pixel = AnalogComponent(
+        name = "Pixel",
+        input_domain = [ProcessDomain.OPTICAL],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(
+            ActivePixelSensor(pd_supply = pd_supply, output_vs = output_vs, num_transistor = 4, enable_cds = True), 1
+        )],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    col_amp = AnalogComponent(
+        name = "ColumnAmplifier",
+        input_domain = [ProcessDomain.VOLTAGE],
+        output_domain = ProcessDomain.VOLTAGE,
+        component_list = [(ColumnAmplifier(), 1)],
+        num_input = [(1, 1, 1)],
+        num_output = (1, 1, 1)
+    )
+    pixel_array.add_component(pixel, (16, 16, 1))
+    pixel_array.add_component(col_amp, (1, 16, 1))
+
+    double_buffer = DoubleBuffer(
+        name = "DoubleBuffer",
+        size = (4, 4096, 4096),
+        write_energy_per_word = 3,
+        read_energy_per_word = 1,
+        pixels_per_write_word = 1,
+        pixels_per_read_word = 1,
+        location = ProcessorLocation.COMPUTE_LAYER,
+    )
+    adc = ADC(
+        name = "ADC",
+        output_pixels_per_cycle = (1, 16, 1),
+        location = ProcessorLocation.SENSOR_LAYER,
+        energy_per_pixel = 600,
+    )
+    adc.set_output_buffer(double_buffer)
+    bin_unit = ComputeUnit(
+        name = "BinUnit",
+        location = ProcessorLocation.COMPUTE_LAYER,
+        input_pixels_per_cycle = [(2, 16, 1)],
+        output_pixels_per_cycle = (1, 8, 1),
+        energy_per_cycle = 10,
+        num_of_stages = 2,
+    )
+    bin_unit.set_input_buffer(double_buffer)
+    bin_unit.set_output_buffer(double_buffer)
+
+    return {
+        "memory": [double_buffer],
+        "compute": [adc, bin_unit],
+        "analog": [pixel_array]
+    }
+
+
+def sw_pipeline():
+    input_data = PixelInput(name = "Input", size = (16, 16, 1))
+    binning_stage = ProcessStage(
+        name = "Binning",
+        input_size = [(16, 16, 1)],
+        kernel_size = [(2, 2, 1)],
+        num_kernels = [1],
+        stride = [(2, 2, 1)],
+        padding = [False]
+    )
+    binning_stage.set_input_stage(input_data)
+
+    return [input_data, binning_stage]
+
+
+def mapping_function():
+    return {
+        "Input" : "PixelArray",
+        "Binning" : "BinUnit",
+    }
+
+
+def test_sensitivity_analysis():
+    total_energy, elasticity = sensitivity_analysis(hw_config(), mapping_function(), sw_pipeline())
+    _, energy_breakdown = energy_simulation(hw_config(), mapping_function(), sw_pipeline())
+
+    # digital energy is linear in its energy parameters, so the elasticity is its energy share.
+    assert np.isclose(elasticity["ADC.energy_per_pixel"], energy_breakdown["ADC"] / total_energy), \
+        "ADC elasticity mismatch."
+    # ranked by magnitude
+    magnitude = np.abs(list(elasticity.values()))
+    assert np.all(magnitude[:-1] >= magnitude[1:]), "Elasticity is not ranked."
+    # the column amplifier's static current dominates and scales linearly with supply.
+    assert list(elasticity.keys())[0] == "PixelArray.ColumnAmplifier.supply", "Wrong dominant parameter."
+
+    _, partial = sensitivity_analysis(
+        hw_config(), mapping_function(), sw_pipeline(),
+        params = ["PixelArray.Pixel.pd_capacitance", "BinUnit.energy_per_cycle"]
+    )
+    assert np.isclose(partial["BinUnit.energy_per_cycle"], elasticity["BinUnit.energy_per_cycle"]), \
+        "Partial analysis mismatch."
+
+
+def test_derived_arguments():
+    # ``output_vs`` is derived from ``pd_supply``, it is not a parameter and follows the supply.
+    rel_step = 0.01
+    _, elasticity = sensitivity_analysis(
+        hw_config(output_vs = None), mapping_function(), sw_pipeline(), rel_step = rel_step
+    )
+    assert "PixelArray.Pixel.output_vs" not in elasticity, "Derived argument is perturbed."
+
+    total_energy, _ = energy_simulation(hw_config(output_vs = None), mapping_function(), sw_pipeline())
+    high_energy, _ = energy_simulation(
+        hw_config(pd_supply = 1.8 * (1 + rel_step), output_vs = None), mapping_function(), sw_pipeline()
+    )
+    low_energy, _ = energy_simulation(
+        hw_config(pd_supply = 1.8 * (1 - rel_step), output_vs = None), mapping_function(), sw_pipeline()
+    )
+    expected = (high_energy - low_energy) / (2 * rel_step * total_energy)
+    assert np.isclose(elasticity["PixelArray.Pixel.pd_supply"], expected, rtol = 1e-3), "Supply elasticity mismatch."
+
+
+if __name__ == '__main__':
+    test_sensitivity_analysis()
+    test_derived_arguments()
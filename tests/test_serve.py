@@ -0,0 +1,148 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+from camj.general.client import SimulationClient
+from camj.general.description import build_description
+from camj.general.launch import energy_simulation
+from camj.general.serve import SimulationServer
+
+
+def description(energy_per_cycle = 10):
+    return {
+        "hw": {
+            "memory": [{
+                "class": "DoubleBuffer",
+                "name": "DoubleBuffer",
+                "size": [4, 4096, 4096],
+                "write_energy_per_word": 3,
+                "read_energy_per_word": 1,
+                "pixels_per_write_word": 1,
+                "pixels_per_read_word": 1,
+                "location": "ProcessorLocation.COMPUTE_LAYER"
+            }],
+            "compute": [{
+                "class": "ADC",
+                "name": "ADC",
+                "output_pixels_per_cycle": [1, 16, 1],
+                "location": "ProcessorLocation.SENSOR_LAYER",
+                "energy_per_pixel": 600,
+                "output_buffer": "DoubleBuffer"
+            }, {
+                "class": "ComputeUnit",
+                "name": "BinUnit",
+                "location": "ProcessorLocation.COMPUTE_LAYER",
+                "input_pixels_per_cycle": [[2, 16, 1]],
+                "output_pixels_per_cycle": [1, 8, 1],
+                "energy_per_cycle": energy_per_cycle,
+                "num_of_stages": 2,
+                "input_buffer": "DoubleBuffer",
+                "output_buffer": "DoubleBuffer"
+            }],
+            "analog": [{
+                "class": "AnalogArray",
+                "name": "PixelArray",
+                "layer": "ProcessorLocation.SENSOR_LAYER",
+                "num_input": [[1, 16, 1]],
+                "num_output": [1, 16, 1],
+                "components": [{
+                    "component": {
+                        "class": "AnalogComponent",
+                        "name": "Pixel",
+                        "input_domain": ["ProcessDomain.OPTICAL"],
+                        "output_domain": "ProcessDomain.VOLTAGE",
+                        "component_list": [[{"class": "ActivePixelSensor", "num_transistor": 4, "enable_cds": True}, 1]],
+                        "num_input": [[1, 1, 1]],
+                        "num_output": [1, 1, 1]
+                    },
+                    "size": [16, 16, 1]
+                }]
+            }]
+        },
+        "sw": [{
+            "class": "PixelInput",
+            "name": "Input",
+            "size": [16, 16, 1]
+        }, {
+            "class": "ProcessStage",
+            "name": "Binning",
+            "input_size": [[16, 16, 1]],
+            "kernel_size": [[2, 2, 1]],
+            "num_kernels": [1],
+            "stride": [[2, 2, 1]],
+            "padding": [False],
+            "input_stages": ["Input"]
+        }],
+        "mapping": {"Input": "PixelArray", "Binning": "BinUnit"}
+    }
+
+
+def test_build_description():
+    hw_desc, mapping, sw_desc = build_description(description())
+    assert [hw_unit.name for hw_unit in hw_desc["compute"]] == ["ADC", "BinUnit"], "Wrong compute units."
+    assert hw_desc["compute"][1].input_buffer is hw_desc["memory"][0], "Input buffer is not connected."
+    assert sw_desc[1].input_stages == [sw_desc[0]], "Input stage is not connected."
+
+    total_energy, _ = energy_simulation(hw_desc, mapping, sw_desc)
+    assert total_energy > 0, "Energy should be positive."
+
+    try:
+        bad_desc = description()
+        bad_desc["sw"][0]["class"] = "os.system"
+        build_description(bad_desc)
+        assert False, "Module outside CamJ should raise an exception."
+    except Exception as e:
+        assert "not allowed" in str(e), "Unexpected exception: %s" % e
+
+    # only hardware and software classes are built, not functions or other CamJ classes.
+    for class_name in [
+        "camj.general.launch.energy_simulation",
+        "camj.general.description.load_description",
+        "camj.general.serve.SimulationServer",
+        "camj.sw.interface.deepcopy",
+        "deepcopy",
+        "PhotodiodeFunc",
+    ]:
+        bad_desc = description()
+        bad_desc["sw"][0] = {"class": class_name, "name": "Input"}
+        try:
+            build_description(bad_desc)
+            assert False, "'%s' should not be built." % class_name
+        except Exception as e:
+            assert "not allowed" in str(e) or "not found" in str(e) or "not a class" in str(e), \
+                "Unexpected exception: %s" % e
+
+
+def test_simulation_service():
+    server = SimulationServer(port = 0, num_workers = 1)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    try:
+        client = SimulationClient(port = server.address[1], timeout = 60)
+        bad_desc = description()
+        bad_desc["hw"]["compute"][1]["class"] = "UnknownUnit"
+        results = client.simulate_batch([description(), description(20), description(), bad_desc])
+
+        expected_energy, expected_breakdown, expected_cycle = energy_simulation(
+            *build_description(description()), return_cycle_cnt = True
+        )
+        assert results[0]["total_energy"] == expected_energy, "Service energy mismatch."
+        assert results[0]["cycle_cnt"] == expected_cycle, "Service cycle count mismatch."
+        assert results[0]["energy_breakdown"] == expected_breakdown, "Service energy breakdown mismatch."
+        assert results[2] == results[0], "Duplicated requests should have the same result."
+        assert results[1]["energy_breakdown"]["BinUnit"] == 2 * expected_breakdown["BinUnit"], \
+            "Service result is not ordered."
+        assert "error" in results[3], "Failed simulation should return an error."
+
+        client.simulate_batch([description()])
+        assert client.status()["hit_cnt"] == 1, "Finished request should be cached."
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    test_build_description()
+    test_simulation_service()
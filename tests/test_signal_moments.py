@@ -0,0 +1,148 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import DigitalPixelSensor, ActivePixelSensor, ColumnAmplifier, ActiveBinning, MaxPool
+from camj.analog.function_model import AnalogToDigitalConverterFunc, SignalMoments, snr_map
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation, moment_simulation
+from camj.sw.interface import PixelInput, ProcessStage
+
+NUM_FRAMES = 4000
+
+
+def analog_array(name, component_list, input_domain, output_domain, size):
+    array = AnalogArray(
+        name = name,
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, size[1], 1)],
+        num_output = (1, size[1], 1)
+    )
+    for component, component_size in component_list:
+        array.add_component(
+            AnalogComponent(
+                name = type(component).__name__,
+                input_domain = [input_domain],
+                output_domain = output_domain,
+                component_list = [(component, 1)],
+                num_input = [(1, 1, 1)],
+                num_output = (1, 1, 1)
+            ),
+            component_size
+        )
+    return array
+
+
+def hw_config(bin_component):
+    # a digital pixel with CDS, the reset noise is larger than the shot noise.
+    dps_array = analog_array(
+        "DPSArray",
+        [(
+            DigitalPixelSensor(
+                pd_supply = 1000., enable_cds = True, enable_prnu = True, enable_dcnu = True,
+                dark_current_noise = 5., dcnu_std = 0.2, fd_noise = 50., fd_prnu_std = 0.05,
+                sf_noise = 1., sf_prnu_std = 0.05, cds_noise = 0.5, adc_noise = 0.5
+            ),
+            (4, 4, 1)
+        )],
+        ProcessDomain.OPTICAL,
+        ProcessDomain.DIGITAL,
+        (4, 4, 1)
+    )
+    pixel_array = analog_array(
+        "PixelArray",
+        [
+            (ActivePixelSensor(num_transistor = 3, enable_prnu = True, fd_noise = 2., sf_noise = 1.), (4, 4, 1)),
+            (ColumnAmplifier(noise = 0.5, enable_prnu = True, prnu_std = 0.05, enable_offset = True), (1, 4, 1))
+        ],
+        ProcessDomain.OPTICAL,
+        ProcessDomain.VOLTAGE,
+        (4, 4, 1)
+    )
+    bin_array = analog_array("BinArray", [(bin_component, (1, 2, 1))], ProcessDomain.VOLTAGE, ProcessDomain.VOLTAGE, (2, 4, 1))
+    bin_array.add_input_array(pixel_array)
+    pixel_array.add_output_array(bin_array)
+
+    return {"memory": [], "compute": [], "analog": [dps_array, pixel_array, bin_array]}
+
+
+def sw_config():
+    dps_input = PixelInput(name = "DPSInput", size = (4, 4, 1))
+    pixel_input = PixelInput(name = "PixelInput", size = (4, 4, 1))
+    bin_stage = ProcessStage(
+        name = "Binning",
+        input_size = [(4, 4, 1)],
+        kernel_size = [(2, 2, 1)],
+        num_kernels = [1],
+        stride = [(2, 2, 1)],
+        padding = [False]
+    )
+    bin_stage.set_input_stage(pixel_input)
+    return [dps_input, pixel_input, bin_stage]
+
+
+MAPPING = {"DPSInput": "DPSArray", "PixelInput": "PixelArray", "Binning": "BinArray"}
+
+
+def test_monte_carlo_moments():
+    photons = np.random.RandomState(0).uniform(200, 400, size = (4, 4, 1))
+    bin_component = ActiveBinning(noise = 0.5, enable_prnu = True, prnu_std = 0.05)
+    moments_res = moment_simulation(
+        sw_config(), hw_config(bin_component), MAPPING, {"DPSInput": [photons], "PixelInput": [photons]}, seed = 0
+    )
+    # many frames on the same sensor, i.e., the same seed and fixed-pattern noise.
+    frames = np.stack([photons] * NUM_FRAMES)
+    samples_res = functional_simulation(
+        sw_config(), hw_config(bin_component), MAPPING, {"DPSInput": [frames], "PixelInput": [frames]},
+        batched = True, seed = 0
+    )
+
+    assert moments_res.keys() == samples_res.keys(), "Different simulated components."
+    for name in ["DigitalPixelSensor", "ColumnAmplifier", "ActiveBinning"]:
+        moments = moments_res[name][0]
+        samples = samples_res[name][0]
+        assert moments.mean.shape == samples.shape[1:], "Wrong moments shape of '%s'." % name
+        assert np.allclose(moments.mean, np.mean(samples, axis = 0), atol = 5 * np.sqrt(np.max(moments.var) / NUM_FRAMES)), \
+            "Mean of '%s' doesn't match Monte Carlo." % name
+        assert np.allclose(moments.var, np.var(samples, axis = 0), rtol = 0.15), \
+            "Variance of '%s' doesn't match Monte Carlo." % name
+
+    # the CDS cancels the large reset noise.
+    dps_moments = moments_res["DigitalPixelSensor"][0]
+    assert np.all(dps_moments.var < (255 / 1000.) ** 2 * 50. ** 2), "Reset noise is not cancelled."
+    snr = snr_map(dps_moments, db = False)
+    assert np.allclose(snr, dps_moments.mean / np.sqrt(dps_moments.var)), "Wrong SNR map."
+
+
+def test_adc_moments():
+    # with a small ADC noise, any variance the sampled ADC doesn't add would show.
+    adc = AnalogToDigitalConverterFunc("ADC", adc_noise = 1e-3, max_val = 1., resolution = 8)
+    voltage = np.linspace(0.1, 0.9, 16).reshape(4, 4, 1)
+    moments = adc.simulate_moments(SignalMoments(voltage))
+    samples = adc.simulate_output(np.stack([voltage] * NUM_FRAMES))
+    assert np.allclose(moments.mean, np.mean(samples, axis = 0), atol = 5 * np.sqrt(np.max(moments.var) / NUM_FRAMES)), \
+        "Mean of the ADC doesn't match Monte Carlo."
+    assert np.allclose(moments.var, np.var(samples, axis = 0), rtol = 0.15), \
+        "Variance of the ADC doesn't match Monte Carlo."
+
+
+def test_unsupported_component():
+    try:
+        moment_simulation(
+            sw_config(), hw_config(MaxPool(noise = 0.1)), MAPPING,
+            {"DPSInput": [np.ones((4, 4, 1))], "PixelInput": [np.ones((4, 4, 1))]}
+        )
+    except Exception as e:
+        assert "doesn't support" in str(e), "Unexpected error: %s" % e
+    else:
+        raise AssertionError("Non-linear component is not reported.")
+
+
+if __name__ == '__main__':
+    test_monte_carlo_moments()
+    test_adc_moments()
+    test_unsupported_component()
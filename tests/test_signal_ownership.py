@@ -0,0 +1,115 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import ActivePixelSensor, ColumnAmplifier
+from camj.analog.function_model import PhotodiodeFunc, AnalogToDigitalConverterFunc, AbsoluteDifferenceFunc,\
+                                CurrentMirrorFunc, PassiveSwitchedCapacitorArrayFunc, MaximumVoltageFunc,\
+                                PixelwiseFunc, FloatingDiffusionFunc, CorrelatedDoubleSamplingFunc,\
+                                ComparatorFunc, ColumnwiseFunc, signal_precision
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput
+
+
+def function_models():
+    # each entry is a function model and the number of its input signals
+    return [
+        (PhotodiodeFunc(name = "Photodiode", dark_current_noise = 1.0, enable_dcnu = True), 1),
+        (AnalogToDigitalConverterFunc(name = "ADC", adc_noise = 0.1, max_val = 10.0, resolution = 8), 1),
+        (AbsoluteDifferenceFunc(name = "AbsDiff", noise = 0.1, enable_prnu = True), 2),
+        (CurrentMirrorFunc(name = "CurrentMirror", noise = 0.1, enable_compute = True, enable_prnu = True), 2),
+        (PixelwiseFunc(name = "Pixelwise", noise = 0.1, enable_prnu = True), 1),
+        (FloatingDiffusionFunc(name = "FD", noise = 0.1, enable_prnu = True), 1),
+        (CorrelatedDoubleSamplingFunc(name = "CDS", noise = 0.1, enable_prnu = True), 2),
+        (ComparatorFunc(name = "Comparator", noise = 0.1, enable_prnu = True), 2),
+        (ColumnwiseFunc(name = "Columnwise", noise = 0.1, enable_prnu = True, enable_offset = True), 1),
+    ]
+
+
+def test_inputs_not_modified():
+    rs = np.random.RandomState(0)
+    for func, num_inputs in function_models():
+        inputs = [rs.uniform(1, 5, size = (6, 8, 1)) for _ in range(num_inputs)]
+        org_inputs = [input_signal.copy() for input_signal in inputs]
+        func.simulate_output(*inputs)
+        for input_signal, org_input in zip(inputs, org_inputs):
+            assert np.array_equal(input_signal, org_input), "'%s' modifies its input." % func.name
+
+    inputs = [rs.uniform(size = (6, 8, 1)) for _ in range(4)]
+    org_inputs = [input_signal.copy() for input_signal in inputs]
+    PassiveSwitchedCapacitorArrayFunc(name = "PSCA", num_capacitor = 4, noise = 0.1).simulate_output(inputs)
+    MaximumVoltageFunc(name = "MaxVoltage", noise = 0.1).simulate_output(inputs)
+    for input_signal, org_input in zip(inputs, org_inputs):
+        assert np.array_equal(input_signal, org_input), "Input list is modified."
+
+
+def test_output_buffer():
+    func = PixelwiseFunc(name = "Pixelwise", gain = 2.0, noise = 0.0)
+    input_signal = np.ones((4, 4, 1))
+    out = np.empty((4, 4, 1))
+    assert func.simulate_output(input_signal, out = out) is out, "Output is not written into 'out'."
+    assert np.allclose(out, 2.0), "Wrong output in 'out'."
+
+    # a non-contiguous buffer, e.g., a channel slice, also works.
+    out = np.zeros((4, 4, 2))
+    func.simulate_output(input_signal[:, :, 0], out = out[:, :, 1])
+    assert np.allclose(out[:, :, 1], 2.0) and np.allclose(out[:, :, 0], 0), "Wrong output in a slice."
+
+
+def test_float32_precision():
+    with signal_precision(np.float32):
+        for func, num_inputs in function_models():
+            inputs = [np.ones((6, 8, 1), dtype = np.float32) for _ in range(num_inputs)]
+            output = func.simulate_output(*inputs)
+            output = output[0] if isinstance(output, tuple) else output
+            assert output.dtype == np.float32, "'%s' output is not float32." % func.name
+
+    pixel_array = AnalogArray(
+        name = "PixelArray",
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [(1, 8, 1)],
+        num_output = (1, 8, 1)
+    )
+    pixel_array.add_component(
+        AnalogComponent(
+            name = "Pixel",
+            input_domain = [ProcessDomain.OPTICAL],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [(ActivePixelSensor(num_transistor = 4, enable_cds = True), 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (8, 8, 1)
+    )
+    pixel_array.add_component(
+        AnalogComponent(
+            name = "ColumnAmplifier",
+            input_domain = [ProcessDomain.VOLTAGE],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [(ColumnAmplifier(), 1)],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        (1, 8, 1)
+    )
+    input_signal = np.full((8, 8, 1), 1000.0)
+    simulation_res = functional_simulation(
+        [PixelInput(name = "Input", size = (8, 8, 1))],
+        {"memory": [], "compute": [], "analog": [pixel_array]},
+        {"Input": "PixelArray"},
+        {"Input": [input_signal]},
+        dtype = np.float32
+    )
+    assert simulation_res["ColumnAmplifier"][0].dtype == np.float32, "Simulation output is not float32."
+    assert input_signal.dtype == np.float64, "Input signal is modified."
+
+
+if __name__ == '__main__':
+    test_inputs_not_modified()
+    test_output_buffer()
+    test_float32_precision()
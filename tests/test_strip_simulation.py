@@ -0,0 +1,134 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import SourceFollower, ColumnAmplifier, Voltage2VoltageConv, MaxPool
+from camj.analog.infra import AnalogArray, AnalogComponent
+from camj.general.enum import ProcessorLocation, ProcessDomain
+from camj.general.launch import functional_simulation
+from camj.sw.interface import PixelInput, ProcessStage
+
+
+def voltage_array(name, component_list, num_input, num_output):
+    array = AnalogArray(
+        name = name,
+        layer = ProcessorLocation.SENSOR_LAYER,
+        num_input = [num_input],
+        num_output = num_output
+    )
+    array.add_component(
+        AnalogComponent(
+            name = name + "Component",
+            input_domain = [ProcessDomain.VOLTAGE],
+            output_domain = ProcessDomain.VOLTAGE,
+            component_list = [(component, 1) for component in component_list],
+            num_input = [(1, 1, 1)],
+            num_output = (1, 1, 1)
+        ),
+        num_output
+    )
+    return array
+
+
+def hw_config():
+    # no temporal noise, so only the fixed-pattern noise differs from the ideal output.
+    pixel_array = voltage_array(
+        "PixelArray",
+        [
+            SourceFollower(noise = 0.0, enable_prnu = True, prnu_std = 0.05),
+            ColumnAmplifier(noise = 0.0, enable_prnu = True, prnu_std = 0.05)
+        ],
+        (1, 16, 1),
+        (1, 16, 1)
+    )
+    conv_array = voltage_array(
+        "ConvArray",
+        [
+            Voltage2VoltageConv(
+                capacitance_array = [1e-12] * 9,
+                vs_array = [1.0] * 9,
+                psca_noise = 0.0,
+                sf_noise = 0.0,
+                sf_enable_prnu = True,
+                sf_prnu_std = 0.05
+            )
+        ],
+        (3, 16, 1),
+        (1, 16, 1)
+    )
+    pool_array = voltage_array("PoolArray", [MaxPool(noise = 0.0)], (2, 16, 1), (1, 8, 1))
+
+    conv_array.add_input_array(pixel_array)
+    pixel_array.add_output_array(conv_array)
+    pool_array.add_input_array(conv_array)
+    conv_array.add_output_array(pool_array)
+
+    return {"memory": [], "compute": [], "analog": [pixel_array, conv_array, pool_array]}
+
+
+def sw_config(height, width):
+    input_data = PixelInput(name = "Input", size = (height, width, 1))
+    weight_data = PixelInput(name = "Weight", size = (3, 3, 1))
+    conv_stage = ProcessStage(
+        name = "Conv",
+        input_size = [(height, width, 1)],
+        kernel_size = [(3, 3, 1)],
+        num_kernels = [1],
+        stride = [(1, 1, 1)],
+        padding = [False]
+    )
+    conv_stage.set_input_stage(input_data)
+    conv_stage.set_input_stage(weight_data)
+    pool_stage = ProcessStage(
+        name = "Pool",
+        input_size = [(height - 2, width - 2, 1)],
+        kernel_size = [(2, 2, 1)],
+        num_kernels = [1],
+        stride = [(2, 2, 1)],
+        padding = [False]
+    )
+    pool_stage.set_input_stage(conv_stage)
+
+    return [input_data, weight_data, conv_stage, pool_stage]
+
+
+def simulate(input_signal, **kwargs):
+    return functional_simulation(
+        sw_config(*input_signal.shape[:2]),
+        hw_config(),
+        {"Input": "PixelArray", "Weight": "ConvArray", "Conv": "ConvArray", "Pool": "PoolArray"},
+        {"Input": [input_signal], "Weight": [np.full((3, 3, 1), 1 / 9)]},
+        seed = 0,
+        **kwargs
+    )
+
+
+def test_strip_matches_full_frame():
+    input_signal = np.random.RandomState(0).uniform(1, 2, size = (30, 16, 1))
+    full_res = simulate(input_signal)
+    for strip_height in [1, 4, 7, 30]:
+        strip_res = simulate(input_signal, strip_height = strip_height)
+        assert full_res.keys() == strip_res.keys(), "Different simulation results."
+        for key in full_res:
+            for full_signal, strip_signal in zip(full_res[key], strip_res[key]):
+                assert full_signal.shape == strip_signal.shape, "Wrong '%s' shape." % key
+                assert np.allclose(full_signal, strip_signal), \
+                    "'%s' differs with strip height %d." % (key, strip_height)
+
+    # the conv output of 28 rows is pooled to 14 rows.
+    assert strip_res["MaxPool"][0].shape == (14, 7, 1), "Wrong MaxPool output shape."
+
+
+def test_strip_batched():
+    frames = np.random.RandomState(0).uniform(1, 2, size = (2, 30, 16, 1))
+    full_res = simulate(frames, batched = True)
+    strip_res = simulate(frames, batched = True, strip_height = 8)
+    assert np.allclose(full_res["MaxPool"][0], strip_res["MaxPool"][0]), "Batched strips differ."
+
+
+if __name__ == '__main__':
+    test_strip_matches_full_frame()
+    test_strip_batched()
@@ -0,0 +1,87 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.general.launch import energy_simulation
+from camj.general.surrogate import SurrogateModel, encode_hw_params, decode_hw_params
+
+from test_sensitivity import hw_config, sw_pipeline, mapping_function
+
+
+def test_surrogate_model():
+    rng = np.random.default_rng(0)
+    # a power-law energy and a linear cycle count, both exactly representable by the surrogate.
+    x = rng.uniform(0.5, 2.0, size = (40, 3))
+    energy = 100 * x[:, 0] ** 2 * x[:, 1]
+    cycle = 1000 + 0 * x[:, 2]
+
+    surrogate = SurrogateModel(param_names = ["a", "b", "c"], degree = 2)
+    for i in range(x.shape[0]):
+        surrogate.add_result(x[i], energy[i], cycle[i])
+    surrogate.fit()
+
+    test_x = rng.uniform(0.5, 2.0, size = (10, 3))
+    pred_energy, energy_std, pred_cycle, cycle_std = surrogate.predict(test_x)
+    assert np.allclose(pred_energy, 100 * test_x[:, 0] ** 2 * test_x[:, 1], rtol = 1e-4), "Energy prediction mismatch."
+    assert np.allclose(pred_cycle, 1000, rtol = 1e-4), "Cycle prediction mismatch."
+    assert np.all(energy_std >= 0) and np.all(cycle_std >= 0), "Uncertainty needs to be non-negative."
+
+    # far away from the training data, the uncertainty grows.
+    surrogate.add_result([1.0, 1.0, 1.0], 150., 1000)
+    surrogate.fit()
+    _, near_std, _, _ = surrogate.predict([1.0, 1.0, 1.0])
+    _, far_std, _, _ = surrogate.predict([8.0, 8.0, 8.0])
+    assert far_std[0] > near_std[0], "Uncertainty should grow away from the training data."
+
+    # the candidate with the lowest energy is suggested first.
+    candidates = np.array([[2.0, 2.0, 1.0], [0.5, 0.5, 1.0], [1.0, 1.0, 1.0]])
+    assert surrogate.suggest(candidates, num_points = 1, kappa = 0.)[0] == 1, "Wrong suggestion."
+
+
+def test_hw_round_trip():
+    param_names = [
+        "PixelArray.ColumnAmplifier.supply", "PixelArray.Pixel.pd_capacitance",
+        "ADC.energy_per_pixel", "BinUnit.energy_per_cycle"
+    ]
+    base_hw = hw_config()
+    param_vector = encode_hw_params(base_hw, param_names)
+    assert np.allclose(param_vector, [1.8, 1e-13, 600, 10]), "Wrong parameter vector."
+
+    new_vector = param_vector * np.array([1.2, 2.0, 0.5, 3.0])
+    new_hw = decode_hw_params(base_hw, param_names, new_vector)
+    assert np.allclose(encode_hw_params(new_hw, param_names), new_vector), "Decoded parameters don't round-trip."
+    assert np.allclose(encode_hw_params(base_hw, param_names), param_vector), "Base description is modified."
+
+    base_energy, base_breakdown = energy_simulation(base_hw, mapping_function(), sw_pipeline())
+    new_energy, new_breakdown = energy_simulation(new_hw, mapping_function(), sw_pipeline())
+    assert np.isclose(new_breakdown["ADC"], 0.5 * base_breakdown["ADC"]), "Wrong decoded ADC energy."
+    assert np.isclose(new_breakdown["BinUnit"], 3.0 * base_breakdown["BinUnit"]), "Wrong decoded compute energy."
+    assert new_breakdown["PixelArray"] > base_breakdown["PixelArray"], "Analog parameters are not decoded."
+
+    # the surrogate records the simulated energy and the encoded parameters of each description.
+    surrogate = SurrogateModel(param_names = param_names[2:], degree = 1)
+    for scale in [0.5, 0.75, 1.0, 1.5, 2.0]:
+        hw_desc = decode_hw_params(base_hw, param_names[2:], [600 * scale, 10 * scale])
+        total_energy, cycle_cnt = surrogate.add_simulation(hw_desc, mapping_function(), sw_pipeline())
+        expected_energy, _, expected_cycle = energy_simulation(
+            hw_desc, mapping_function(), sw_pipeline(), return_cycle_cnt = True
+        )
+        assert total_energy == expected_energy and cycle_cnt == expected_cycle, "Wrong simulated result."
+    assert np.allclose(surrogate.param_vectors[-1], [1200, 20]), "Wrong recorded parameters."
+
+    surrogate.fit()
+    held_out = [900, 15]
+    pred_energy, _, pred_cycle, _ = surrogate.predict(held_out)
+    expected_energy, _, expected_cycle = energy_simulation(
+        decode_hw_params(base_hw, param_names[2:], held_out), mapping_function(), sw_pipeline(), return_cycle_cnt = True
+    )
+    assert np.isclose(pred_energy[0], expected_energy, rtol = 0.05), "Energy prediction mismatch."
+    assert np.isclose(pred_cycle[0], expected_cycle), "Cycle prediction mismatch."
+
+
+if __name__ == '__main__':
+    test_surrogate_model()
+    test_hw_round_trip()
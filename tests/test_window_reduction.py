@@ -0,0 +1,85 @@
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from camj.analog.component import MaxPool, PassiveBinning, ActiveBinning, ActiveAverage
+from camj.analog.function_model import frame_batch
+from camj.analog.rng import reseed
+
+
+def window_list(input_signal, kernel_size):
+    # the (kh * kw) signals of the kernel positions, in row-major order.
+    kh, kw = kernel_size
+    height, width = input_signal.shape[-3] // kh * kh, input_signal.shape[-2] // kw * kw
+    return [input_signal[..., i:height:kh, j:width:kw, :] for i in range(kh) for j in range(kw)]
+
+
+def binning_components():
+    max_pool = MaxPool(noise = 0.01)
+    passive_binning = PassiveBinning(capacitance_array = [1e-12] * 4, vs_array = [1.0] * 4, psca_noise = 0.01)
+    active_binning = ActiveBinning(noise = 0.01, enable_prnu = True, enable_offset = True)
+    for component in [max_pool, passive_binning, active_binning]:
+        component.kernel_size = (2, 2)
+    return max_pool, passive_binning, active_binning
+
+
+def reference_outputs(input_signal):
+    # the list-based simulation of each component.
+    max_pool, passive_binning, active_binning = binning_components()
+    reseed([max_pool.func_model, passive_binning.psca_func_model, passive_binning.sf_func_model,
+            active_binning.func_model], 0)
+    windows = window_list(input_signal, (2, 2))
+    active_outputs = [active_binning.func_model.simulate_output(w) for w in windows]
+    return [
+        max_pool.func_model.simulate_output(windows),
+        passive_binning.sf_func_model.simulate_output(passive_binning.psca_func_model.simulate_output(windows)),
+        np.mean(active_outputs, axis = 0)
+    ]
+
+
+def component_outputs(input_signal):
+    max_pool, passive_binning, active_binning = binning_components()
+    reseed([max_pool.func_model, passive_binning.psca_func_model, passive_binning.sf_func_model,
+            active_binning.func_model], 0)
+    return [component.noise([input_signal])[1][0] for component in [max_pool, passive_binning, active_binning]]
+
+
+def test_window_reduction():
+    # 7 x 9 is not a multiple of the kernel, the last row and column are dropped.
+    input_signal = np.random.RandomState(0).uniform(0.5, 1.0, size = (7, 9, 2))
+    for output, reference in zip(component_outputs(input_signal), reference_outputs(input_signal)):
+        assert output.shape == (3, 4, 2), "Wrong output shape: %s." % (output.shape, )
+        assert np.allclose(output, reference, atol = 1e-6), "Window reduction differs from the list-based one."
+
+    # batched frames are reduced in the same way.
+    with frame_batch():
+        outputs = component_outputs(np.stack([input_signal] * 3))
+    for output, reference in zip(outputs, reference_outputs(input_signal)):
+        assert output.shape == (3, 3, 4, 2), "Wrong batched output shape: %s." % (output.shape, )
+        assert np.allclose(np.mean(output, axis = 0), reference, atol = 0.05), "Wrong batched output."
+
+    try:
+        component_outputs(np.ones((1, 4, 1)))
+    except Exception as e:
+        assert "smaller than the kernel" in str(e), "Unexpected error: %s" % e
+    else:
+        raise AssertionError("Input smaller than the kernel is not reported.")
+
+
+def test_active_average():
+    active_average = ActiveAverage(noise = 0.01, enable_prnu = True)
+    input_signal_list = [np.full((4, 6, 1), 1.0), np.full((4, 6, 1), 3.0)]
+    reseed([active_average.func_model], 0)
+    name, output_signal_list = active_average.noise(input_signal_list)
+    reseed([active_average.func_model], 0)
+    reference = np.mean([active_average.func_model.simulate_output(s) for s in input_signal_list], axis = 0)
+    assert name == "ActiveAverage" and len(output_signal_list) == 1, "Wrong simulation result."
+    assert np.allclose(output_signal_list[0], reference, atol = 1e-6), "Stacked average differs from the list-based one."
+
+
+if __name__ == '__main__':
+    test_window_reduction()
+    test_active_average()
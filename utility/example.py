@@ -4,10 +4,9 @@ import os
 import cv2
 import time
 import random
-import tensorflow as tf
 
-from reverse_process import unprocess
-from forward_process import process, process_only_gain, process_no_demosaic
+from numpy_reverse_process import unprocess
+from numpy_forward_process import process, process_only_gain, process_no_demosaic
 from isp_utils import convert_raw, convert_bayer, edge_aware_demosaic, \
                       luminance_based_demosaic, chroma_filter_demosaic
 def main():
@@ -21,18 +20,14 @@ def main():
     (H, W, _) = org_img.shape
     org_img = org_img[:(H//2)*2, :(W//2)*2, :]
 
-    # convert to tensor for tf reverse process
-    org_img = tf.convert_to_tensor(org_img, dtype=tf.float32)
-
     # reverse process and generate raw bayer image (H//2, W//2, 4)
-    # 4 is for RGGB
-    bayer_raw, metadata = unprocess(org_img)
+    # 4 is for RGGB, the seed makes the random metadata reproducible
+    bayer_raw, metadata = unprocess(org_img, rng=0)
     # convert bayer image to raw image (H, W)
     raw_img = convert_raw(bayer_raw)
 
     # forward process, first convert to bayer image
     noise_bayer = convert_bayer(raw_img)
-    noise_bayer = tf.convert_to_tensor(noise_bayer, dtype=tf.float32)
 
     # perform demosaicing, there are several different demosaicing methods as shown in `isp_utils`
     restored_img = chroma_filter_demosaic(noise_bayer, metadata)
@@ -1,34 +1,34 @@
-from reverse_process import unprocess
-from forward_process import process, process_only_gain, process_no_demosaic
-import cv2
+from numpy_reverse_process import unprocess
+from numpy_forward_process import process, process_only_gain, process_no_demosaic
 import os
 import random
 import numpy as np
-import tensorflow as tf
 
 def get_luminance(raw_img):
-	gaussian_filter = [
+	gaussian_filter = np.array([
 		[-2,  3, -6,  3, -2],
 		[ 3,  4,  2,  4,  3],
 		[-6,  2, 48,  2,  6],
 		[ 3,  4,  2,  4,  3],
 		[-2,  3, -6,  3, -2]
-	]
+	])
 
-	luminance = np.zeros(raw_img.shape)
 	H, W = raw_img.shape
-
-	for r in range(5):
-		for c in range(5):
-			r_offset = 2 - r
-			c_offset = 2 - c
-			luminance[int(max(r_offset, 0)):int(min(r_offset+H, H)), int(max(c_offset, 0)):int(min(c_offset+W, W))]= \
-				raw_img[int(max(-r_offset, 0)):int(min(-r_offset+H, H)), int(max(-c_offset, 0)):int(min(-c_offset+W, W))]*gaussian_filter[r][c]
+	# each filter tap is assigned to (not accumulated into) its shifted window, in row-major
+	# tap order, so every pixel keeps the last tap that covers it, i.e., the pixel 2 rows down
+	# and 2 columns right, clamped to the image.
+	src_rows = np.minimum(np.arange(H) + 2, H - 1)
+	src_cols = np.minimum(np.arange(W) + 2, W - 1)
+	taps = gaussian_filter[(src_rows - np.arange(H) + 2)[:, np.newaxis], src_cols - np.arange(W) + 2]
+	luminance = raw_img[src_rows[:, np.newaxis], src_cols] * taps
 
 	return luminance / 64.
 
 
 def perform_chorma_bilinear(luminance, red, green, blue):
+	# OpenCV is only needed by the OpenCV based steps.
+	import cv2
+
 	H, W = luminance.shape
 	lumin_red = red
 	lumin_red = cv2.resize(luminance[0::2, 0::2] - red[0::2, 0::2], (W, H))
@@ -89,208 +89,86 @@ def lumin_based_interpolation(raw_rggb):
 
 	return rgb_img
 
+def _fill_last_row_and_columns(channel):
+	# fill zeros in the last row, then in the first and last columns, from their neighbors.
+	# the first row is kept as is.
+	channel[-1, :] = np.where(channel[-1, :] == 0, channel[-2, :], channel[-1, :])
+	channel[:, 0] = np.where(channel[:, 0] == 0, channel[:, 1], channel[:, 0])
+	channel[:, -1] = np.where(channel[:, -1] == 0, channel[:, -2], channel[:, -1])
+
+
+def _interpolation_grid(H, W, row_start, col_start, skip_first):
+	# the (rows, cols) of pixels at (row_start + 2i, col_start + 2j) to interpolate, the last
+	# row and column, and optionally the first row and column, are skipped.
+	rows = np.arange(row_start, min(2 * (H // 2), H - 1), 2)
+	cols = np.arange(col_start, min(2 * (W // 2), W - 1), 2)
+	if skip_first:
+		rows = rows[rows != 0]
+		cols = cols[cols != 0]
+	return rows[:, np.newaxis], cols[np.newaxis, :]
+
+
+def _edge_aware_interpolate(channel, row_start, col_start, skip_first):
+	# interpolate along the direction with the smaller gradient. Row -1 wraps around to the
+	# last row, as with Python indexing.
+	rows, cols = _interpolation_grid(*channel.shape, row_start, col_start, skip_first)
+	up, down = channel[rows - 1, cols], channel[rows + 1, cols]
+	left, right = channel[rows, cols - 1], channel[rows, cols + 1]
+
+	delta_h = np.abs(left - right)
+	delta_v = np.abs(up - down)
+	channel[rows, cols] = np.where(delta_h > delta_v, 1/2*(up+down), 1/2*(left+right))
+
+
+def _diagonal_interpolate(channel, row_start, col_start, skip_first):
+	# interpolate from the four diagonal neighbors.
+	rows, cols = _interpolation_grid(*channel.shape, row_start, col_start, skip_first)
+	channel[rows, cols] = 1/4*(
+		channel[rows-1, cols-1]+channel[rows-1, cols+1]+
+		channel[rows+1, cols-1]+channel[rows+1, cols+1])
+
+
 def edge_aware_interpolation_green_channel(green_channel):
-	(H, W) = green_channel.shape
-	# auto fill first and last row
-	for i in range(W):
-		if [0, i] == 0:
-			green_channel[0, i] = green_channel[1, i]
-		if green_channel[-1, i] == 0:
-			green_channel[-1, i] = green_channel[-2, i]
-
-	# auto fill first and last column
-	for i in range(H):
-		if green_channel[i, 0] == 0:
-			green_channel[i, 0] = green_channel[i, 1]
-		if green_channel[i, -1] == 0:
-			green_channel[i, -1] = green_channel[i, -2]
+	_fill_last_row_and_columns(green_channel)
 
 	# edge aware interpolation first green
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2
-			c = j*2
-			# skip those rows and cols
-			if r == 0 or c == 0 or r >= H-1 or c >= W-1:
-				continue
-			
-			delta_h = np.abs(green_channel[r, c-1] - green_channel[r, c+1])
-			delta_v = np.abs(green_channel[r-1, c] - green_channel[r+1, c])
-
-			if delta_h > delta_v:
-				green_channel[r, c] = 1/2*(green_channel[r-1, c]+green_channel[r+1, c])
-			else:
-				green_channel[r, c] = 1/2*(green_channel[r, c-1]+green_channel[r, c+1])
-
+	_edge_aware_interpolate(green_channel, 0, 0, skip_first = True)
 	# edge aware interpolation second green
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2+1
-			c = j*2+1
-			# skip those rows and cols
-			if r >= H-1 or c >= W-1:
-				continue
-			
-			delta_h = np.abs(green_channel[r, c-1] - green_channel[r, c+1])
-			delta_v = np.abs(green_channel[r-1, c] - green_channel[r+1, c])
-
-			if delta_h > delta_v:
-				green_channel[r, c] = 1/2*(green_channel[r-1, c]+green_channel[r+1, c])
-			else:
-				green_channel[r, c] = 1/2*(green_channel[r, c-1]+green_channel[r, c+1])
-
-
-	# cv2.imshow("green_channel", green_channel/np.max(green_channel))
-	# cv2.waitKey(0)
-	# cv2.destroyAllWindows()
+	_edge_aware_interpolate(green_channel, 1, 1, skip_first = False)
 
 	return green_channel
 
 
 def edge_aware_interpolation_red_channel(red_channel):
-	(H, W) = red_channel.shape
-	# print(red_channel)
 	red_channel[1::2, -1] = red_channel[0::2, -2]
 	red_channel[-1:, 1::2] = red_channel[-2, 0::2]
 
 	# R22 interpolation
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2+1
-			c = j*2+1
-			# skip those rows and cols
-			if r >= H-1 or c >= W-1:
-				continue
-			red_channel[r, c] = 1/4*(
-				red_channel[r-1, c-1]+red_channel[r-1, c+1]+
-				red_channel[r+1, c-1]+red_channel[r+1, c+1])
-
-	# print(red_channel)
-
-	# auto fill first and last row
-	for i in range(W):
-		if [0, i] == 0:
-			red_channel[0, i] = red_channel[1, i]
-		if red_channel[-1, i] == 0:
-			red_channel[-1, i] = red_channel[-2, i]
-
-	# auto fill first and last column
-	for i in range(H):
-		if red_channel[i, 0] == 0:
-			red_channel[i, 0] = red_channel[i, 1]
-		if red_channel[i, -1] == 0:
-			red_channel[i, -1] = red_channel[i, -2]
+	_diagonal_interpolate(red_channel, 1, 1, skip_first = False)
 
-	# edge aware interpolation first red
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2+1
-			c = j*2
-			# skip those rows and cols
-			if r == 0 or c == 0 or r >= H-1 or c >= W-1:
-				continue
-			
-			delta_h = np.abs(red_channel[r, c-1] - red_channel[r, c+1])
-			delta_v = np.abs(red_channel[r-1, c] - red_channel[r+1, c])
-
-			if delta_h > delta_v:
-				red_channel[r, c] = 1/2*(red_channel[r-1, c]+red_channel[r+1, c])
-			else:
-				red_channel[r, c] = 1/2*(red_channel[r, c-1]+red_channel[r, c+1])
+	_fill_last_row_and_columns(red_channel)
 
-	# edge aware interpolation second green
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2
-			c = j*2+1
-			# skip those rows and cols
-			if r >= H-1 or c >= W-1:
-				continue
-			
-			delta_h = np.abs(red_channel[r, c-1] - red_channel[r, c+1])
-			delta_v = np.abs(red_channel[r-1, c] - red_channel[r+1, c])
-
-			if delta_h > delta_v:
-				red_channel[r, c] = 1/2*(red_channel[r-1, c]+red_channel[r+1, c])
-			else:
-				red_channel[r, c] = 1/2*(red_channel[r, c-1]+red_channel[r, c+1])
-
-	# cv2.imshow("red_channel", red_channel/np.max(red_channel))
-	# cv2.waitKey(0)
-	# cv2.destroyAllWindows()
+	# edge aware interpolation first red
+	_edge_aware_interpolate(red_channel, 1, 0, skip_first = True)
+	# edge aware interpolation second red
+	_edge_aware_interpolate(red_channel, 0, 1, skip_first = False)
 
 	return red_channel
 
 
 def edge_aware_interpolation_blue_channel(blue_channel):
-	(H, W) = blue_channel.shape
 	blue_channel[0::2, 0] = blue_channel[1::2, 1]
 	blue_channel[0:, 0::2] = blue_channel[1, 1::2]
 
 	# B11 interpolation
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2
-			c = j*2
-			# skip those rows and cols
-			if c == 0 or r == 0 or r >= H-1 or c >= W-1:
-				continue
-			blue_channel[r, c] = 1/4*(
-				blue_channel[r-1, c-1]+blue_channel[r-1, c+1]+
-				blue_channel[r+1, c-1]+blue_channel[r+1, c+1]
-			)
-
-	# auto fill first and last row
-	for i in range(W):
-		if [0, i] == 0:
-			blue_channel[0, i] = blue_channel[1, i]
-		if blue_channel[-1, i] == 0:
-			blue_channel[-1, i] = blue_channel[-2, i]
-
-	# auto fill first and last column
-	for i in range(H):
-		if blue_channel[i, 0] == 0:
-			blue_channel[i, 0] = blue_channel[i, 1]
-		if blue_channel[i, -1] == 0:
-			blue_channel[i, -1] = blue_channel[i, -2]
+	_diagonal_interpolate(blue_channel, 0, 0, skip_first = True)
 
-	# edge aware interpolation first blue
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2+1
-			c = j*2
-			# skip those rows and cols
-			if r == 0 or c == 0 or r >= H-1 or c >= W-1:
-				continue
-			
-			delta_h = np.abs(blue_channel[r, c-1] - blue_channel[r, c+1])
-			delta_v = np.abs(blue_channel[r-1, c] - blue_channel[r+1, c])
-
-			if delta_h > delta_v:
-				blue_channel[r, c] = 1/2*(blue_channel[r-1, c]+blue_channel[r+1, c])
-			else:
-				blue_channel[r, c] = 1/2*(blue_channel[r, c-1]+blue_channel[r, c+1])
+	_fill_last_row_and_columns(blue_channel)
 
-	# edge aware interpolation second green
-	for i in range(H//2):
-		for j in range(W//2):
-			r = i*2
-			c = j*2+1
-			# skip those rows and cols
-			if r >= H-1 or c >= W-1:
-				continue
-			
-			delta_h = np.abs(blue_channel[r, c-1] - blue_channel[r, c+1])
-			delta_v = np.abs(blue_channel[r-1, c] - blue_channel[r+1, c])
-
-			if delta_h > delta_v:
-				blue_channel[r, c] = 1/2*(blue_channel[r-1, c]+blue_channel[r+1, c])
-			else:
-				blue_channel[r, c] = 1/2*(blue_channel[r, c-1]+blue_channel[r, c+1])
-
-	# cv2.imshow("blue_channel", blue_channel/np.max(blue_channel))
-	# cv2.waitKey(0)
-	# cv2.destroyAllWindows()
+	# edge aware interpolation first blue
+	_edge_aware_interpolate(blue_channel, 1, 0, skip_first = True)
+	# edge aware interpolation second blue
+	_edge_aware_interpolate(blue_channel, 0, 1, skip_first = False)
 
 	return blue_channel
 
@@ -311,6 +189,8 @@ def edge_aware_interpolation(bayer_img):
 	return rgb_img
 
 def opencv_demosaic(bayer_img):
+	import cv2
+
 	(H, W, _) = bayer_img.shape
 	raw_img = np.zeros((H*2, W*2))
 
@@ -324,6 +204,8 @@ def opencv_demosaic(bayer_img):
 	return bgr_img/np.max(bgr_img)
 
 def low_pass_chroma(img):
+	import cv2
+
 	restored_img = cv2.cvtColor(img, cv2.COLOR_BGR2YUV)
 
 	restored_img[:, :, 1] = cv2.medianBlur(restored_img[:, :, 1], 5)
@@ -334,46 +216,29 @@ def low_pass_chroma(img):
 	return restored_img
 
 def edge_aware_demosaic(raw_img, metadata):
-
-	raw_img = tf.expand_dims(raw_img, axis=0)
 	bayer_img = process_only_gain(raw_img, metadata["red_gain"], metadata["blue_gain"])
 
-	bayer_img = bayer_img.numpy()
-
-	demosaic_img = edge_aware_interpolation(bayer_img[0])
-
-	demosaic_img = tf.expand_dims(tf.convert_to_tensor(demosaic_img, dtype=tf.float32), axis=0)
+	demosaic_img = edge_aware_interpolation(bayer_img)
 
 	restored_img = process_no_demosaic(demosaic_img, metadata["cam2rgb"])
 
-	restored_img = restored_img.numpy()[0]
-
 	restored_img = low_pass_chroma(restored_img)
 
 	return restored_img
 
 def luminance_based_demosaic(raw_img, metadata):
-	raw_img = tf.expand_dims(raw_img, axis=0)
 	bayer_img = process_only_gain(raw_img, metadata["red_gain"], metadata["blue_gain"])
 
-	bayer_img = bayer_img.numpy()[0]
 	demosaic_img = lumin_based_interpolation(bayer_img)
 
-	demosaic_img = tf.expand_dims(tf.convert_to_tensor(demosaic_img, dtype=tf.float32), axis=0)
-
 	restored_img = process_no_demosaic(demosaic_img, metadata["cam2rgb"])
 
-	restored_img = restored_img.numpy()[0]
-
 	restored_img = low_pass_chroma(restored_img)
 	return restored_img
 
 def chroma_filter_demosaic(raw_img, metadata):
-	raw_img = tf.expand_dims(raw_img, axis=0)
 	restored_img = process(raw_img, metadata["red_gain"], metadata["blue_gain"], metadata["cam2rgb"])
 
-	restored_img = restored_img.numpy()[0]
-
 	restored_img = low_pass_chroma(restored_img)
 
 	return restored_img
@@ -0,0 +1,179 @@
+# coding=utf-8
+# Copyright 2019 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Forward processing of raw data to sRGB images, in NumPy.
+
+The NumPy counterpart of `forward_process.py`, with the same functions and
+semantics but without TensorFlow. Every function takes a single image or a
+batch of images with a leading batch axis, and the gains and color correction
+matrices are either shared by the batch or given for each image, e.g., the
+metadata of a batched `numpy_reverse_process.unprocess`.
+
+Unprocessing Images for Learned Raw Denoising
+http://timothybrooks.com/tech/unprocessing
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+def _per_image(param, num_trailing_axes, num_broadcast_axes):
+  """Reshapes a parameter given for each image in a batch, e.g., gains of shape
+  (N,), to broadcast against the images. A shared parameter is kept as is."""
+  param = np.asarray(param, dtype=np.float32)
+  if param.ndim == num_trailing_axes:
+    return param
+  batch_shape = param.shape[:param.ndim - num_trailing_axes]
+  return param.reshape(batch_shape + (1,) * num_broadcast_axes + param.shape[len(batch_shape):])
+
+
+def apply_smoothstep(images):
+  """Approximately apply a global tone mapping curve."""
+  return 3*images**2 - 2*images**3
+
+
+def apply_gains(bayer_images, red_gains, blue_gains):
+  """Applies white balance gains to a batch of Bayer images."""
+  bayer_images = np.asarray(bayer_images, dtype=np.float32)
+  # (N,) gains are reshaped to (N, 1, 1), and stacked to (N, 1, 1, 4).
+  red_gains = _per_image(red_gains, 0, 2)
+  blue_gains = _per_image(blue_gains, 0, 2)
+  green_gains = np.ones_like(red_gains)
+  gains = np.stack([red_gains, green_gains, green_gains, blue_gains], axis=-1)
+  return bayer_images * gains
+
+
+def _upsample_bilinear(images):
+  """Upsamples (..., H, W, C) images by 2x, as tf.compat.v1.image.resize_bilinear
+  without aligned corners or half-pixel centers."""
+  def upsample(images, axis):
+    size = images.shape[axis]
+    # output pixel 2i is at input pixel i, and 2i + 1 is halfway to the next one.
+    lower = np.repeat(images, 2, axis=axis)
+    upper = np.take(images, np.minimum(np.arange(size) + 1, size - 1), axis=axis)
+    upper = np.repeat(upper, 2, axis=axis)
+    lerp = np.tile(np.array([0., 0.5], dtype=images.dtype), size)
+    lerp = lerp.reshape((-1,) + (1,) * (images.ndim - 1 - (axis % images.ndim)))
+    return lower + (upper - lower) * lerp
+
+  return upsample(upsample(images, -2), -3)
+
+
+def _space_to_depth(images):
+  """tf.nn.space_to_depth with a block size of 2 on (..., H, W, C) images."""
+  shape = images.shape
+  images = images.reshape(shape[:-3] + (shape[-3] // 2, 2, shape[-2] // 2, 2, shape[-1]))
+  images = np.moveaxis(images, -4, -3)
+  return images.reshape(shape[:-3] + (shape[-3] // 2, shape[-2] // 2, 4 * shape[-1]))
+
+
+def _depth_to_space(images):
+  """tf.nn.depth_to_space with a block size of 2 on (..., H, W, 4C) images."""
+  shape = images.shape
+  images = images.reshape(shape[:-3] + (shape[-3], shape[-2], 2, 2, shape[-1] // 4))
+  images = np.moveaxis(images, -3, -4)
+  return images.reshape(shape[:-3] + (shape[-3] * 2, shape[-2] * 2, shape[-1] // 4))
+
+
+def demosaic(bayer_images):
+  """Bilinearly demosaics a batch of RGGB Bayer images."""
+  bayer_images = np.asarray(bayer_images)
+  if bayer_images.shape[-1] != 4:
+    raise ValueError('Bayer images need to have 4 channels, got %s.' % (bayer_images.shape,))
+
+  # This implementation exploits how edges are aligned when upsampling with
+  # tf.image.resize_bilinear().
+  flip_lr = lambda x: np.flip(x, axis=-2)
+  flip_ud = lambda x: np.flip(x, axis=-3)
+
+  red = bayer_images[Ellipsis, 0:1]
+  red = _upsample_bilinear(red)
+
+  green_red = bayer_images[Ellipsis, 1:2]
+  green_red = flip_lr(_upsample_bilinear(flip_lr(green_red)))
+  green_red = _space_to_depth(green_red)
+
+  green_blue = bayer_images[Ellipsis, 2:3]
+  green_blue = flip_ud(_upsample_bilinear(flip_ud(green_blue)))
+  green_blue = _space_to_depth(green_blue)
+
+  green_at_red = (green_red[Ellipsis, 0] + green_blue[Ellipsis, 0]) / 2
+  green_at_green_red = green_red[Ellipsis, 1]
+  green_at_green_blue = green_blue[Ellipsis, 2]
+  green_at_blue = (green_red[Ellipsis, 3] + green_blue[Ellipsis, 3]) / 2
+
+  green_planes = [
+      green_at_red, green_at_green_red, green_at_green_blue, green_at_blue
+  ]
+  green = _depth_to_space(np.stack(green_planes, axis=-1))
+
+  blue = bayer_images[Ellipsis, 3:4]
+  blue = flip_ud(flip_lr(_upsample_bilinear(flip_ud(flip_lr(blue)))))
+
+  rgb_images = np.concatenate([red, green, blue], axis=-1)
+  return rgb_images
+
+
+def apply_ccms(images, ccms):
+  """Applies color correction matrices."""
+  images = np.asarray(images, dtype=np.float32)
+  # (N, 3, 3) matrices are reshaped to (N, 1, 3, 3) to broadcast over rows.
+  ccms = _per_image(ccms, 2, 1)
+  # out[..., i] = sum_j images[..., j] * ccms[i, j]
+  return np.matmul(images, np.swapaxes(ccms, -1, -2))
+
+
+def gamma_compression(images, gamma=2.2):
+  """Converts from linear to gamma space."""
+  # Clamps to prevent numerical instability of gradients near zero.
+  return np.maximum(images, 1e-8) ** (1.0 / gamma)
+
+
+def process(bayer_images, red_gains, blue_gains, cam2rgbs):
+  """Processes a batch of Bayer RGGB images into sRGB images."""
+  # White balance.
+  bayer_images = apply_gains(bayer_images, red_gains, blue_gains)
+  # Demosaic.
+  bayer_images = np.clip(bayer_images, 0.0, 1.0)
+  images = demosaic(bayer_images)
+  # Color correction.
+  images = apply_ccms(images, cam2rgbs)
+  # Gamma compression.
+  images = np.clip(images, 0.0, 1.0)
+  images = gamma_compression(images)
+  images = np.clip(images, 0.0, 1.0)
+  images = apply_smoothstep(images)
+  return images
+
+
+def process_only_gain(images, red_gains, blue_gains):
+  """Processes a batch of Bayer RGGB images into sRGB images."""
+  # White balance.
+  bayer_images = apply_gains(images, red_gains, blue_gains)
+  return bayer_images
+
+
+def process_no_demosaic(images, cam2rgbs):
+  """Processes a batch of Bayer RGGB images into sRGB images."""
+  # Color correction.
+  images = apply_ccms(images, cam2rgbs)
+  # Gamma compression.
+  images = np.clip(images, 0.0, 1.0)
+  images = gamma_compression(images)
+
+  return images
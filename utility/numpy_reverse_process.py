@@ -0,0 +1,190 @@
+# coding=utf-8
+# Copyright 2019 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unprocesses sRGB images into realistic raw data, in NumPy.
+
+The NumPy counterpart of `reverse_process.py`, with the same functions and
+semantics but without TensorFlow. Every function takes a single image or a
+batch of images with a leading batch axis. Random functions take an `rng`,
+a `np.random.Generator` or a seed, so the metadata is reproducible, and a
+batch gets independent metadata for each image.
+
+Unprocessing Images for Learned Raw Denoising
+http://timothybrooks.com/tech/unprocessing
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from numpy_forward_process import apply_ccms as _apply_ccms
+
+
+def _generator(rng):
+  """Returns `rng` if it is a generator, or a new generator seeded by `rng`."""
+  if isinstance(rng, np.random.Generator):
+    return rng
+  return np.random.default_rng(rng)
+
+
+def random_ccm(rng=None, size=()):
+  """Generates random RGB -> Camera color correction matrices."""
+  rng = _generator(rng)
+  # Takes a random convex combination of XYZ -> Camera CCMs.
+  xyz2cams = np.array([[[1.0234, -0.2969, -0.2266],
+                 [-0.5625, 1.6328, -0.0469],
+                 [-0.0703, 0.2188, 0.6406]],
+                [[0.4913, -0.0541, -0.0202],
+                 [-0.613, 1.3513, 0.2906],
+                 [-0.1564, 0.2151, 0.7183]],
+                [[0.838, -0.263, -0.0639],
+                 [-0.2887, 1.0725, 0.2496],
+                 [-0.0627, 0.1427, 0.5438]],
+                [[0.6596, -0.2079, -0.0562],
+                 [-0.4782, 1.3016, 0.1933],
+                 [-0.097, 0.1581, 0.5181]]], dtype=np.float32)
+  num_ccms = len(xyz2cams)
+  size = (size,) if np.isscalar(size) else tuple(size)
+  weights = rng.uniform(1e-8, 1e8, size=size + (num_ccms, 1, 1)).astype(np.float32)
+  weights_sum = np.sum(weights, axis=-3)
+  xyz2cam = np.sum(xyz2cams * weights, axis=-3) / weights_sum
+
+  # Multiplies with RGB -> XYZ to get RGB -> Camera CCM.
+  rgb2xyz = np.array([[0.4124564, 0.3575761, 0.1804375],
+                      [0.2126729, 0.7151522, 0.0721750],
+                      [0.0193339, 0.1191920, 0.9503041]], dtype=np.float32)
+  rgb2cam = np.matmul(xyz2cam, rgb2xyz)
+
+  # Normalizes each row.
+  rgb2cam = rgb2cam / np.sum(rgb2cam, axis=-1, keepdims=True)
+  return rgb2cam
+
+
+def random_gains(rng=None, size=()):
+  """Generates random gains for brightening and white balance."""
+  rng = _generator(rng)
+  # RGB gain represents brightening.
+  rgb_gain = np.float32(1.0) / rng.normal(0.8, 0.1, size=size).astype(np.float32)
+
+  # Red and blue gains represent white balance.
+  red_gain = rng.uniform(1.9, 2.4, size=size).astype(np.float32)
+  blue_gain = rng.uniform(1.5, 1.9, size=size).astype(np.float32)
+  return rgb_gain, red_gain, blue_gain
+
+
+def inverse_smoothstep(image):
+  """Approximately inverts a global tone mapping curve."""
+  image = np.clip(image, 0.0, 1.0)
+  return 0.5 - np.sin(np.arcsin(1.0 - 2.0 * image) / 3.0)
+
+
+def gamma_expansion(image):
+  """Converts from gamma to linear space."""
+  # Clamps to prevent numerical instability of gradients near zero.
+  return np.maximum(image, 1e-8) ** 2.2
+
+
+def apply_ccm(image, ccm):
+  """Applies a color correction matrix."""
+  return _apply_ccms(image, ccm)
+
+
+def safe_invert_gains(image, rgb_gain, red_gain, blue_gain):
+  """Inverts gains while safely handling saturated pixels."""
+  rgb_gain, red_gain, blue_gain = (np.asarray(g, dtype=np.float32) for g in (rgb_gain, red_gain, blue_gain))
+  gains = np.stack([1.0 / red_gain, np.ones_like(red_gain), 1.0 / blue_gain], axis=-1) / rgb_gain[..., np.newaxis]
+  # (3,) gains are shared, (N, 3) gains are given for each image.
+  gains = gains.reshape(gains.shape[:-1] + (1, 1, 3))
+
+  # Prevents dimming of saturated pixels by smoothly masking gains near white.
+  gray = np.mean(image, axis=-1, keepdims=True)
+  inflection = 0.9
+  mask = (np.maximum(gray - inflection, 0.0) / (1.0 - inflection)) ** 2.0
+  safe_gains = np.maximum(mask + (1.0 - mask) * gains, gains)
+  return image * safe_gains
+
+
+def mosaic(image):
+  """Extracts RGGB Bayer planes from an RGB image."""
+  if image.shape[-1] != 3:
+    raise ValueError('Images need to have 3 channels, got %s.' % (image.shape,))
+  red = image[Ellipsis, 0::2, 0::2, 0]
+  green_red = image[Ellipsis, 0::2, 1::2, 1]
+  green_blue = image[Ellipsis, 1::2, 0::2, 1]
+  blue = image[Ellipsis, 1::2, 1::2, 2]
+  return np.stack((red, green_red, green_blue, blue), axis=-1)
+
+
+def unprocess(image, rng=None):
+  """Unprocesses an image from sRGB to realistic raw data.
+
+  `image` is an (H, W, 3) image or a batch of (N, H, W, 3) images, each image
+  of a batch gets its own random metadata.
+  """
+  image = np.asarray(image, dtype=np.float32)
+  if image.ndim not in (3, 4) or image.shape[-1] != 3:
+    raise ValueError('Images need to be in (H, W, 3) or (N, H, W, 3) shape, got %s.' % (image.shape,))
+  rng = _generator(rng)
+  size = image.shape[:-3]
+
+  # Randomly creates image metadata.
+  rgb2cam = random_ccm(rng, size)
+  cam2rgb = np.linalg.inv(rgb2cam)
+  rgb_gain, red_gain, blue_gain = random_gains(rng, size)
+
+  # Approximately inverts global tone mapping.
+  image = inverse_smoothstep(image)
+  # Inverts gamma compression.
+  image = gamma_expansion(image)
+  # Inverts color correction.
+  image = apply_ccm(image, rgb2cam)
+  # Approximately inverts white balance and brightening.
+  image = safe_invert_gains(image, rgb_gain, red_gain, blue_gain)
+  # Clips saturated pixels.
+  image = np.clip(image, 0.0, 1.0)
+  # Applies a Bayer mosaic.
+  image = mosaic(image)
+
+  metadata = {
+      'cam2rgb': cam2rgb,
+      'rgb_gain': rgb_gain,
+      'red_gain': red_gain,
+      'blue_gain': blue_gain,
+  }
+  return image, metadata
+
+
+def random_noise_levels(rng=None, size=()):
+  """Generates random noise levels from a log-log linear distribution."""
+  rng = _generator(rng)
+  log_min_shot_noise = np.log(0.0001)
+  log_max_shot_noise = np.log(0.012)
+  log_shot_noise = rng.uniform(log_min_shot_noise, log_max_shot_noise, size=size)
+  shot_noise = np.exp(log_shot_noise)
+
+  line = lambda x: 2.18 * x + 1.20
+  log_read_noise = line(log_shot_noise) + rng.normal(0.0, 0.26, size=size)
+  read_noise = np.exp(log_read_noise)
+  return shot_noise, read_noise
+
+
+def add_noise(image, shot_noise=0.01, read_noise=0.0005, rng=None):
+  """Adds random shot (proportional to image) and read (independent) noise."""
+  rng = _generator(rng)
+  variance = image * shot_noise + read_noise
+  noise = rng.normal(size=np.shape(image)) * np.sqrt(variance)
+  return image + noise
@@ -0,0 +1,75 @@
+"""Prepare a sharded dataset of raw electron maps from a directory of RGB images.
+
+Each image goes through the inverse ISP (`numpy_reverse_process.unprocess`) into an RGGB
+Bayer image, which is laid out as a (H, W, 1) raw image and scaled to electrons by the full
+well capacity. The shards are read back with `camj.general.dataset.ShardedDataset`.
+
+Usage:
+    python prepare_dataset.py --image_dir ../test_imgs --output_dir ../test_data --full_well_capacity 10000 --seed 0
+"""
+import os
+import sys
+# setting path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import functools
+import numpy as np
+
+from numpy_reverse_process import unprocess
+from camj.general.dataset import prepare_dataset
+
+
+def unprocess_image(image, index, seed = None):
+    # each image gets its own metadata, seeded by the image index so the dataset doesn't
+    # depend on the number of workers.
+    rng = None if seed is None else (seed, index)
+    # trim the image to be multiple of 2
+    (H, W, _) = image.shape
+    image = image[:(H//2)*2, :(W//2)*2, :]
+    bayer_img, _ = unprocess(image / 255., rng = rng)
+    (H, W, _) = bayer_img.shape
+    raw_img = np.zeros((H*2, W*2, 1), dtype = bayer_img.dtype)
+    raw_img[0::2, 0::2, 0] = bayer_img[:, :, 0]
+    raw_img[0::2, 1::2, 0] = bayer_img[:, :, 1]
+    raw_img[1::2, 0::2, 0] = bayer_img[:, :, 2]
+    raw_img[1::2, 1::2, 0] = bayer_img[:, :, 3]
+    return raw_img
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image_dir", required = True, help = "directory of RGB images.")
+    parser.add_argument("--output_dir", required = True, help = "directory of the shards and the index.")
+    parser.add_argument("--full_well_capacity", type = float, default = 10000.)
+    parser.add_argument("--height", type = int, default = None, help = "images are center cropped to this height.")
+    parser.add_argument("--width", type = int, default = None, help = "images are center cropped to this width.")
+    parser.add_argument("--shard_size", type = int, default = 256)
+    parser.add_argument("--seed", type = int, default = None, help = "seed of the inverse ISP metadata.")
+    parser.add_argument("--workers", type = int, default = None, help = "number of worker processes.")
+    parser.add_argument("--no_inverse_isp", action = "store_true", help = "convert grayscale images without the inverse ISP.")
+    args = parser.parse_args()
+
+    size = None
+    if args.height is not None or args.width is not None:
+        if args.height is None or args.width is None:
+            raise Exception("Both --height and --width need to be given.")
+        size = (args.height, args.width)
+
+    dataset = prepare_dataset(
+        args.image_dir,
+        args.output_dir,
+        full_well_capacity = args.full_well_capacity,
+        size = size,
+        convert = None if args.no_inverse_isp else functools.partial(unprocess_image, seed = args.seed),
+        grayscale = args.no_inverse_isp,
+        shard_size = args.shard_size,
+        num_workers = args.workers
+    )
+    print("prepared %d images of shape %s in %d shards in %s" % (
+        len(dataset), dataset.shape, len(dataset.shard_paths), args.output_dir
+    ))
+
+
+if __name__ == '__main__':
+    main()